@@ -0,0 +1,66 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from app.utils.enums.history_type import HistoryType
+from app.utils.enums.time_bucket import TimeBucket
+from app.services.analytics_service import get_log_counts
+from app.controllers.dependencies import get_current_user
+
+# Definir el router
+router = APIRouter()
+
+# Modelo para la respuesta de conteos agregados
+class LogCountsResponse(BaseModel):
+    status: str
+    bucket: str
+    start_date: datetime
+    end_date: datetime
+    data: list
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "status": "success",
+                "bucket": "hour",
+                "start_date": "2024-11-22T00:00:00",
+                "end_date": "2024-11-29T09:00:00",
+                "data": [
+                    {
+                        "bucket": "2024-11-29T08:00:00",
+                        "level": "IA",
+                        "log_type": "ERROR",
+                        "count": 12
+                    }
+                ]
+            }
+        }
+
+# Controlador para obtener conteos de logs agrupados por tiempo, nivel y log_type
+@router.get("/analytics/logs", tags=["Historial de Documentos"], summary="Obtener conteos de logs por bucket de tiempo", response_model=LogCountsResponse)
+async def get_log_counts_data(
+    bucket: TimeBucket = Query(TimeBucket.HOUR, description="minute, hour o day"),
+    type: Optional[HistoryType] = None,
+    log_type: Optional[str] = None,
+    start_date: Optional[datetime] = Query(None, description="Fecha de inicio en formato YYYY-MM-DDTHH:MM:SS"),
+    end_date: Optional[datetime] = Query(None, description="Fecha de fin en formato YYYY-MM-DDTHH:MM:SS"),
+    payload: dict = Depends(get_current_user)
+):
+    """
+    Endpoint para contar los logs agrupados por bucket de tiempo, nivel y log_type.
+    El rango se alinea a los buckets; sin fecha de inicio se usa una ventana por defecto
+    (24 horas para minute, 7 días para hour y 90 días para day).
+    """
+    try:
+        result = await get_log_counts(bucket, type, log_type, start_date, end_date)
+        return {
+            "status": "success",
+            "bucket": result["bucket"],
+            "start_date": result["start_date"],
+            "end_date": result["end_date"],
+            "data": result["counts"]
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener los conteos de logs: {e}")
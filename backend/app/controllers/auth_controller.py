@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
 from app.services.auth_service import authenticate_user, refresh_access_token
@@ -23,11 +23,13 @@ class AuthResponse(BaseModel):
 
 # Controlador para manejar el login
 @router.post("/login", tags=["Autenticación"], summary="Login de usuario", description="Endpoint para manejar el login del usuario.", response_model=AuthResponse)
-async def login(user: UserLogin):
+async def login(user: UserLogin, request: Request):
     """
     Endpoint para manejar el login del usuario.
+    Los intentos se limitan por username y por IP; al excederse se responde 429.
     """
-    result = await authenticate_user(user.username, user.password)
+    client_ip = request.client.host if request.client else None
+    result = await authenticate_user(user.username, user.password, client_ip=client_ip)
     if not result:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
     
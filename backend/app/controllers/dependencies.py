@@ -0,0 +1,42 @@
+from typing import Optional
+from fastapi import Depends, HTTPException, Query
+from fastapi.security import OAuth2PasswordBearer
+from app.services.auth_service import verify_token, redeem_stream_ticket
+from app.services.log_service import store_log
+
+# Configurar OAuth2
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+# EventSource no permite enviar encabezados: en las transmisiones en vivo se acepta un ticket de un solo uso por query
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+
+
+# Dependencia para obtener el payload del token de la petición
+def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
+    return verify_token(token)
+
+
+# Dependencia para las rutas consumidas con EventSource (token por encabezado o ticket por query)
+def get_current_stream_user(
+    token: Optional[str] = Depends(oauth2_scheme_optional),
+    ticket: Optional[str] = Query(None, description="Ticket de POST /history/stream/ticket para clientes que no pueden enviar el encabezado Authorization (EventSource)")
+) -> dict:
+    if token:
+        return verify_token(token)
+    if ticket:
+        return redeem_stream_ticket(ticket)
+    raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+
+
+def require_role(*roles: str):
+    """
+    Crea una dependencia que exige que el usuario tenga uno de los roles indicados.
+
+    Uso:
+        payload: dict = Depends(require_role("admin"))
+    """
+    def dependency(payload: dict = Depends(get_current_user)) -> dict:
+        if payload.get("role") not in roles:
+            store_log("INTERACCION_USUARIO", f"Acceso denegado para {payload.get('sub')} con rol {payload.get('role')}", "ERROR")
+            raise HTTPException(status_code=403, detail="No tiene permisos para realizar esta acción.")
+        return payload
+    return dependency
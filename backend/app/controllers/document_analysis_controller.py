@@ -1,12 +1,20 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends
-from fastapi.security import OAuth2PasswordBearer
+import json
+from typing import List
+from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.services.document_analysis_service import analyze_document
+from app.services.document_analysis_service import (
+    ALLOWED_DOCUMENT_TYPES,
+    ANALYZE_BATCH_MAX_FILES,
+    analyze_document,
+    analyze_documents_batch
+)
 from app.services.log_service import store_log  # Importando la función para almacenar logs
-from app.services.auth_service import verify_token  # Importando la función para verificar el token
-
-# Configurar OAuth2
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+from app.controllers.dependencies import get_current_user
+from app.controllers.job_controller import JobResponse, enqueue_job
+from app.utils.enums.job_priority import JobPriority
+from app.utils.enums.job_type import JobType
 
 # Definir el router
 router = APIRouter()
@@ -35,26 +43,78 @@ class DocumentAnalysisResponse(BaseModel):
         }
 
 # Controlador para manejar la carga y análisis de documentos
-@router.post("/analyze-document", tags=["Análisis de Documentos"], summary="Cargar y analizar documento", description="Endpoint para cargar y analizar documentos PDF, JPG o PNG.", response_model=DocumentAnalysisResponse)
-async def upload_document(file: UploadFile = File(...), token: str = Depends(oauth2_scheme)):
+@router.post("/analyze-document", tags=["Análisis de Documentos"], summary="Cargar y analizar documento", description="Endpoint para cargar y analizar documentos PDF, JPG o PNG.", response_model=DocumentAnalysisResponse, responses={202: {"model": JobResponse, "description": "Trabajo encolado (background=true)"}})
+async def upload_document(
+    file: UploadFile = File(...),
+    payload: dict = Depends(get_current_user),
+    background: bool = Query(False, description="Procesar en segundo plano y responder 202 con el id del trabajo"),
+    priority: JobPriority = Query(JobPriority.NORMAL, description="Prioridad del trabajo en segundo plano"),
+):
     """
     Endpoint para manejar la carga y análisis de documentos.
+    Con `background=true` el documento se guarda y se analiza en la cola de trabajos; el
+    resultado se consulta en GET /jobs/{id}.
     """
     try:
-        # Verificar el token
-        payload = verify_token(token)
-        
         # Validar tipo de archivo
-        allowed_types = ["application/pdf", "image/jpeg", "image/png"]
-        if file.content_type not in allowed_types:
+        if file.content_type not in ALLOWED_DOCUMENT_TYPES:
             store_log("IA", f"Tipo de archivo no válido: {file.content_type}", "ERROR")
             raise HTTPException(status_code=400, detail="Tipo de archivo no permitido. Solo se permiten archivos PDF, JPG o PNG.")
 
+        if background:
+            params = {"filename": file.filename, "requested_by": payload.get("sub")}
+            return await enqueue_job(JobType.DOCUMENT_ANALYSIS, file.file, params, priority)
+
         # Procesar el documento
         result = await analyze_document(file)
         store_log("IA", f"{result['message']} ID: {result['id']}", "INFO")
         return {"status": "success", "data": result}
 
+    except HTTPException:
+        # Tipo de archivo no permitido o cola de trabajos llena
+        raise
     except Exception as e:
         store_log("IA", f"Error al analizar el documento: {str(e)}", "ERROR")
-        raise HTTPException(status_code=500, detail=f"Error al analizar el documento: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error al analizar el documento: {e}")
+
+
+async def _batch_result_stream(documents: List[tuple], username: str):
+    """Genera una línea NDJSON por archivo a medida que se analiza y el resumen final del lote."""
+    async for result in analyze_documents_batch(documents):
+        if result["status"] == "error":
+            store_log("IA", f"Error al analizar el documento {result['filename']}: {result['error']}", "ERROR")
+        elif result["status"] == "summary":
+            if result["committed"]:
+                store_log("IA", f"Lote de {result['total']} documentos de {username}: {result['analyzed']} almacenados, {result['failed']} con error", "INFO")
+            else:
+                store_log("IA", f"Error al guardar el lote de {result['total']} documentos: {result['error']}", "ERROR")
+        yield json.dumps(jsonable_encoder(result), ensure_ascii=False) + "\n"
+
+# Controlador para analizar varios documentos en una sola petición
+@router.post("/analyze-documents", tags=["Análisis de Documentos"], summary="Cargar y analizar varios documentos", description="Endpoint para analizar un lote de documentos PDF, JPG o PNG; responde en NDJSON.")
+async def upload_documents(
+    files: List[UploadFile] = File(...),
+    payload: dict = Depends(get_current_user),
+):
+    """
+    Endpoint para analizar un lote de documentos a la vez (hasta ANALYZE_BATCH_CONCURRENCY
+    simultáneos). La respuesta es NDJSON: una línea por archivo apenas termina su análisis
+    (`status` analyzed o error, con su `index` en el lote) y al final una línea
+    `status: summary` con los IDs. Los documentos analizados se guardan todos juntos en una
+    sola transacción al terminar el lote; si esa inserción falla, el resumen tiene
+    `committed: false` y no se guarda ninguno.
+    """
+    if len(files) > ANALYZE_BATCH_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"Se permiten como máximo {ANALYZE_BATCH_MAX_FILES} archivos por lote.")
+
+    # Los archivos se leen aquí: FastAPI los cierra al terminar el endpoint, antes de que
+    # se genere la respuesta en streaming. Los de tipo no permitido no se leen
+    documents = [
+        (file.filename, file.content_type, await file.read() if file.content_type in ALLOWED_DOCUMENT_TYPES else b"")
+        for file in files
+    ]
+    return StreamingResponse(
+        _batch_result_stream(documents, payload.get("sub")),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}
+    )
@@ -1,14 +1,19 @@
+import asyncio
+import json
 from fastapi import APIRouter, HTTPException, Depends, Query
-from fastapi.security import OAuth2PasswordBearer
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
 from app.utils.enums.history_type import HistoryType
-from app.services.history_service import get_filtered_history
-from app.services.auth_service import verify_token
-
-# Configurar OAuth2
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+from app.utils.enums.count_mode import CountMode
+from app.utils.enums.export_format import ExportFormat
+from app.utils.export_writers import EXPORT_WRITERS
+from app.services.history_service import get_filtered_history, encode_cursor, export_filtered_history
+from app.controllers.dependencies import get_current_user, get_current_stream_user
+from app.services.auth_service import create_stream_ticket, STREAM_TICKET_TTL
+from app.services.log_stream_service import log_broadcaster, SubscriberLimitError, LOG_STREAM_KEEPALIVE
 
 # Definir el router
 router = APIRouter()
@@ -16,11 +21,14 @@ router = APIRouter()
 # Modelo para la respuesta de historial con paginación
 class HistoryResponse(BaseModel):
     status: str
-    total_records: int
-    total_pages: int
-    current_page: int
+    total_records: Optional[int] = None
+    total_pages: Optional[int] = None
+    current_page: Optional[int] = None
     page_size: int
     data: list
+    has_more: Optional[bool] = None
+    count_mode: Optional[str] = None
+    next_cursor: Optional[str] = None
 
     class Config:
         json_schema_extra = {
@@ -40,7 +48,10 @@ class HistoryResponse(BaseModel):
                         "fecha": "2024-11-29T08:42:58",
                         "total_factura": 200.0
                     }
-                ]
+                ],
+                "has_more": True,
+                "count_mode": "exact",
+                "next_cursor": "eyJ0IjoiMjAyNC0xMS0yOVQwODo0Mjo1OCIsImlkIjoxfQ"
             }
         }
 
@@ -53,16 +64,19 @@ async def get_filtered_history_data(
     end_date: Optional[datetime] = Query(None, description="Fecha de fin en formato YYYY-MM-DDTHH:MM:SS"),
     page: int = 1,
     page_size: int = 10,
-    token: str = Depends(oauth2_scheme)
+    cursor: Optional[str] = Query(None, description="Cursor devuelto como next_cursor; pagina por búsqueda en lugar de OFFSET"),
+    count_mode: CountMode = Query(CountMode.EXACT, description="exact (cacheado), estimated (estadísticas de la tabla) o none (solo has_more)"),
+    payload: dict = Depends(get_current_user)
 ):
     """
     Endpoint para obtener el historial de análisis de documentos con filtros opcionales y paginación.
     Los filtros incluyen tipo, descripción y rango de fechas.
     Si no se pasa ningún filtro, se obtienen todos los datos.
+    Cada respuesta incluye `next_cursor`; enviarlo como `cursor` obtiene la página siguiente
+    buscando directamente en el índice, sin importar cuán profunda sea la página.
+    El parámetro `count_mode` define cómo se calcula `total_records`.
     """
     try:
-        # Verificar el token
-        payload = verify_token(token)
         print(f"Start Date: {start_date}, End Date: {end_date}")
         # Obtener el historial filtrado y paginado
         history = await get_filtered_history(
@@ -71,17 +85,111 @@ async def get_filtered_history_data(
             start_date, 
             end_date, 
             page, 
-            page_size
+            page_size,
+            cursor,
+            count_mode
         )
+
+        # En paginación por OFFSET el cursor se arma con el último registro de la página
+        if cursor:
+            next_cursor = history.get('next_cursor')
+        else:
+            has_more = history['has_more']
+            next_cursor = encode_cursor(history['records'][-1]) if has_more and history['records'] else None
         
         # Retornar la respuesta con la paginación
         return {
             "status": "success",
             "total_records": history['total_records'],
             "total_pages": history['total_pages'],
-            "current_page": page,
+            "current_page": history['current_page'],
             "page_size": page_size,
-            "data": history['records']
+            "data": history['records'],
+            "has_more": history['has_more'],
+            "count_mode": history['count_mode'],
+            "next_cursor": next_cursor
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener el historial filtrado: {e}")
+
+# Controlador para exportar el historial completo en streaming
+@router.get("/history/export", tags=["Historial de Documentos"], summary="Exportar el historial filtrado en CSV, NDJSON o XLSX")
+async def export_history_data(
+    type: Optional[HistoryType] = None,
+    description: Optional[str] = None,
+    start_date: Optional[datetime] = Query(None, description="Fecha de inicio en formato YYYY-MM-DDTHH:MM:SS"),
+    end_date: Optional[datetime] = Query(None, description="Fecha de fin en formato YYYY-MM-DDTHH:MM:SS"),
+    format: ExportFormat = Query(ExportFormat.CSV, description="csv, ndjson o xlsx"),
+    payload: dict = Depends(get_current_user)
+):
+    """
+    Endpoint para exportar todos los registros que cumplen los filtros (los mismos de /history).
+    El archivo se envía en streaming a medida que se lee de la base de datos.
+    """
+    try:
+        stream = export_filtered_history(type, description, start_date, end_date, format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al obtener el historial filtrado: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error al exportar el historial: {e}")
+
+    _, media_type, extension = EXPORT_WRITERS[format.value]
+    return StreamingResponse(
+        stream,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="logs.{extension}"'}
+    )
+
+
+async def _log_event_stream(subscription):
+    """Genera los eventos SSE de una suscripción hasta que el cliente se desconecta."""
+    try:
+        while True:
+            try:
+                event = await subscription.get(LOG_STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                # Comentario SSE para mantener abierta la conexión
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                yield 'event: overflow\ndata: {"detail": "Cliente demasiado lento; vuelva a conectarse."}\n\n'
+                return
+            yield f"data: {json.dumps(jsonable_encoder(event), ensure_ascii=False)}\n\n"
+    finally:
+        log_broadcaster.unsubscribe(subscription)
+
+# Controlador para emitir el ticket de la transmisión en vivo
+@router.post("/history/stream/ticket", tags=["Historial de Documentos"], summary="Obtener un ticket de un solo uso para /history/stream")
+async def create_history_stream_ticket(payload: dict = Depends(get_current_user)):
+    """
+    Endpoint que entrega un ticket opaco de un solo uso, válido durante STREAM_TICKET_TTL
+    segundos, para abrir /history/stream con EventSource sin poner el JWT en la URL.
+    """
+    return {"ticket": create_stream_ticket(payload), "expires_in": STREAM_TICKET_TTL}
+
+# Controlador para recibir en vivo los logs registrados
+@router.get("/history/stream", tags=["Historial de Documentos"], summary="Recibir en vivo los nuevos logs (Server-Sent Events)")
+async def stream_history_data(
+    type: Optional[HistoryType] = None,
+    description: Optional[str] = None,
+    payload: dict = Depends(get_current_stream_user)
+):
+    """
+    Endpoint que envía como Server-Sent Events cada log que se registra y cumple los filtros
+    (tipo exacto y descripción contenida, sin distinguir mayúsculas). Los eventos se reparten
+    en memoria en cuanto el log se escribe (con su id), sin consultar la base de datos. Se
+    autentica con el encabezado Authorization o con `ticket`. Si el cliente no consume a
+    tiempo y su cola se llena, recibe un evento `overflow` y se cierra la conexión.
+    """
+    try:
+        subscription = log_broadcaster.subscribe(type.value if type else None, description)
+    except SubscriberLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return StreamingResponse(
+        _log_event_stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
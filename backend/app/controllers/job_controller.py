@@ -0,0 +1,82 @@
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from app.services.job_service import get_job, submit_job, job_submit_executor, JOB_RETRY_BACKOFF
+from app.controllers.dependencies import get_current_user
+from app.utils.job_queue import JobQueueFullError
+
+# Definir el router
+router = APIRouter()
+
+# Modelo para la respuesta del estado de un trabajo
+class JobResponse(BaseModel):
+    id: str
+    type: str
+    status: str
+    priority: str
+    attempts: int
+    max_attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    requested_by: Optional[str] = None
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "id": "3f2b9c1e8a4d4f6b9e0c7d5a1b2c3d4e",
+                "type": "upload",
+                "status": "succeeded",
+                "priority": "normal",
+                "attempts": 1,
+                "max_attempts": 3,
+                "created_at": "2024-11-29T08:00:00",
+                "started_at": "2024-11-29T08:00:01",
+                "finished_at": "2024-11-29T08:00:09",
+                "result": {
+                    "upload_result": {"message": "Archivo subido con éxito a bucket-name/files/file_upload/filename.csv"},
+                    "validation_results": []
+                },
+                "error": None,
+                "requested_by": "admin"
+            }
+        }
+
+async def enqueue_job(job_type, payload, params: dict, priority) -> JSONResponse:
+    """Encola el trabajo en el ejecutor de la cola (copia el archivo a disco fuera del event loop)."""
+    return await job_submit_executor.run(enqueue_job_response, job_type, payload, params, priority)
+
+def enqueue_job_response(job_type, payload, params: dict, priority) -> JSONResponse:
+    """
+    Encola el trabajo y arma la respuesta 202 con la ubicación de su estado.
+    Es bloqueante (copia el archivo a disco): desde un endpoint se usa `enqueue_job`.
+
+    Raises:
+        HTTPException: 503 con Retry-After si la cola está llena.
+    """
+    try:
+        job = submit_job(job_type, payload, params, priority)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(max(1, JOB_RETRY_BACKOFF)))})
+    return JSONResponse(
+        status_code=202,
+        content=jsonable_encoder(job),
+        headers={"Location": f"/jobs/{job['id']}"}
+    )
+
+# Controlador para consultar el estado de un trabajo en segundo plano
+@router.get("/jobs/{job_id}", tags=["Trabajos"], summary="Consultar el estado de un trabajo", response_model=JobResponse)
+async def get_job_status(job_id: str, payload: dict = Depends(get_current_user)):
+    """
+    Endpoint para consultar el estado y el resultado de un trabajo encolado con `background=true`.
+    Solo lo puede consultar quien lo solicitó o un administrador.
+    """
+    job = get_job(job_id)
+    if job is None or (job["requested_by"] != payload.get("sub") and payload.get("role") != "admin"):
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado.")
+    return job
@@ -0,0 +1,240 @@
+from fastapi import APIRouter, HTTPException, Depends
+from pydantic import BaseModel
+from app.db import get_pool_stats, get_db_executor_stats
+from app.controllers.dependencies import get_current_user
+from app.services.log_service import get_log_writer_stats
+from app.services.history_service import get_count_cache_stats
+from app.services.log_search_service import log_search_indexer
+from app.services.analytics_service import log_rollup_worker
+from app.services.log_stream_service import log_broadcaster
+from app.services.auth_service import get_token_cache_stats, get_login_stats
+from app.services.file_upload_service import get_s3_upload_stats, get_upload_executor_stats
+from app.services.job_service import get_job_stats
+from app.services.document_analysis_service import get_textract_cache_stats, get_textract_stats
+
+# Definir el router
+router = APIRouter()
+
+# Modelo para la respuesta de métricas
+class MetricsResponse(BaseModel):
+    db_pool: dict
+    db_executor: dict
+    log_writer: dict
+    history_count_cache: dict
+    log_search_index: dict
+    log_rollup: dict
+    log_stream: dict
+    auth_token_cache: dict
+    login: dict
+    upload_executor: dict
+    s3_upload: dict
+    jobs: dict
+    textract: dict
+    textract_cache: dict
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "db_pool": {
+                    "size": 4,
+                    "in_use": 1,
+                    "idle": 3,
+                    "waiters": 0,
+                    "min_size": 2,
+                    "max_size": 10,
+                    "checkouts": 120,
+                    "timeouts": 0,
+                    "created": 4,
+                    "recycled": 0,
+                    "failed_pings": 0,
+                    "wait_time_total_ms": 1.2,
+                    "wait_time_avg_ms": 0.01,
+                    "wait_time_max_ms": 0.4
+                },
+                "db_executor": {
+                    "max_concurrency": 10,
+                    "running": 1,
+                    "pending": 0,
+                    "completed": 118
+                },
+                "log_writer": {
+                    "running": True,
+                    "overflow_policy": "drop_oldest",
+                    "buffered": 3,
+                    "buffer_size": 10000,
+                    "queued": 540,
+                    "flushed": 537,
+                    "batches": 12,
+                    "dropped": 0,
+                    "spilled": 0,
+                    "diverted": 0,
+                    "failed": 0,
+                    "spool": {
+                        "fsync_policy": "interval",
+                        "db_unavailable": False,
+                        "segments": 0,
+                        "pending_bytes": 0,
+                        "spooled": 0,
+                        "replayed": 0,
+                        "replay_failures": 0,
+                        "corrupt_lines": 0
+                    }
+                },
+                "history_count_cache": {
+                    "size": 12,
+                    "max_size": 256,
+                    "hits": 310,
+                    "misses": 45,
+                    "hit_ratio": 0.8732,
+                    "evictions": 0,
+                    "invalidations": 30
+                },
+                "log_search_index": {
+                    "enabled": True,
+                    "running": True,
+                    "processed": 15230,
+                    "errors": 0
+                },
+                "log_rollup": {
+                    "enabled": True,
+                    "running": True,
+                    "processed": 15230,
+                    "errors": 0
+                },
+                "log_stream": {
+                    "subscribers": 2,
+                    "max_subscribers": 100,
+                    "queue_size": 1000,
+                    "published": 540,
+                    "delivered": 610,
+                    "disconnected_slow": 0
+                },
+                "auth_token_cache": {
+                    "verified": {
+                        "size": 35,
+                        "max_size": 10000,
+                        "hits": 4210,
+                        "misses": 52,
+                        "hit_ratio": 0.9878,
+                        "evictions": 0,
+                        "invalidations": 0
+                    },
+                    "rejected": {
+                        "size": 1,
+                        "max_size": 10000,
+                        "hits": 120,
+                        "misses": 52,
+                        "hit_ratio": 0.6977,
+                        "evictions": 0,
+                        "invalidations": 0
+                    }
+                },
+                "login": {
+                    "user_cache": {
+                        "size": 3,
+                        "max_size": 1000,
+                        "hits": 85,
+                        "misses": 9,
+                        "hit_ratio": 0.9043,
+                        "evictions": 0,
+                        "invalidations": 0
+                    },
+                    "user_lookups": {"in_flight": 0, "executed": 9, "coalesced": 14},
+                    "rate_limit": {
+                        "username": {"rate": 0.0833, "burst": 5, "keys": 4, "allowed": 94, "rejected": 37},
+                        "ip": {"rate": 0.5, "burst": 20, "keys": 2, "allowed": 94, "rejected": 0}
+                    }
+                },
+                "upload_executor": {
+                    "max_concurrency": 4,
+                    "running": 1,
+                    "pending": 0,
+                    "completed": 37
+                },
+                "s3_upload": {
+                    "in_flight": 1,
+                    "completed": 42,
+                    "failed": 0,
+                    "compensated": 1,
+                    "workers": 4,
+                    "max_concurrency": 10,
+                    "multipart_chunk_mb": 8.0,
+                    "max_pool_connections": 40
+                },
+                "jobs": {
+                    "workers": 2,
+                    "running": 2,
+                    "queued": 5,
+                    "queued_by_priority": {"high": 1, "normal": 4},
+                    "waiting_retry": 1,
+                    "submitting": 0,
+                    "max_queued": 100,
+                    "submitted": 230,
+                    "succeeded": 221,
+                    "failed": 1,
+                    "retried": 3,
+                    "wait_seconds": {"count": 230, "avg": 2.41, "p95": 9.8, "max": 31.2},
+                    "processing_seconds": {"count": 225, "avg": 6.7, "p95": 18.3, "max": 95.0},
+                    "submit_executor": {"max_concurrency": 4, "running": 0, "pending": 0, "completed": 230}
+                },
+                "textract": {
+                    "max_in_flight": 4,
+                    "in_flight": 4,
+                    "queued": 3,
+                    "max_queue": 20,
+                    "queue_timeout": 30.0,
+                    "admitted": 149,
+                    "rejected": 2,
+                    "timed_out": 0,
+                    "avg_wait_ms": 812.5,
+                    "avg_hold_ms": 2410.7,
+                    "executor": {"max_concurrency": 6, "running": 4, "pending": 0, "completed": 295},
+                    "async_jobs": {
+                        "jobs": 18,
+                        "failed": 0,
+                        "pages": 214,
+                        "status_calls": 97,
+                        "result_calls": 6,
+                        "avg_job_seconds": 14.82,
+                        "limiter": {"max_in_flight": 10, "in_flight": 2, "queued": 0, "max_queue": 20, "queue_timeout": 30.0, "admitted": 20, "rejected": 0, "timed_out": 0, "avg_wait_ms": 0.0, "avg_hold_ms": 14950.2},
+                        "executor": {"max_concurrency": 10, "running": 2, "pending": 0, "completed": 18}
+                    }
+                },
+                "textract_cache": {
+                    "enabled": True,
+                    "hits": 37,
+                    "misses": 112,
+                    "hit_ratio": 0.2483,
+                    "avg_textract_ms": 2350.4,
+                    "latency_saved_seconds": 86.965,
+                    "memory": {"size": 112, "max_size": 128, "hits": 30, "misses": 119, "hit_ratio": 0.2013, "evictions": 0, "invalidations": 0},
+                    "disk": {"entries": 112, "bytes": 9437184, "max_bytes": 536870912, "hits": 7, "misses": 112, "hit_ratio": 0.0588, "evictions": 0, "errors": 0}
+                }
+            }
+        }
+
+# Controlador para consultar las métricas internas de la aplicación
+@router.get("/metrics", tags=["Métricas"], summary="Obtener métricas de la aplicación", response_model=MetricsResponse)
+async def get_metrics(payload: dict = Depends(get_current_user)):
+    """
+    Endpoint para consultar las métricas internas (pool de conexiones, ejecutor de la base de datos, escritor de logs, cachés, subidas a S3, cola de trabajos, Textract y su caché).
+    """
+    try:
+        return {
+            "db_pool": get_pool_stats(),
+            "db_executor": get_db_executor_stats(),
+            "log_writer": get_log_writer_stats(),
+            "history_count_cache": get_count_cache_stats(),
+            "log_search_index": log_search_indexer.stats(),
+            "log_rollup": log_rollup_worker.stats(),
+            "log_stream": log_broadcaster.stats(),
+            "auth_token_cache": get_token_cache_stats(),
+            "login": get_login_stats(),
+            "upload_executor": get_upload_executor_stats(),
+            "s3_upload": get_s3_upload_stats(),
+            "jobs": get_job_stats(),
+            "textract": get_textract_stats(),
+            "textract_cache": get_textract_cache_stats()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener las métricas: {e}")
@@ -1,16 +1,17 @@
-from fastapi import APIRouter, HTTPException, Depends, File, UploadFile
-from fastapi.security import OAuth2PasswordBearer
+from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Query
 from pydantic import BaseModel
-from app.services.file_upload_service import handle_file_upload
-from app.services.auth_service import verify_token
+from app.services.file_upload_service import handle_file_upload, handle_file_upload_stream, upload_executor, UPLOAD_STREAM_THRESHOLD_MB, UPLOAD_PARSER_ENGINE
+from app.services.upload_dedup_service import UPLOAD_SKIP_EXISTING_ROWS
+from app.controllers.dependencies import require_role
+from app.controllers.job_controller import JobResponse, enqueue_job
+from app.utils.enums.job_priority import JobPriority
+from app.utils.enums.job_type import JobType
+from app.utils.enums.parser_engine import ParserEngine
 from app.services.log_service import store_log
 
 # Definir el router
 router = APIRouter()
 
-# Configurar OAuth2PasswordBearer
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
-
 # Modelo para la respuesta de subida de archivo
 class UploadResponse(BaseModel):
     upload_result: dict
@@ -25,25 +26,43 @@ class UploadResponse(BaseModel):
         }
 
 # Controlador para manejar la subida de archivos
-@router.post("/upload", tags=["Archivos"], summary="Subida de archivo", description="Endpoint para subir archivos CSV.", response_model=UploadResponse)
+@router.post("/upload", tags=["Archivos"], summary="Subida de archivo", description="Endpoint para subir archivos CSV (también comprimidos con gzip o zstd) o Parquet.", response_model=UploadResponse, responses={202: {"model": JobResponse, "description": "Trabajo encolado (background=true)"}})
 async def upload_file(
     file: UploadFile = File(...),
-    token: str = Depends(oauth2_scheme),
+    payload: dict = Depends(require_role("admin")),
     param1: str = None,
     param2: str = None,
+    background: bool = Query(False, description="Procesar en segundo plano y responder 202 con el id del trabajo"),
+    priority: JobPriority = Query(JobPriority.NORMAL, description="Prioridad del trabajo en segundo plano"),
+    skip_existing_rows: bool = Query(UPLOAD_SKIP_EXISTING_ROWS, description="Insertar solo las filas que aún no están cargadas"),
+    engine: ParserEngine = Query(ParserEngine(UPLOAD_PARSER_ENGINE), description="Motor de lectura: auto, pandas o pyarrow"),
 ):
     """
-    Endpoint para subir archivos CSV.
+    Endpoint para subir archivos CSV (.csv, .csv.gz, .csv.zst) o Parquet (.parquet).
+    Con el motor pyarrow el archivo se lee con varios hilos directamente desde los bytes
+    recibidos y las columnas pasan a la carga masiva sin convertirse a pandas.
+    Los archivos mayores a UPLOAD_STREAM_THRESHOLD_MB (o de tamaño desconocido) se procesan
+    por bloques desde el archivo temporal de la subida, sin cargarlos completos en memoria.
+    Con `background=true` el archivo se guarda y se procesa en la cola de trabajos; el
+    resultado se consulta en GET /jobs/{id}.
+    Si UPLOAD_DEDUP_ENABLED está activo, un archivo con el mismo contenido que una carga
+    anterior no se vuelve a procesar: la respuesta indica la carga original en `duplicate_of`.
     """
     try:
-        payload = verify_token(token)
-        role = payload.get("role")
-        
-        if role != "admin":
-            raise HTTPException(status_code=403, detail="No tiene permisos para realizar esta acción.")
-        
-        contents = await file.read()
-        result = handle_file_upload(contents, file.filename, param1, param2)
+        if background:
+            params = {"filename": file.filename, "param1": param1, "param2": param2, "skip_existing_rows": skip_existing_rows, "engine": engine.value, "requested_by": payload.get("sub")}
+            return await enqueue_job(JobType.UPLOAD, file.file, params, priority)
+
+        # Validación, inserción y subida a S3 se ejecutan fuera del event loop, en el ejecutor de
+        # subidas: los hilos de run_db quedan para las consultas (el pool limita las inserciones)
+        if file.size is None or file.size > UPLOAD_STREAM_THRESHOLD_MB * 1024 * 1024:
+            result = await upload_executor.run(
+                handle_file_upload_stream, file.file, file.filename, param1, param2,
+                skip_existing_rows=skip_existing_rows, engine=engine.value
+            )
+        else:
+            contents = await file.read()
+            result = await upload_executor.run(handle_file_upload, contents, file.filename, param1, param2, skip_existing_rows, engine.value)
         
         return result
     except HTTPException as e:
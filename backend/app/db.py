@@ -1,10 +1,30 @@
 import pyodbc
+import asyncio
+import functools
 import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def get_db_connection():
+# Configuración del pool de conexiones
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # Segundos de espera máxima al pedir una conexión
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))  # Segundos antes de reciclar una conexión
+DB_POOL_PING_AFTER = float(os.getenv("DB_POOL_PING_AFTER", "30"))  # Segundos de inactividad antes de validar la conexión
+
+# Máximo de operaciones de base de datos ejecutándose a la vez desde los endpoints async
+DB_MAX_CONCURRENCY = int(os.getenv("DB_MAX_CONCURRENCY", str(DB_POOL_MAX_SIZE)))
+
+
+def create_raw_connection():
+    """
+    Abre una conexión nueva contra SQL Server (TCP + TLS + login).
+    """
     connection = pyodbc.connect(
         f"DRIVER={{ODBC Driver 17 for SQL Server}};"
         f"SERVER={os.getenv('DB_HOST')},{os.getenv('DB_PORT')};"
@@ -12,4 +32,382 @@ def get_db_connection():
         f"UID={os.getenv('DB_USERNAME')};"
         f"PWD={os.getenv('DB_PASSWORD')}"
     )
-    return connection
\ No newline at end of file
+    return connection
+
+
+class PoolTimeoutError(Exception):
+    """Se lanza cuando no hay conexiones disponibles dentro del tiempo de espera."""
+
+
+class _PoolEntry:
+    """Conexión física administrada por el pool junto con sus tiempos de vida."""
+
+    __slots__ = ("connection", "created_at", "last_used_at")
+
+    def __init__(self, connection):
+        now = time.monotonic()
+        self.connection = connection
+        self.created_at = now
+        self.last_used_at = now
+
+
+class PooledConnection:
+    """
+    Envoltorio de una conexión del pool. Expone la misma interfaz que la conexión
+    de pyodbc, pero `close()` devuelve la conexión al pool en lugar de cerrarla.
+    """
+
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+
+    def __getattr__(self, name):
+        if self._entry is None:
+            raise pyodbc.Error("La conexión ya fue devuelta al pool.")
+        return getattr(self._entry.connection, name)
+
+    def cursor(self):
+        return self.__getattr__("cursor")()
+
+    def commit(self):
+        return self.__getattr__("commit")()
+
+    def rollback(self):
+        return self.__getattr__("rollback")()
+
+    def invalidate(self):
+        """Descarta la conexión física (por ejemplo, tras un error de red)."""
+        if self._entry is not None:
+            entry, self._entry = self._entry, None
+            self._pool._release(entry, discard=True)
+
+    def close(self):
+        if self._entry is not None:
+            entry, self._entry = self._entry, None
+            self._pool._release(entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones a SQL Server con tamaño mínimo/máximo, precalentamiento,
+    validación al entregar, reciclaje por tiempo de vida y tiempo de espera máximo.
+    """
+
+    def __init__(
+        self,
+        connection_factory=create_raw_connection,
+        min_size: int = DB_POOL_MIN_SIZE,
+        max_size: int = DB_POOL_MAX_SIZE,
+        timeout: float = DB_POOL_TIMEOUT,
+        max_lifetime: float = DB_POOL_MAX_LIFETIME,
+        ping_after: float = DB_POOL_PING_AFTER,
+    ):
+        if max_size < 1:
+            raise ValueError("El tamaño máximo del pool debe ser mayor o igual a 1.")
+        self._factory = connection_factory
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_after = ping_after
+
+        self._idle = deque()
+        self._size = 0  # Conexiones físicas abiertas (ociosas + en uso + en apertura)
+        self._in_use = 0
+        self._waiters = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+        # Estadísticas acumuladas
+        self._checkouts = 0
+        self._timeouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._failed_pings = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+    # === Ciclo de vida ===
+
+    def warm_up(self):
+        """Abre conexiones hasta alcanzar el tamaño mínimo configurado."""
+        with self._condition:
+            self._closed = False
+            missing = self.min_size - self._size
+            self._size += max(missing, 0)
+        for opened in range(max(missing, 0)):
+            try:
+                entry = _PoolEntry(self._factory())
+            except Exception:
+                # Se liberan todos los lugares reservados que no llegaron a abrirse
+                with self._condition:
+                    self._size -= missing - opened
+                    self._condition.notify_all()
+                raise
+            with self._condition:
+                self._created += 1
+                self._idle.append(entry)
+                self._condition.notify()
+
+    def close(self):
+        """Cierra todas las conexiones ociosas; las que están en uso se cierran al devolverse."""
+        with self._condition:
+            self._closed = True
+            entries = list(self._idle)
+            self._idle.clear()
+            self._size -= len(entries)
+            self._condition.notify_all()
+        for entry in entries:
+            self._close_entry(entry)
+
+    # === Entrega y devolución ===
+
+    def get_connection(self, timeout: float = None) -> PooledConnection:
+        """
+        Entrega una conexión del pool. Espera hasta `timeout` segundos si el pool
+        está lleno y lanza PoolTimeoutError si no se libera ninguna.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            entry, must_create = self._acquire_slot(deadline, started)
+
+            if must_create:
+                try:
+                    entry = _PoolEntry(self._factory())
+                except Exception:
+                    self._discard_slot()
+                    raise
+                with self._condition:
+                    self._created += 1
+                return PooledConnection(self, entry)
+
+            if self._is_usable(entry):
+                entry.last_used_at = time.monotonic()
+                return PooledConnection(self, entry)
+
+            # La conexión no sirve: se descarta y se intenta de nuevo
+            self._close_entry(entry)
+            self._discard_slot()
+
+    def _acquire_slot(self, deadline: float, started: float):
+        with self._condition:
+            waiting = False
+            try:
+                while True:
+                    if self._closed:
+                        raise pyodbc.Error("El pool de conexiones está cerrado.")
+                    if self._idle:
+                        entry = self._idle.pop()  # LIFO: la más reciente suele estar viva
+                        self._mark_checkout(started)
+                        return entry, False
+                    if self._size < self.max_size:
+                        self._size += 1
+                        self._mark_checkout(started)
+                        return None, True
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"No hay conexiones disponibles después de {self.timeout} segundos "
+                            f"(en uso: {self._in_use}, máximo: {self.max_size})."
+                        )
+                    if not waiting:
+                        self._waiters += 1
+                        waiting = True
+                    self._condition.wait(remaining)
+            finally:
+                if waiting:
+                    self._waiters -= 1
+
+    def _mark_checkout(self, started: float):
+        waited = time.monotonic() - started
+        self._in_use += 1
+        self._checkouts += 1
+        self._wait_time_total += waited
+        self._wait_time_max = max(self._wait_time_max, waited)
+
+    def _discard_slot(self):
+        with self._condition:
+            self._size -= 1
+            self._in_use -= 1
+            self._condition.notify()
+
+    def _release(self, entry: _PoolEntry, discard: bool = False):
+        if not discard:
+            try:
+                # Descartar cualquier transacción que haya quedado abierta
+                entry.connection.rollback()
+            except Exception:
+                discard = True
+
+        now = time.monotonic()
+        with self._condition:
+            self._in_use -= 1
+            expired = self.max_lifetime and now - entry.created_at >= self.max_lifetime
+            if discard or expired or self._closed:
+                self._size -= 1
+                if expired and not discard:
+                    self._recycled += 1
+                to_close = entry
+            else:
+                entry.last_used_at = now
+                self._idle.append(entry)
+                to_close = None
+            self._condition.notify()
+
+        if to_close is not None:
+            self._close_entry(to_close)
+
+    def _is_usable(self, entry: _PoolEntry) -> bool:
+        """Valida que la conexión siga viva y no haya superado su tiempo de vida."""
+        now = time.monotonic()
+        if self.max_lifetime and now - entry.created_at >= self.max_lifetime:
+            with self._condition:
+                self._recycled += 1
+            return False
+        if now - entry.last_used_at < self.ping_after:
+            return True
+        try:
+            cursor = entry.connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            with self._condition:
+                self._failed_pings += 1
+            return False
+
+    @staticmethod
+    def _close_entry(entry: _PoolEntry):
+        try:
+            entry.connection.close()
+        except Exception:
+            pass
+
+    # === Estadísticas ===
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiters": self._waiters,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "created": self._created,
+                "recycled": self._recycled,
+                "failed_pings": self._failed_pings,
+                "wait_time_total_ms": round(self._wait_time_total * 1000, 3),
+                "wait_time_avg_ms": round(self._wait_time_total * 1000 / self._checkouts, 3) if self._checkouts else 0.0,
+                "wait_time_max_ms": round(self._wait_time_max * 1000, 3),
+            }
+
+
+# Pool compartido por toda la aplicación
+pool = ConnectionPool()
+
+
+def get_db_connection():
+    """
+    Obtiene una conexión del pool compartido. Al llamar a `close()` la conexión
+    vuelve al pool en lugar de cerrarse.
+    """
+    return pool.get_connection()
+
+
+def get_pool_stats() -> dict:
+    """Estadísticas del pool de conexiones (en uso, ociosas, en espera y tiempos de espera)."""
+    return pool.stats()
+
+
+# === Acceso asíncrono a la base de datos ===
+
+class DBExecutor:
+    """
+    Ejecutor acotado para las llamadas bloqueantes de pyodbc. Los endpoints async
+    delegan aquí sus consultas para no bloquear el event loop de uvicorn. Otros clientes
+    bloqueantes (Textract) usan su propia instancia con otro `thread_name_prefix`.
+    """
+
+    def __init__(self, max_workers: int = DB_MAX_CONCURRENCY, thread_name_prefix: str = "db"):
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+        self._executor = None
+        self._lock = threading.Lock()
+        self._running = 0
+        self._pending = 0
+        self._completed = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.thread_name_prefix)
+            return self._executor
+
+    async def run(self, func, *args, **kwargs):
+        """Ejecuta `func(*args, **kwargs)` en el ejecutor y espera su resultado sin bloquear el loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._pending += 1
+        return await loop.run_in_executor(self._get_executor(), self._track, functools.partial(func, *args, **kwargs))
+
+    def _track(self, call):
+        with self._lock:
+            self._pending -= 1
+            self._running += 1
+        try:
+            return call()
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_concurrency": self.max_workers,
+                "running": self._running,
+                "pending": self._pending,
+                "completed": self._completed,
+            }
+
+
+# Ejecutor compartido por todos los servicios
+db_executor = DBExecutor()
+
+
+async def run_db(func, *args, **kwargs):
+    """
+    Ejecuta una función bloqueante de acceso a datos en el ejecutor de base de datos.
+
+    Ejemplo:
+        record_id = await run_db(save_to_db, "invoices", data)
+    """
+    return await db_executor.run(func, *args, **kwargs)
+
+
+def get_db_executor_stats() -> dict:
+    """Estadísticas del ejecutor de base de datos (en ejecución, pendientes y completadas)."""
+    return db_executor.stats()
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+import logging
 from fastapi import FastAPI
 import uvicorn
 from fastapi.openapi.utils import get_openapi
@@ -8,12 +10,47 @@ from app.controllers.auth_controller import router as auth_router
 from app.controllers.upload_file_controller import router as upload_router
 from app.controllers.document_analysis_controller import router as document_analysis_router  # Nuevo controlador
 from app.controllers.history_controller import router as history_router  # Nuevo controlador
+from app.controllers.metrics_controller import router as metrics_router
+from app.controllers.analytics_controller import router as analytics_router
+from app.controllers.job_controller import router as job_router
+from app.db import pool, db_executor
+from app.services.log_service import start_log_writer, stop_log_writer
+from app.services.log_search_service import start_log_search_indexer, stop_log_search_indexer
+from app.services.analytics_service import start_log_rollup_worker, stop_log_rollup_worker
+from app.services.job_service import start_job_workers, stop_job_workers
+from app.services.document_analysis_service import textract_executor, textract_job_executor
+from app.services.file_upload_service import upload_executor
+
+# Ciclo de vida de la aplicación: precalentar el pool, iniciar el escritor de logs y vaciarlo al apagar
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        pool.warm_up()
+    except Exception as e:
+        # La aplicación arranca igual; las conexiones se abrirán bajo demanda
+        logging.error(f"No se pudo precalentar el pool de conexiones: {e}")
+    start_log_writer()
+    start_log_search_indexer()
+    start_log_rollup_worker()
+    start_job_workers()
+    yield
+    # Los trabajos en curso terminan antes de cerrar el pool; los pendientes quedan persistidos
+    stop_job_workers()
+    stop_log_rollup_worker()
+    stop_log_search_indexer()
+    stop_log_writer()
+    upload_executor.shutdown()
+    textract_job_executor.shutdown()
+    textract_executor.shutdown()
+    db_executor.shutdown()
+    pool.close()
 
 # Crear la instancia principal de la aplicación FastAPI
 app = FastAPI(
     title="Prueba API Python",
     version="0.1.0",
-    openapi_version="3.0.3"  # Cambiar a la versión que necesitas
+    openapi_version="3.0.3",  # Cambiar a la versión que necesitas
+    lifespan=lifespan
 )
 
 # Agregar middleware de CORS
@@ -61,6 +98,9 @@ app.include_router(auth_router)
 app.include_router(upload_router)
 app.include_router(document_analysis_router)  # Nuevo router
 app.include_router(history_router)  # Nuevo router
+app.include_router(metrics_router)
+app.include_router(analytics_router)
+app.include_router(job_router)
 
 if __name__ == "__main__":
     uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
@@ -0,0 +1,247 @@
+import os
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any
+from dotenv import load_dotenv
+from app.db import get_db_connection, run_db
+from app.services.log_service import add_log_listener
+from app.utils.enums.time_bucket import TimeBucket
+from app.utils.watermark_worker import IdHorizon, WatermarkWorker, safe_upper_bound
+
+load_dotenv()
+
+# Configuración de los agregados de conteo de logs
+LOG_ROLLUP_ENABLED = os.getenv("LOG_ROLLUP_ENABLED", "false").lower() == "true"
+LOG_ROLLUP_BATCH = int(os.getenv("LOG_ROLLUP_BATCH", "50000"))  # Logs agregados por transacción
+LOG_ROLLUP_LAG = float(os.getenv("LOG_ROLLUP_LAG", "5.0"))  # Segundos de margen tras MAX(id)
+ANALYTICS_MAX_BUCKETS = int(os.getenv("ANALYTICS_MAX_BUCKETS", "10080"))  # Buckets máximos por consulta
+
+# Unidad de DATEADD/DATEDIFF y duración de cada bucket
+BUCKET_UNITS = {
+    TimeBucket.MINUTE: ("MINUTE", timedelta(minutes=1)),
+    TimeBucket.HOUR: ("HOUR", timedelta(hours=1)),
+    TimeBucket.DAY: ("DAY", timedelta(days=1)),
+}
+
+# Rango consultado cuando no se indica la fecha de inicio
+DEFAULT_WINDOWS = {
+    TimeBucket.MINUTE: timedelta(hours=24),
+    TimeBucket.HOUR: timedelta(days=7),
+    TimeBucket.DAY: timedelta(days=90),
+}
+
+# Tabla de agregados desde la que se calcula cada tamaño de bucket
+ROLLUP_TABLES = {
+    TimeBucket.MINUTE: "dbo.log_counts_minute",
+    TimeBucket.HOUR: "dbo.log_counts_hour",
+    TimeBucket.DAY: "dbo.log_counts_hour",
+}
+
+# Logs con id mayor a la marca de agua aún no están agregados y se cuentan desde dbo.logs
+WATERMARK_QUERY = "COALESCE((SELECT last_rolled_id FROM dbo.log_rollup_state WHERE id = 1), 0)"
+
+
+def _bucket_expression(unit: str, column: str) -> str:
+    """Expresión SQL que trunca una fecha al inicio de su bucket."""
+    return f"DATEADD({unit}, DATEDIFF({unit}, 0, {column}), 0)"
+
+
+def _align(value: datetime, bucket: TimeBucket) -> datetime:
+    """Trunca una fecha al inicio de su bucket."""
+    value = value.replace(second=0, microsecond=0)
+    if bucket in (TimeBucket.HOUR, TimeBucket.DAY):
+        value = value.replace(minute=0)
+    if bucket == TimeBucket.DAY:
+        value = value.replace(hour=0)
+    return value
+
+
+def _resolve_range(bucket: TimeBucket, start_date: Optional[datetime], end_date: Optional[datetime]) -> tuple:
+    """
+    Alinea el rango a los buckets: [inicio del bucket de start_date, fin del bucket de end_date).
+
+    Raises:
+        ValueError: Si el rango es inválido o excede ANALYTICS_MAX_BUCKETS.
+    """
+    step = BUCKET_UNITS[bucket][1]
+    end_date = end_date or datetime.now()
+    start_date = start_date or end_date - DEFAULT_WINDOWS[bucket]
+    if start_date > end_date:
+        raise ValueError("La fecha de inicio no puede ser posterior a la fecha de fin.")
+
+    range_start = _align(start_date, bucket)
+    range_end = _align(end_date, bucket) + step
+    if (range_end - range_start) / step > ANALYTICS_MAX_BUCKETS:
+        raise ValueError(f"El rango solicitado excede el máximo de {ANALYTICS_MAX_BUCKETS} buckets; use un bucket mayor o un rango menor.")
+    return range_start, range_end
+
+
+def _build_counts_query(
+    bucket: TimeBucket,
+    level: Optional[str],
+    log_type: Optional[str],
+    range_start: datetime,
+    range_end: datetime
+) -> tuple:
+    """Construye la consulta de conteos por bucket, nivel y log_type."""
+    unit = BUCKET_UNITS[bucket][0]
+    filters = ""
+    filter_params = []
+    if level:
+        filters += " AND level = ?"
+        filter_params.append(level)
+    if log_type:
+        filters += " AND log_type = ?"
+        filter_params.append(log_type)
+
+    raw_bucket = _bucket_expression(unit, "timestamp")
+    if not LOG_ROLLUP_ENABLED:
+        query = (
+            f"SELECT {raw_bucket} AS bucket, level, log_type, COUNT_BIG(*) AS total FROM dbo.logs "
+            f"WHERE timestamp >= ? AND timestamp < ?{filters} "
+            f"GROUP BY {raw_bucket}, level, log_type ORDER BY bucket, level, log_type"
+        )
+        return query, [range_start, range_end] + filter_params
+
+    # Agregados hasta la marca de agua más los logs recientes aún no agregados
+    rollup_bucket = _bucket_expression(unit, "bucket")
+    query = (
+        "SELECT bucket, level, log_type, SUM(total) AS total FROM ("
+        f"SELECT {rollup_bucket} AS bucket, level, log_type, total FROM {ROLLUP_TABLES[bucket]} "
+        f"WHERE bucket >= ? AND bucket < ?{filters} "
+        "UNION ALL "
+        f"SELECT {raw_bucket} AS bucket, level, log_type, COUNT_BIG(*) AS total FROM dbo.logs "
+        f"WHERE id > {WATERMARK_QUERY} AND timestamp >= ? AND timestamp < ?{filters} "
+        f"GROUP BY {raw_bucket}, level, log_type"
+        ") AS counts GROUP BY bucket, level, log_type ORDER BY bucket, level, log_type"
+    )
+    params = [range_start, range_end] + filter_params + [range_start, range_end] + filter_params
+    return query, params
+
+
+def _query_log_counts(query: str, params: list) -> list:
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        return [
+            {"bucket": row[0], "level": row[1], "log_type": row[2], "count": int(row[3])}
+            for row in cursor.fetchall()
+        ]
+    finally:
+        cursor.close()
+        conn.close()
+
+
+async def get_log_counts(
+    bucket: TimeBucket = TimeBucket.HOUR,
+    level: Optional[str] = None,
+    log_type: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Obtiene la cantidad de logs agrupada por bucket de tiempo, nivel y log_type.
+
+    Args:
+        bucket (TimeBucket): Tamaño del bucket (minute, hour o day).
+        level (Optional[str]): Filtro por nivel (HistoryType).
+        log_type (Optional[str]): Filtro por log_type.
+        start_date (Optional[datetime]): Inicio del rango (se alinea al inicio de su bucket).
+        end_date (Optional[datetime]): Fin del rango (se incluye su bucket completo).
+
+    Returns:
+        Dict[str, Any]: Rango efectivo y lista de conteos ordenada por bucket.
+
+    Raises:
+        ValueError: Si el rango no es válido.
+    """
+    bucket = TimeBucket(bucket)
+    range_start, range_end = _resolve_range(bucket, start_date, end_date)
+    query, params = _build_counts_query(bucket, level, log_type, range_start, range_end)
+    counts = await run_db(_query_log_counts, query, params)
+    return {
+        "bucket": bucket.value,
+        "start_date": range_start,
+        "end_date": range_end,
+        "counts": counts,
+    }
+
+
+def rollup_pending_logs(batch_size: int = LOG_ROLLUP_BATCH, horizon: Optional[IdHorizon] = None) -> int:
+    """
+    Suma a los agregados los logs posteriores a la marca de agua. Cada lote actualiza
+    las tablas de minuto y de hora junto con la nueva marca de agua en una transacción.
+    Con `horizon` no se pasa del último id seguro, para no saltar los INSERT con id
+    menor que se confirman tarde.
+
+    Returns:
+        int: Número de logs agregados.
+    """
+    rolled = 0
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        upper_bound = safe_upper_bound(cursor, horizon)
+        bound_sql, bound_params = (" AND id <= ?", (upper_bound,)) if upper_bound is not None else ("", ())
+        while True:
+            cursor.execute(f"SELECT {WATERMARK_QUERY}")
+            watermark = cursor.fetchone()[0]
+
+            cursor.execute(
+                f"SELECT COUNT(*), MAX(id) FROM (SELECT TOP (?) id FROM dbo.logs WHERE id > ?{bound_sql} ORDER BY id) AS batch",
+                (batch_size, watermark, *bound_params)
+            )
+            count, last_id = cursor.fetchone()
+            if not count:
+                break
+
+            for unit, table in (("MINUTE", "dbo.log_counts_minute"), ("HOUR", "dbo.log_counts_hour")):
+                bucket_expr = _bucket_expression(unit, "timestamp")
+                cursor.execute(
+                    f"""
+                    MERGE {table} WITH (HOLDLOCK) AS target
+                    USING (
+                        SELECT {bucket_expr} AS bucket, level, log_type, COUNT_BIG(*) AS total
+                        FROM dbo.logs WHERE id > ? AND id <= ?
+                        GROUP BY {bucket_expr}, level, log_type
+                    ) AS source
+                    ON target.bucket = source.bucket AND target.level = source.level AND target.log_type = source.log_type
+                    WHEN MATCHED THEN UPDATE SET total = target.total + source.total
+                    WHEN NOT MATCHED THEN INSERT (bucket, level, log_type, total)
+                        VALUES (source.bucket, source.level, source.log_type, source.total);
+                    """,
+                    (watermark, last_id)
+                )
+            cursor.execute(
+                """
+                MERGE dbo.log_rollup_state AS target
+                USING (SELECT 1 AS id) AS source ON target.id = source.id
+                WHEN MATCHED THEN UPDATE SET last_rolled_id = ?
+                WHEN NOT MATCHED THEN INSERT (id, last_rolled_id) VALUES (1, ?);
+                """,
+                (last_id, last_id)
+            )
+            conn.commit()
+            rolled += count
+            if count < batch_size:
+                break
+        return rolled
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# Proceso de agregación compartido; se inicia en el ciclo de vida de la aplicación si está habilitado
+log_rollup_worker = WatermarkWorker("log-rollup", rollup_pending_logs, enabled=LOG_ROLLUP_ENABLED, lag=LOG_ROLLUP_LAG)
+add_log_listener(log_rollup_worker.notify)
+
+
+def start_log_rollup_worker():
+    log_rollup_worker.start()
+
+
+def stop_log_rollup_worker():
+    log_rollup_worker.stop()
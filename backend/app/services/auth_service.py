@@ -1,10 +1,16 @@
+import hashlib
+import math
 import os
+import secrets
 from dotenv import load_dotenv
 from fastapi import HTTPException
 from jose import jwt, JWTError, ExpiredSignatureError
 from datetime import datetime, timedelta
-from app.db import get_db_connection
+from app.db import get_db_connection, run_db
 from app.services.log_service import store_log  # Importar el servicio de logs
+from app.utils.cache import TTLCache, MISSING
+from app.utils.concurrency import SingleFlight
+from app.utils.rate_limiter import TokenBucketLimiter, acquire_all
 
 # Cargar variables de entorno desde el archivo .env
 load_dotenv()
@@ -12,6 +18,34 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 
+# Caché de tokens verificados (expiran junto con el token) y de tokens rechazados
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+AUTH_REJECTED_TOKEN_TTL = float(os.getenv("AUTH_REJECTED_TOKEN_TTL", "30"))  # Segundos que se recuerda un rechazo
+
+_verified_tokens = TTLCache(max_size=AUTH_TOKEN_CACHE_SIZE)
+_rejected_tokens = TTLCache(max_size=AUTH_TOKEN_CACHE_SIZE, ttl=AUTH_REJECTED_TOKEN_TTL)
+
+# Tickets de un solo uso para las transmisiones en vivo (EventSource no envía encabezados)
+STREAM_TICKET_TTL = float(os.getenv("STREAM_TICKET_TTL", "30"))  # Segundos para abrir la conexión
+STREAM_TICKET_CACHE_SIZE = int(os.getenv("STREAM_TICKET_CACHE_SIZE", "1000"))
+
+_stream_tickets = TTLCache(max_size=STREAM_TICKET_CACHE_SIZE, ttl=STREAM_TICKET_TTL)
+
+# Caché de usuarios consultados en el login (también guarda los usuarios inexistentes)
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "30"))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "1000"))
+
+# Límite de intentos de login: ráfaga máxima y fichas recuperadas por minuto
+LOGIN_USER_BURST = int(os.getenv("LOGIN_USER_BURST", "5"))
+LOGIN_USER_PER_MINUTE = float(os.getenv("LOGIN_USER_PER_MINUTE", "5"))
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "20"))
+LOGIN_IP_PER_MINUTE = float(os.getenv("LOGIN_IP_PER_MINUTE", "30"))
+
+_user_cache = TTLCache(max_size=AUTH_USER_CACHE_SIZE, ttl=AUTH_USER_CACHE_TTL)
+_user_lookups = SingleFlight()
+_login_user_limiter = TokenBucketLimiter(LOGIN_USER_PER_MINUTE / 60, LOGIN_USER_BURST)
+_login_ip_limiter = TokenBucketLimiter(LOGIN_IP_PER_MINUTE / 60, LOGIN_IP_BURST)
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     if expires_delta:
@@ -22,57 +56,142 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def authenticate_user(username: str, password: str):
+def get_user_by_username(username: str):
+    """
+    Consulta el usuario por username. Retorna la fila (user_id, username, password, role) o None.
+    """
     connection = get_db_connection()
     try:
         with connection.cursor() as cursor:
-            # Consulta del usuario por username
             query = "SELECT user_id, username, password, role FROM users WHERE username = ?"
             cursor.execute(query, (username,))
-            db_user = cursor.fetchone()
-
-            # Si el usuario no existe o la contraseña es incorrecta
-            if db_user is None or db_user[2] != password:
-                # Detalle específico para el log
-                if db_user is None:
-                    message = "Username does not exist"
-                else:
-                    message = f"Incorrect password for username: {username}"
-
-                # Guardar el error en el log con detalle específico
-                store_log("INTERACCION_USUARIO", message, "ERROR")
-                
-                # Mensaje genérico para el cliente
-                raise HTTPException(status_code=401, detail="Username or password is incorrect")
-
-            # Generar el token de acceso
-            access_token_expires = timedelta(minutes=15)  # Token expira en 15 minutos
-            access_token = create_access_token(
-                data={"sub": db_user[1], "role": db_user[3]},
-                expires_delta=access_token_expires
-            )
-
-            # Log de autenticación exitosa
-            message = f"user_id:{db_user[0]}, successfully authenticated."
-            store_log("INTERACCION_USUARIO", message, "INFO")
-
-            # Respuesta exitosa
-            return {
-                "user_id": db_user[0],
-                "username": db_user[1],
-                "role": db_user[3],
-                "access_token": access_token,
-            }
+            return cursor.fetchone()
+    finally:
+        connection.close()
+
+async def get_cached_user(username: str):
+    """
+    Retorna el usuario desde la caché; si no está, lo consulta una sola vez aunque
+    lleguen varios logins simultáneos para el mismo username.
+    """
+    db_user = _user_cache.get(username)
+    if db_user is not MISSING:
+        return db_user
+
+    async def lookup():
+        row = await run_db(get_user_by_username, username)
+        row = tuple(row) if row is not None else None
+        _user_cache.set(username, row)
+        return row
+
+    return await _user_lookups.do(username, lookup)
+
+def invalidate_user(username: str = None):
+    """Descarta de la caché un usuario (o todos) tras cambiar su contraseña o su rol."""
+    if username is None:
+        _user_cache.clear()
+    else:
+        _user_cache.delete(username)
+
+def check_login_rate(username: str, client_ip: str = None):
+    """
+    Aplica los límites de intentos por username y por IP antes de tocar la base de datos.
+
+    Raises:
+        HTTPException: 429 con el encabezado Retry-After si se excede algún límite.
+    """
+    # Se revisan ambos límites antes de consumir: un rechazo por IP no gasta el intento del username
+    limits = [(_login_user_limiter, username)]
+    if client_ip:
+        limits.append((_login_ip_limiter, client_ip))
+    retry_after = acquire_all(*limits)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Demasiados intentos de inicio de sesión. Intente más tarde.",
+            headers={"Retry-After": str(max(1, math.ceil(min(retry_after, 3600))))}
+        )
+
+def get_login_stats() -> dict:
+    """Contadores de la caché de usuarios, las consultas agrupadas y los límites de login."""
+    return {
+        "user_cache": _user_cache.stats(),
+        "user_lookups": _user_lookups.stats(),
+        "rate_limit": {
+            "username": _login_user_limiter.stats(),
+            "ip": _login_ip_limiter.stats(),
+        },
+    }
+
+async def authenticate_user(username: str, password: str, client_ip: str = None):
+    # Los intentos que exceden el límite se rechazan sin consultar la base de datos ni escribir logs
+    check_login_rate(username, client_ip)
+    try:
+        # Consulta del usuario por username (caché y consultas agrupadas)
+        db_user = await get_cached_user(username)
+
+        # Si el usuario no existe o la contraseña es incorrecta
+        if db_user is None or db_user[2] != password:
+            # Detalle específico para el log
+            if db_user is None:
+                message = "Username does not exist"
+            else:
+                message = f"Incorrect password for username: {username}"
+
+            # Guardar el error en el log con detalle específico
+            store_log("INTERACCION_USUARIO", message, "ERROR")
+            
+            # Mensaje genérico para el cliente
+            raise HTTPException(status_code=401, detail="Username or password is incorrect")
+
+        # Generar el token de acceso
+        access_token_expires = timedelta(minutes=15)  # Token expira en 15 minutos
+        access_token = create_access_token(
+            data={"sub": db_user[1], "role": db_user[3]},
+            expires_delta=access_token_expires
+        )
+
+        # Log de autenticación exitosa
+        message = f"user_id:{db_user[0]}, successfully authenticated."
+        store_log("INTERACCION_USUARIO", message, "INFO")
+
+        # Respuesta exitosa
+        return {
+            "user_id": db_user[0],
+            "username": db_user[1],
+            "role": db_user[3],
+            "access_token": access_token,
+        }
     except HTTPException as e:
         raise e
     except Exception as e:
         message = f"Error al autenticar usuario: {e}"
         store_log("INTERACCION_USUARIO", message, "ERROR")
         raise HTTPException(status_code=500, detail=message)
-    finally:
-        connection.close()
+
+class _CachedRejection(HTTPException):
+    """401 de un token que ya se había rechazado (caché negativa)."""
+
+
+def _token_key(token: str) -> str:
+    # Se guarda el hash para no conservar los tokens en memoria
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
 
 def verify_token(token: str):
+    """
+    Verifica el token y retorna su payload. Los tokens válidos se guardan en caché hasta
+    su `exp`, así que la firma solo se verifica la primera vez. Los rechazados se recuerdan
+    durante AUTH_REJECTED_TOKEN_TTL segundos: un cliente que reintenta con el mismo token
+    recibe el mismo 401 sin decodificarlo ni escribir de nuevo en el log.
+    """
+    key = _token_key(token)
+    payload = _verified_tokens.get(key)
+    if payload is not MISSING:
+        return dict(payload)
+    detail = _rejected_tokens.get(key)
+    if detail is not MISSING:
+        raise _CachedRejection(status_code=401, detail=detail)
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username = payload.get("sub")
@@ -80,17 +199,52 @@ def verify_token(token: str):
 
         if not username or not role:
             message = "Token inválido"
+            _rejected_tokens.set(key, message)
             store_log("INTERACCION_USUARIO", message, "ERROR")
             raise HTTPException(status_code=401, detail=message)
 
-        return payload
+        # Solo se guardan los tokens con vencimiento
+        exp = payload.get("exp")
+        if exp is not None:
+            _verified_tokens.set(key, payload, expires_at=float(exp))
+        return dict(payload)
     except ExpiredSignatureError:
         message = "El token ha expirado"
+        _rejected_tokens.set(key, message)
         raise HTTPException(status_code=401, detail=message)
     except JWTError as e:
         message = f"Token inválido: {e}"
+        _rejected_tokens.set(key, "Token inválido")
         raise HTTPException(status_code=401, detail="Token inválido")
 
+def create_stream_ticket(payload: dict) -> str:
+    """
+    Emite un ticket opaco de un solo uso para abrir una transmisión en vivo. Así el JWT
+    no viaja en la URL (y no queda en los logs de acceso ni en el historial del navegador).
+    """
+    ticket = secrets.token_urlsafe(32)
+    _stream_tickets.set(_token_key(ticket), {"sub": payload.get("sub"), "role": payload.get("role")})
+    return ticket
+
+def redeem_stream_ticket(ticket: str) -> dict:
+    """
+    Canjea un ticket de transmisión y retorna el payload del usuario que lo pidió.
+
+    Raises:
+        HTTPException: 401 si el ticket no existe, ya se usó o expiró.
+    """
+    payload = _stream_tickets.pop(_token_key(ticket))
+    if payload is MISSING:
+        raise HTTPException(status_code=401, detail="Ticket inválido o expirado")
+    return dict(payload)
+
+def get_token_cache_stats() -> dict:
+    """Contadores de las cachés de tokens verificados y rechazados."""
+    return {
+        "verified": _verified_tokens.stats(),
+        "rejected": _rejected_tokens.stats(),
+    }
+
 def is_token_expired(payload: dict) -> bool:
     exp = payload.get("exp")
     if exp:
@@ -114,7 +268,9 @@ def refresh_access_token(token: str):
 
         return new_token
     except HTTPException as e:
-        store_log("INTERACCION_USUARIO", e, "ERROR")
+        # Los reintentos con un token ya rechazado no vuelven a escribir en el log
+        if not isinstance(e, _CachedRejection):
+            store_log("INTERACCION_USUARIO", e.detail, "ERROR")
         raise e
     except Exception as e:
         message = f"Error al refrescar el token: {e}"
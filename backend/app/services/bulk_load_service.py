@@ -0,0 +1,208 @@
+import os
+import time
+from typing import Callable, Optional
+import pandas as pd
+import pyodbc
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configuración de la carga masiva en dbo.uploaded_files
+UPLOAD_BULK_MODE = os.getenv("UPLOAD_BULK_MODE", "executemany")  # executemany | staging | tvp
+UPLOAD_BULK_CHUNK_SIZE = int(os.getenv("UPLOAD_BULK_CHUNK_SIZE", "10000"))  # Filas por envío
+UPLOAD_BULK_COMMIT_CHUNKS = int(os.getenv("UPLOAD_BULK_COMMIT_CHUNKS", "0"))  # Confirmar cada N bloques (0 = una sola transacción)
+
+BULK_MODES = ("executemany", "staging", "tvp")
+
+# Columnas de destino, en el orden de los parámetros
+UPLOADED_FILES_COLUMNS = ["column1", "column2"]
+
+STAGING_TABLE = "#uploaded_files_staging"
+# Con skip_existing solo pasan a la tabla final las filas cuyo hash no existe
+# (columna row_hash e índice creados en sql/005_upload_fingerprints.sql)
+INSERT_NEW_ROWS = (
+    "INSERT INTO dbo.uploaded_files WITH (TABLOCK) (column1, column2) "
+    f"SELECT s.column1, s.column2 FROM {STAGING_TABLE} AS s "
+    "WHERE NOT EXISTS (SELECT 1 FROM dbo.uploaded_files AS f WITH (UPDLOCK, HOLDLOCK) "
+    "WHERE f.row_hash = CAST(HASHBYTES('SHA2_256', CONCAT(s.column1, NCHAR(31), s.column2)) AS BINARY(32)))"
+)
+# Tipo de tabla y procedimiento creados en sql/004_uploaded_files_bulk.sql
+TVP_PROCEDURE = "{CALL dbo.insert_uploaded_files (?)}"
+TVP_TYPE = "uploaded_files_type"
+
+
+def _column_values(data, column: str, start: int, stop: int) -> list:
+    if isinstance(data, pd.DataFrame):
+        values = data[column].iloc[start:stop]
+        return values.astype(object).where(values.notna(), None).tolist()
+    # Tabla de Arrow: la columna pasa directo a valores de Python (los nulos ya son None)
+    return data.column(column).slice(start, stop - start).to_pylist()
+
+
+def _chunk_rows(data, chunk_size: int):
+    """
+    Convierte el DataFrame (o la tabla de Arrow) en bloques de tuplas columna por columna:
+    cada columna pasa a lista de una sola vez (sin crear una Series por fila) y los nulos
+    se envían como NULL.
+    """
+    for start in range(0, len(data), chunk_size):
+        columns = [
+            _column_values(data, column, start, start + chunk_size)
+            for column in UPLOADED_FILES_COLUMNS
+        ]
+        yield list(zip(*columns)), columns
+
+
+def _input_sizes(columns: list) -> list:
+    """
+    Tamaño de cada parámetro del bloque. Con fast_executemany pyodbc reserva el búfer según
+    la primera fila; declarar el máximo evita que un valor más largo fuerce a reenlazar.
+    """
+    sizes = []
+    for values in columns:
+        longest = max((len(str(value)) for value in values if value is not None), default=1)
+        # NVARCHAR(MAX) (tamaño 0) por encima del límite de NVARCHAR(n)
+        sizes.append((pyodbc.SQL_WVARCHAR, longest if longest <= 4000 else 0, 0))
+    return sizes
+
+
+class UploadedFilesBulkLoader:
+    """
+    Carga incremental en dbo.uploaded_files: recibe DataFrames o tablas de Arrow con `add`
+    (por ejemplo, los bloques de un CSV leído por partes) y los envía en bloques de
+    `chunk_size` filas.
+
+    Modos:
+        executemany: INSERT con fast_executemany (un envío por bloque).
+        staging: los bloques se cargan en una tabla temporal y `finish` los pasa a
+            la tabla final con un único INSERT ... SELECT.
+        tvp: cada bloque se envía como parámetro con valor de tabla al
+            procedimiento dbo.insert_uploaded_files.
+
+    Con `skip_existing` se usa siempre staging y `finish` inserta solo las filas que aún no
+    están en dbo.uploaded_files; las demás se cuentan en `skipped`.
+
+    La conexión la administra quien llama; `finish` confirma y `abort` revierte.
+    """
+
+    def __init__(
+        self,
+        conn,
+        mode: str = UPLOAD_BULK_MODE,
+        chunk_size: int = UPLOAD_BULK_CHUNK_SIZE,
+        commit_chunks: int = UPLOAD_BULK_COMMIT_CHUNKS,
+        progress: Optional[Callable[[int, Optional[int]], None]] = None,
+        total: Optional[int] = None,
+        skip_existing: bool = False
+    ):
+        if mode not in BULK_MODES:
+            raise ValueError(f"Modo de carga no válido. Los permitidos son: {', '.join(BULK_MODES)}.")
+        self.conn = conn
+        self.mode = "staging" if skip_existing else mode
+        self.skip_existing = skip_existing
+        self.skipped = 0
+        self.chunk_size = chunk_size
+        self.commit_chunks = commit_chunks
+        self.progress = progress
+        self.total = total
+        self.loaded = 0
+        self.chunks = 0
+        self._started = time.perf_counter()
+
+        self.cursor = conn.cursor()
+        self._closed = False
+        self.cursor.fast_executemany = True
+        if self.mode == "staging":
+            self.cursor.execute(
+                f"SELECT TOP 0 column1, column2 INTO {STAGING_TABLE} FROM dbo.uploaded_files"
+            )
+
+    def add(self, data):
+        """Envía las filas del DataFrame o de la tabla de Arrow (columnas column1 y column2)."""
+        for rows, columns in _chunk_rows(data, self.chunk_size):
+            if self.mode == "tvp":
+                self.cursor.execute(TVP_PROCEDURE, ([TVP_TYPE, "dbo"] + rows,))
+            else:
+                target = STAGING_TABLE if self.mode == "staging" else "dbo.uploaded_files"
+                self.cursor.setinputsizes(_input_sizes(columns))
+                self.cursor.executemany(f"INSERT INTO {target} (column1, column2) VALUES (?, ?)", rows)
+
+            self.loaded += len(rows)
+            self.chunks += 1
+            if self.mode != "staging" and self.commit_chunks and self.chunks % self.commit_chunks == 0:
+                self.conn.commit()
+            if self.progress is not None:
+                self.progress(self.loaded, self.total)
+
+    def finish(self, before_commit: Optional[Callable[["UploadedFilesBulkLoader"], object]] = None) -> dict:
+        """
+        Confirma la carga. `before_commit` se ejecuta en la misma transacción, justo antes de
+        confirmar (con las filas ya insertadas); si lanza una excepción no se confirma nada.
+        Retorna filas, filas omitidas, bloques, modo y duración.
+        """
+        try:
+            if self.skip_existing:
+                self.cursor.execute(INSERT_NEW_ROWS)
+                self.skipped = self.loaded - max(0, self.cursor.rowcount)
+                self.cursor.execute(f"DROP TABLE {STAGING_TABLE}")
+            elif self.mode == "staging":
+                self.cursor.execute(
+                    f"INSERT INTO dbo.uploaded_files WITH (TABLOCK) (column1, column2) "
+                    f"SELECT column1, column2 FROM {STAGING_TABLE}"
+                )
+                self.cursor.execute(f"DROP TABLE {STAGING_TABLE}")
+            if before_commit is not None:
+                before_commit(self)
+            self.conn.commit()
+        finally:
+            self._close_cursor()
+        return {
+            "rows": self.loaded,
+            "skipped": self.skipped,
+            "chunks": self.chunks,
+            "mode": self.mode,
+            "seconds": round(time.perf_counter() - self._started, 3),
+        }
+
+    def abort(self):
+        """Revierte lo cargado desde la última confirmación (con staging, todo)."""
+        try:
+            self.conn.rollback()
+        finally:
+            self._close_cursor()
+
+    def _close_cursor(self):
+        if not self._closed:
+            self._closed = True
+            self.cursor.close()
+
+
+def bulk_load_uploaded_files(
+    conn,
+    df: pd.DataFrame,
+    mode: str = UPLOAD_BULK_MODE,
+    chunk_size: int = UPLOAD_BULK_CHUNK_SIZE,
+    commit_chunks: int = UPLOAD_BULK_COMMIT_CHUNKS,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> dict:
+    """
+    Inserta las filas del DataFrame en dbo.uploaded_files por bloques (ver UploadedFilesBulkLoader).
+
+    Args:
+        conn: Conexión a la base de datos.
+        df (pd.DataFrame): Datos con las columnas column1 y column2.
+        chunk_size (int): Filas por bloque.
+        commit_chunks (int): Confirma cada N bloques; 0 confirma todo al final
+            (en modo staging la tabla final siempre se llena en una transacción).
+        progress (callable): Recibe (filas cargadas, filas totales) después de cada bloque.
+
+    Returns:
+        dict: Filas, bloques, modo y duración de la carga.
+    """
+    loader = UploadedFilesBulkLoader(conn, mode, chunk_size, commit_chunks, progress, total=len(df))
+    try:
+        loader.add(df)
+        return loader.finish()
+    except Exception:
+        loader.abort()
+        raise
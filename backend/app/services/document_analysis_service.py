@@ -1,13 +1,25 @@
 import boto3
-from fastapi import UploadFile
+from botocore.exceptions import ClientError
+from fastapi import HTTPException, UploadFile
+from typing import AsyncIterator, List
 from datetime import datetime
+import asyncio
+import hashlib
+import math
 import os
 import re
+import threading
+import time
 from dotenv import load_dotenv
-from app.db import get_db_connection
+from app.db import DBExecutor, get_db_connection, run_db
+from app.services import file_upload_service
+from app.services.log_service import store_log
+from app.utils.cache import TTLCache
+from app.utils.concurrency import ConcurrencyLimiter, ConcurrencyLimitError
 from app.utils.date_utils import transform_date_for_sqlserver
+from app.utils.keyword_matcher import KeywordMatcher, normalize_text
 from app.utils.text_extraction_mapping import KEYWORD_MAPPING
-import unicodedata
+from app.utils.tiered_cache import CompressedDiskCache, TieredCache
 
 # Cargar las credenciales de AWS y la base de datos desde el archivo .env
 load_dotenv()
@@ -24,18 +36,319 @@ textract_client = boto3.client(
     region_name='us-east-2'
 )
 
+TEXTRACT_FEATURE_TYPES = ['TABLES', 'FORMS']
+
+# Caché de respuestas de Textract por contenido del documento: LRU en memoria sobre disco comprimido
+TEXTRACT_CACHE_ENABLED = os.getenv("TEXTRACT_CACHE_ENABLED", "true").lower() == "true"
+TEXTRACT_CACHE_MEMORY_ITEMS = int(os.getenv("TEXTRACT_CACHE_MEMORY_ITEMS", "128"))
+TEXTRACT_CACHE_DIR = os.getenv("TEXTRACT_CACHE_DIR", "textract_cache")  # Vacío: solo en memoria
+TEXTRACT_CACHE_MAX_MB = float(os.getenv("TEXTRACT_CACHE_MAX_MB", "512"))
+
+textract_cache = TieredCache(
+    TTLCache(max_size=TEXTRACT_CACHE_MEMORY_ITEMS),
+    CompressedDiskCache(TEXTRACT_CACHE_DIR, int(TEXTRACT_CACHE_MAX_MB * 1024 * 1024)) if TEXTRACT_CACHE_DIR else None
+)
+
+_textract_stats_lock = threading.Lock()
+_textract_stats = {"hits": 0, "misses": 0, "calls_seconds": 0.0}
+
+# Llamadas simultáneas a Textract (según la cuota de TPS de la cuenta) y espera de las que exceden el límite
+TEXTRACT_MAX_IN_FLIGHT = int(os.getenv("TEXTRACT_MAX_IN_FLIGHT", "4"))
+TEXTRACT_MAX_QUEUE = int(os.getenv("TEXTRACT_MAX_QUEUE", "20"))
+TEXTRACT_QUEUE_TIMEOUT = float(os.getenv("TEXTRACT_QUEUE_TIMEOUT", "30"))
+
+# Análisis por lotes (/analyze-documents): archivos por petición y documentos analizados a la vez por lote
+ANALYZE_BATCH_MAX_FILES = int(os.getenv("ANALYZE_BATCH_MAX_FILES", "50"))
+ANALYZE_BATCH_CONCURRENCY = int(os.getenv("ANALYZE_BATCH_CONCURRENCY", str(TEXTRACT_MAX_IN_FLIGHT)))
+
+textract_limiter = ConcurrencyLimiter(TEXTRACT_MAX_IN_FLIGHT, TEXTRACT_MAX_QUEUE, TEXTRACT_QUEUE_TIMEOUT)
+# Hilos para las llamadas bloqueantes de boto3; los dos extra atienden las consultas a la caché
+# mientras todos los lugares del limitador están ocupados
+textract_executor = DBExecutor(max_workers=TEXTRACT_MAX_IN_FLIGHT + 2, thread_name_prefix="textract")
+
+# Coincidencia difusa opcional de las claves extraídas con KEYWORD_MAPPING (tolera el ruido del OCR)
+KEYWORD_FUZZY_MATCHING = os.getenv("KEYWORD_FUZZY_MATCHING", "false").lower() == "true"
+KEYWORD_MIN_CONFIDENCE = float(os.getenv("KEYWORD_MIN_CONFIDENCE", "0.9"))
+
+_keyword_matchers = {}
+
 # === Funciones para procesar documentos ===
 
-def analyze_document_with_textract(file: UploadFile):
+def textract_cache_key(file_content: bytes, feature_types) -> str:
+    """Clave de la caché: SHA-256 del documento y las FeatureTypes pedidas."""
+    return f"{hashlib.sha256(file_content).hexdigest()}:{','.join(sorted(feature_types))}"
+
+def cached_textract_response(file_content: bytes, feature_types=TEXTRACT_FEATURE_TYPES):
+    """Respuesta guardada de Textract para el documento, o None (no se debe modificar)."""
+    if not TEXTRACT_CACHE_ENABLED:
+        return None
+    cached = textract_cache.get(textract_cache_key(file_content, feature_types))
+    if cached is not None:
+        with _textract_stats_lock:
+            _textract_stats["hits"] += 1
+    return cached
+
+def _record_textract_call(key, response, elapsed: float) -> dict:
+    with _textract_stats_lock:
+        _textract_stats["misses"] += 1
+        _textract_stats["calls_seconds"] += elapsed
+    if key is not None:
+        # Los metadatos de la petición (RequestId, reintentos) no forman parte del análisis
+        textract_cache.set(key, {k: v for k, v in response.items() if k != 'ResponseMetadata'})
+    return response
+
+def call_textract(file_content: bytes, feature_types=TEXTRACT_FEATURE_TYPES):
     """
-    Analiza un documento usando AWS Textract.
+    Llama a AnalyzeDocument de Textract. Si el mismo documento ya se analizó con las mismas
+    FeatureTypes, retorna la respuesta guardada sin llamar a AWS (no se debe modificar).
     """
-    file_content = file.file.read()
+    cached = cached_textract_response(file_content, feature_types)
+    if cached is not None:
+        return cached
+
+    key = textract_cache_key(file_content, feature_types) if TEXTRACT_CACHE_ENABLED else None
+    start = time.perf_counter()
     response = textract_client.analyze_document(
         Document={'Bytes': file_content},
-        FeatureTypes=['TABLES', 'FORMS']
+        FeatureTypes=list(feature_types)
     )
-    return response
+    return _record_textract_call(key, response, time.perf_counter() - start)
+
+# === Análisis asíncrono de PDF de varias páginas (StartDocumentAnalysis) ===
+
+# El PDF se deja temporalmente en S3 (Textract solo lee ahí los documentos de los trabajos)
+TEXTRACT_SYNC_MAX_MB = float(os.getenv("TEXTRACT_SYNC_MAX_MB", "10"))  # Tamaño máximo para AnalyzeDocument
+TEXTRACT_ASYNC_PREFIX = os.getenv("TEXTRACT_ASYNC_PREFIX", "files/textract/")
+TEXTRACT_ASYNC_MAX_JOBS = int(os.getenv("TEXTRACT_ASYNC_MAX_JOBS", "10"))  # Trabajos de Textract en curso a la vez
+TEXTRACT_ASYNC_POLL_INITIAL = float(os.getenv("TEXTRACT_ASYNC_POLL_INITIAL", "1"))
+TEXTRACT_ASYNC_POLL_MAX = float(os.getenv("TEXTRACT_ASYNC_POLL_MAX", "5"))
+TEXTRACT_ASYNC_TIMEOUT = float(os.getenv("TEXTRACT_ASYNC_TIMEOUT", "900"))
+
+# Bloques por página de resultados de GetDocumentAnalysis (el máximo que admite la API)
+TEXTRACT_RESULTS_PAGE_SIZE = 1000
+
+# Errores de AnalyzeDocument que indican que el documento requiere el análisis asíncrono
+ASYNC_ONLY_ERRORS = {"UnsupportedDocumentException", "DocumentTooLargeException"}
+
+textract_job_limiter = ConcurrencyLimiter(TEXTRACT_ASYNC_MAX_JOBS, TEXTRACT_MAX_QUEUE, TEXTRACT_QUEUE_TIMEOUT)
+# Cada trabajo ocupa un hilo mientras consulta su estado (casi todo el tiempo en espera)
+textract_job_executor = DBExecutor(max_workers=TEXTRACT_ASYNC_MAX_JOBS, thread_name_prefix="textract-job")
+
+# Intentos fallidos por documento: Textract recuerda el ClientRequestToken durante 7 días y
+# devolvería el mismo trabajo fallido, así que cada reintento usa un token nuevo
+_textract_job_attempts = TTLCache(max_size=1024, ttl=7 * 24 * 3600)
+
+_textract_job_stats = {"jobs": 0, "failed": 0, "pages": 0, "status_calls": 0, "result_calls": 0, "job_seconds": 0.0}
+
+PDF_PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+class TextractJobError(Exception):
+    """El trabajo de Textract terminó con error o no terminó dentro del plazo."""
+
+def count_pdf_pages(file_content: bytes) -> int:
+    """
+    Páginas del PDF según sus objetos /Type /Page. Retorna 0 si no es un PDF o si las páginas
+    están dentro de flujos comprimidos (en ese caso se intenta primero el análisis síncrono).
+    """
+    if not file_content.startswith(b"%PDF-"):
+        return 0
+    return len(PDF_PAGE_PATTERN.findall(file_content))
+
+def needs_async_analysis(file_content: bytes) -> bool:
+    """Indica si el documento es un PDF que AnalyzeDocument no acepta (varias páginas o muy grande)."""
+    if not file_content.startswith(b"%PDF-"):
+        return False
+    return len(file_content) > TEXTRACT_SYNC_MAX_MB * 1024 * 1024 or count_pdf_pages(file_content) > 1
+
+def _requires_async_analysis(error: Exception, file_content: bytes) -> bool:
+    code = getattr(error, "response", {}).get("Error", {}).get("Code")
+    return code in ASYNC_ONLY_ERRORS and file_content.startswith(b"%PDF-")
+
+def _wait_for_analysis(job_id: str, sleep=time.sleep) -> dict:
+    """
+    Consulta el estado del trabajo con espera creciente hasta que termina. La consulta pide
+    la primera página de resultados, así que al terminar ya trae los primeros bloques.
+    """
+    delay = TEXTRACT_ASYNC_POLL_INITIAL
+    deadline = time.monotonic() + TEXTRACT_ASYNC_TIMEOUT
+    while True:
+        response = textract_client.get_document_analysis(JobId=job_id, MaxResults=TEXTRACT_RESULTS_PAGE_SIZE)
+        with _textract_stats_lock:
+            _textract_job_stats["status_calls"] += 1
+        status = response.get("JobStatus")
+        if status in ("SUCCEEDED", "PARTIAL_SUCCESS"):
+            return response
+        if status == "FAILED":
+            raise TextractJobError(f"El análisis de Textract {job_id} falló: {response.get('StatusMessage', 'sin detalle')}")
+        if time.monotonic() + delay > deadline:
+            raise TextractJobError(f"El análisis de Textract {job_id} no terminó en {TEXTRACT_ASYNC_TIMEOUT:g} segundos.")
+        sleep(delay)
+        delay = min(delay * 2, TEXTRACT_ASYNC_POLL_MAX)
+
+def _merge_analysis_pages(job_id: str, first_page: dict) -> dict:
+    """
+    Recorre las páginas de resultados (NextToken) y une sus bloques en una respuesta con la
+    misma forma que la de AnalyzeDocument.
+    """
+    blocks = list(first_page.get("Blocks", []))
+    warnings = list(first_page.get("Warnings", []))
+    next_token = first_page.get("NextToken")
+    while next_token:
+        page = textract_client.get_document_analysis(JobId=job_id, MaxResults=TEXTRACT_RESULTS_PAGE_SIZE, NextToken=next_token)
+        with _textract_stats_lock:
+            _textract_job_stats["result_calls"] += 1
+        blocks.extend(page.get("Blocks", []))
+        warnings.extend(page.get("Warnings", []))
+        next_token = page.get("NextToken")
+
+    merged = {"DocumentMetadata": first_page.get("DocumentMetadata", {}), "Blocks": blocks}
+    if "AnalyzeDocumentModelVersion" in first_page:
+        merged["AnalyzeDocumentModelVersion"] = first_page["AnalyzeDocumentModelVersion"]
+    if warnings:
+        merged["Warnings"] = warnings
+    return merged
+
+def call_textract_job(file_content: bytes, feature_types=TEXTRACT_FEATURE_TYPES, sleep=time.sleep):
+    """
+    Analiza un PDF de varias páginas con StartDocumentAnalysis: lo sube a S3, espera el
+    trabajo (Textract procesa las páginas en paralelo) y une los bloques de todas las
+    páginas de resultados. Comparte la caché con `call_textract`. Bloquea hasta terminar.
+
+    Raises:
+        TextractJobError: Si el trabajo falla o no termina dentro de TEXTRACT_ASYNC_TIMEOUT.
+    """
+    cached = cached_textract_response(file_content, feature_types)
+    if cached is not None:
+        return cached
+
+    key = textract_cache_key(file_content, feature_types)
+    # El mismo token devuelve el mismo trabajo si el documento ya se envió (Textract lo recuerda 7 días);
+    # después de un fallo o de un tiempo agotado se agrega el número de intento
+    attempt = _textract_job_attempts.get(key, 0)
+    token = hashlib.sha256(f"{key}:{attempt}".encode() if attempt else key.encode()).hexdigest()
+    s3_key = f"{TEXTRACT_ASYNC_PREFIX}{token}.pdf"
+    # El bucket y el cliente de S3 son los de las cargas de archivos
+    bucket = file_upload_service.BUCKET_NAME
+    start = time.perf_counter()
+    file_upload_service.upload_file_to_s3(file_content, s3_key)
+    try:
+        job_id = textract_client.start_document_analysis(
+            DocumentLocation={'S3Object': {'Bucket': bucket, 'Name': s3_key}},
+            FeatureTypes=list(feature_types),
+            ClientRequestToken=token
+        )['JobId']
+        try:
+            response = _merge_analysis_pages(job_id, _wait_for_analysis(job_id, sleep))
+        except TextractJobError:
+            with _textract_stats_lock:
+                _textract_job_stats["failed"] += 1
+                _textract_job_attempts.set(key, attempt + 1)
+            raise
+    finally:
+        try:
+            file_upload_service.s3_client.delete_object(Bucket=bucket, Key=s3_key)
+        except Exception as e:
+            store_log("IA", f"No se pudo eliminar {bucket}/{s3_key}: {e}", "ERROR")
+
+    elapsed = time.perf_counter() - start
+    with _textract_stats_lock:
+        _textract_job_stats["jobs"] += 1
+        _textract_job_stats["pages"] += response["DocumentMetadata"].get("Pages", 0)
+        _textract_job_stats["job_seconds"] += elapsed
+    return _record_textract_call(key if TEXTRACT_CACHE_ENABLED else None, response, elapsed)
+
+def _textract_busy(error: ConcurrencyLimitError) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Hay demasiados documentos en análisis; intente de nuevo más tarde.",
+        headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+    )
+
+def call_textract_limited(file_content: bytes, feature_types=TEXTRACT_FEATURE_TYPES):
+    """
+    Versión de `run_textract` para los hilos (trabajos en segundo plano): comparte los
+    límites de llamadas simultáneas con los endpoints.
+
+    Raises:
+        HTTPException: 429 con Retry-After si no hubo lugar dentro del plazo de espera.
+    """
+    cached = cached_textract_response(file_content, feature_types)
+    if cached is not None:
+        return cached
+    try:
+        if not needs_async_analysis(file_content):
+            try:
+                with textract_limiter.hold():
+                    return call_textract(file_content, feature_types)
+            except ClientError as e:
+                if not _requires_async_analysis(e, file_content):
+                    raise
+        with textract_job_limiter.hold():
+            return call_textract_job(file_content, feature_types)
+    except ConcurrencyLimitError as e:
+        raise _textract_busy(e)
+
+async def run_textract(file_content: bytes, feature_types=TEXTRACT_FEATURE_TYPES):
+    """
+    Analiza el documento en el ejecutor de Textract sin bloquear el event loop. Las respuestas
+    en caché no ocupan lugar en el límite de llamadas simultáneas; el resto espera su turno.
+    Los PDF de varias páginas (o los que AnalyzeDocument rechaza) se analizan con un trabajo
+    asíncrono de Textract, con su propio límite de trabajos en curso.
+
+    Raises:
+        HTTPException: 429 con Retry-After si la espera está llena o vence el plazo.
+    """
+    cached = await textract_executor.run(cached_textract_response, file_content, feature_types)
+    if cached is not None:
+        return cached
+    try:
+        if not needs_async_analysis(file_content):
+            try:
+                # El lugar se libera cuando termina el hilo, aunque se cancele la solicitud
+                return await textract_limiter.run(textract_executor, call_textract, file_content, feature_types)
+            except ClientError as e:
+                if not _requires_async_analysis(e, file_content):
+                    raise
+        return await textract_job_limiter.run(textract_job_executor, call_textract_job, file_content, feature_types)
+    except ConcurrencyLimitError as e:
+        raise _textract_busy(e)
+
+def get_textract_stats() -> dict:
+    """Estadísticas de los límites de llamadas simultáneas, los ejecutores y los trabajos de Textract."""
+    with _textract_stats_lock:
+        jobs = dict(_textract_job_stats)
+    job_seconds = jobs.pop("job_seconds")
+    jobs["avg_job_seconds"] = round(job_seconds / jobs["jobs"], 2) if jobs["jobs"] else 0.0
+    return {
+        **textract_limiter.stats(),
+        "executor": textract_executor.stats(),
+        "async_jobs": {**jobs, "limiter": textract_job_limiter.stats(), "executor": textract_job_executor.stats()},
+    }
+
+def get_textract_cache_stats() -> dict:
+    """
+    Estadísticas de la caché de Textract. El tiempo ahorrado estima cada acierto con la
+    duración media de las llamadas a Textract.
+    """
+    with _textract_stats_lock:
+        hits, misses, seconds = _textract_stats["hits"], _textract_stats["misses"], _textract_stats["calls_seconds"]
+    average = seconds / misses if misses else 0.0
+    return {
+        "enabled": TEXTRACT_CACHE_ENABLED,
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        "avg_textract_ms": round(average * 1000, 1),
+        "latency_saved_seconds": round(hits * average, 3),
+        **textract_cache.stats(),
+    }
+
+def analyze_document_with_textract(file: UploadFile):
+    """
+    Analiza un documento usando AWS Textract.
+    """
+    file_content = file.file.read()
+    return call_textract(file_content)
 
 def extract_data_from_textract_response(response):
     """
@@ -79,19 +392,6 @@ def extract_text_from_relationships(block, blocks_by_id, relationship_type):
                 )
     return text
 
-def normalize_text(text):
-    """
-    Normaliza un texto eliminando mayúsculas, tildes y espacios adicionales.
-    """
-    if not text:  # Manejar valores nulos o vacíos
-        return ""
-    text = text.lower().strip()
-    text = ''.join(
-        c for c in unicodedata.normalize('NFD', text)
-        if unicodedata.category(c) != 'Mn'
-    )
-    return text
-
 def clean_key(key):
     """
     Limpia una clave para manejar posibles formatos como 'Clave:' o 'Clave : valor'.
@@ -104,42 +404,78 @@ def clean_key(key):
         return field_name, value
     return key.strip(), ""
 
+def _keyword_matcher(keyword_mapping):
+    """Matcher compilado del mapeo (el mapeo no se debe modificar después de usarlo)."""
+    entry = _keyword_matchers.get(id(keyword_mapping))
+    if entry is None or entry[0] is not keyword_mapping:
+        entry = (keyword_mapping, KeywordMatcher(keyword_mapping, KEYWORD_FUZZY_MATCHING, KEYWORD_MIN_CONFIDENCE))
+        _keyword_matchers[id(keyword_mapping)] = entry
+    return entry[1]
+
 def find_matching_field(key, keyword_mapping):
     """
     Encuentra el campo correspondiente en el keyword_mapping para una clave dada.
     """
-    normalized_key = normalize_text(key)
-    for field, keywords in keyword_mapping.items():
-        normalized_keywords = [normalize_text(k) for k in keywords]
-        if any(normalized_key == keyword for keyword in normalized_keywords):
-            return field
-    return None
+    return _keyword_matcher(keyword_mapping).field_for(key)
 
 def extract_fields_data(data, keyword_mapping):
     """
-    Extrae los campos clave del JSON utilizando el keyword_mapping.
+    Extrae los campos clave del JSON utilizando el keyword_mapping. Si varias claves
+    corresponden al mismo campo, se queda la de mayor confianza (y entre iguales, la última).
     """
+    matcher = _keyword_matcher(keyword_mapping)
     extracted_data = {}
+    confidences = {}
 
     for raw_key, raw_value in data.items():
-        print(f"Procesando: {raw_key} = {raw_value}")  
         # Limpieza de clave y normalización
         cleaned_key, embedded_value = clean_key(raw_key)
-        print("cleaned_key:", cleaned_key)
-        print("keyword_mapping:", keyword_mapping)
-        matching_field = find_matching_field(cleaned_key, keyword_mapping)
+        match = matcher.match(cleaned_key)
 
         # Priorizar el valor incrustado si existe
         value = embedded_value if embedded_value else raw_value
 
         # Si se encuentra un campo coincidente, asignar el valor
-        if matching_field:
-            extracted_data[matching_field] = value.strip() if value else ""
+        if match and match.confidence >= confidences.get(match.field, 0):
+            extracted_data[match.field] = value.strip() if value else ""
+            confidences[match.field] = match.confidence
 
     return extracted_data
 
 # === Base de datos ===
 
+def _insert_record(cursor, table, data, timestamp):
+    """Inserta el registro con el cursor recibido (sin confirmar) y retorna su ID."""
+    if table == "invoices":
+        cursor.execute(
+            """
+            INSERT INTO invoices (client_name, client_address, supplier_name, supplier_address, invoice_number, 
+            invoice_date, total_invoice, products, timestamp) 
+            OUTPUT INSERTED.id
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                data.get("client_name"), data.get("client_address"), data.get("supplier_name"), data.get("supplier_address"),
+                data.get("invoice_number"), transform_date_for_sqlserver(data.get("invoice_date")), data.get("total_invoice"), data.get("products"), timestamp
+            ),
+        )
+        # Recuperar el ID insertado para la tabla de invoices
+        return cursor.fetchone()[0]
+
+    elif table == "information":
+        cursor.execute(
+            """
+            INSERT INTO information (description, summary, sentiment_analysis, timestamp) 
+            OUTPUT INSERTED.id
+            VALUES (?, ?, ?, ?)
+            """,
+            (
+                data.get("description"), data.get("summary"), data.get("sentiment_analysis"), timestamp
+            ),
+        )
+        # Recuperar el ID insertado para la tabla de information
+        return cursor.fetchone()[0]
+
 def save_to_db(table, data):
     """
     Guarda datos en la base de datos según la tabla especificada y retorna el ID del registro.
@@ -151,43 +487,26 @@ def save_to_db(table, data):
     Returns:
         int: ID del registro recién insertado
     """
+    return save_many_to_db([(table, data)])[0]
+
+def save_many_to_db(records):
+    """
+    Guarda varios registros en una sola transacción: se insertan todos o ninguno.
+
+    Args:
+        records (list): Pares (tabla, datos) a insertar
+
+    Returns:
+        list: IDs de los registros insertados, en el mismo orden
+    """
     conn = get_db_connection()
     cursor = conn.cursor()
     timestamp = datetime.now()
 
     try:
-        if table == "invoices":
-            cursor.execute(
-                """
-                INSERT INTO invoices (client_name, client_address, supplier_name, supplier_address, invoice_number, 
-                invoice_date, total_invoice, products, timestamp) 
-                OUTPUT INSERTED.id
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    data.get("client_name"), data.get("client_address"), data.get("supplier_name"), data.get("supplier_address"),
-                    data.get("invoice_number"), transform_date_for_sqlserver(data.get("invoice_date")), data.get("total_invoice"), data.get("products"), timestamp
-                ),
-            )
-            # Recuperar el ID insertado para la tabla de invoices
-            inserted_id = cursor.fetchone()[0]
-        
-        elif table == "information":
-            cursor.execute(
-                """
-                INSERT INTO information (description, summary, sentiment_analysis, timestamp) 
-                OUTPUT INSERTED.id
-                VALUES (?, ?, ?, ?)
-                """,
-                (
-                    data.get("description"), data.get("summary"), data.get("sentiment_analysis"), timestamp
-                ),
-            )
-            # Recuperar el ID insertado para la tabla de information
-            inserted_id = cursor.fetchone()[0]
-        
+        inserted_ids = [_insert_record(cursor, table, data, timestamp) for table, data in records]
         conn.commit()
-        return inserted_id
+        return inserted_ids
     
     except Exception as e:
         # Manejar cualquier error de inserción
@@ -199,25 +518,104 @@ def save_to_db(table, data):
 
 # === Función principal ===
 
-async def analyze_document(file: UploadFile):
+# Palabras clave para clasificación
+INVOICE_KEYWORDS = {"invoice_date", "invoice_number", "client_name", "total_invoice"}
+INFORMATION_KEYWORDS = {"description", "summary"}
+
+def classify_document(response):
     """
-    Función principal para analizar un archivo y guardar los resultados en la base de datos.
+    Extrae los campos de la respuesta de Textract y decide la tabla de destino.
+
+    Returns:
+        tuple: (tabla, campos extraídos)
     """
-    response = analyze_document_with_textract(file)
     extracted_data = extract_data_from_textract_response(response)
-
-    # Palabras clave para clasificación
-    invoice_keywords = {"invoice_date", "invoice_number", "client_name", "total_invoice"}
-    information_keywords = {"description", "summary"}
-
     extract_fields = extract_fields_data(extracted_data, KEYWORD_MAPPING)
     data_keys = set(extract_fields.keys())
 
-    print("Datos extraídos:", extract_fields)
+    table = "invoices" if data_keys & INVOICE_KEYWORDS else "information"
+    return table, extract_fields
 
-    if data_keys & invoice_keywords:
-        record_id = save_to_db("invoices", extract_fields)
+def _analysis_result(table, record_id):
+    if table == "invoices":
         return {"message": "Factura almacenada en la base de datos.", "id": record_id}
-    else:
-        record_id = save_to_db("information", extract_fields)
-        return {"message": "Información almacenada en la base de datos.", "id": record_id}
+    return {"message": "Información almacenada en la base de datos.", "id": record_id}
+
+def analyze_document_content(file_content: bytes):
+    """
+    Versión síncrona de `analyze_document` a partir del contenido del archivo (la usan
+    los trabajos en segundo plano).
+    """
+    response = call_textract_limited(file_content)
+    table, extract_fields = classify_document(response)
+    return _analysis_result(table, save_to_db(table, extract_fields))
+
+async def analyze_document(file: UploadFile):
+    """
+    Función principal para analizar un archivo y guardar los resultados en la base de datos.
+    Textract y la base de datos se llaman en sus ejecutores, fuera del event loop.
+    """
+    response = await run_textract(await file.read())
+    table, extract_fields = classify_document(response)
+    record_id = await run_db(save_to_db, table, extract_fields)
+    return _analysis_result(table, record_id)
+
+# Tipos de archivo que acepta el análisis de documentos
+ALLOWED_DOCUMENT_TYPES = ["application/pdf", "image/jpeg", "image/png"]
+
+async def _analyze_batch_file(index: int, document: tuple, semaphore: asyncio.Semaphore) -> dict:
+    """Analiza un archivo del lote sin guardarlo; los errores quedan en el resultado del archivo."""
+    filename, content_type, content = document
+    result = {"index": index, "filename": filename}
+    if content_type not in ALLOWED_DOCUMENT_TYPES:
+        return {**result, "status": "error", "status_code": 400, "error": f"Tipo de archivo no permitido: {content_type}."}
+    try:
+        async with semaphore:
+            response = await run_textract(content)
+        table, extract_fields = classify_document(response)
+        return {**result, "status": "analyzed", "table": table, "data": extract_fields}
+    except HTTPException as e:
+        return {**result, "status": "error", "status_code": e.status_code, "error": e.detail}
+    except Exception as e:
+        return {**result, "status": "error", "status_code": 500, "error": str(e)}
+
+async def analyze_documents_batch(documents: List[tuple], concurrency: int = ANALYZE_BATCH_CONCURRENCY) -> AsyncIterator[dict]:
+    """
+    Analiza varios archivos a la vez (hasta `concurrency`) y genera el resultado de cada uno
+    apenas está listo, en orden de finalización. Al terminar guarda todos los documentos
+    analizados en una sola transacción y genera un resumen con los IDs de cada archivo
+    (`committed` es False si la inserción falló y no se guardó ninguno).
+
+    Args:
+        documents (List[tuple]): (nombre, tipo de contenido, bytes) de cada archivo, ya leídos:
+            los UploadFile se cierran al terminar el endpoint, antes de la respuesta en streaming.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    tasks = [asyncio.create_task(_analyze_batch_file(index, document, semaphore)) for index, document in enumerate(documents)]
+    analyzed = []
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            result = await next_result
+            if result["status"] == "analyzed":
+                analyzed.append(result)
+            yield result
+    finally:
+        # Si el cliente se desconecta se cancelan los análisis pendientes
+        for task in tasks:
+            task.cancel()
+
+    summary = {"status": "summary", "total": len(documents), "analyzed": len(analyzed), "failed": len(documents) - len(analyzed), "committed": False, "records": []}
+    if analyzed:
+        analyzed.sort(key=lambda result: result["index"])
+        try:
+            ids = await run_db(save_many_to_db, [(result["table"], result["data"]) for result in analyzed])
+        except Exception as e:
+            summary["error"] = f"No se guardó ningún documento del lote: {e}"
+            yield summary
+            return
+        summary["records"] = [
+            {"index": result["index"], "filename": result["filename"], "table": result["table"], "id": record_id}
+            for result, record_id in zip(analyzed, ids)
+        ]
+    summary["committed"] = True
+    yield summary
@@ -1,40 +1,474 @@
 from fastapi import HTTPException
-from io import BytesIO, StringIO
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
+from typing import BinaryIO, Callable, Iterator, Optional, Union
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import NoCredentialsError, PartialCredentialsError
+import math
 import os
+import threading
+import numpy as np
 import pandas as pd
-from app.db import get_db_connection
+from dotenv import load_dotenv
+from app.db import DBExecutor, get_db_connection
 from app.services.log_service import store_log
+from app.services.bulk_load_service import bulk_load_uploaded_files, UploadedFilesBulkLoader
+from app.services.upload_dedup_service import (
+    UPLOAD_DEDUP_ENABLED, UPLOAD_SKIP_EXISTING_ROWS, UploadInProgressError,
+    claim_upload, complete_upload, release_upload, fingerprint_bytes, fingerprint_file
+)
+from app.utils.csv_validation import ColumnRule, CsvValidator, Schema
+from app.utils.duplicate_detector import DuplicateDetector, hash_rows
+from app.utils.upload_parsers import (
+    EmptyUploadError, UnsupportedUploadError, detect_format, resolve_engine,
+    read_upload, iter_upload, profile_upload, is_blank_upload, text_frame
+)
+
+load_dotenv()
 
-s3_client = boto3.client("s3")
 BUCKET_NAME = os.getenv("AWS_BUCKET_NAME")
 
-def handle_file_upload(contents: bytes, filename: str, param1: str = None, param2: str = None):
-    if not contents.strip():
+# Configuración de la subida a S3
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None  # Endpoint alternativo (por ejemplo, un S3 local)
+S3_MULTIPART_THRESHOLD_MB = float(os.getenv("S3_MULTIPART_THRESHOLD_MB", "8"))  # Tamaño desde el que se sube por partes
+S3_MULTIPART_CHUNK_MB = float(os.getenv("S3_MULTIPART_CHUNK_MB", "8"))  # Tamaño de cada parte (mínimo 5 MB en S3)
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "10"))  # Partes en paralelo por archivo
+S3_UPLOAD_WORKERS = int(os.getenv("S3_UPLOAD_WORKERS", "4"))  # Archivos subiéndose a la vez
+# Cada parte en vuelo usa una conexión: el pool cubre todas las subidas simultáneas
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", str(S3_MAX_CONCURRENCY * S3_UPLOAD_WORKERS)))
+
+s3_client = boto3.client(
+    "s3",
+    endpoint_url=S3_ENDPOINT_URL,
+    config=Config(max_pool_connections=S3_MAX_POOL_CONNECTIONS)
+)
+s3_transfer_config = TransferConfig(
+    multipart_threshold=int(S3_MULTIPART_THRESHOLD_MB * 1024 * 1024),
+    multipart_chunksize=int(S3_MULTIPART_CHUNK_MB * 1024 * 1024),
+    max_concurrency=S3_MAX_CONCURRENCY,
+    use_threads=True
+)
+# Al subir desde bytes o un archivo abierto, boto3 mantiene a lo sumo 10 partes en memoria
+# (y con ello en vuelo); cada subida usa hasta S3_MAX_CONCURRENCY * S3_MULTIPART_CHUNK_MB
+s3_transfer_config.max_in_memory_upload_chunks = max(10, S3_MAX_CONCURRENCY)
+
+# Las subidas a S3 corren en estos hilos mientras el hilo de la petición inserta en la base de datos
+_s3_executor = ThreadPoolExecutor(max_workers=S3_UPLOAD_WORKERS, thread_name_prefix="s3-upload")
+_s3_stats_lock = threading.Lock()
+_s3_stats = {"in_flight": 0, "completed": 0, "failed": 0, "compensated": 0}
+
+# Lectura, validación y subida a S3 de las peticiones síncronas. Tiene su propio ejecutor para no
+# ocupar los hilos de run_db (dimensionados al pool de conexiones) con trabajo de CPU y de red
+UPLOAD_MAX_CONCURRENCY = int(os.getenv("UPLOAD_MAX_CONCURRENCY", "4"))  # Archivos procesándose a la vez
+upload_executor = DBExecutor(max_workers=UPLOAD_MAX_CONCURRENCY, thread_name_prefix="upload")
+
+# Subida en streaming: los archivos mayores al umbral se procesan por bloques
+UPLOAD_STREAM_THRESHOLD_MB = float(os.getenv("UPLOAD_STREAM_THRESHOLD_MB", "50"))
+UPLOAD_STREAM_MEMORY_MB = float(os.getenv("UPLOAD_STREAM_MEMORY_MB", "256"))  # Memoria objetivo por subida
+UPLOAD_STREAM_TMP_DIR = os.getenv("UPLOAD_STREAM_TMP_DIR") or None  # Directorio de las particiones de hashes
+
+# Motor de lectura por defecto: auto (pyarrow si está instalado), pandas o pyarrow
+UPLOAD_PARSER_ENGINE = os.getenv("UPLOAD_PARSER_ENGINE", "auto")
+
+# Validación de los CSV: valores con errores antes de detenerse y filas informadas por error
+UPLOAD_VALIDATION_MAX_ERRORS = int(os.getenv("UPLOAD_VALIDATION_MAX_ERRORS", "1000"))
+UPLOAD_VALIDATION_MAX_ROWS = int(os.getenv("UPLOAD_VALIDATION_MAX_ROWS", "20"))
+
+# Esquema de los CSV que se cargan en dbo.uploaded_files
+UPLOADED_FILES_SCHEMA = Schema([ColumnRule("column1"), ColumnRule("column2")], unique_rows=True)
+
+# Bytes de memoria que ocupa un DataFrame de texto por cada byte del CSV (estimación)
+DATAFRAME_BYTES_PER_CSV_BYTE = 8
+# Bytes leídos del inicio del archivo para estimar el largo de las filas
+STREAM_SAMPLE_BYTES = 64 * 1024
+
+def handle_file_upload(
+    contents: bytes,
+    filename: str,
+    param1: str = None,
+    param2: str = None,
+    skip_existing_rows: bool = UPLOAD_SKIP_EXISTING_ROWS,
+    engine: str = UPLOAD_PARSER_ENGINE
+):
+    # isspace() recorre el contenido sin copiarlo (strip() duplicaría el archivo en memoria)
+    if not contents or contents.isspace():
         raise HTTPException(status_code=400, detail="El archivo está vacío.")
     
-    if not filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail="El archivo no es un CSV.")
-    
-    validation_results = validate_csv(contents)
-    if validation_results:
-        raise HTTPException(status_code=400, detail=f"Errores de validación: {validation_results}")
-    
-    store_csv_data(contents, param1, param2)
+    upload_format, engine = _upload_format(filename, engine)
     
+    # Un archivo con el mismo contenido que una carga anterior no se vuelve a procesar
     s3_key = f"files/file_upload/{filename}"
-    upload_result = upload_file_to_s3(contents, s3_key)
+    digest = fingerprint_bytes(contents) if UPLOAD_DEDUP_ENABLED else None
+    if digest is not None:
+        original = _claim_upload(digest, filename, s3_key, len(contents))
+        if original is not None:
+            return _duplicate_result(original)
+
+    with _release_on_error(digest):
+        # El archivo se interpreta una sola vez: el DataFrame se valida y la carga masiva
+        # recibe los mismos datos (con pyarrow, la tabla de Arrow sin pasar por pandas)
+        df, columnar = parse_upload(contents, upload_format, engine)
+
+        validation_results = validate_csv(df)
+        if validation_results:
+            raise HTTPException(status_code=400, detail=f"Errores de validación: {validation_results}")
+
+        # A S3 se suben los bytes originales, sin volver a serializar, mientras se insertan las
+        # filas; la inserción se confirma solo si la subida terminó bien
+        upload = start_s3_upload(contents, s3_key)
+        try:
+            store_csv_data(
+                columnar, param1, param2,
+                before_commit=_before_commit(upload, digest),
+                skip_existing_rows=skip_existing_rows
+            )
+        except Exception:
+            discard_s3_upload(upload, s3_key)
+            raise
+        del df, columnar
+        upload_result = upload.result()
     
     return {
         "upload_result": upload_result,
         "validation_results": validation_results
     }
 
-def upload_file_to_s3(contents: bytes, s3_key: str):
+def _upload_format(filename: str, engine: str) -> tuple:
+    """Formato del archivo según su extensión y motor con el que se lee."""
+    upload_format = detect_format(filename)
+    if upload_format is None:
+        raise HTTPException(status_code=400, detail="El formato del archivo no es compatible (se aceptan .csv, .csv.gz, .csv.zst y .parquet).")
+    try:
+        return upload_format, resolve_engine(engine, upload_format)
+    except UnsupportedUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _claim_upload(digest: bytes, filename: str, s3_key: str, size: int) -> Optional[dict]:
+    """Reserva la huella del archivo; retorna la carga original si es un duplicado exacto."""
+    try:
+        return claim_upload(digest, filename, s3_key, size)
+    except UploadInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        message = f"Ocurrió un error al verificar si el archivo ya fue cargado: {e}"
+        store_log("CARGA_DOCUMENTO", message, "ERROR")
+        raise HTTPException(status_code=500, detail=message)
+
+@contextmanager
+def _release_on_error(digest: Optional[bytes]):
+    """Libera la huella reservada si la carga no llega a confirmarse."""
+    try:
+        yield
+    except BaseException:
+        if digest is not None:
+            release_upload(digest)
+        raise
+
+def _before_commit(upload: Optional[Future], digest: Optional[bytes]) -> Callable[[UploadedFilesBulkLoader], None]:
+    """Pasos en la transacción de la inserción: esperar la subida a S3 y registrar la huella."""
+    def check(loader: UploadedFilesBulkLoader):
+        if upload is not None:
+            upload.result()
+        if digest is not None:
+            complete_upload(loader.cursor, digest, loader.loaded, loader.loaded - loader.skipped)
+    return check
+
+def _duplicate_result(original: dict) -> dict:
+    store_log("CARGA_DOCUMENTO", f"El archivo tiene el mismo contenido que {original['s3_key']} (cargado el {original['ingested_at']}); se omite la carga.", "INFO")
+    return {
+        "upload_result": {
+            "message": "El archivo ya fue cargado anteriormente; no se volvió a procesar.",
+            "duplicate_of": original
+        },
+        "validation_results": []
+    }
+
+def _stored_message(result: dict) -> str:
+    if result["skipped"]:
+        return (
+            f"Archivo procesado y almacenado exitosamente ({result['rows'] - result['skipped']} filas nuevas de "
+            f"{result['rows']}, {result['skipped']} ya existentes, en {result['seconds']} s)."
+        )
+    return f"Archivo procesado y almacenado exitosamente ({result['rows']} filas en {result['seconds']} s)."
+
+def parse_upload(contents: bytes, upload_format: tuple, engine: str) -> tuple:
+    """Lee el archivo con el motor indicado. Retorna (DataFrame para validar, datos para la carga)."""
+    try:
+        return read_upload(contents, upload_format, engine, UPLOADED_FILES_SCHEMA.names)
+    except EmptyUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        message = f"Ocurrió un error al validar el archivo: {e}"
+        store_log("CARGA_DOCUMENTO", message, "ERROR")
+        raise HTTPException(status_code=500, detail=message)
+
+def parse_csv(contents: bytes) -> pd.DataFrame:
+    """Interpreta el CSV directamente desde los bytes (sin decodificar a str ni copiar a StringIO)."""
+    try:
+        return pd.read_csv(BytesIO(contents), encoding="utf-8")
+    except Exception as e:
+        message = f"Ocurrió un error al validar el archivo: {e}"
+        store_log("CARGA_DOCUMENTO", message, "ERROR")
+        raise HTTPException(status_code=500, detail=message)
+
+def _plan_stream(estimated_rows: float, line_bytes: float, memory_bytes: float) -> tuple:
+    """
+    Reparte la memoria objetivo: la mitad para el bloque de filas en proceso y la otra
+    mitad para revisar una partición de hashes de filas (8 bytes por fila).
+
+    Returns:
+        tuple: (filas por bloque, particiones de hashes)
+    """
+    chunk_rows = max(1000, int(memory_bytes / 2 / (line_bytes * DATAFRAME_BYTES_PER_CSV_BYTE)))
+    partitions = max(1, math.ceil(estimated_rows * 8 / (memory_bytes / 2)))
+    return chunk_rows, partitions
+
+def _row_hashes(columnar) -> np.ndarray:
+    # Se hashea el texto leído (no la vista para validar, cuyos tipos cambian entre bloques)
+    return hash_rows(text_frame(columnar, UPLOADED_FILES_SCHEMA.names).astype(str))
+
+def _confirm_duplicates(chunks: Iterator, candidates: set, limit: int) -> list:
+    """
+    Vuelve a leer el archivo comparando solo las filas cuyo hash se repitió; descarta
+    colisiones de hash. Retorna las filas (desde 1) que repiten una anterior, hasta `limit`.
+    """
+    candidate_array = np.fromiter(candidates, dtype=np.uint64, count=len(candidates))
+    seen = set()
+    repeated = []
+    offset = 0
+    for _, columnar in chunks:
+        chunk = text_frame(columnar, UPLOADED_FILES_SCHEMA.names).astype(str)
+        positions = np.flatnonzero(np.isin(hash_rows(chunk), candidate_array))
+        for position, row in zip(positions, chunk.iloc[positions].itertuples(index=False, name=None)):
+            if row in seen:
+                repeated.append(offset + int(position) + 1)
+                if len(repeated) >= limit:
+                    return repeated
+            seen.add(row)
+        offset += len(chunk)
+    return repeated
+
+def handle_file_upload_stream(
+    fileobj: BinaryIO,
+    filename: str,
+    param1: str = None,
+    param2: str = None,
+    memory_mb: float = UPLOAD_STREAM_MEMORY_MB,
+    skip_existing_rows: bool = UPLOAD_SKIP_EXISTING_ROWS,
+    engine: str = UPLOAD_PARSER_ENGINE
+):
+    """
+    Procesa un archivo grande sin cargarlo completo en memoria: se lee por bloques, cada
+    bloque se valida y se inserta en la misma transacción, los duplicados se buscan con
+    hashes particionados en disco y el mismo archivo se sube a S3 por partes al mismo tiempo.
+    Si la validación falla la transacción se revierte, igual que en `handle_file_upload`.
+
+    Args:
+        fileobj (BinaryIO): Archivo abierto y posicionable (el de UploadFile).
+        memory_mb (float): Memoria objetivo del procesamiento.
+    """
+    upload_format, engine = _upload_format(filename, engine)
+    if is_blank_upload(fileobj, upload_format):
+        raise HTTPException(status_code=400, detail="El archivo está vacío.")
+
+    file_size = fileobj.seek(0, os.SEEK_END)
+    fileobj.seek(0)
+    estimated_rows, line_bytes = profile_upload(fileobj, upload_format, STREAM_SAMPLE_BYTES)
+    chunk_rows, partitions = _plan_stream(estimated_rows, line_bytes, memory_mb * 1024 * 1024)
+
+    def read_chunks():
+        block_bytes = max(1024 * 1024, int(chunk_rows * line_bytes))
+        return iter_upload(fileobj, upload_format, engine, UPLOADED_FILES_SCHEMA.names, chunk_rows, block_bytes)
+
+    s3_key = f"files/file_upload/{filename}"
+    digest = fingerprint_file(fileobj) if UPLOAD_DEDUP_ENABLED else None
+    if digest is not None:
+        original = _claim_upload(digest, filename, s3_key, file_size)
+        if original is not None:
+            return _duplicate_result(original)
+
+    with _release_on_error(digest):
+        conn = get_db_connection()
+        # Con un lector independiente del archivo, S3 lo recibe mientras se valida e inserta
+        s3_reader = _PositionalReader.open(fileobj)
+        upload = start_s3_upload(s3_reader, s3_key) if s3_reader is not None else None
+
+        loader = None
+        try:
+            loader = UploadedFilesBulkLoader(conn, skip_existing=skip_existing_rows)
+            # Las filas completas repetidas se buscan con DuplicateDetector, en disco
+            validator = _csv_validator(check_unique_rows=False)
+            with DuplicateDetector(partitions, UPLOAD_STREAM_TMP_DIR) as detector:
+                for chunk, columnar in read_chunks():
+                    if not validator.check(chunk):
+                        break
+                    detector.add(_row_hashes(columnar))
+                    # Con errores el archivo se rechaza: se deja de insertar
+                    if validator.clean:
+                        loader.add(columnar)
+
+                report = validator.report()
+                duplicate_rows = []
+                if report.valid:
+                    candidates = detector.duplicate_hashes()
+                    if candidates:
+                        duplicate_rows = _confirm_duplicates(read_chunks(), candidates, UPLOAD_VALIDATION_MAX_ROWS)
+
+            validation_results = report.messages()
+            if duplicate_rows:
+                rows = ", ".join(str(row) for row in duplicate_rows)
+                if len(duplicate_rows) >= UPLOAD_VALIDATION_MAX_ROWS:
+                    rows += ", ..."
+                validation_results.append(f"El archivo contiene registros duplicados (filas {rows}).")
+            if validation_results:
+                raise HTTPException(status_code=400, detail=f"Errores de validación: {validation_results}")
+
+            # La inserción se confirma solo si la subida a S3 terminó bien
+            result = loader.finish(_before_commit(upload, digest))
+            store_log("CARGA_DOCUMENTO", _stored_message(result), "INFO")
+        except HTTPException:
+            if loader is not None:
+                loader.abort()
+            if upload is not None:
+                discard_s3_upload(upload, s3_key)
+            raise
+        except Exception as e:
+            if loader is not None:
+                loader.abort()
+            if upload is not None:
+                discard_s3_upload(upload, s3_key)
+            message = f"Ocurrió un error al almacenar el archivo: {e}"
+            store_log("CARGA_DOCUMENTO", message, "ERROR")
+            raise HTTPException(status_code=500, detail=message)
+        finally:
+            conn.close()
+
+        if upload is not None:
+            upload_result = upload.result()
+        else:
+            # Sin lector independiente el archivo se sube al terminar la inserción
+            fileobj.seek(0)
+            upload_result = upload_file_to_s3(fileobj, s3_key)
+
+        return {
+            "upload_result": upload_result,
+            "validation_results": []
+        }
+
+class _PositionalReader:
+    """
+    Lector de solo lectura sobre el descriptor de un archivo con su propia posición
+    (os.pread): S3 puede leer el archivo mientras pandas lo recorre con el objeto original.
+    """
+
+    def __init__(self, fd: int):
+        self._fd = fd
+        self._position = 0
+
+    @classmethod
+    def open(cls, fileobj: BinaryIO) -> Optional["_PositionalReader"]:
+        """Retorna None si el archivo no tiene descriptor o la plataforma no tiene os.pread."""
+        if not hasattr(os, "pread"):
+            return None
+        try:
+            fileobj.flush()
+            return cls(fileobj.fileno())
+        except (AttributeError, OSError, ValueError):
+            return None
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = max(0, os.fstat(self._fd).st_size - self._position)
+        data = os.pread(self._fd, size, self._position)
+        self._position += len(data)
+        return data
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += os.fstat(self._fd).st_size
+        self._position = offset
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def seekable(self) -> bool:
+        return True
+
+    def readable(self) -> bool:
+        return True
+
+def _track_s3_upload(contents: Union[bytes, BinaryIO], s3_key: str):
+    try:
+        result = upload_file_to_s3(contents, s3_key)
+    except Exception:
+        with _s3_stats_lock:
+            _s3_stats["in_flight"] -= 1
+            _s3_stats["failed"] += 1
+        raise
+    with _s3_stats_lock:
+        _s3_stats["in_flight"] -= 1
+        _s3_stats["completed"] += 1
+    return result
+
+def start_s3_upload(contents: Union[bytes, BinaryIO], s3_key: str) -> Future:
+    """
+    Inicia la subida a S3 en segundo plano. `result()` retorna lo mismo que
+    `upload_file_to_s3` o lanza su HTTPException.
+    """
+    with _s3_stats_lock:
+        _s3_stats["in_flight"] += 1
+    return _s3_executor.submit(_track_s3_upload, contents, s3_key)
+
+def discard_s3_upload(upload: Future, s3_key: str):
+    """
+    Compensa una subida iniciada cuando el archivo no se almacenó: espera a que termine
+    y, si el objeto llegó a S3, lo elimina.
+    """
     try:
-        with BytesIO(contents) as file_data:
-            s3_client.upload_fileobj(file_data, BUCKET_NAME, s3_key)
+        upload.result()
+    except Exception:
+        return
+    try:
+        s3_client.delete_object(Bucket=BUCKET_NAME, Key=s3_key)
+        with _s3_stats_lock:
+            _s3_stats["compensated"] += 1
+        store_log("CARGA_DOCUMENTO", f"Se eliminó {BUCKET_NAME}/{s3_key} porque el archivo no se almacenó.", "INFO")
+    except Exception as e:
+        store_log("CARGA_DOCUMENTO", f"No se pudo eliminar {BUCKET_NAME}/{s3_key}: {e}", "ERROR")
+
+def get_upload_executor_stats() -> dict:
+    """Estadísticas del ejecutor de las subidas síncronas (en ejecución, pendientes y completadas)."""
+    return upload_executor.stats()
+
+def get_s3_upload_stats() -> dict:
+    """Configuración y contadores de las subidas a S3."""
+    with _s3_stats_lock:
+        stats = dict(_s3_stats)
+    stats.update({
+        "workers": S3_UPLOAD_WORKERS,
+        "max_concurrency": S3_MAX_CONCURRENCY,
+        "multipart_chunk_mb": S3_MULTIPART_CHUNK_MB,
+        "max_pool_connections": S3_MAX_POOL_CONNECTIONS,
+    })
+    return stats
+
+def upload_file_to_s3(contents: Union[bytes, BinaryIO], s3_key: str):
+    """
+    Sube a S3 los bytes del archivo o, en streaming, el archivo abierto (desde su posición
+    actual). Los archivos grandes se suben por partes en paralelo según s3_transfer_config.
+    """
+    try:
+        if isinstance(contents, (bytes, bytearray)):
+            with BytesIO(contents) as file_data:
+                s3_client.upload_fileobj(file_data, BUCKET_NAME, s3_key, Config=s3_transfer_config)
+        else:
+            s3_client.upload_fileobj(contents, BUCKET_NAME, s3_key, Config=s3_transfer_config)
         message = f"Archivo subido con éxito a {BUCKET_NAME}/{s3_key}"
         store_log("CARGA_DOCUMENTO", message, "INFO")
         return {"message": message}
@@ -55,52 +489,69 @@ def upload_file_to_s3(contents: bytes, s3_key: str):
         store_log("CARGA_DOCUMENTO", message, "ERROR")
         raise HTTPException(status_code=500, detail=message)
 
-def validate_csv(contents: bytes):
+def _csv_validator(check_unique_rows: Optional[bool] = None) -> CsvValidator:
+    return CsvValidator(
+        UPLOADED_FILES_SCHEMA,
+        max_errors=UPLOAD_VALIDATION_MAX_ERRORS,
+        max_rows=UPLOAD_VALIDATION_MAX_ROWS,
+        check_unique_rows=check_unique_rows
+    )
+
+def validate_csv(data: Union[pd.DataFrame, bytes]) -> list:
+    """
+    Valida el CSV ya interpretado (también acepta los bytes del archivo) contra
+    UPLOADED_FILES_SCHEMA. Retorna un mensaje por cada regla incumplida, con las filas
+    afectadas; lista vacía si el archivo es válido.
+    """
+    df = data if isinstance(data, pd.DataFrame) else parse_csv(data)
     try:
-        csv_file = StringIO(contents.decode("utf-8"))
-        df = pd.read_csv(csv_file)
-
-        validation_results = []
-        if df.shape[1] != 2:
-            validation_results.append("El archivo no tiene exactamente 2 columnas.")
-        if df.isnull().values.any():
-            validation_results.append("El archivo contiene valores vacíos.")
-        if not all(df.dtypes == 'object'):
-            validation_results.append("El archivo contiene tipos de datos incorrectos.")
-        if df.duplicated().any():
-            validation_results.append("El archivo contiene registros duplicados.")
-
-        return validation_results
+        validator = _csv_validator()
+        validator.check(df)
+        return validator.report().messages()
     except Exception as e:
         message = f"Ocurrió un error al validar el archivo: {e}"
         store_log("CARGA_DOCUMENTO", message, "ERROR")
         raise HTTPException(status_code=500, detail=message)
 
-def store_csv_data(contents: bytes, param1: str = None, param2: str = None):
+def store_csv_data(
+    data: Union[pd.DataFrame, bytes, "pa.Table"],
+    param1: str = None,
+    param2: str = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    before_commit: Optional[Callable[[UploadedFilesBulkLoader], object]] = None,
+    skip_existing_rows: bool = False
+) -> dict:
+    """
+    Almacena el CSV ya interpretado (DataFrame o tabla de Arrow; también acepta los bytes
+    del archivo) con la carga masiva por bloques de bulk_load_service. Si `before_commit` lanza una excepción
+    (por ejemplo, la subida a S3 falló), la inserción se revierte y la excepción se propaga.
+    Con `skip_existing_rows` solo se insertan las filas que aún no están en la tabla.
+    """
     try:
-        csv_file = StringIO(contents.decode("utf-8"))
-        df = pd.read_csv(csv_file)
+        df = pd.read_csv(BytesIO(data), encoding="utf-8") if isinstance(data, (bytes, bytearray)) else data
+        # La tabla de Arrow pasa tal cual: el cargador toma sus columnas por nombre
+        rows = df[['column1', 'column2']] if isinstance(df, pd.DataFrame) else df
 
         conn = get_db_connection()
-        cursor = conn.cursor()
-
         try:
-            for index, row in df.iterrows():
-                cursor.execute(
-                    "INSERT INTO uploaded_files (column1, column2) VALUES (?, ?)",
-                    (row['column1'], row['column2'])
-                )
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            raise e
+            if before_commit is None and not skip_existing_rows:
+                result = bulk_load_uploaded_files(conn, rows, progress=progress)
+            else:
+                loader = UploadedFilesBulkLoader(conn, progress=progress, total=len(df), skip_existing=skip_existing_rows)
+                try:
+                    loader.add(rows)
+                    result = loader.finish(before_commit)
+                except Exception:
+                    loader.abort()
+                    raise
         finally:
-            cursor.close()
             conn.close()
 
-        message = "Archivo procesado y almacenado exitosamente."
-        store_log("CARGA_DOCUMENTO", message, "INFO")
+        store_log("CARGA_DOCUMENTO", _stored_message(result), "INFO")
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
         message = f"Ocurrió un error al almacenar el archivo: {e}"
         store_log("CARGA_DOCUMENTO", message, "ERROR")
-        raise HTTPException(status_code=500, detail=message)
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=message)
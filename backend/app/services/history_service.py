@@ -1,8 +1,32 @@
 import pyodbc
-from typing import Optional, Dict, Any
+import base64
+import json
+import os
+import unicodedata
+from typing import Optional, Dict, Any, Iterator
 from datetime import datetime
-from app.db import get_db_connection
+from dotenv import load_dotenv
+from app.db import get_db_connection, run_db
+from app.services.log_service import add_log_listener, store_log
+from app.services.log_search_service import build_search_filter
+from app.utils.cache import TTLCache, MISSING
 from app.utils.date_utils import parse_datetime  # Nuevo módulo de utilidades para fechas
+from app.utils.enums.count_mode import CountMode
+from app.utils.export_writers import EXPORT_WRITERS
+
+load_dotenv()
+
+# Caché de conteos por conjunto de filtros normalizado
+HISTORY_COUNT_CACHE_TTL = float(os.getenv("HISTORY_COUNT_CACHE_TTL", "30"))
+HISTORY_COUNT_CACHE_SIZE = int(os.getenv("HISTORY_COUNT_CACHE_SIZE", "256"))
+
+_count_cache = TTLCache(max_size=HISTORY_COUNT_CACHE_SIZE, ttl=HISTORY_COUNT_CACHE_TTL)
+
+# Filas leídas por cada fetchmany durante la exportación
+HISTORY_EXPORT_BATCH = int(os.getenv("HISTORY_EXPORT_BATCH", "5000"))
+
+# Columnas de la exportación (mismos nombres que los registros de GET /history)
+EXPORT_COLUMNS = ["id", "type", "description", "log_type", "datetime"]
 
 async def get_filtered_history(
     level: Optional[str] = None,
@@ -10,10 +34,13 @@ async def get_filtered_history(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     page: int = 1,
-    page_size: int = 10
+    page_size: int = 10,
+    cursor: Optional[str] = None,
+    count_mode: CountMode = CountMode.EXACT
 ) -> Dict[str, Any]:
     """
     Obtiene el historial filtrado con paginación desde la base de datos SQL Server.
+    Si se recibe un cursor se usa paginación por búsqueda (keyset) en lugar de OFFSET.
     
     Args:
         level (Optional[str]): Nivel de log para filtrar.
@@ -22,6 +49,8 @@ async def get_filtered_history(
         end_date (Optional[datetime]): Fecha de fin para filtrar.
         page (int): Número de página para paginación.
         page_size (int): Tamaño de página para paginación.
+        cursor (Optional[str]): Cursor opaco devuelto en la página anterior.
+        count_mode (CountMode): Estrategia de conteo (exacto cacheado, estimado o sin conteo).
     
     Returns:
         Dict[str, Any]: Diccionario con información de paginación y registros.
@@ -32,6 +61,22 @@ async def get_filtered_history(
     # Validar parámetros de paginación
     _validate_pagination_params(page, page_size)
 
+    # Ejecutar las consultas en el ejecutor de base de datos sin bloquear el event loop
+    if cursor:
+        after = decode_cursor(cursor)
+        return await run_db(_query_history_after, level, description, start_date, end_date, after, page_size)
+    return await run_db(_query_history, level, description, start_date, end_date, page, page_size, CountMode(count_mode))
+
+def _query_history(
+    level: Optional[str],
+    description: Optional[str],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    page: int,
+    page_size: int,
+    count_mode: CountMode = CountMode.EXACT
+) -> Dict[str, Any]:
+    """Ejecuta las consultas bloqueantes del historial (conteo y página)."""
     # Obtener conexión a la base de datos
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -40,32 +85,147 @@ async def get_filtered_history(
         # Construir consulta base y parámetros
         base_query, params = _build_base_query(level, description, start_date, end_date)
 
-        # Obtener total de registros
-        total_records = _get_total_records(cursor, base_query, params)
+        if count_mode == CountMode.NONE:
+            # Sin conteo: se pide un registro extra para saber si hay más páginas
+            history = _fetch_paginated_records(cursor, base_query, params, page, page_size + 1)
+            has_more = len(history) > page_size
+            history = history[:page_size]
+            total_records = None
+            total_pages = None
+        else:
+            # Obtener total de registros (exacto cacheado o estimado)
+            filters = _normalize_filters(level, description, start_date, end_date)
+            total_records, count_mode = _count_records(cursor, base_query, params, filters, count_mode)
 
-        # Calcular paginación
-        total_pages = _calculate_total_pages(total_records, page_size)
+            # Calcular paginación
+            total_pages = _calculate_total_pages(total_records, page_size)
 
-        # Obtener registros paginados
-        history = _fetch_paginated_records(cursor, base_query, params, page, page_size)
+            # Obtener registros paginados
+            history = _fetch_paginated_records(cursor, base_query, params, page, page_size)
+            has_more = page < total_pages
 
         return {
             "total_records": total_records,
             "total_pages": total_pages,
             "current_page": page,
             "page_size": page_size,
-            "records": history
+            "records": history,
+            "has_more": has_more,
+            "count_mode": count_mode.value
         }
 
     except Exception as e:
-        # Logging de errores (considera usar un logger profesional)
-        print(f"Error en get_filtered_history: {e}")
+        store_log("INTERACCION_USUARIO", f"Error al consultar el historial: {e}", "ERROR")
         raise
     finally:
         # Asegurar cierre de cursor y conexión
         cursor.close()
         conn.close()
 
+def _query_history_after(
+    level: Optional[str],
+    description: Optional[str],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    after: tuple,
+    page_size: int
+) -> Dict[str, Any]:
+    """Ejecuta la consulta bloqueante de una página posterior al cursor (sin conteo)."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        base_query, params = _build_base_query(level, description, start_date, end_date)
+        history = _fetch_records_after(cursor, base_query, params, after, page_size + 1)
+
+        # Se pide un registro extra para saber si existe una página siguiente
+        has_more = len(history) > page_size
+        history = history[:page_size]
+
+        return {
+            "total_records": None,
+            "total_pages": None,
+            "current_page": None,
+            "page_size": page_size,
+            "records": history,
+            "has_more": has_more,
+            "count_mode": CountMode.NONE.value,
+            "next_cursor": encode_cursor(history[-1]) if has_more else None
+        }
+
+    except Exception as e:
+        store_log("INTERACCION_USUARIO", f"Error al consultar el historial por cursor: {e}", "ERROR")
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+def export_filtered_history(
+    level: Optional[str] = None,
+    description: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    export_format: str = "csv",
+    batch_size: int = HISTORY_EXPORT_BATCH
+) -> Iterator[bytes]:
+    """
+    Prepara la exportación completa del historial filtrado. Los filtros se validan de
+    inmediato; las filas se leen con fetchmany y se escriben lote a lote, así que la
+    memoria no crece con el tamaño del resultado.
+
+    Args:
+        export_format (str): csv, ndjson o xlsx.
+        batch_size (int): Filas por cada fetchmany.
+
+    Returns:
+        Iterator[bytes]: Fragmentos del archivo listos para enviarse.
+
+    Raises:
+        ValueError: Si los filtros o el formato no son válidos.
+    """
+    export_format = getattr(export_format, "value", export_format)
+    if export_format not in EXPORT_WRITERS:
+        raise ValueError(f"Formato no válido. Los formatos permitidos son: {', '.join(EXPORT_WRITERS)}.")
+    writer = EXPORT_WRITERS[export_format][0]
+
+    base_query, params = _build_base_query(level, description, start_date, end_date)
+    query = f"{base_query} ORDER BY timestamp DESC, id DESC"
+    return writer(EXPORT_COLUMNS, _iter_record_batches(query, params, batch_size))
+
+def _iter_record_batches(query: str, params: list, batch_size: int) -> Iterator[list]:
+    """Recorre el resultado con un cursor del servidor entregando lotes de filas."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [tuple(row) for row in rows]
+    finally:
+        # También se ejecuta si el cliente corta la descarga
+        cursor.close()
+        conn.close()
+
+def encode_cursor(record: Dict[str, Any]) -> str:
+    """Codifica el último registro visto (timestamp, id) en un cursor opaco."""
+    timestamp = record["datetime"]
+    payload = {
+        "t": timestamp.isoformat() if isinstance(timestamp, datetime) else str(timestamp),
+        "id": record["id"]
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    """Decodifica un cursor opaco en la tupla (timestamp, id)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), int(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("El cursor de paginación no es válido.")
+
 def _validate_pagination_params(page: int, page_size: int) -> None:
     """Validar parámetros de paginación."""
     if page < 1:
@@ -91,8 +251,14 @@ def _build_base_query(
         base_query += " AND level = ?"
         params.append(level)
 
-    # Añadir filtro de descripción
+    # Añadir filtro de descripción: el índice de trigramas reduce los candidatos
+    # y el LIKE verifica la coincidencia exacta
     if description:
+        search_filter = build_search_filter(description)
+        if search_filter:
+            search_query, search_params = search_filter
+            base_query += search_query
+            params.extend(search_params)
         base_query += " AND message LIKE ?"
         params.append(f"%{description}%")
 
@@ -109,6 +275,101 @@ def _build_base_query(
 
     return base_query, params
 
+def _normalize_filters(
+    level: Optional[str],
+    description: Optional[str],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
+) -> tuple:
+    """Normaliza los filtros para usarlos como clave de la caché de conteos."""
+    return (
+        str(level.value if hasattr(level, "value") else level) if level else None,
+        description or None,
+        parse_datetime(start_date) if start_date else None,
+        parse_datetime(end_date) if end_date else None,
+    )
+
+def _count_records(cursor, base_query: str, params: list, filters: tuple, count_mode: CountMode) -> tuple:
+    """
+    Obtiene el total de registros según la estrategia pedida. Retorna (total, estrategia usada):
+    la estimación solo aplica sin filtros o con filtros de fecha; en otro caso se usa el conteo exacto.
+    """
+    level, description, start_date, end_date = filters
+    if count_mode == CountMode.ESTIMATED and level is None and description is None:
+        key = (CountMode.ESTIMATED.value, filters)
+        total = _count_cache.get(key)
+        if total is MISSING:
+            total = _estimate_total_records(cursor, start_date, end_date)
+            _count_cache.set(key, total)
+        return total, CountMode.ESTIMATED
+
+    key = (CountMode.EXACT.value, filters)
+    total = _count_cache.get(key)
+    if total is MISSING:
+        total = _get_total_records(cursor, base_query, params)
+        _count_cache.set(key, total)
+    return total, CountMode.EXACT
+
+def _estimate_total_records(cursor, start_date: Optional[datetime], end_date: Optional[datetime]) -> int:
+    """
+    Estima el total desde los metadatos de la tabla. Con rango de fechas se asume una
+    distribución uniforme entre el registro más antiguo y el más reciente.
+    """
+    cursor.execute("SELECT SUM(rows) FROM sys.partitions WHERE object_id = OBJECT_ID('dbo.logs') AND index_id IN (0, 1)")
+    total = cursor.fetchone()[0] or 0
+    if total == 0 or (start_date is None and end_date is None):
+        return total
+
+    # MIN y MAX se resuelven con un seek sobre el índice de timestamp
+    cursor.execute("SELECT MIN(timestamp), MAX(timestamp) FROM dbo.logs")
+    oldest, newest = cursor.fetchone()
+    if oldest is None:
+        return 0
+
+    lower = max(start_date, oldest) if start_date else oldest
+    upper = min(end_date, newest) if end_date else newest
+    if upper < lower:
+        return 0
+    span = (newest - oldest).total_seconds()
+    if span <= 0:
+        return total
+    return round(total * (upper - lower).total_seconds() / span)
+
+def _fold(text: str) -> str:
+    """Minúsculas y sin tildes, para comparar como lo haría una intercalación insensible."""
+    return "".join(c for c in unicodedata.normalize("NFD", text.casefold()) if unicodedata.category(c) != "Mn")
+
+def _invalidate_counts(rows: list) -> None:
+    """Descarta los conteos cacheados cuyos filtros coinciden con algún log recién escrito."""
+    if not len(_count_cache):
+        return
+    new_rows = [(level, _fold(message), timestamp) for level, message, log_type, timestamp in rows]
+
+    def affected(key) -> bool:
+        _, (level, description, start_date, end_date) = key
+        # Con comodines de LIKE no se puede evaluar en Python: se invalida por seguridad
+        term = None if description is None or any(c in description for c in "%_[") else _fold(description)
+        for row_level, row_message, row_timestamp in new_rows:
+            if level is not None and row_level != level:
+                continue
+            if term is not None and term not in row_message:
+                continue
+            if start_date is not None and row_timestamp < start_date:
+                continue
+            if end_date is not None and row_timestamp > end_date:
+                continue
+            return True
+        return False
+
+    _count_cache.invalidate_where(affected)
+
+# Los nuevos logs invalidan los conteos afectados
+add_log_listener(_invalidate_counts)
+
+def get_count_cache_stats() -> dict:
+    """Estadísticas de la caché de conteos del historial."""
+    return _count_cache.stats()
+
 def _get_total_records(cursor, base_query: str, params: list) -> int:
     """Obtener total de registros para la consulta."""
     count_query = f"SELECT COUNT(*) FROM ({base_query}) AS count_query"
@@ -128,12 +389,37 @@ def _fetch_paginated_records(
 ) -> list:
     """Obtener registros paginados."""
     offset = (page - 1) * page_size
-    query_with_pagination = f"{base_query} ORDER BY timestamp DESC OFFSET ? ROWS FETCH NEXT ? ROWS ONLY"
-    params.extend([offset, page_size])
+    query_with_pagination = f"{base_query} ORDER BY timestamp DESC, id DESC OFFSET ? ROWS FETCH NEXT ? ROWS ONLY"
+
+    cursor.execute(query_with_pagination, params + [offset, page_size])
+    return _rows_to_records(cursor.fetchall())
+
+def _fetch_records_after(
+    cursor,
+    base_query: str,
+    params: list,
+    after: tuple,
+    limit: int
+) -> list:
+    """
+    Obtiene los registros posteriores al cursor buscando directamente en el índice
+    (timestamp DESC, id DESC), sin recorrer las páginas anteriores.
+    """
+    after_timestamp, after_id = after
+    # El timestamp se relee de la fila del cursor para compararlo con la misma precisión
+    # de la columna; si la fila ya no existe se usa el valor codificado en el cursor
+    cursor_timestamp = "COALESCE((SELECT timestamp FROM dbo.logs WHERE id = ?), ?)"
+    query = (
+        f"{base_query} AND (timestamp < {cursor_timestamp} OR (timestamp = {cursor_timestamp} AND id < ?)) "
+        "ORDER BY timestamp DESC, id DESC OFFSET 0 ROWS FETCH NEXT ? ROWS ONLY"
+    )
+    params = params + [after_id, after_timestamp, after_id, after_timestamp, after_id, limit]
 
-    cursor.execute(query_with_pagination, params)
-    rows = cursor.fetchall()
+    cursor.execute(query, params)
+    return _rows_to_records(cursor.fetchall())
 
+def _rows_to_records(rows: list) -> list:
+    """Convierte las filas de dbo.logs al formato de respuesta."""
     return [
         {
             "id": row[0],
@@ -0,0 +1,136 @@
+import os
+from typing import BinaryIO, Optional, Union
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from app.db import DBExecutor
+from app.services.log_service import store_log
+from app.services.file_upload_service import (
+    handle_file_upload, handle_file_upload_stream, UPLOAD_STREAM_THRESHOLD_MB, UPLOAD_PARSER_ENGINE
+)
+from app.services.document_analysis_service import analyze_document_content
+from app.utils.enums.history_type import HistoryType
+from app.utils.enums.job_priority import JobPriority
+from app.utils.enums.job_type import JobType
+from app.utils.job_queue import Job, JobQueue, JobStore
+
+load_dotenv()
+
+# Configuración de la cola de trabajos en segundo plano
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # Trabajos procesados a la vez
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "100"))  # Trabajos pendientes antes de rechazar (503)
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "5"))  # Segundos antes del primer reintento (se duplica)
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", "3600"))  # Segundos que se conserva el estado de un trabajo terminado
+JOB_STORAGE_DIR = os.getenv("JOB_STORAGE_DIR", "job_store")  # Payloads y estado persistidos
+JOB_SUBMIT_WORKERS = int(os.getenv("JOB_SUBMIT_WORKERS", "4"))  # Payloads copiándose a disco a la vez al encolar
+
+# Orden de atención: menor valor, antes
+PRIORITY_ORDER = {JobPriority.HIGH: 0, JobPriority.NORMAL: 1, JobPriority.LOW: 2}
+PRIORITY_NAMES = {order: priority.value for priority, order in PRIORITY_ORDER.items()}
+
+# Tipo de historial con el que se registra cada tipo de trabajo
+JOB_HISTORY_TYPES = {JobType.UPLOAD: HistoryType.CARGA_DOCUMENTO, JobType.DOCUMENT_ANALYSIS: HistoryType.IA}
+
+
+def _run_upload(job: Job, payload_path: str) -> dict:
+    params = job.params
+    skip_existing_rows = params.get("skip_existing_rows", False)
+    engine = params.get("engine", UPLOAD_PARSER_ENGINE)
+    with open(payload_path, "rb") as fileobj:
+        if os.path.getsize(payload_path) > UPLOAD_STREAM_THRESHOLD_MB * 1024 * 1024:
+            return handle_file_upload_stream(
+                fileobj, params["filename"], params.get("param1"), params.get("param2"),
+                skip_existing_rows=skip_existing_rows, engine=engine
+            )
+        contents = fileobj.read()
+    return handle_file_upload(
+        contents, params["filename"], params.get("param1"), params.get("param2"), skip_existing_rows, engine
+    )
+
+
+def _run_document_analysis(job: Job, payload_path: str) -> dict:
+    with open(payload_path, "rb") as fileobj:
+        contents = fileobj.read()
+    result = analyze_document_content(contents)
+    store_log("IA", f"{result['message']} ID: {result['id']}", "INFO")
+    return result
+
+
+def _is_retryable(error: Exception) -> bool:
+    # Los errores del cliente (validación, archivo inválido) no cambian al reintentar; un 409
+    # (el mismo contenido se está cargando) se reintenta para terminar como duplicado y un 429
+    # (Textract saturado) para esperar su turno
+    return not (isinstance(error, HTTPException) and error.status_code < 500 and error.status_code not in (409, 429))
+
+
+# Cola compartida; sus hilos se inician en el ciclo de vida de la aplicación
+job_queue = JobQueue(
+    "jobs",
+    {
+        JobType.UPLOAD.value: _run_upload,
+        JobType.DOCUMENT_ANALYSIS.value: _run_document_analysis,
+    },
+    JobStore(JOB_STORAGE_DIR),
+    workers=JOB_WORKERS,
+    max_queued=JOB_QUEUE_MAX,
+    max_attempts=JOB_MAX_ATTEMPTS,
+    retry_backoff=JOB_RETRY_BACKOFF,
+    result_ttl=JOB_RESULT_TTL,
+    retryable=_is_retryable
+)
+
+# Copia de los payloads al encolar desde los endpoints (fuera del ejecutor de la base de datos)
+job_submit_executor = DBExecutor(max_workers=JOB_SUBMIT_WORKERS, thread_name_prefix="job-submit")
+
+
+def _public(job: Job) -> dict:
+    data = job.to_dict()
+    data["priority"] = PRIORITY_NAMES.get(job.priority, job.priority)
+    data["requested_by"] = job.params.get("requested_by")
+    return data
+
+
+def submit_job(
+    job_type: JobType,
+    payload: Union[bytes, BinaryIO],
+    params: dict,
+    priority: JobPriority = JobPriority.NORMAL
+) -> dict:
+    """
+    Persiste el archivo y encola el trabajo. `params` lleva los argumentos del servicio
+    y `requested_by` (usuario que lo solicitó).
+
+    Returns:
+        dict: Estado inicial del trabajo.
+
+    Raises:
+        JobQueueFullError: Si la cola está llena.
+    """
+    job_type, priority = JobType(job_type), JobPriority(priority)
+    job = job_queue.submit(job_type.value, params, payload, PRIORITY_ORDER[priority])
+    store_log(JOB_HISTORY_TYPES[job_type].value, f"Trabajo {job.id} encolado con prioridad {priority.value}.", "INFO")
+    return _public(job)
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    """Estado del trabajo, o None si no existe o ya expiró."""
+    job = job_queue.get(job_id)
+    return _public(job) if job is not None else None
+
+
+def get_job_stats() -> dict:
+    stats = job_queue.stats()
+    stats["submit_executor"] = job_submit_executor.stats()
+    stats["queued_by_priority"] = {
+        PRIORITY_NAMES.get(priority, priority): count for priority, count in stats["queued_by_priority"].items()
+    }
+    return stats
+
+
+def start_job_workers():
+    job_queue.start()
+
+
+def stop_job_workers():
+    job_submit_executor.shutdown()
+    job_queue.stop()
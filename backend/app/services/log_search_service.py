@@ -0,0 +1,133 @@
+import os
+import re
+import unicodedata
+from typing import Optional
+from dotenv import load_dotenv
+from app.db import get_db_connection
+from app.services.log_service import add_log_listener
+from app.utils.watermark_worker import IdHorizon, WatermarkWorker, safe_upper_bound
+
+load_dotenv()
+
+# Configuración del índice de trigramas para buscar en los mensajes de dbo.logs
+LOG_SEARCH_INDEX_ENABLED = os.getenv("LOG_SEARCH_INDEX_ENABLED", "false").lower() == "true"
+LOG_SEARCH_INDEX_BATCH = int(os.getenv("LOG_SEARCH_INDEX_BATCH", "5000"))  # Logs indexados por transacción
+LOG_SEARCH_MAX_TRIGRAMS = int(os.getenv("LOG_SEARCH_MAX_TRIGRAMS", "8"))  # Trigramas usados por búsqueda
+LOG_SEARCH_INDEX_LAG = float(os.getenv("LOG_SEARCH_INDEX_LAG", "5.0"))  # Segundos de margen tras MAX(id)
+
+# Caracteres con significado especial en LIKE; con ellos no se puede usar el índice
+LIKE_WILDCARDS = "%_["
+
+# Caracteres fuera del plano básico (emojis): ocupan dos unidades UTF-16 y un trigrama con
+# ellos no cabe en dbo.log_trigrams.trigram (NCHAR(3)), así que se indexan como U+FFFD
+_NON_BMP_CHARS = re.compile("[\U00010000-\U0010FFFF]")
+
+# Logs con id mayor a la marca de agua aún no están indexados y se revisan con LIKE
+WATERMARK_QUERY = "COALESCE((SELECT last_indexed_id FROM dbo.log_search_state WHERE id = 1), 0)"
+
+
+def fold_text(text: str) -> str:
+    """Minúsculas y sin tildes, igual para los mensajes indexados y para los términos buscados."""
+    return "".join(c for c in unicodedata.normalize("NFD", text.casefold()) if unicodedata.category(c) != "Mn")
+
+
+def extract_trigrams(text: str) -> set:
+    """Obtiene los trigramas (ventanas de 3 caracteres) de un texto normalizado."""
+    folded = _NON_BMP_CHARS.sub("\ufffd", fold_text(text or ""))
+    return {folded[i:i + 3] for i in range(len(folded) - 2)}
+
+
+def build_search_filter(description: str) -> Optional[tuple]:
+    """
+    Construye el filtro que reduce los candidatos usando el índice de trigramas.
+    El LIKE original se mantiene después como verificación final.
+
+    Returns:
+        Optional[tuple]: (fragmento SQL, parámetros) o None si el término no permite usar el índice.
+    """
+    if not LOG_SEARCH_INDEX_ENABLED or any(c in description for c in LIKE_WILDCARDS):
+        return None
+    trigrams = sorted(extract_trigrams(description))
+    if not trigrams:
+        return None
+
+    # Una muestra repartida a lo largo del término basta para acotar los candidatos
+    if len(trigrams) > LOG_SEARCH_MAX_TRIGRAMS:
+        step = len(trigrams) / LOG_SEARCH_MAX_TRIGRAMS
+        trigrams = [trigrams[int(i * step)] for i in range(LOG_SEARCH_MAX_TRIGRAMS)]
+
+    placeholders = ", ".join(["?"] * len(trigrams))
+    sql = (
+        f" AND (id > {WATERMARK_QUERY} OR id IN ("
+        f"SELECT log_id FROM dbo.log_trigrams WHERE trigram IN ({placeholders}) "
+        "GROUP BY log_id HAVING COUNT(*) = ?))"
+    )
+    return sql, trigrams + [len(trigrams)]
+
+
+def index_pending_logs(batch_size: int = LOG_SEARCH_INDEX_BATCH, horizon: Optional[IdHorizon] = None) -> int:
+    """
+    Indexa los logs posteriores a la marca de agua. Cada lote se inserta junto con la
+    nueva marca de agua en la misma transacción. Con `horizon` no se pasa del último id
+    seguro, para no saltar los INSERT con id menor que se confirman tarde.
+
+    Returns:
+        int: Número de logs indexados.
+    """
+    indexed = 0
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.fast_executemany = True
+        upper_bound = safe_upper_bound(cursor, horizon)
+        bound_sql, bound_params = ("AND id <= ? ", (upper_bound,)) if upper_bound is not None else ("", ())
+        while True:
+            cursor.execute(f"SELECT {WATERMARK_QUERY}")
+            watermark = cursor.fetchone()[0]
+
+            cursor.execute(
+                f"SELECT id, message FROM dbo.logs WHERE id > ? {bound_sql}ORDER BY id OFFSET 0 ROWS FETCH NEXT ? ROWS ONLY",
+                (watermark, *bound_params, batch_size)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            postings = [(trigram, row[0]) for row in rows for trigram in extract_trigrams(row[1])]
+            if postings:
+                cursor.executemany("INSERT INTO dbo.log_trigrams (trigram, log_id) VALUES (?, ?)", postings)
+            cursor.execute(
+                """
+                MERGE dbo.log_search_state AS target
+                USING (SELECT 1 AS id) AS source ON target.id = source.id
+                WHEN MATCHED THEN UPDATE SET last_indexed_id = ?
+                WHEN NOT MATCHED THEN INSERT (id, last_indexed_id) VALUES (1, ?);
+                """,
+                (rows[-1][0], rows[-1][0])
+            )
+            conn.commit()
+            indexed += len(rows)
+            if len(rows) < batch_size:
+                break
+        return indexed
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# Indexador compartido; se inicia en el ciclo de vida de la aplicación si está habilitado
+log_search_indexer = WatermarkWorker(
+    "log-search-indexer", index_pending_logs, enabled=LOG_SEARCH_INDEX_ENABLED, lag=LOG_SEARCH_INDEX_LAG
+)
+add_log_listener(log_search_indexer.notify)
+
+
+def start_log_search_indexer():
+    log_search_indexer.start()
+
+
+def stop_log_search_indexer():
+    log_search_indexer.stop()
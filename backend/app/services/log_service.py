@@ -1,30 +1,397 @@
+import asyncio
 import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Optional
+from dotenv import load_dotenv
 from app.db import get_db_connection
+from app.services.log_spool_service import log_spool
+from app.services.log_stream_service import log_broadcaster
+
+load_dotenv()
 
 # Configurar logging
 logging.basicConfig(filename='file_logs.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Configuración del escritor de logs en lotes
+LOG_BUFFER_SIZE = int(os.getenv("LOG_BUFFER_SIZE", "10000"))  # Máximo de logs pendientes en memoria
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "200"))  # Logs que disparan una escritura inmediata
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "1.0"))  # Segundos máximos entre escrituras
+LOG_OVERFLOW_POLICY = os.getenv("LOG_OVERFLOW_POLICY", "drop_oldest")  # block (solo hilos) | drop_oldest | spill
+LOG_BLOCK_TIMEOUT = float(os.getenv("LOG_BLOCK_TIMEOUT", "1.0"))  # Espera máxima con la política "block"
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "spill")
+
+# SQL Server admite hasta 2100 parámetros por sentencia (4 por fila)
+MAX_ROWS_PER_STATEMENT = 500
+
+
+def _in_event_loop() -> bool:
+    """Indica si se llama desde el hilo de un event loop en ejecución (p. ej. un endpoint async)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _build_multi_row_insert(row_count: int) -> str:
+    """Construye un INSERT de varias filas para la tabla de logs."""
+    values = ", ".join(["(?, ?, ?, ?)"] * row_count)
+    return f"INSERT INTO logs (level, message, log_type, timestamp) OUTPUT INSERTED.id VALUES {values}"
+
+
+# Funciones notificadas con cada lote de logs escrito en la base de datos
+_log_listeners = []
+
+
+def add_log_listener(listener):
+    """
+    Registra una función que recibe cada lote de logs ya escrito en la base de datos.
+
+    Args:
+        listener (callable): Recibe una lista de tuplas (level, message, log_type, timestamp).
+    """
+    _log_listeners.append(listener)
+
+
+def notify_log_listeners(rows: list, ids: Optional[list] = None):
+    """
+    Notifica a los listeners registrados; un error en uno no afecta a los demás.
+
+    Si se conocen los ids asignados por la base de datos, cada log también se publica
+    a los suscriptores en vivo (los eventos sin id no se transmiten).
+    """
+    if ids is not None and len(ids) == len(rows):
+        for log_id, row in zip(ids, rows):
+            log_broadcaster.publish(log_id, *row)
+    for listener in list(_log_listeners):
+        try:
+            listener(rows)
+        except Exception as e:
+            logging.error(f"Error al notificar el lote de logs: {e}")
+
+
+def write_log_rows(rows: list) -> list:
+    """
+    Inserta un lote de logs en la base de datos en una sola transacción.
+
+    Args:
+        rows (list): Tuplas (level, message, log_type, timestamp).
+
+    Returns:
+        list: Los ids asignados, en el mismo orden que `rows`.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    ids = []
+    try:
+        for start in range(0, len(rows), MAX_ROWS_PER_STATEMENT):
+            chunk = rows[start:start + MAX_ROWS_PER_STATEMENT]
+            params = [value for row in chunk for value in row]
+            cursor.execute(_build_multi_row_insert(len(chunk)), params)
+            # OUTPUT no garantiza el orden de las filas; la identidad sí sigue el orden de VALUES
+            ids.extend(sorted(row[0] for row in cursor.fetchall()))
+        conn.commit()
+        return ids
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+class LogWriter:
+    """
+    Escritor de logs en segundo plano. `store_log` encola los eventos en un búfer
+    acotado y un hilo los escribe en lotes por tamaño o por tiempo.
+    """
+
+    def __init__(
+        self,
+        buffer_size: int = LOG_BUFFER_SIZE,
+        batch_size: int = LOG_BATCH_SIZE,
+        flush_interval: float = LOG_FLUSH_INTERVAL,
+        overflow_policy: str = LOG_OVERFLOW_POLICY,
+        block_timeout: float = LOG_BLOCK_TIMEOUT,
+        writer=write_log_rows,
+        spool=None,
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Política de desbordamiento no válida. Las permitidas son: {', '.join(OVERFLOW_POLICIES)}.")
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self._writer = writer
+        self._spool = spool
+
+        self._buffer = deque()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._flush_requested = False
+        self._flushing = 0
+
+        # Contadores
+        self._queued = 0
+        self._flushed = 0
+        self._dropped = 0
+        self._spilled = 0
+        self._diverted = 0
+        self._failed = 0
+        self._batches = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # === Ciclo de vida ===
+
+    def start(self):
+        """Inicia el hilo que vacía el búfer."""
+        with self._condition:
+            if self.running:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Detiene el hilo después de escribir todos los logs pendientes."""
+        with self._condition:
+            if self._thread is None:
+                return
+            self._stopping = True
+            self._condition.notify_all()
+            thread = self._thread
+        thread.join(timeout)
+        with self._condition:
+            self._thread = None
+            pending = list(self._buffer)
+            self._buffer.clear()
+        if pending:
+            # El hilo no alcanzó a vaciar el búfer: se escribe de forma síncrona
+            self._flush(pending)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Espera hasta que el búfer quede vacío y no haya lotes en escritura."""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._flush_requested = True
+            self._condition.notify_all()
+            while self._buffer or self._flushing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    # === Encolado ===
+
+    def enqueue(self, row: tuple) -> bool:
+        """
+        Encola un log. Si el búfer está lleno aplica la política de desbordamiento.
+        "block" es solo para escritores en hilos: si aun así se llama desde el event loop,
+        el log se desvía al spool (contador `diverted`) en lugar de bloquearlo.
+        Retorna False si el log se descartó.
+        """
+        with self._condition:
+            if len(self._buffer) >= self.buffer_size:
+                policy = self.overflow_policy
+                diverted = policy == "block" and _in_event_loop()
+                if diverted:
+                    policy = "spill"
+                if policy == "drop_oldest":
+                    self._buffer.popleft()
+                    self._dropped += 1
+                elif policy == "block":
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self._buffer) >= self.buffer_size:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._dropped += 1
+                            return False
+                        self._condition.wait(remaining)
+                else:
+                    rows = [row]
+                    if self._spool is not None:
+                        # El búfer pasa al spool antes que el log nuevo y sin soltar el candado:
+                        # el spool se recarga primero, así la base de datos los recibe en orden
+                        rows = list(self._buffer) + rows
+                        self._buffer.clear()
+                    if diverted:
+                        self._diverted += len(rows)
+                    else:
+                        self._spilled += len(rows)
+                    self._spill(rows)
+                    return True
+
+            self._buffer.append(row)
+            self._queued += 1
+            if len(self._buffer) >= self.batch_size:
+                self._condition.notify_all()
+            return True
+
+    # === Escritura ===
+
+    def _run(self):
+        while True:
+            with self._condition:
+                deadline = time.monotonic() + self.flush_interval
+                while not (self._stopping or self._flush_requested) and len(self._buffer) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+                if not self._buffer:
+                    self._flush_requested = False
+                    if self._stopping:
+                        return
+                    continue
+
+                batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                self._flushing += 1
+                # Hay espacio libre para los productores bloqueados
+                self._condition.notify_all()
+
+            try:
+                self._flush(batch)
+            finally:
+                with self._condition:
+                    self._flushing -= 1
+                    self._condition.notify_all()
+
+    def _flush(self, batch: list):
+        # Mientras la base de datos esté caída o el spool tenga eventos pendientes se
+        # escribe directo al spool: no se paga el timeout y se conserva el orden. Cuando
+        # solo queda el segmento activo se recarga aquí y se vuelve a escribir directo
+        if self._spool is not None and (self._spool.db_unavailable() or self._spool.has_pending()):
+            if self._spool.db_unavailable() or not self._spool.drain(self._write_replayed):
+                self._spill(batch)
+                return
+
+        try:
+            ids = self._writer(batch)
+            with self._condition:
+                self._flushed += len(batch)
+                self._batches += 1
+            notify_log_listeners(batch, ids)
+        except Exception as e:
+            with self._condition:
+                self._failed += len(batch)
+            logging.error(f"Error al almacenar el lote de logs: {e}")
+            if self._spool is not None:
+                self._spool.mark_db_failure()
+            self._spill(batch)
+
+    def _write_replayed(self, rows: list):
+        notify_log_listeners(rows, self._writer(rows))
+
+    def _spill(self, rows: list):
+        """Conserva los eventos que no se escribieron en la base de datos (spool local o archivo de logs)."""
+        if self._spool is not None:
+            try:
+                self._spool.append(rows)
+                return
+            except Exception as e:
+                logging.error(f"Error al escribir en el spool de logs: {e}")
+        for level, message, log_type, timestamp in rows:
+            logging.error(f"Log no almacenado [{timestamp.isoformat()}] {level} {log_type}: {message}")
+
+    # === Estadísticas ===
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "running": self.running,
+                "overflow_policy": self.overflow_policy,
+                "buffered": len(self._buffer),
+                "buffer_size": self.buffer_size,
+                "queued": self._queued,
+                "flushed": self._flushed,
+                "batches": self._batches,
+                "dropped": self._dropped,
+                "spilled": self._spilled,
+                "diverted": self._diverted,
+                "failed": self._failed,
+            }
+
+
+# Escritor compartido; se inicia y se detiene en el ciclo de vida de la aplicación
+log_writer = LogWriter(spool=log_spool)
+
+
+def get_log_writer_stats() -> dict:
+    """Contadores del escritor de logs (encolados, escritos, descartados) y de su spool local."""
+    stats = log_writer.stats()
+    stats["spool"] = log_spool.stats()
+    return stats
+
+
+def _replay_log_rows(rows: list):
+    notify_log_listeners(rows, write_log_rows(rows))
+
+
+def start_log_writer():
+    """
+    Inicia el escritor de logs y la recarga del spool local.
+
+    Raises:
+        ValueError: Si LOG_OVERFLOW_POLICY es "block": store_log también se llama desde el
+            event loop, donde esa política no puede esperar.
+    """
+    if log_writer.overflow_policy == "block":
+        raise ValueError(
+            "LOG_OVERFLOW_POLICY=block solo es válida para escritores en hilos; "
+            "store_log se llama desde el event loop. Use drop_oldest o spill."
+        )
+    log_writer.start()
+    log_spool.start_replayer(_replay_log_rows)
+
+
+def stop_log_writer():
+    """Vacía el escritor de logs; lo que no llegue a la base de datos queda sellado en el spool."""
+    log_spool.stop_replayer()
+    log_writer.stop()
+    log_spool.close()
+
+
 # Función para almacenar logs en la base de datos
 def store_log(level: str, message: str, log_type: str, ):
+    row = (str(level).upper(), str(message), str(log_type), datetime.now())
+
+    # Con el escritor en marcha el log se encola y se escribe en lote en segundo plano
+    if log_writer.running:
+        log_writer.enqueue(row)
+        return
+
     try:
         # Conectar a la base de datos
         conn = get_db_connection()
         cursor = conn.cursor()
-        
-        # Convertir los parámetros a cadenas de texto
-        level_str = str(level).upper()  # Asegurarse de que el nivel esté en mayúsculas
-        message_str = str(message)
-        log_type_str = str(log_type)
-        
+    except Exception as e:
+        logging.error(f"Error al almacenar el log: {e}")
+        return
+
+    try:
         # Insertar el log en la tabla
-        cursor.execute("INSERT INTO logs (level, message, log_type) VALUES (?, ?, ?)", (level_str, message_str, log_type_str))
-        
+        cursor.execute("INSERT INTO logs (level, message, log_type) OUTPUT INSERTED.id VALUES (?, ?, ?)", row[:3])
+        log_id = cursor.fetchone()[0]
+
         # Confirmar la transacción
         conn.commit()
-        
-        # Cerrar la conexión
+        notify_log_listeners([row], [log_id])
+
+    except Exception as e:
+        logging.error(f"Error al almacenar el log: {e}")
+    finally:
+        # Cerrar la conexión (la devuelve al pool)
         cursor.close()
         conn.close()
-        
-    except Exception as e:
-        logging.error(f"Error al almacenar el log: {e}")
\ No newline at end of file
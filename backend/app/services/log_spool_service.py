@@ -0,0 +1,285 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configuración del spool local de logs
+LOG_SPOOL_DIR = os.getenv("LOG_SPOOL_DIR", "log_spool")
+LOG_SPOOL_SEGMENT_BYTES = int(os.getenv("LOG_SPOOL_SEGMENT_BYTES", str(4 * 1024 * 1024)))  # Tamaño máximo por segmento
+LOG_SPOOL_FSYNC = os.getenv("LOG_SPOOL_FSYNC", "interval")  # always | interval | never
+LOG_SPOOL_FSYNC_INTERVAL = float(os.getenv("LOG_SPOOL_FSYNC_INTERVAL", "1.0"))  # Segundos entre fsync con "interval"
+LOG_SPOOL_REPLAY_INTERVAL = float(os.getenv("LOG_SPOOL_REPLAY_INTERVAL", "5.0"))  # Segundos entre intentos de recarga
+LOG_DB_RETRY_AFTER = float(os.getenv("LOG_DB_RETRY_AFTER", "10.0"))  # Segundos sin intentar la BD tras un fallo
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+SEALED_SUFFIX = ".jsonl"
+ACTIVE_SUFFIX = ".jsonl.open"
+
+
+class LogSpool:
+    """
+    Spool local, de solo anexado, para los logs que no se pueden escribir en la base
+    de datos. Los eventos se guardan en segmentos JSON Lines numerados; un hilo de
+    recarga los inserta de nuevo en `dbo.logs`, en orden, cuando la base de datos vuelve.
+    """
+
+    def __init__(
+        self,
+        directory: str = LOG_SPOOL_DIR,
+        segment_bytes: int = LOG_SPOOL_SEGMENT_BYTES,
+        fsync_policy: str = LOG_SPOOL_FSYNC,
+        fsync_interval: float = LOG_SPOOL_FSYNC_INTERVAL,
+        replay_interval: float = LOG_SPOOL_REPLAY_INTERVAL,
+        db_retry_after: float = LOG_DB_RETRY_AFTER,
+    ):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Política de fsync no válida. Las permitidas son: {', '.join(FSYNC_POLICIES)}.")
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.replay_interval = replay_interval
+        self.db_retry_after = db_retry_after
+
+        self._lock = threading.RLock()
+        self._active = None  # Archivo del segmento activo
+        self._active_path = None
+        self._active_bytes = 0
+        self._next_sequence = None
+        self._sealed_count = None  # Segmentos sellados pendientes (se cuentan una vez al recuperar)
+        self._last_fsync = 0.0
+        self._db_failed_at = None
+
+        self._replay_lock = threading.Lock()  # El hilo de recarga y el escritor no recargan a la vez
+        self._replay_thread = None
+        self._stop_event = threading.Event()
+
+        # Contadores
+        self._spooled = 0
+        self._replayed = 0
+        self._replay_failures = 0
+        self._corrupt_lines = 0
+
+    # === Estado de la base de datos ===
+
+    def mark_db_failure(self):
+        """Registra un fallo de la base de datos; durante un tiempo no se vuelve a intentar."""
+        with self._lock:
+            self._db_failed_at = time.monotonic()
+
+    def db_unavailable(self) -> bool:
+        with self._lock:
+            return self._db_failed_at is not None and time.monotonic() - self._db_failed_at < self.db_retry_after
+
+    def has_pending(self) -> bool:
+        """Indica si quedan eventos en el spool pendientes de recargar (sin leer el directorio)."""
+        with self._lock:
+            return self._active_bytes > 0 or self._pending_sealed() > 0
+
+    def _pending_sealed(self) -> int:
+        if self._sealed_count is None:
+            if os.path.isdir(self.directory):
+                self._recover()
+            else:
+                self._sealed_count = 0
+        return self._sealed_count
+
+    # === Escritura ===
+
+    def append(self, rows: list):
+        """
+        Anexa eventos al segmento activo.
+
+        Args:
+            rows (list): Tuplas (level, message, log_type, timestamp).
+        """
+        lines = "".join(
+            json.dumps({"level": level, "message": message, "log_type": log_type, "timestamp": timestamp.isoformat()}, ensure_ascii=False) + "\n"
+            for level, message, log_type, timestamp in rows
+        ).encode("utf-8")
+
+        with self._lock:
+            if self._active is None:
+                self._open_segment()
+            self._active.write(lines)
+            self._active_bytes += len(lines)
+            self._spooled += len(rows)
+            self._sync()
+            if self._active_bytes >= self.segment_bytes:
+                self._seal_active()
+
+    def _sync(self, force: bool = False):
+        self._active.flush()
+        if self.fsync_policy == "never" and not force:
+            return
+        now = time.monotonic()
+        if force or self.fsync_policy == "always" or now - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._active.fileno())
+            self._last_fsync = now
+
+    def _open_segment(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if self._next_sequence is None:
+            self._recover()
+        self._active_path = os.path.join(self.directory, f"{self._next_sequence:012d}{ACTIVE_SUFFIX}")
+        self._next_sequence += 1
+        self._active = open(self._active_path, "ab")
+        self._active_bytes = 0
+
+    def _seal_active(self):
+        """Cierra el segmento activo y lo deja listo para la recarga."""
+        if self._active is None:
+            return
+        self._sync(force=self.fsync_policy != "never")
+        self._active.close()
+        os.replace(self._active_path, self._active_path[: -len(ACTIVE_SUFFIX)] + SEALED_SUFFIX)
+        self._sealed_count = self._pending_sealed() + 1
+        self._active = None
+        self._active_path = None
+        self._active_bytes = 0
+
+    def _recover(self):
+        """Sella los segmentos que quedaron abiertos tras un cierre inesperado y calcula la siguiente secuencia."""
+        last_sequence = 0
+        sealed = 0
+        for name in os.listdir(self.directory):
+            if not (name.endswith(SEALED_SUFFIX) or name.endswith(ACTIVE_SUFFIX)):
+                continue
+            sequence = int(name.split(".", 1)[0])
+            last_sequence = max(last_sequence, sequence)
+            sealed += 1
+            if name.endswith(ACTIVE_SUFFIX):
+                path = os.path.join(self.directory, name)
+                os.replace(path, path[: -len(ACTIVE_SUFFIX)] + SEALED_SUFFIX)
+        self._next_sequence = max(last_sequence + 1, self._next_sequence or 0)
+        self._sealed_count = sealed
+
+    def _sealed_segments(self) -> list:
+        if not os.path.isdir(self.directory):
+            return []
+        if self._next_sequence is None:
+            self._recover()
+        return sorted(
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(SEALED_SUFFIX)
+        )
+
+    # === Recarga ===
+
+    def _read_segment(self, path: str) -> list:
+        rows = []
+        with open(path, "rb") as segment:
+            for line in segment:
+                try:
+                    event = json.loads(line)
+                    rows.append((event["level"], event["message"], event["log_type"], datetime.fromisoformat(event["timestamp"])))
+                except (ValueError, KeyError):
+                    # Línea truncada por un cierre inesperado
+                    self._corrupt_lines += 1
+        return rows
+
+    def replay(self, writer) -> int:
+        """
+        Recarga en orden los segmentos pendientes. Cada segmento se escribe en una sola
+        transacción y se elimina al confirmarse. Se detiene en el primer fallo.
+
+        Args:
+            writer (callable): Función que inserta una lista de filas en la base de datos.
+
+        Returns:
+            int: Número de eventos recargados.
+        """
+        with self._replay_lock:
+            with self._lock:
+                self._seal_active()
+                segments = self._sealed_segments()
+
+            replayed = 0
+            for path in segments:
+                rows = self._read_segment(path)
+                try:
+                    if rows:
+                        writer(rows)
+                except Exception as e:
+                    self.mark_db_failure()
+                    with self._lock:
+                        self._replay_failures += 1
+                    logging.error(f"Error al recargar el spool de logs ({os.path.basename(path)}): {e}")
+                    break
+                os.remove(path)
+                replayed += len(rows)
+                with self._lock:
+                    self._sealed_count -= 1
+                    self._replayed += len(rows)
+
+        if replayed:
+            with self._lock:
+                self._db_failed_at = None
+        return replayed
+
+    def drain(self, writer) -> bool:
+        """
+        Recarga el spool desde el hilo del escritor de logs cuando solo queda el segmento
+        activo, para que el escritor vuelva a insertar directo en la base de datos.
+        Retorna True si el spool quedó vacío.
+        """
+        with self._lock:
+            if self._pending_sealed() > 0:
+                # El hilo de recarga se ocupa de los segmentos sellados
+                return False
+        self.replay(writer)
+        return not self.has_pending()
+
+    def start_replayer(self, writer):
+        """Inicia el hilo que recarga el spool periódicamente."""
+        if self._replay_thread is not None and self._replay_thread.is_alive():
+            return
+        self._stop_event.clear()
+
+        def run():
+            while not self._stop_event.wait(self.replay_interval):
+                # Tras un fallo se espera `db_retry_after` antes de volver a probar la base de datos
+                if self.has_pending() and not self.db_unavailable():
+                    self.replay(writer)
+
+        self._replay_thread = threading.Thread(target=run, name="log-spool-replayer", daemon=True)
+        self._replay_thread.start()
+
+    def stop_replayer(self, timeout: float = 10.0):
+        self._stop_event.set()
+        if self._replay_thread is not None:
+            self._replay_thread.join(timeout)
+            self._replay_thread = None
+
+    def close(self):
+        """Sella el segmento activo para que se recargue en el siguiente arranque."""
+        with self._lock:
+            self._seal_active()
+
+    # === Estadísticas ===
+
+    def stats(self) -> dict:
+        with self._lock:
+            segments = self._sealed_segments()
+            pending_bytes = self._active_bytes + sum(os.path.getsize(path) for path in segments)
+            return {
+                "fsync_policy": self.fsync_policy,
+                "db_unavailable": self.db_unavailable(),
+                "segments": len(segments) + (1 if self._active is not None else 0),
+                "pending_bytes": pending_bytes,
+                "spooled": self._spooled,
+                "replayed": self._replayed,
+                "replay_failures": self._replay_failures,
+                "corrupt_lines": self._corrupt_lines,
+            }
+
+
+# Spool compartido por el escritor de logs
+log_spool = LogSpool()
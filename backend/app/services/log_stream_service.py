@@ -0,0 +1,130 @@
+import asyncio
+import os
+import threading
+from datetime import datetime
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configuración de la transmisión en vivo de logs
+LOG_STREAM_QUEUE_SIZE = int(os.getenv("LOG_STREAM_QUEUE_SIZE", "1000"))  # Eventos pendientes por suscriptor
+LOG_STREAM_MAX_SUBSCRIBERS = int(os.getenv("LOG_STREAM_MAX_SUBSCRIBERS", "100"))
+LOG_STREAM_KEEPALIVE = float(os.getenv("LOG_STREAM_KEEPALIVE", "15"))  # Segundos entre comentarios keep-alive
+
+
+class SubscriberLimitError(Exception):
+    """Se alcanzó el máximo de suscriptores simultáneos."""
+
+
+class LogSubscription:
+    """
+    Suscripción de un cliente. Los eventos llegan desde cualquier hilo y se encolan en
+    el event loop del cliente; si la cola se llena, el suscriptor se desconecta.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, level: Optional[str], description: Optional[str], queue_size: int):
+        self.loop = loop
+        self.level = level
+        self.description = description.casefold() if description else None
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+        self.closed = False
+
+    def matches(self, event: dict) -> bool:
+        if self.level and event["type"] != self.level:
+            return False
+        return not self.description or self.description in event["description"].casefold()
+
+    def _put(self, event: dict):
+        # Se ejecuta en el event loop del suscriptor
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Consumidor lento: se descartan sus eventos y se le indica el cierre
+            self.overflowed = True
+            self.closed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        """
+        Espera el siguiente evento.
+
+        Returns:
+            Optional[dict]: El evento, o None si la suscripción se cerró por desbordamiento.
+
+        Raises:
+            asyncio.TimeoutError: Si no llegó ningún evento en `timeout` segundos.
+        """
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class LogBroadcaster:
+    """Reparte en memoria cada log registrado a los suscriptores cuyo filtro coincide."""
+
+    def __init__(self, queue_size: int = LOG_STREAM_QUEUE_SIZE, max_subscribers: int = LOG_STREAM_MAX_SUBSCRIBERS):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._published = 0
+        self._delivered = 0
+        self._disconnected = 0
+
+    def subscribe(self, level: Optional[str] = None, description: Optional[str] = None) -> LogSubscription:
+        """Registra un suscriptor en el event loop actual."""
+        subscription = LogSubscription(asyncio.get_running_loop(), level, description, self.queue_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise SubscriberLimitError("Se alcanzó el máximo de suscriptores en vivo.")
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: LogSubscription):
+        subscription.closed = True
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+                if subscription.overflowed:
+                    self._disconnected += 1
+
+    def publish(self, log_id: int, level: str, message: str, log_type: str, timestamp: datetime):
+        """Publica un log ya escrito en la base de datos; puede llamarse desde cualquier hilo y nunca bloquea."""
+        with self._lock:
+            if not self._subscribers:
+                return
+            subscribers = list(self._subscribers)
+            self._published += 1
+
+        event = {"id": log_id, "type": level, "description": message, "log_type": log_type, "datetime": timestamp}
+        delivered = 0
+        for subscription in subscribers:
+            if subscription.closed or not subscription.matches(event):
+                continue
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, event)
+                delivered += 1
+            except RuntimeError:
+                # El event loop del suscriptor ya se cerró
+                subscription.closed = True
+        with self._lock:
+            self._delivered += delivered
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "max_subscribers": self.max_subscribers,
+                "queue_size": self.queue_size,
+                "published": self._published,
+                "delivered": self._delivered,
+                "disconnected_slow": self._disconnected,
+            }
+
+
+# Difusor compartido; notify_log_listeners publica cada log escrito con su id
+log_broadcaster = LogBroadcaster()
@@ -0,0 +1,128 @@
+import hashlib
+import os
+from typing import BinaryIO, Optional
+import pyodbc
+from dotenv import load_dotenv
+from app.db import get_db_connection
+from app.services.log_service import store_log
+
+load_dotenv()
+
+# Deduplicación de las cargas (requiere sql/005_upload_fingerprints.sql)
+UPLOAD_DEDUP_ENABLED = os.getenv("UPLOAD_DEDUP_ENABLED", "false").lower() == "true"
+UPLOAD_DEDUP_PENDING_TIMEOUT = int(os.getenv("UPLOAD_DEDUP_PENDING_TIMEOUT", "3600"))  # Segundos antes de retomar una carga abandonada
+UPLOAD_SKIP_EXISTING_ROWS = os.getenv("UPLOAD_SKIP_EXISTING_ROWS", "false").lower() == "true"  # Valor por defecto de skip_existing_rows
+
+FINGERPRINT_BLOCK_SIZE = 1024 * 1024
+
+
+class UploadInProgressError(Exception):
+    """Otra petición está cargando un archivo con el mismo contenido."""
+
+
+def fingerprint_bytes(contents: bytes) -> bytes:
+    return hashlib.sha256(contents).digest()
+
+
+def fingerprint_file(fileobj: BinaryIO) -> bytes:
+    """SHA-256 del archivo leído por bloques; deja el archivo al inicio."""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for block in iter(lambda: fileobj.read(FINGERPRINT_BLOCK_SIZE), b""):
+        digest.update(block)
+    fileobj.seek(0)
+    return digest.digest()
+
+
+def _ingestion(row, digest: bytes) -> dict:
+    return {
+        "sha256": digest.hex(),
+        "filename": row[0],
+        "s3_key": row[1],
+        "size_bytes": row[2],
+        "row_count": row[3],
+        "ingested_at": row[5],
+    }
+
+
+def claim_upload(digest: bytes, filename: str, s3_key: str, size: int) -> Optional[dict]:
+    """
+    Reserva la huella del archivo antes de procesarlo.
+
+    Returns:
+        Optional[dict]: None si la carga quedó reservada (hay que procesar el archivo), o
+        la carga original si el mismo contenido ya fue ingerido.
+
+    Raises:
+        UploadInProgressError: Si otra petición está procesando el mismo contenido.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        for _ in range(2):
+            try:
+                cursor.execute(
+                    "INSERT INTO dbo.upload_fingerprints (sha256, filename, s3_key, size_bytes, status, claimed_at) "
+                    "VALUES (?, ?, ?, ?, 'pending', SYSDATETIME())",
+                    (digest, filename, s3_key, size)
+                )
+                conn.commit()
+                return None
+            except pyodbc.IntegrityError:
+                conn.rollback()
+
+            cursor.execute(
+                "SELECT filename, s3_key, size_bytes, row_count, status, ingested_at, "
+                "DATEDIFF(SECOND, claimed_at, SYSDATETIME()) FROM dbo.upload_fingerprints WHERE sha256 = ?",
+                (digest,)
+            )
+            row = cursor.fetchone()
+            if row is None:
+                # La reserva anterior se liberó entre el INSERT y la consulta
+                continue
+            if row[4] == "ingested":
+                cursor.execute(
+                    "UPDATE dbo.upload_fingerprints SET times_seen = times_seen + 1, last_seen_at = SYSDATETIME() WHERE sha256 = ?",
+                    (digest,)
+                )
+                conn.commit()
+                return _ingestion(row, digest)
+            if row[6] < UPLOAD_DEDUP_PENDING_TIMEOUT:
+                break
+            # Carga abandonada (el proceso terminó sin confirmarla ni liberarla): se retoma
+            cursor.execute(
+                "UPDATE dbo.upload_fingerprints SET filename = ?, s3_key = ?, claimed_at = SYSDATETIME() "
+                "WHERE sha256 = ? AND status = 'pending' AND DATEDIFF(SECOND, claimed_at, SYSDATETIME()) >= ?",
+                (filename, s3_key, digest, UPLOAD_DEDUP_PENDING_TIMEOUT)
+            )
+            taken = cursor.rowcount == 1
+            conn.commit()
+            if taken:
+                return None
+        raise UploadInProgressError("Ya se está procesando un archivo con el mismo contenido.")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def complete_upload(cursor, digest: bytes, row_count: int, rows_inserted: int):
+    """Marca la carga como ingerida; se ejecuta en la transacción de la inserción."""
+    cursor.execute(
+        "UPDATE dbo.upload_fingerprints SET status = 'ingested', row_count = ?, rows_inserted = ?, "
+        "ingested_at = SYSDATETIME() WHERE sha256 = ?",
+        (row_count, rows_inserted, digest)
+    )
+
+
+def release_upload(digest: bytes):
+    """Libera la reserva de una carga que falló, para que pueda volver a intentarse."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM dbo.upload_fingerprints WHERE sha256 = ? AND status = 'pending'", (digest,))
+        conn.commit()
+    except Exception as e:
+        store_log("CARGA_DOCUMENTO", f"No se pudo liberar la huella {digest.hex()}: {e}", "ERROR")
+    finally:
+        cursor.close()
+        conn.close()
@@ -0,0 +1,239 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+class SingleFlight:
+    """
+    Agrupa las llamadas concurrentes con la misma clave: la primera inicia la función y
+    las demás esperan su resultado (o su error) en lugar de repetir el trabajo.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._executed = 0
+        self._coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is not None:
+            self._coalesced += 1
+        else:
+            # La llamada compartida corre en su propia tarea: si se cancela quien la inició,
+            # las demás siguen esperando el mismo resultado
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            self._executed += 1
+            task.add_done_callback(lambda done: self._finish(key, done))
+        # shield: si se cancela quien espera, no se cancela la llamada compartida
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # Evita el aviso de excepción no recuperada si nadie esperaba
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "executed": self._executed,
+            "coalesced": self._coalesced,
+        }
+
+
+class ConcurrencyLimitError(Exception):
+    """No hay lugar para la operación: la cola de espera está llena o venció el plazo."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("granted", "event", "loop", "future")
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.granted = False
+        self.loop = loop
+        self.future = loop.create_future() if loop is not None else None
+        self.event = threading.Event() if loop is None else None
+
+    def wake(self):
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(lambda: self.future.done() or self.future.set_result(None))
+
+
+class ConcurrencyLimiter:
+    """
+    Limita las operaciones simultáneas (p. ej. las llamadas a un servicio con cuota de TPS).
+
+    Las que exceden `max_in_flight` esperan en orden de llegada hasta `queue_timeout`
+    segundos. Si ya hay `max_queue` esperando, o vence el plazo, se lanza
+    ConcurrencyLimitError con una estimación de cuándo reintentar. El mismo límite se
+    comparte entre corutinas (`async with limiter.slot()` o `await limiter.run(...)` para
+    las llamadas en un ejecutor) e hilos (`with limiter.hold()`).
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._waiters = deque()
+        self._in_flight = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._completed = 0
+        self._hold_seconds = 0.0
+        self._wait_seconds = 0.0
+
+    def _enqueue(self, loop: Optional[asyncio.AbstractEventLoop]) -> Optional[_Waiter]:
+        """Toma un lugar libre (retorna None) o pone en la cola a quien llama."""
+        with self._lock:
+            if self._in_flight < self.max_in_flight and not self._waiters:
+                self._in_flight += 1
+                self._admitted += 1
+                return None
+            if len(self._waiters) >= self.max_queue:
+                self._rejected += 1
+                raise ConcurrencyLimitError("Se alcanzó el límite de operaciones simultáneas.", self._retry_after())
+            waiter = _Waiter(loop)
+            self._waiters.append(waiter)
+            return waiter
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """Saca de la cola a quien dejó de esperar. Retorna True si ya había recibido un lugar."""
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._waiters.remove(waiter)
+            return False
+
+    def _timeout_error(self) -> ConcurrencyLimitError:
+        with self._lock:
+            self._timed_out += 1
+            return ConcurrencyLimitError(
+                f"No hubo lugar para la operación en {self.queue_timeout:g} segundos.", self._retry_after()
+            )
+
+    def _granted(self, started: float):
+        with self._lock:
+            self._admitted += 1
+            self._wait_seconds += time.monotonic() - started
+
+    async def acquire(self):
+        """Espera un lugar sin bloquear el event loop."""
+        started = time.monotonic()
+        waiter = self._enqueue(asyncio.get_running_loop())
+        if waiter is None:
+            return
+        try:
+            await asyncio.wait_for(waiter.future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not self._abandon(waiter):
+                raise self._timeout_error()
+        except asyncio.CancelledError:
+            if self._abandon(waiter):
+                self.release()
+            raise
+        self._granted(started)
+
+    def acquire_sync(self):
+        """Espera un lugar bloqueando el hilo que llama."""
+        started = time.monotonic()
+        waiter = self._enqueue(None)
+        if waiter is None:
+            return
+        if not waiter.event.wait(self.queue_timeout) and not self._abandon(waiter):
+            raise self._timeout_error()
+        self._granted(started)
+
+    def release(self, held_seconds: Optional[float] = None):
+        """Libera el lugar; si hay alguien esperando, el lugar pasa directamente al primero."""
+        with self._lock:
+            if held_seconds is not None:
+                self._completed += 1
+                self._hold_seconds += held_seconds
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                waiter.wake()
+            else:
+                self._in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    @contextmanager
+    def hold(self):
+        self.acquire_sync()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    async def run(self, executor, func: Callable, *args, **kwargs) -> Any:
+        """
+        Ejecuta `func` en `executor` (un DBExecutor) con un lugar del límite. El lugar se
+        libera en el hilo al terminar la llamada: si se cancela la corutina que espera, la
+        llamada sigue en curso (shield) y conserva su lugar hasta terminar.
+        """
+        await self.acquire()
+        started = time.monotonic()
+        ran = False
+
+        def call():
+            nonlocal ran
+            ran = True
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.release(time.monotonic() - started)
+
+        try:
+            return await asyncio.shield(executor.run(call))
+        except asyncio.CancelledError:
+            raise
+        except BaseException:
+            # El ejecutor no llegó a correr la llamada (p. ej. ya estaba detenido)
+            if not ran:
+                self.release()
+            raise
+
+    def _retry_after(self) -> float:
+        # Se llama con el lock tomado: lo que tardaría en atenderse la cola actual
+        average = self._hold_seconds / self._completed if self._completed else 1.0
+        return max(1.0, average * (len(self._waiters) + 1) / self.max_in_flight)
+
+    def retry_after(self) -> float:
+        with self._lock:
+            return self._retry_after()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self._in_flight,
+                "queued": len(self._waiters),
+                "max_queue": self.max_queue,
+                "queue_timeout": self.queue_timeout,
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "avg_wait_ms": round(self._wait_seconds / self._admitted * 1000, 1) if self._admitted else 0.0,
+                "avg_hold_ms": round(self._hold_seconds / self._completed * 1000, 1) if self._completed else 0.0,
+            }
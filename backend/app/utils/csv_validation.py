@@ -0,0 +1,394 @@
+import re
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+from app.utils.duplicate_detector import hash_rows
+
+# pyarrow es opcional: sin él las filas repetidas se buscan solo con pandas
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = pc = None
+
+# Tipos admitidos en ColumnRule.dtype
+COLUMN_TYPES = ("str", "int", "float", "bool", "date")
+
+BOOL_VALUES = ("true", "false", "1", "0", "si", "sí", "no")
+
+# Descripción de cada regla en los mensajes de error
+RULE_DESCRIPTIONS = {
+    "null": "valores vacíos",
+    "type": "valores que no son de tipo {dtype}",
+    "pattern": "valores que no cumplen el formato {pattern}",
+    "range": "valores fuera del rango [{min_value}, {max_value}]",
+    "length": "valores con largo fuera de [{min_length}, {max_length}]",
+    "unique": "valores repetidos",
+}
+
+
+def is_text_dtype(dtype) -> bool:
+    # pandas 3 infiere las columnas de texto como dtype "str" en lugar de "object"
+    return dtype == object or pd.api.types.is_string_dtype(dtype)
+
+
+def duplicated_rows(df: pd.DataFrame) -> np.ndarray:
+    """
+    Marca todas las apariciones de las filas repetidas, como DataFrame.duplicated(keep=False).
+
+    Si todas las columnas son de texto respaldado por Arrow (motor pyarrow o el dtype "str"
+    de pandas 3), ordena las filas con pyarrow y compara cada una con la siguiente: los
+    valores no pasan a objetos de Python ni se arma una tabla hash por columna, que con
+    valores casi todos distintos ocupan varias veces el tamaño del archivo.
+    """
+    arrow_backed = all(
+        hasattr(df[name].array, "__arrow_array__") and pd.api.types.is_string_dtype(df[name].dtype)
+        for name in df.columns
+    )
+    if pc is None or len(df) < 2 or not arrow_backed:
+        return df.duplicated(keep=False).to_numpy()
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    order = pc.sort_indices(table, sort_keys=[(name, "ascending") for name in table.column_names])
+    ordered = table.take(order)
+    same_as_next = None
+    for column in ordered.columns:
+        current, following = column.slice(0, len(column) - 1), column.slice(1)
+        # Dos vacíos cuentan como el mismo valor, igual que en pandas
+        equal = pc.or_(
+            pc.fill_null(pc.equal(current, following), False),
+            pc.and_(pc.is_null(current), pc.is_null(following))
+        )
+        same_as_next = equal if same_as_next is None else pc.and_(same_as_next, equal)
+    del ordered
+
+    same = same_as_next.to_numpy(zero_copy_only=False).astype(bool)
+    flags = np.zeros(len(df), dtype=bool)
+    flags[:-1] |= same
+    flags[1:] |= same
+    repeated = np.zeros(len(df), dtype=bool)
+    repeated[order.to_numpy()] = flags
+    return repeated
+
+
+class ColumnRule:
+    """
+    Reglas de una columna del CSV: tipo, si admite vacíos, expresión regular (debe
+    coincidir con todo el valor), rango numérico, largo y unicidad. Las reglas en None
+    no se revisan.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        dtype: str = "str",
+        nullable: bool = False,
+        pattern: Optional[str] = None,
+        min_value: Optional[float] = None,
+        max_value: Optional[float] = None,
+        min_length: Optional[int] = None,
+        max_length: Optional[int] = None,
+        unique: bool = False,
+        date_format: Optional[str] = None
+    ):
+        if dtype not in COLUMN_TYPES:
+            raise ValueError(f"Tipo de columna no válido. Los permitidos son: {', '.join(COLUMN_TYPES)}.")
+        self.name = name
+        self.dtype = dtype
+        self.nullable = nullable
+        self.pattern = pattern
+        self.regex = re.compile(pattern) if pattern else None
+        self.min_value = min_value
+        self.max_value = max_value
+        self.min_length = min_length
+        self.max_length = max_length
+        self.unique = unique
+        self.date_format = date_format
+
+
+class Schema:
+    """Columnas esperadas del CSV y si las filas completas deben ser únicas."""
+
+    def __init__(self, columns: List[ColumnRule], unique_rows: bool = False, allow_extra_columns: bool = False):
+        self.columns = columns
+        self.unique_rows = unique_rows
+        self.allow_extra_columns = allow_extra_columns
+
+    @property
+    def names(self) -> list:
+        return [rule.name for rule in self.columns]
+
+
+class ValidationReport:
+    """
+    Resultado de la validación. Cada error indica la columna (None para las filas
+    completas), la regla, cuántos valores la incumplen y las primeras filas (numeradas
+    desde 1, sin contar la cabecera).
+    """
+
+    def __init__(self, issues: list, error_count: int, truncated: bool, max_errors: int):
+        self.issues = issues
+        self.error_count = error_count
+        self.truncated = truncated
+        self.max_errors = max_errors
+
+    @property
+    def valid(self) -> bool:
+        return not self.issues
+
+    def messages(self) -> list:
+        messages = [issue["message"] for issue in self.issues]
+        if self.truncated:
+            messages.append(
+                f"Se superó el máximo de {self.max_errors} errores; la validación se detuvo antes de revisar todo el archivo."
+            )
+        return messages
+
+    def to_dict(self) -> dict:
+        return {"valid": self.valid, "error_count": self.error_count, "truncated": self.truncated, "issues": self.issues}
+
+
+class CsvValidator:
+    """
+    Valida un CSV contra un Schema, en un solo DataFrame o bloque por bloque (`check` por
+    cada bloque y `report` al final). Cada regla se evalúa sobre la columna completa con
+    operaciones vectorizadas de pandas/NumPy.
+
+    Se detiene en cuanto los valores con errores superan `max_errors` y guarda a lo sumo
+    `max_rows` filas por error. La unicidad se revisa con hashes de 64 bits de los valores
+    (8 bytes por fila y regla); con `check_unique_rows=False` la unicidad de las filas
+    completas queda a cargo de quien llama (por ejemplo, con DuplicateDetector).
+    """
+
+    def __init__(
+        self,
+        schema: Schema,
+        max_errors: int = 1000,
+        max_rows: int = 20,
+        check_unique_rows: Optional[bool] = None
+    ):
+        self.schema = schema
+        self.max_errors = max_errors
+        self.max_rows = max_rows
+        self.check_unique_rows = schema.unique_rows if check_unique_rows is None else check_unique_rows
+        self.rows = 0
+        self.error_count = 0
+        self.exhausted = False
+        self._structure_issue = None
+        self._issues = {}
+        # Una columna "str" es de otro tipo solo si ningún bloque la interpretó como texto
+        self._non_text = {}
+        self._text_seen = set()
+        # Columnas únicas del primer bloque: si no llegan más bloques la unicidad se revisa
+        # sin hashes (exacta y más rápida); si llegan, se pasan a hashes
+        self._first = {}
+        self._hashes = {}
+
+    @property
+    def clean(self) -> bool:
+        """
+        Indica si hasta ahora no se encontraron errores (sin contar los tipos de texto
+        pendientes, que se resuelven en `report`).
+        """
+        return self._structure_issue is None and not self._issues
+
+    def check(self, df: pd.DataFrame) -> bool:
+        """
+        Valida un bloque de filas (las filas se numeran a continuación de los bloques
+        anteriores). Retorna False si conviene dejar de leer: la estructura no coincide o
+        se agotó el máximo de errores.
+        """
+        if self._structure_issue is not None or self.exhausted:
+            return False
+        offset = self.rows
+        self.rows += len(df)
+        if not self._check_structure(df):
+            return False
+
+        for rule in self.schema.columns:
+            series = df[rule.name]
+            values = series.notna()
+            if not rule.nullable:
+                self._record(rule, "null", ~values, offset)
+            numbers = self._check_type(rule, series, values, offset)
+            text = None
+            if rule.regex is not None:
+                text = series.astype(str)
+                self._record(rule, "pattern", values & ~text.str.fullmatch(rule.regex).fillna(False).astype(bool), offset)
+            if rule.min_value is not None or rule.max_value is not None:
+                numbers = _to_numbers(series) if numbers is None else numbers
+                outside = pd.Series(False, index=series.index)
+                if rule.min_value is not None:
+                    outside |= numbers < rule.min_value
+                if rule.max_value is not None:
+                    outside |= numbers > rule.max_value
+                self._record(rule, "range", outside, offset)
+            if rule.min_length is not None or rule.max_length is not None:
+                lengths = (text if text is not None else series.astype(str)).str.len()
+                outside = pd.Series(False, index=series.index)
+                if rule.min_length is not None:
+                    outside |= lengths < rule.min_length
+                if rule.max_length is not None:
+                    outside |= lengths > rule.max_length
+                self._record(rule, "length", values & outside, offset)
+            if rule.unique:
+                self._add_unique(rule.name, df[[rule.name]], offset)
+            if self.exhausted:
+                return False
+
+        if self.check_unique_rows:
+            self._add_unique(None, df[self.schema.names], offset)
+        return True
+
+    def report(self) -> ValidationReport:
+        """Cierra la validación: tipos pendientes y unicidad entre todos los bloques."""
+        if self._structure_issue is not None:
+            return ValidationReport([self._structure_issue], 1, False, self.max_errors)
+
+        for name, pending in self._non_text.items():
+            if name not in self._text_seen and not self.exhausted:
+                self._add_issue(name, "type", pending["count"], pending["rows"])
+        self._non_text = {}
+
+        for name, frame in self._first.items():
+            if self.exhausted:
+                break
+            repeated = duplicated_rows(frame)
+            if repeated.any():
+                self._add_issue(name, "unique", int(repeated.sum()), (np.flatnonzero(repeated)[:self.max_rows] + 1).tolist())
+        for name, parts in self._hashes.items():
+            if self.exhausted:
+                break
+            hashes = np.concatenate([part[0] for part in parts])
+            rows = np.concatenate([part[1] for part in parts])
+            repeated = pd.Series(hashes).duplicated(keep=False).to_numpy()
+            if repeated.any():
+                self._add_issue(name, "unique", int(repeated.sum()), rows[repeated][:self.max_rows].tolist())
+        self._first = {}
+        self._hashes = {}
+
+        issues = []
+        for (name, rule_name), issue in self._issues.items():
+            issues.append({
+                "column": name,
+                "rule": rule_name,
+                "count": issue["count"],
+                "rows": issue["rows"],
+                "message": self._message(name, rule_name, issue),
+            })
+        return ValidationReport(issues, self.error_count, self.exhausted, self.max_errors)
+
+    def _check_structure(self, df: pd.DataFrame) -> bool:
+        expected = self.schema.names
+        if len(df.columns) != len(expected) and not self.schema.allow_extra_columns:
+            message = f"El archivo no tiene exactamente {len(expected)} columnas."
+        else:
+            missing = [name for name in expected if name not in df.columns]
+            if not missing:
+                return True
+            message = f"Faltan las columnas: {', '.join(missing)}."
+        self._structure_issue = {"column": None, "rule": "columns", "count": 1, "rows": [], "message": message}
+        return False
+
+    def _check_type(self, rule: ColumnRule, series: pd.Series, values: pd.Series, offset: int) -> Optional[pd.Series]:
+        """Revisa el tipo de la columna; retorna los valores numéricos si tuvo que calcularlos."""
+        dtype = series.dtype
+        numbers = None
+        if rule.dtype == "str":
+            if is_text_dtype(dtype):
+                self._text_seen.add(rule.name)
+            elif rule.name not in self._text_seen:
+                pending = self._non_text.setdefault(rule.name, {"count": 0, "rows": []})
+                self._collect(pending, values, offset)
+            return None
+        if rule.dtype == "int":
+            if pd.api.types.is_integer_dtype(dtype):
+                return None
+            numbers = _to_numbers(series)
+            invalid = numbers.isna() | (numbers % 1 != 0)
+        elif rule.dtype == "float":
+            if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+                return None
+            numbers = _to_numbers(series)
+            invalid = numbers.isna()
+        elif rule.dtype == "bool":
+            if pd.api.types.is_bool_dtype(dtype):
+                return None
+            invalid = ~series.astype(str).str.strip().str.lower().isin(BOOL_VALUES)
+        else:
+            invalid = pd.to_datetime(series, errors="coerce", format=rule.date_format).isna()
+        self._record(rule, "type", values & invalid, offset)
+        return numbers
+
+    def _add_unique(self, name: Optional[str], df: pd.DataFrame, offset: int):
+        if offset == 0 and not self._hashes:
+            self._first[name] = df
+            return
+        if name in self._first:
+            self._add_hashes(name, self._first.pop(name), 0)
+        self._add_hashes(name, df, offset)
+
+    def _add_hashes(self, name: Optional[str], df: pd.DataFrame, offset: int):
+        # Los bloques pueden inferir tipos distintos: se hashea el texto de los valores
+        df = df.astype({column: str for column, dtype in df.dtypes.items() if not is_text_dtype(dtype)})
+        rows = np.arange(offset + 1, offset + len(df) + 1, dtype=np.int64)
+        self._hashes.setdefault(name, []).append((hash_rows(df), rows))
+
+    def _collect(self, issue: dict, mask: pd.Series, offset: int) -> int:
+        flags = mask.to_numpy(dtype=bool, na_value=False)
+        count = int(np.count_nonzero(flags))
+        room = self.max_rows - len(issue["rows"])
+        if count and room > 0:
+            issue["rows"].extend((np.flatnonzero(flags)[:room] + offset + 1).tolist())
+        issue["count"] += count
+        return count
+
+    def _record(self, rule: ColumnRule, rule_name: str, mask: pd.Series, offset: int):
+        issue = self._issues.get((rule.name, rule_name)) or {"count": 0, "rows": []}
+        count = self._collect(issue, mask, offset)
+        if count:
+            self._issues[(rule.name, rule_name)] = issue
+            self._count(count)
+
+    def _add_issue(self, name: Optional[str], rule_name: str, count: int, rows: list):
+        self._issues[(name, rule_name)] = {"count": count, "rows": rows}
+        self._count(count)
+
+    def _count(self, count: int):
+        self.error_count += count
+        if self.error_count > self.max_errors:
+            self.exhausted = True
+
+    def _message(self, name: Optional[str], rule_name: str, issue: dict) -> str:
+        rows = ", ".join(str(row) for row in issue["rows"])
+        if issue["count"] > len(issue["rows"]):
+            rows += ", ..."
+        if name is None:
+            return f"El archivo contiene {issue['count']} registros duplicados (filas {rows})."
+        rule = next(rule for rule in self.schema.columns if rule.name == name)
+        limits = {
+            "min_value": "-∞" if rule.min_value is None else rule.min_value,
+            "max_value": "∞" if rule.max_value is None else rule.max_value,
+            "min_length": rule.min_length or 0,
+            "max_length": "∞" if rule.max_length is None else rule.max_length,
+        }
+        description = RULE_DESCRIPTIONS[rule_name].format(**{**vars(rule), **limits})
+        return f"La columna {name} tiene {issue['count']} {description} (filas {rows})."
+
+
+def _to_numbers(series: pd.Series) -> pd.Series:
+    """Valores numéricos de la columna (NaN si no son números)."""
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        return series
+    try:
+        # Conversión directa de NumPy: mucho más rápida cuando todos los valores son números
+        return series.astype(float)
+    except (TypeError, ValueError):
+        return pd.to_numeric(series, errors="coerce")
+
+
+def validate_frame(df: pd.DataFrame, schema: Schema, max_errors: int = 1000, max_rows: int = 20) -> ValidationReport:
+    """Valida un DataFrame completo contra el esquema."""
+    validator = CsvValidator(schema, max_errors, max_rows)
+    validator.check(df)
+    return validator.report()
@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+
+def hash_rows(df: pd.DataFrame) -> np.ndarray:
+    """Hash de 64 bits de cada fila (mismo valor para filas con el mismo contenido)."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+
+
+class DuplicateDetector:
+    """
+    Detecta filas repetidas sin mantener todo el archivo en memoria. Los hashes de las
+    filas se reparten por `hash % partitions` en archivos temporales; al final cada
+    partición se revisa por separado, así la memoria usada es la de una sola partición.
+
+    Un hash repetido es solo un candidato (podría ser una colisión): quien llama confirma
+    comparando las filas con esos hashes.
+    """
+
+    def __init__(self, partitions: int = 1, directory: Optional[str] = None):
+        self.partitions = max(1, partitions)
+        self._directory = tempfile.mkdtemp(prefix="csv_dedup_", dir=directory)
+        self._files = [
+            open(os.path.join(self._directory, f"{i:04d}.bin"), "wb") for i in range(self.partitions)
+        ]
+        self.rows = 0
+
+    def add(self, hashes: np.ndarray):
+        self.rows += len(hashes)
+        if self.partitions == 1:
+            hashes.tofile(self._files[0])
+            return
+        buckets = hashes % np.uint64(self.partitions)
+        for partition in np.unique(buckets):
+            hashes[buckets == partition].tofile(self._files[int(partition)])
+
+    def duplicate_hashes(self) -> set:
+        """Hashes que aparecen más de una vez."""
+        duplicates = set()
+        for partition_file in self._files:
+            partition_file.close()
+            values = np.fromfile(partition_file.name, dtype=np.uint64)
+            if len(values) < 2:
+                continue
+            values.sort()
+            repeated = values[1:][values[1:] == values[:-1]]
+            duplicates.update(int(value) for value in np.unique(repeated))
+        return duplicates
+
+    def close(self):
+        for partition_file in self._files:
+            partition_file.close()
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
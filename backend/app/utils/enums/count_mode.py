@@ -0,0 +1,7 @@
+from enum import Enum
+
+# Enum para las estrategias de conteo del historial
+class CountMode(str, Enum):
+    EXACT = "exact"          # COUNT(*) exacto, cacheado por filtros con TTL corto
+    ESTIMATED = "estimated"  # Estimación desde las estadísticas de la tabla (sin filtros o solo fechas)
+    NONE = "none"            # Sin conteo: solo se informa si hay más registros
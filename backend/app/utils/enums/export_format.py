@@ -0,0 +1,7 @@
+from enum import Enum
+
+# Enum para los formatos de exportación del historial
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+    XLSX = "xlsx"
@@ -0,0 +1,7 @@
+from enum import Enum
+
+# Enum para la prioridad de los trabajos en segundo plano
+class JobPriority(str, Enum):
+    HIGH = "high"
+    NORMAL = "normal"
+    LOW = "low"
@@ -0,0 +1,6 @@
+from enum import Enum
+
+# Enum para los tipos de trabajo en segundo plano
+class JobType(str, Enum):
+    UPLOAD = "upload"
+    DOCUMENT_ANALYSIS = "document_analysis"
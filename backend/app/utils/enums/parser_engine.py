@@ -0,0 +1,7 @@
+from enum import Enum
+
+# Enum para el motor de lectura de los archivos subidos
+class ParserEngine(str, Enum):
+    AUTO = "auto"
+    PANDAS = "pandas"
+    PYARROW = "pyarrow"
@@ -0,0 +1,7 @@
+from enum import Enum
+
+# Enum para el tamaño de los buckets de tiempo en las agregaciones de logs
+class TimeBucket(str, Enum):
+    MINUTE = "minute"
+    HOUR = "hour"
+    DAY = "day"
@@ -0,0 +1,230 @@
+import csv
+import io
+import json
+import re
+import zipfile
+from datetime import date, datetime
+from typing import Iterable, Iterator
+from xml.sax.saxutils import escape
+
+# Fecha base de Excel para convertir fechas a número de serie
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+# Caracteres de control no permitidos en XML 1.0
+_ILLEGAL_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def write_csv(columns: list, batches: Iterable[list]) -> Iterator[bytes]:
+    """Genera un CSV (UTF-8 con BOM para Excel) lote a lote, sin acumular el resultado."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows(
+            [value.isoformat() if isinstance(value, (datetime, date)) else value for value in row]
+            for row in rows
+        )
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    remaining = buffer.getvalue()
+    if remaining:
+        yield remaining.encode("utf-8")
+
+
+def write_ndjson(columns: list, batches: Iterable[list]) -> Iterator[bytes]:
+    """Genera un objeto JSON por línea, lote a lote."""
+    for rows in batches:
+        yield "".join(
+            json.dumps(dict(zip(columns, row)), default=_json_default, ensure_ascii=False) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Destino no posicionable para zipfile: acumula lo escrito hasta que se vacía."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def tell(self):
+        raise OSError("Flujo no posicionable")
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _xlsx_cell(reference: str, value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return f'<c r="{reference}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c r="{reference}"><v>{value}</v></c>'
+    if isinstance(value, datetime):
+        serial = (value - EXCEL_EPOCH).total_seconds() / 86400
+        return f'<c r="{reference}" s="1"><v>{serial:.10f}</v></c>'
+    text = escape(_ILLEGAL_XML_CHARS.sub("", str(value)))
+    return f'<c r="{reference}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+# Filas máximas por hoja de Excel (incluido el encabezado); las exportaciones más grandes
+# continúan en hojas adicionales
+XLSX_MAX_ROWS = 1048576
+
+_XLSX_STATIC_PARTS = {
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/styles.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm:ss"/></numFmts>'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+        '</styleSheet>'
+    ),
+}
+
+
+def _xlsx_index_parts(sheet_count: int) -> dict:
+    """Partes que enumeran las hojas; se escriben al final, cuando ya se conoce la cantidad."""
+    numbers = range(1, sheet_count + 1)
+    return {
+        "[Content_Types].xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            + "".join(
+                f'<Override PartName="/xl/worksheets/sheet{n}.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                for n in numbers
+            )
+            + '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            '</Types>'
+        ),
+        "xl/workbook.xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+            + "".join(f'<sheet name="{"Logs" if n == 1 else f"Logs {n}"}" sheetId="{n}" r:id="rId{n}"/>' for n in numbers)
+            + '</sheets></workbook>'
+        ),
+        "xl/_rels/workbook.xml.rels": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + "".join(
+                f'<Relationship Id="rId{n}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet{n}.xml"/>'
+                for n in numbers
+            )
+            + f'<Relationship Id="rId{sheet_count + 1}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+            '</Relationships>'
+        ),
+    }
+
+
+def _open_xlsx_sheet(workbook: zipfile.ZipFile, number: int, header: str):
+    sheet = workbook.open(f"xl/worksheets/sheet{number}.xml", mode="w", force_zip64=True)
+    sheet.write(
+        b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+    )
+    sheet.write(f'<row r="1">{header}</row>'.encode("utf-8"))
+    return sheet
+
+
+def _close_xlsx_sheet(sheet):
+    sheet.write(b"</sheetData></worksheet>")
+    sheet.close()
+
+
+def write_xlsx(columns: list, batches: Iterable[list], max_rows: int = XLSX_MAX_ROWS) -> Iterator[bytes]:
+    """
+    Genera un libro XLSX en streaming: la hoja se escribe fila a fila dentro del ZIP y
+    los bytes comprimidos se entregan por lote, con memoria constante. Al llegar a
+    `max_rows` filas (el límite de Excel) se continúa en otra hoja con el mismo encabezado.
+    """
+    output = _StreamBuffer()
+    with zipfile.ZipFile(output, mode="w", compression=zipfile.ZIP_DEFLATED) as workbook:
+        for name, content in _XLSX_STATIC_PARTS.items():
+            workbook.writestr(name, content)
+
+        letters = [_column_letter(i) for i in range(len(columns))]
+        header = "".join(_xlsx_cell(f"{letter}1", column) for letter, column in zip(letters, columns))
+        sheet = _open_xlsx_sheet(workbook, 1, header)
+        sheet_count = 1
+        try:
+            row_number = 1
+            for rows in batches:
+                parts = []
+                for row in rows:
+                    if row_number >= max_rows:
+                        sheet.write("".join(parts).encode("utf-8"))
+                        parts = []
+                        _close_xlsx_sheet(sheet)
+                        sheet = None
+                        sheet_count += 1
+                        sheet = _open_xlsx_sheet(workbook, sheet_count, header)
+                        row_number = 1
+                    row_number += 1
+                    cells = "".join(
+                        _xlsx_cell(f"{letter}{row_number}", value) for letter, value in zip(letters, row)
+                    )
+                    parts.append(f'<row r="{row_number}">{cells}</row>')
+                sheet.write("".join(parts).encode("utf-8"))
+                data = output.drain()
+                if data:
+                    yield data
+        finally:
+            if sheet is not None:
+                _close_xlsx_sheet(sheet)
+
+        # El ZIP no exige un orden: las partes que enumeran las hojas van al final
+        for name, content in _xlsx_index_parts(sheet_count).items():
+            workbook.writestr(name, content)
+
+    yield output.drain()
+
+
+# Escritores disponibles por formato: (función, tipo de contenido, extensión)
+EXPORT_WRITERS = {
+    "csv": (write_csv, "text/csv; charset=utf-8", "csv"),
+    "ndjson": (write_ndjson, "application/x-ndjson", "ndjson"),
+    "xlsx": (write_xlsx, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
@@ -0,0 +1,385 @@
+import heapq
+import itertools
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import BinaryIO, Callable, Dict, Optional, Union
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Muestras recientes usadas para los promedios y percentiles de las métricas
+TIMING_SAMPLES = 1000
+
+# Segundos máximos entre dos depuraciones de los trabajos terminados al finalizar otro
+PRUNE_INTERVAL = 60.0
+
+
+class JobQueueFullError(Exception):
+    """La cola alcanzó el máximo de trabajos pendientes."""
+
+
+class Job:
+    """Trabajo en segundo plano; se persiste como JSON junto a su payload."""
+
+    def __init__(
+        self,
+        job_type: str,
+        params: dict,
+        priority: int,
+        max_attempts: int,
+        job_id: Optional[str] = None,
+        status: str = QUEUED,
+        attempts: int = 0,
+        created_at: Optional[float] = None,
+        queued_at: Optional[float] = None,
+        available_at: float = 0.0,
+        started_at: Optional[float] = None,
+        finished_at: Optional[float] = None,
+        result: Optional[dict] = None,
+        error: Optional[str] = None
+    ):
+        self.id = job_id or uuid.uuid4().hex
+        self.type = job_type
+        self.params = params
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.status = status
+        self.attempts = attempts
+        self.created_at = created_at or time.time()
+        self.queued_at = queued_at or self.created_at
+        self.available_at = available_at
+        self.started_at = started_at
+        self.finished_at = finished_at
+        self.result = result
+        self.error = error
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_record(self) -> dict:
+        return {
+            "job_id": self.id,
+            "job_type": self.type,
+            "params": self.params,
+            "priority": self.priority,
+            "max_attempts": self.max_attempts,
+            "status": self.status,
+            "attempts": self.attempts,
+            "created_at": self.created_at,
+            "queued_at": self.queued_at,
+            "available_at": self.available_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+    def to_dict(self) -> dict:
+        """Estado público del trabajo (fechas como datetime)."""
+        def to_datetime(value: Optional[float]) -> Optional[datetime]:
+            return datetime.fromtimestamp(value) if value else None
+
+        return {
+            "id": self.id,
+            "type": self.type,
+            "status": self.status,
+            "priority": self.priority,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "created_at": to_datetime(self.created_at),
+            "started_at": to_datetime(self.started_at),
+            "finished_at": to_datetime(self.finished_at),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobStore:
+    """
+    Persistencia de los trabajos en un directorio local: `<id>.json` con el estado y
+    `<id>.payload` con el archivo recibido. Permite retomar los pendientes al reiniciar.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def payload_path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.payload")
+
+    def write_payload(self, job_id: str, payload: Union[bytes, BinaryIO]):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.payload_path(job_id), "wb") as target:
+            if isinstance(payload, (bytes, bytearray)):
+                target.write(payload)
+            else:
+                shutil.copyfileobj(payload, target, 1024 * 1024)
+
+    def save(self, job: Job):
+        path = os.path.join(self.directory, f"{job.id}.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as target:
+            json.dump(job.to_record(), target, default=str)
+        os.replace(path + ".tmp", path)
+
+    def delete_payload(self, job_id: str):
+        try:
+            os.remove(self.payload_path(job_id))
+        except FileNotFoundError:
+            pass
+
+    def delete(self, job_id: str):
+        self.delete_payload(job_id)
+        try:
+            os.remove(os.path.join(self.directory, f"{job_id}.json"))
+        except FileNotFoundError:
+            pass
+
+    def load_all(self) -> list:
+        jobs = []
+        if not os.path.isdir(self.directory):
+            return jobs
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding="utf-8") as source:
+                    jobs.append(Job(**json.load(source)))
+            except (OSError, ValueError, TypeError) as e:
+                logging.error(f"No se pudo leer el trabajo {name}: {e}")
+        return jobs
+
+
+def _timing_stats(samples: deque) -> dict:
+    if not samples:
+        return {"count": 0, "avg": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "avg": round(sum(ordered) / len(ordered), 3),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+class JobQueue:
+    """
+    Cola de trabajos con prioridad (menor número, mayor prioridad) atendida por un grupo
+    fijo de hilos. Un trabajo que falla se reintenta con espera exponencial mientras
+    `retryable(error)` lo permita y no supere `max_attempts`. Los trabajos terminados se
+    conservan `result_ttl` segundos para consultar su estado.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handlers: Dict[str, Callable[[Job, str], dict]],
+        store: JobStore,
+        workers: int = 2,
+        max_queued: int = 100,
+        max_attempts: int = 3,
+        retry_backoff: float = 5.0,
+        result_ttl: float = 3600.0,
+        retryable: Callable[[Exception], bool] = lambda error: True
+    ):
+        self.name = name
+        self.handlers = handlers
+        self.store = store
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.result_ttl = result_ttl
+        self.retryable = retryable
+
+        self._jobs = {}
+        self._ready = []  # (prioridad, orden, id)
+        self._delayed = []  # (disponible desde, orden, id)
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._threads = []
+        self._stopping = False
+        self._running = 0
+        self._reserved = 0  # Lugares tomados por trabajos que aún están guardando su payload
+        self._pruned_at = 0.0
+        self._counters = {"submitted": 0, "succeeded": 0, "failed": 0, "retried": 0}
+        self._wait_times = deque(maxlen=TIMING_SAMPLES)
+        self._processing_times = deque(maxlen=TIMING_SAMPLES)
+
+    # === Encolar y consultar ===
+
+    def submit(self, job_type: str, params: dict, payload: Union[bytes, BinaryIO], priority: int = 1) -> Job:
+        """
+        Persiste el payload y encola el trabajo.
+
+        Raises:
+            JobQueueFullError: Si ya hay `max_queued` trabajos pendientes.
+        """
+        if job_type not in self.handlers:
+            raise ValueError(f"Tipo de trabajo desconocido: {job_type}")
+        # El lugar se reserva antes de soltar el lock: las subidas simultáneas no superan max_queued
+        with self._condition:
+            if len(self._ready) + len(self._delayed) + self._reserved >= self.max_queued:
+                raise JobQueueFullError("La cola de trabajos está llena.")
+            self._reserved += 1
+
+        job = Job(job_type, params, priority, self.max_attempts)
+        try:
+            self.store.write_payload(job.id, payload)
+            self.store.save(job)
+        except Exception:
+            with self._condition:
+                self._reserved -= 1
+            self.store.delete(job.id)
+            raise
+        with self._condition:
+            self._reserved -= 1
+            self._jobs[job.id] = job
+            self._counters["submitted"] += 1
+            self._push(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._condition:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def _push(self, job: Job):
+        # Se llama con el lock tomado
+        if job.available_at > time.time():
+            heapq.heappush(self._delayed, (job.available_at, next(self._sequence), job.id))
+        else:
+            heapq.heappush(self._ready, (job.priority, next(self._sequence), job.id))
+        self._condition.notify()
+
+    def _prune(self):
+        # Descarta los trabajos terminados hace más de result_ttl (con el lock tomado)
+        self._pruned_at = time.monotonic()
+        limit = time.time() - self.result_ttl
+        expired = [job.id for job in self._jobs.values() if job.finished and job.finished_at < limit]
+        for job_id in expired:
+            del self._jobs[job_id]
+            self.store.delete(job_id)
+
+    # === Ciclo de vida ===
+
+    def start(self):
+        """Retoma los trabajos persistidos (los que estaban en curso vuelven a la cola) e inicia los hilos."""
+        if self._threads:
+            return
+        with self._condition:
+            self._stopping = False
+            for job in self.store.load_all():
+                if job.id in self._jobs:
+                    continue
+                if job.status == RUNNING:
+                    job.status = QUEUED
+                    self.store.save(job)
+                self._jobs[job.id] = job
+                if not job.finished:
+                    self._push(job)
+            self._prune()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"{self.name}-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 30.0):
+        """Espera a que terminen los trabajos en curso; los pendientes quedan persistidos."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        self._threads = []
+
+    # === Procesamiento ===
+
+    def _next_job(self) -> Optional[Job]:
+        with self._condition:
+            while not self._stopping:
+                now = time.time()
+                while self._delayed and self._delayed[0][0] <= now:
+                    _, sequence, job_id = heapq.heappop(self._delayed)
+                    heapq.heappush(self._ready, (self._jobs[job_id].priority, sequence, job_id))
+                if self._ready:
+                    job = self._jobs[heapq.heappop(self._ready)[2]]
+                    job.status = RUNNING
+                    job.attempts += 1
+                    job.started_at = now
+                    self._running += 1
+                    self._wait_times.append(now - max(job.queued_at, job.available_at))
+                    return job
+                self._condition.wait(self._delayed[0][0] - now if self._delayed else None)
+        return None
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            self.store.save(job)
+            started = time.monotonic()
+            try:
+                job.result = self.handlers[job.type](job, self.store.payload_path(job.id))
+                self._finish(job, SUCCEEDED, None, time.monotonic() - started)
+            except Exception as e:
+                error = getattr(e, "detail", None) or str(e)
+                if job.attempts < job.max_attempts and self.retryable(e):
+                    self._retry(job, str(error), time.monotonic() - started)
+                else:
+                    logging.error(f"El trabajo {job.id} ({job.type}) falló: {error}")
+                    self._finish(job, FAILED, str(error), time.monotonic() - started)
+
+    def _finish(self, job: Job, status: str, error: Optional[str], elapsed: float):
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        self.store.delete_payload(job.id)
+        self.store.save(job)
+        with self._condition:
+            self._running -= 1
+            self._counters[status] += 1
+            self._processing_times.append(elapsed)
+            # Sin consultas de estado los terminados se depuran igual, a lo sumo cada PRUNE_INTERVAL
+            if time.monotonic() - self._pruned_at >= min(PRUNE_INTERVAL, self.result_ttl):
+                self._prune()
+
+    def _retry(self, job: Job, error: str, elapsed: float):
+        job.status = QUEUED
+        job.error = error
+        job.queued_at = time.time()
+        job.available_at = job.queued_at + self.retry_backoff * 2 ** (job.attempts - 1)
+        self.store.save(job)
+        with self._condition:
+            self._running -= 1
+            self._counters["retried"] += 1
+            self._processing_times.append(elapsed)
+            self._push(job)
+
+    def stats(self) -> dict:
+        with self._condition:
+            by_priority = {}
+            for priority, _, _ in self._ready:
+                by_priority[priority] = by_priority.get(priority, 0) + 1
+            return {
+                "workers": self.workers,
+                "running": self._running,
+                "queued": len(self._ready),
+                "queued_by_priority": by_priority,
+                "waiting_retry": len(self._delayed),
+                "submitting": self._reserved,
+                "max_queued": self.max_queued,
+                **self._counters,
+                "wait_seconds": _timing_stats(self._wait_times),
+                "processing_seconds": _timing_stats(self._processing_times),
+            }
@@ -0,0 +1,199 @@
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List, Optional
+from app.utils.cache import MISSING, TTLCache
+
+# Marcas diacríticas (categoría Mn) del plano básico, para quitarlas con str.translate
+_STRIP_MARKS = {code: None for code in range(0x10000) if unicodedata.category(chr(code)) == "Mn"}
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+# Confianza de las coincidencias sin errores (el texto normalizado o sus palabras son iguales)
+EXACT_CONFIDENCE = 1.0
+CANONICAL_CONFIDENCE = 0.95
+
+# Similitud mínima de trigramas y cantidad de candidatas para la coincidencia difusa
+FUZZY_MIN_DICE = 0.5
+FUZZY_CANDIDATES = 3
+# Para aceptar una coincidencia difusa los trigramas también deben coincidir en este grado
+FUZZY_ACCEPT_DICE = 0.7
+# Errores admitidos por palabra (las palabras de hasta FUZZY_SHORT_WORD letras no admiten ninguno)
+FUZZY_MAX_WORD_EDITS = 1
+FUZZY_SHORT_WORD = 3
+
+
+def normalize_text(text) -> str:
+    """
+    Normaliza un texto eliminando mayúsculas, tildes y espacios adicionales.
+    """
+    if not text:  # Manejar valores nulos o vacíos
+        return ""
+    text = text.lower().strip()
+    if text.isascii():
+        return text
+    return unicodedata.normalize("NFD", text).translate(_STRIP_MARKS)
+
+
+def canonical_text(text) -> str:
+    """Texto normalizado reducido a sus palabras (sin signos de puntuación ni espacios repetidos)."""
+    return _NON_ALNUM.sub(" ", normalize_text(text)).strip()
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Distancia de edición entre `a` y `b` (Levenshtein más la transposición de dos letras
+    contiguas, un error típico del OCR); retorna limit + 1 en cuanto la supera.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if before is not None and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def _words_agree(key: str, keyword: str) -> bool:
+    """Las dos formas canónicas tienen las mismas palabras salvo errores menores dentro de cada una."""
+    key_words = key.split()
+    keyword_words = keyword.split()
+    if len(key_words) != len(keyword_words):
+        return False
+    for key_word, keyword_word in zip(key_words, keyword_words):
+        limit = 0 if min(len(key_word), len(keyword_word)) <= FUZZY_SHORT_WORD else FUZZY_MAX_WORD_EDITS
+        if edit_distance(key_word, keyword_word, limit) > limit:
+            return False
+    return True
+
+
+class KeywordMatch:
+    """Campo encontrado para una clave, la palabra clave que coincidió y la confianza (0 a 1)."""
+
+    __slots__ = ("field", "keyword", "confidence", "fuzzy")
+
+    def __init__(self, field: str, keyword: str, confidence: float, fuzzy: bool):
+        self.field = field
+        self.keyword = keyword
+        self.confidence = confidence
+        self.fuzzy = fuzzy
+
+    def __eq__(self, other):
+        return isinstance(other, KeywordMatch) and (self.field, self.keyword, self.confidence, self.fuzzy) == (
+            other.field, other.keyword, other.confidence, other.fuzzy
+        )
+
+    def __repr__(self):
+        return f"KeywordMatch(field={self.field!r}, keyword={self.keyword!r}, confidence={self.confidence}, fuzzy={self.fuzzy})"
+
+
+class KeywordMatcher:
+    """
+    Mapeo de palabras clave compilado una sola vez: índices hash por texto normalizado y por
+    sus palabras (sin puntuación), y opcionalmente (`fuzzy`) un índice de trigramas para
+    tolerar el ruido del OCR (letras cambiadas o faltantes). Una coincidencia difusa exige
+    que la distancia de edición, los trigramas y cada palabra coincidan, así que una palabra
+    distinta ("fecha de cargo" frente a "fecha de pago") no se acepta. Ante palabras clave
+    repetidas gana el primer campo del mapeo, como en la búsqueda lineal. Los resultados se
+    guardan en una caché LRU.
+    """
+
+    def __init__(
+        self,
+        mapping: Dict[str, List[str]],
+        fuzzy: bool = False,
+        min_confidence: float = 0.9,
+        cache_size: int = 4096
+    ):
+        self.fuzzy = fuzzy
+        self.min_confidence = min_confidence
+        self._exact = {}
+        self._canonical = {}
+        self._trigram_index = defaultdict(list)
+        self._keywords = []  # (forma canónica, campo, palabra clave original, cantidad de trigramas)
+        self._cache = TTLCache(max_size=cache_size)
+
+        for field, keywords in mapping.items():
+            for keyword in keywords:
+                self._exact.setdefault(normalize_text(keyword), (field, keyword))
+                canonical = canonical_text(keyword)
+                if canonical and canonical not in self._canonical:
+                    self._canonical[canonical] = (field, keyword)
+                    position = len(self._keywords)
+                    trigrams = _trigrams(canonical)
+                    self._keywords.append((canonical, field, keyword, len(trigrams)))
+                    for trigram in trigrams:
+                        self._trigram_index[trigram].append(position)
+
+    def match(self, key) -> Optional[KeywordMatch]:
+        """Campo que corresponde a la clave, o None si ninguna palabra clave alcanza `min_confidence`."""
+        result = self._cache.get(key)
+        if result is MISSING:
+            result = self._match(key)
+            self._cache.set(key, result)
+        return result
+
+    def field_for(self, key) -> Optional[str]:
+        result = self.match(key)
+        return result.field if result is not None else None
+
+    def _match(self, key) -> Optional[KeywordMatch]:
+        entry = self._exact.get(normalize_text(key))
+        if entry is not None:
+            return KeywordMatch(entry[0], entry[1], EXACT_CONFIDENCE, False)
+        canonical = canonical_text(key)
+        if not canonical:
+            return None
+        entry = self._canonical.get(canonical)
+        if entry is not None:
+            return KeywordMatch(entry[0], entry[1], CANONICAL_CONFIDENCE, False)
+        return self._fuzzy_match(canonical) if self.fuzzy else None
+
+    def _fuzzy_match(self, canonical: str) -> Optional[KeywordMatch]:
+        trigrams = _trigrams(canonical)
+        shared = defaultdict(int)
+        for trigram in trigrams:
+            for position in self._trigram_index.get(trigram, ()):
+                shared[position] += 1
+        # Solo se calcula la distancia de edición de las candidatas con más trigramas en común
+        # (coeficiente de Dice); un par de letras cambiadas conserva más de la mitad
+        candidates = []
+        for position, count in shared.items():
+            dice = 2 * count / (len(trigrams) + self._keywords[position][3])
+            if dice >= FUZZY_MIN_DICE:
+                candidates.append((dice, position))
+        candidates.sort(reverse=True)
+
+        best = None
+        best_score = self.min_confidence
+        for dice, position in candidates[:FUZZY_CANDIDATES]:
+            candidate, field, keyword, _ = self._keywords[position]
+            if dice < FUZZY_ACCEPT_DICE or not _words_agree(canonical, candidate):
+                continue
+            length = max(len(candidate), len(canonical))
+            limit = int(length * (1 - best_score))
+            distance = edit_distance(canonical, candidate, limit)
+            if distance > limit:
+                continue
+            # Las coincidencias difusas nunca superan a las exactas
+            score = round(min(CANONICAL_CONFIDENCE - 0.01, 1 - distance / length), 4)
+            if best is None or score > best.confidence:
+                best = KeywordMatch(field, keyword, score, True)
+                best_score = score
+        return best
+
+    def stats(self) -> dict:
+        return {"keywords": len(self._keywords), "fuzzy": self.fuzzy, "cache": self._cache.stats()}
@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+
+class TokenBucketLimiter:
+    """
+    Limitador de tasa por clave con el algoritmo token bucket. Cada clave acumula hasta
+    `burst` fichas y recupera `rate` fichas por segundo; cada petición consume una.
+    Se recuerdan como máximo `max_keys` claves (las usadas hace más tiempo se descartan).
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # clave -> (fichas, instante de la última recarga)
+        self._lock = threading.Lock()
+        self._allowed = 0
+        self._rejected = 0
+
+    def acquire(self, key: Hashable) -> float:
+        """
+        Intenta consumir una ficha.
+
+        Returns:
+            float: 0 si la petición se admite; si no, segundos hasta la siguiente ficha.
+        """
+        return acquire_all((self, key))
+
+    # Los métodos siguientes se llaman con el lock tomado
+
+    def _refill(self, key: Hashable, now: float) -> float:
+        tokens, updated_at = self._buckets.get(key, (float(self.burst), now))
+        return min(float(self.burst), tokens + (now - updated_at) * self.rate)
+
+    def _store(self, key: Hashable, tokens: float, now: float):
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+    def _retry_after(self, tokens: float) -> float:
+        return (1 - tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def reset(self, key: Hashable):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "keys": len(self._buckets),
+                "allowed": self._allowed,
+                "rejected": self._rejected,
+            }
+
+
+def acquire_all(*requests) -> float:
+    """
+    Consume una ficha de cada (limitador, clave) solo si todos la admiten: si alguno
+    rechaza la petición, no se consume ninguna (p. ej. por username y por IP).
+
+    Returns:
+        float: 0 si la petición se admite; si no, los segundos de espera más largos.
+    """
+    # Los locks se toman siempre en el mismo orden para no bloquearse entre llamadas
+    limiters = sorted({id(limiter): limiter for limiter, _ in requests}.values(), key=id)
+    now = time.monotonic()
+    for limiter in limiters:
+        limiter._lock.acquire()
+    try:
+        levels = [(limiter, key, limiter._refill(key, now)) for limiter, key in requests]
+        retry_after = max((limiter._retry_after(tokens) for limiter, _, tokens in levels if tokens < 1), default=0.0)
+        for limiter, key, tokens in levels:
+            if retry_after:
+                limiter._store(key, tokens, now)
+                if tokens < 1:
+                    limiter._rejected += 1
+            else:
+                limiter._store(key, tokens - 1, now)
+                limiter._allowed += 1
+        return retry_after
+    finally:
+        for limiter in reversed(limiters):
+            limiter._lock.release()
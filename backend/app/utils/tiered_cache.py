@@ -0,0 +1,164 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from app.utils.cache import MISSING, TTLCache
+
+
+class CompressedDiskCache:
+    """
+    Caché en disco de valores binarios comprimidos con zlib, un archivo por entrada.
+    Cuando el total comprimido supera `max_bytes` se eliminan las entradas usadas hace más
+    tiempo. El índice se reconstruye desde el directorio (por fecha de último uso) la
+    primera vez que se usa, así la caché sobrevive a los reinicios.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, level: int = 6):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.level = level
+        self._index = OrderedDict()  # nombre de archivo -> bytes, del menos al más usado
+        self._bytes = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._errors = 0
+
+    def _name(self, key: Hashable) -> str:
+        return hashlib.sha256(str(key).encode("utf-8")).hexdigest() + ".z"
+
+    def _load(self):
+        # Se llama con el lock tomado
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.isdir(self.directory):
+            return
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".z"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._index[name] = size
+            self._bytes += size
+        self._evict()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        name = self._name(key)
+        path = os.path.join(self.directory, name)
+        with self._lock:
+            self._load()
+            if name not in self._index:
+                self._misses += 1
+                return None
+            self._index.move_to_end(name)
+        try:
+            with open(path, "rb") as source:
+                value = zlib.decompress(source.read())
+            os.utime(path)
+        except (OSError, zlib.error) as e:
+            logging.error(f"No se pudo leer la entrada {name} de la caché en disco: {e}")
+            with self._lock:
+                self._errors += 1
+                self._misses += 1
+                self._remove(name)
+            return None
+        with self._lock:
+            self._hits += 1
+        return value
+
+    def set(self, key: Hashable, value: bytes):
+        name = self._name(key)
+        path = os.path.join(self.directory, name)
+        data = zlib.compress(value, self.level)
+        if len(data) > self.max_bytes:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path + ".tmp", "wb") as target:
+                target.write(data)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            logging.error(f"No se pudo escribir la entrada {name} en la caché en disco: {e}")
+            with self._lock:
+                self._errors += 1
+            return
+        with self._lock:
+            self._load()
+            self._bytes += len(data) - self._index.pop(name, 0)
+            self._index[name] = len(data)
+            self._evict()
+
+    def _remove(self, name: str):
+        # Se llama con el lock tomado
+        self._bytes -= self._index.pop(name, 0)
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+    def _evict(self):
+        # Se llama con el lock tomado
+        while self._bytes > self.max_bytes and self._index:
+            self._remove(next(iter(self._index)))
+            self._evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._index),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "errors": self._errors,
+            }
+
+
+class TieredCache:
+    """
+    Caché de dos niveles para valores serializables como JSON: una LRU en memoria (TTLCache)
+    sobre una CompressedDiskCache opcional. Lo que se encuentra en disco vuelve a memoria.
+    Los valores de la caché en memoria se comparten: no se deben modificar.
+    """
+
+    def __init__(self, memory: TTLCache, disk: Optional[CompressedDiskCache] = None):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self.memory.get(key)
+        if value is not MISSING:
+            return value
+        if self.disk is not None:
+            data = self.disk.get(key)
+            if data is not None:
+                value = json.loads(data)
+                self.memory.set(key, value)
+                return value
+        return default
+
+    def set(self, key: Hashable, value: Any):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, json.dumps(value, default=str, separators=(",", ":")).encode("utf-8"))
+
+    def stats(self) -> dict:
+        return {
+            "memory": self.memory.stats(),
+            "disk": self.disk.stats() if self.disk is not None else None,
+        }
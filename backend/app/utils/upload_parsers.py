@@ -0,0 +1,289 @@
+import gzip
+from io import BytesIO
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+import pandas as pd
+
+# pyarrow es opcional: sin él solo está disponible el motor de pandas (y no se aceptan Parquet)
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pc = pa_csv = pq = None
+
+# zstandard es opcional: sin él los CSV .zst se descomprimen con pyarrow
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Extensiones admitidas: (formato, compresión)
+UPLOAD_FORMATS = {
+    ".csv": ("csv", None),
+    ".csv.gz": ("csv", "gzip"),
+    ".csv.zst": ("csv", "zstd"),
+    ".csv.zstd": ("csv", "zstd"),
+    ".parquet": ("parquet", None),
+}
+
+# Bytes de CSV por cada byte comprimido (estimación para planificar la lectura por bloques)
+COMPRESSED_CSV_EXPANSION = 5
+
+# Una tabla de Arrow o un DataFrame, según el motor
+Columnar = Union[pd.DataFrame, "pa.Table"]
+
+
+class UnsupportedUploadError(ValueError):
+    """El formato del archivo o el motor pedido no están disponibles."""
+
+
+class EmptyUploadError(ValueError):
+    """El archivo (ya descomprimido) no tiene contenido."""
+
+
+def detect_format(filename: str) -> Optional[Tuple[str, Optional[str]]]:
+    """Formato y compresión según la extensión del archivo, o None si no se admite."""
+    name = filename.lower()
+    for suffix in sorted(UPLOAD_FORMATS, key=len, reverse=True):
+        if name.endswith(suffix):
+            return UPLOAD_FORMATS[suffix]
+    return None
+
+
+def available_engines() -> List[str]:
+    return ["pandas", "pyarrow"] if pa is not None else ["pandas"]
+
+
+def resolve_engine(engine: str, upload_format: Tuple[str, Optional[str]]) -> str:
+    """
+    Motor con el que se lee el archivo. `auto` usa pyarrow si está instalado.
+
+    Raises:
+        UnsupportedUploadError: Si el motor o el formato requieren una dependencia no instalada.
+    """
+    kind, compression = upload_format
+    engine = getattr(engine, "value", engine)
+    if engine == "auto":
+        engine = "pyarrow" if pa is not None else "pandas"
+    if engine not in ("pandas", "pyarrow"):
+        raise UnsupportedUploadError(f"Motor de lectura no válido: {engine}.")
+    if (engine == "pyarrow" or kind == "parquet") and pa is None:
+        raise UnsupportedUploadError("El motor pyarrow (requerido para Parquet) no está instalado.")
+    if kind == "parquet":
+        return "pyarrow"
+    if compression == "zstd" and zstandard is None and pa is None:
+        raise UnsupportedUploadError("Para leer CSV comprimidos con zstd se requiere pyarrow o zstandard.")
+    return engine
+
+
+class _KeepOpen:
+    """
+    Envoltorio del archivo recibido para los lectores de Arrow: al cerrarlos no se cierra el
+    original, que se sigue usando (subida a S3, segunda lectura de los duplicados).
+    """
+
+    def __init__(self, fileobj: BinaryIO):
+        self._fileobj = fileobj
+        self.closed = False
+
+    def __getattr__(self, name):
+        return getattr(self._fileobj, name)
+
+    def close(self):
+        self.closed = True
+
+
+def _open_decompressed(fileobj: BinaryIO, compression: Optional[str]) -> BinaryIO:
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=fileobj, mode="rb")
+    if compression == "zstd":
+        if zstandard is not None:
+            return zstandard.ZstdDecompressor().stream_reader(fileobj, closefd=False)
+        return pa.CompressedInputStream(pa.PythonFile(_KeepOpen(fileobj), mode="r"), "zstd")
+    return fileobj
+
+
+def _arrow_stream(source: Union[bytes, BinaryIO], compression: Optional[str]):
+    if isinstance(source, (bytes, bytearray)):
+        stream = pa.BufferReader(source)
+    else:
+        stream = pa.PythonFile(_KeepOpen(source), mode="r")
+    return pa.CompressedInputStream(stream, compression) if compression else stream
+
+
+def _arrow_csv_options(text_columns: List[str], block_size: Optional[int] = None) -> tuple:
+    read_options = pa_csv.ReadOptions(use_threads=True, **({"block_size": block_size} if block_size else {}))
+    # Igual que pandas: los valores vacíos son nulos. Las columnas del esquema se leen como
+    # texto para que un bloque no falle si su tipo difiere del inferido en el primero
+    convert_options = pa_csv.ConvertOptions(
+        strings_can_be_null=True,
+        column_types={name: pa.string() for name in text_columns}
+    )
+    return read_options, convert_options
+
+
+def _infer_numbers(table: "pa.Table") -> "pa.Table":
+    """
+    Convierte a números las columnas de texto en las que todos los valores lo son, como
+    hace la inferencia de tipos de pandas (la validación marca esas columnas como de otro tipo).
+    """
+    for index, field in enumerate(table.schema):
+        if not pa.types.is_string(field.type) or table.column(index).null_count == len(table):
+            continue
+        for target in (pa.int64(), pa.float64()):
+            try:
+                column = pc.cast(table.column(index), target)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                continue
+            table = table.set_column(index, field.name, column)
+            break
+    return table
+
+
+def _to_frame(data) -> pd.DataFrame:
+    # Las columnas quedan respaldadas por Arrow (sin copiar cada valor a un objeto de Python)
+    return data.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def _read_csv_text(source, text_columns: List[str], **kwargs):
+    # Las columnas del esquema se leen como texto: "000" o "1.50" se cargan tal como vienen
+    return pd.read_csv(source, encoding="utf-8", dtype={name: str for name in text_columns}, **kwargs)
+
+
+def _infer_frame(df: pd.DataFrame, text_columns: List[str]) -> pd.DataFrame:
+    """
+    Vista para validar: convierte a números las columnas de texto en las que todos los valores
+    lo son, como la inferencia de tipos de pandas. El DataFrame original no se modifica.
+    """
+    inferred = None
+    for name in text_columns:
+        if name not in df.columns or not df[name].notna().any():
+            continue
+        try:
+            numbers = pd.to_numeric(df[name])
+        except (ValueError, TypeError):
+            continue
+        if inferred is None:
+            inferred = df.copy(deep=False)
+        inferred[name] = numbers
+    return df if inferred is None else inferred
+
+
+def text_frame(columnar: Columnar, text_columns: List[str]) -> pd.DataFrame:
+    """Columnas del esquema de los datos para la carga, como texto (para comparar filas entre bloques)."""
+    if isinstance(columnar, pd.DataFrame):
+        return columnar[text_columns]
+    return _to_frame(columnar.select(text_columns))
+
+
+def read_upload(
+    contents: bytes,
+    upload_format: Tuple[str, Optional[str]],
+    engine: str,
+    text_columns: List[str]
+) -> Tuple[pd.DataFrame, Columnar]:
+    """
+    Lee el archivo completo desde los bytes recibidos.
+
+    Returns:
+        tuple: (DataFrame para validar, datos para la carga masiva). Con pyarrow la carga
+        recibe la tabla de Arrow; con pandas, un DataFrame. Las columnas del esquema llegan a
+        la carga como texto; solo la vista para validar infiere números.
+
+    Raises:
+        EmptyUploadError: Si el archivo no tiene contenido.
+    """
+    kind, compression = upload_format
+    if engine == "pandas":
+        try:
+            df = _read_csv_text(_open_decompressed(BytesIO(contents), compression), text_columns)
+        except pd.errors.EmptyDataError:
+            raise EmptyUploadError("El archivo está vacío.")
+        return _infer_frame(df, text_columns), df
+
+    if kind == "parquet":
+        table = pq.read_table(pa.BufferReader(contents), use_threads=True)
+    else:
+        read_options, convert_options = _arrow_csv_options(text_columns)
+        try:
+            table = pa_csv.read_csv(_arrow_stream(contents, compression), read_options, convert_options=convert_options)
+        except pa.ArrowInvalid as e:
+            if "Empty CSV file" in str(e):
+                raise EmptyUploadError("El archivo está vacío.")
+            raise
+        return _to_frame(_infer_numbers(table)), table
+    return _to_frame(table), table
+
+
+def iter_upload(
+    fileobj: BinaryIO,
+    upload_format: Tuple[str, Optional[str]],
+    engine: str,
+    text_columns: List[str],
+    chunk_rows: int,
+    block_bytes: int
+) -> Iterator[Tuple[pd.DataFrame, Columnar]]:
+    """
+    Lee el archivo por bloques desde el inicio. Cada bloque es (DataFrame para validar,
+    datos para la carga masiva), como en `read_upload`: cada bloque infiere sus tipos solo
+    en la vista para validar, así la carga recibe siempre el texto original. Con pyarrow los bloques de CSV son
+    de unos `block_bytes` bytes; en los demás casos, de `chunk_rows` filas.
+    """
+    kind, compression = upload_format
+    fileobj.seek(0)
+    if engine == "pandas":
+        for chunk in _read_csv_text(_open_decompressed(fileobj, compression), text_columns, chunksize=chunk_rows):
+            yield _infer_frame(chunk, text_columns), chunk
+        return
+
+    if kind == "parquet":
+        batches = pq.ParquetFile(_KeepOpen(fileobj)).iter_batches(batch_size=chunk_rows, use_threads=True)
+    else:
+        read_options, convert_options = _arrow_csv_options(text_columns, block_bytes)
+        batches = pa_csv.open_csv(_arrow_stream(fileobj, compression), read_options, convert_options=convert_options)
+    for batch in batches:
+        table = pa.Table.from_batches([batch])
+        yield _to_frame(_infer_numbers(table) if kind == "csv" else table), table
+
+
+def profile_upload(fileobj: BinaryIO, upload_format: Tuple[str, Optional[str]], sample_bytes: int) -> Tuple[float, float]:
+    """
+    Estima las filas del archivo y los bytes de texto por fila (para repartir la memoria de
+    la lectura por bloques). Deja el archivo al inicio.
+    """
+    kind, compression = upload_format
+    fileobj.seek(0)
+    try:
+        if kind == "parquet":
+            metadata = pq.ParquetFile(_KeepOpen(fileobj)).metadata
+            rows = max(1, metadata.num_rows)
+            size = sum(metadata.row_group(i).total_byte_size for i in range(metadata.num_row_groups))
+            return float(rows), max(1.0, size / rows)
+
+        file_size = fileobj.seek(0, 2)
+        fileobj.seek(0)
+        sample = _open_decompressed(fileobj, compression).read(sample_bytes)
+        line_bytes = max(1.0, len(sample) / max(1, sample.count(b"\n")))
+        expanded = file_size * COMPRESSED_CSV_EXPANSION if compression else file_size
+        return expanded / line_bytes, line_bytes
+    finally:
+        fileobj.seek(0)
+
+
+def is_blank_upload(fileobj: BinaryIO, upload_format: Tuple[str, Optional[str]], block_size: int = 1024 * 1024) -> bool:
+    """Indica si el archivo (descomprimido) está vacío o solo tiene espacios. Deja el archivo al inicio."""
+    kind, compression = upload_format
+    fileobj.seek(0)
+    try:
+        if kind == "parquet":
+            return fileobj.read(1) == b""
+        source = _open_decompressed(fileobj, compression)
+        while True:
+            block = source.read(block_size)
+            if not block:
+                return True
+            if not block.isspace():
+                return False
+    finally:
+        fileobj.seek(0)
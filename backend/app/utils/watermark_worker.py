@@ -0,0 +1,109 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+
+class IdHorizon:
+    """
+    Límite seguro para avanzar una marca de agua sobre el id IDENTITY de dbo.logs. Los ids
+    se asignan al insertar pero las transacciones se confirman en otro orden: un id menor
+    puede hacerse visible después de uno mayor. Solo se procesa hasta el MAX(id) observado
+    hace al menos `lag` segundos, cuando los INSERT de ese momento ya terminaron.
+    """
+
+    def __init__(self, lag: float):
+        self.lag = lag
+        self._observations = deque()  # (instante, MAX(id)) aún dentro del margen
+        self._safe = 0
+        self._lock = threading.Lock()
+
+    def observe(self, max_id: int, now: float = None) -> int:
+        """Registra el MAX(id) actual y retorna el id más alto que ya se puede procesar."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._observations.append((now, max_id))
+            while self._observations and now - self._observations[0][0] >= self.lag:
+                self._safe = max(self._safe, self._observations.popleft()[1])
+            return self._safe
+
+    def pending(self) -> bool:
+        """Indica si hay ids observados que todavía están dentro del margen."""
+        with self._lock:
+            return any(max_id > self._safe for _, max_id in self._observations)
+
+
+def safe_upper_bound(cursor, horizon: Optional[IdHorizon]) -> Optional[int]:
+    """Id más alto de dbo.logs que el trabajo puede procesar, o None si no hay margen."""
+    if horizon is None:
+        return None
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM dbo.logs")
+    return horizon.observe(cursor.fetchone()[0])
+
+
+class WatermarkWorker:
+    """
+    Hilo que ejecuta un trabajo incremental sobre dbo.logs (índices, agregados) a partir
+    de su marca de agua. El escritor de logs lo despierta con cada lote escrito (vía
+    `notify`); también se ejecuta periódicamente por si otro proceso insertó logs.
+
+    El trabajo recibe `horizon` (IdHorizon con el margen `lag`) y no debe pasar de
+    `safe_upper_bound`; si quedan logs dentro del margen se vuelve a ejecutar al cumplirse.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        job: Callable[..., int],
+        interval: float = 30.0,
+        enabled: bool = True,
+        lag: float = 5.0
+    ):
+        self.name = name
+        self.job = job
+        self.interval = interval
+        self.enabled = enabled
+        self.horizon = IdHorizon(lag)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._processed = 0
+        self._errors = 0
+
+    def notify(self, rows: list = None):
+        self._wake.set()
+
+    def start(self):
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(min(self.interval, self.horizon.lag) if self.horizon.pending() else self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self._processed += self.job(horizon=self.horizon)
+            except Exception as e:
+                self._errors += 1
+                logging.error(f"Error en el proceso {self.name}: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "processed": self._processed,
+            "errors": self._errors,
+        }
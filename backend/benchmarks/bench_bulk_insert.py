@@ -0,0 +1,115 @@
+"""
+Benchmark de la inserción de las filas de un CSV en dbo.uploaded_files: el ciclo
+anterior (iterrows + un cursor.execute por fila) contra bulk_load_service.
+
+No requiere SQL Server: un cursor simulado cuenta los viajes de ida y vuelta y las
+filas enviadas. El tiempo reportado es el tiempo real de Python (preparar y enviar los
+parámetros) más el costo de red simulado: viajes * --rtt-ms + filas * --row-us.
+
+Uso:
+    python benchmarks/bench_bulk_insert.py --rows 1000000 --rtt-ms 0.5
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.services.bulk_load_service import bulk_load_uploaded_files  # noqa: E402
+
+
+class SimulatedCursor:
+    """Cursor que solo cuenta viajes de ida y vuelta y filas enviadas."""
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+        self.fast_executemany = False
+
+    def execute(self, query, params=None):
+        self.stats["round_trips"] += 1
+        self.stats["rows"] += 1
+
+    def executemany(self, query, rows):
+        rows = list(rows)
+        # Sin fast_executemany pyodbc envía una sentencia por fila
+        self.stats["round_trips"] += 1 if self.fast_executemany else len(rows)
+        self.stats["rows"] += len(rows)
+
+    def setinputsizes(self, sizes):
+        pass
+
+    def close(self):
+        pass
+
+
+class SimulatedConnection:
+    def __init__(self):
+        self.stats = {"round_trips": 0, "rows": 0}
+
+    def cursor(self):
+        return SimulatedCursor(self.stats)
+
+    def commit(self):
+        self.stats["round_trips"] += 1
+
+    def rollback(self):
+        pass
+
+
+def legacy_load(conn, df: pd.DataFrame):
+    cursor = conn.cursor()
+    for _, row in df.iterrows():
+        cursor.execute(
+            "INSERT INTO uploaded_files (column1, column2) VALUES (?, ?)",
+            (row["column1"], row["column2"])
+        )
+    conn.commit()
+
+
+def run(name: str, load, df: pd.DataFrame, rtt_ms: float, row_us: float):
+    conn = SimulatedConnection()
+    start = time.perf_counter()
+    load(conn, df)
+    python_seconds = time.perf_counter() - start
+    network_seconds = conn.stats["round_trips"] * rtt_ms / 1000 + conn.stats["rows"] * row_us / 1_000_000
+    total = python_seconds + network_seconds
+    print(
+        f"{name:22s} viajes {conn.stats['round_trips']:>9,}   python {python_seconds:7.2f} s   "
+        f"red {network_seconds:8.2f} s   total {total:8.2f} s"
+    )
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--rtt-ms", type=float, default=0.5, help="Latencia de ida y vuelta con el servidor")
+    parser.add_argument("--row-us", type=float, default=2.0, help="Costo del servidor por fila insertada")
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    df = pd.DataFrame({
+        "column1": [f"cliente_{n:09d}" for n in range(args.rows)],
+        "column2": [f"proveedor_{n * 7:011d}" for n in range(args.rows)],
+    })
+    print(f"{args.rows:,} filas, RTT {args.rtt_ms} ms, {args.row_us} µs por fila\n")
+
+    legacy = run("iterrows + execute", legacy_load, df, args.rtt_ms, args.row_us)
+    bulk = run(
+        "fast_executemany",
+        lambda conn, data: bulk_load_uploaded_files(conn, data, mode="executemany", chunk_size=args.chunk_size),
+        df, args.rtt_ms, args.row_us
+    )
+    run(
+        "staging",
+        lambda conn, data: bulk_load_uploaded_files(conn, data, mode="staging", chunk_size=args.chunk_size),
+        df, args.rtt_ms, args.row_us
+    )
+    print(f"\nAceleración con fast_executemany: {legacy / bulk:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark del procesamiento de CSV de POST /upload: la versión anterior (decodificar a
+str, StringIO y read_csv dos veces, en validate_csv y en store_csv_data) contra el flujo
+actual de file_upload_service (un solo read_csv desde los bytes, validación y
+almacenamiento sobre el mismo DataFrame).
+
+Cada variante se ejecuta en un proceso aparte para medir su pico de memoria (RSS). Ambas
+importan los mismos módulos y leen el archivo antes de medir, así que además del pico total
+se informa la memoria adicional que usa el procesamiento (pico menos RSS al empezar); el
+pico total incluye pandas, pyarrow y boto3, que pesan más que un CSV pequeño. La inserción
+en la base de datos y la subida a S3 se reemplazan por funciones vacías: se mide el costo
+de leer, validar y preparar las filas.
+
+Uso:
+    python benchmarks/bench_csv_upload.py --size-mb 500
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+def generate_csv(path: str, size_mb: int):
+    """Genera un CSV válido (2 columnas de texto, sin duplicados) del tamaño indicado."""
+    target = size_mb * 1024 * 1024
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("column1,column2\n")
+        written, i = 0, 0
+        while written < target:
+            lines = "".join(f"cliente_{n:012d},proveedor_{n * 7:014d}\n" for n in range(i, i + 100_000))
+            f.write(lines)
+            written += len(lines)
+            i += 100_000
+
+
+def legacy_pipeline(contents: bytes):
+    """Flujo anterior: cada etapa decodifica y vuelve a interpretar el archivo."""
+    import pandas as pd
+
+    if not contents.strip():
+        raise ValueError("vacío")
+    df = pd.read_csv(StringIO(contents.decode("utf-8")))
+    df.shape, df.isnull().values.any(), df.duplicated().any()
+
+    df = pd.read_csv(StringIO(contents.decode("utf-8")))
+    for _, row in df.iterrows():
+        (row["column1"], row["column2"])
+
+
+class NullCursor:
+    """
+    Cursor sin efectos: solo se mide el recorrido de las filas. Un MagicMock guardaría los
+    argumentos de cada executemany y el pico de memoria incluiría todas las filas enviadas.
+    """
+
+    fast_executemany = False
+    rowcount = 0
+
+    def execute(self, *args):
+        return self
+
+    def executemany(self, *args):
+        pass
+
+    def setinputsizes(self, *args):
+        pass
+
+    def close(self):
+        pass
+
+
+def current_pipeline(contents: bytes):
+    from app.services import file_upload_service
+
+    conn = MagicMock()
+    conn.cursor.return_value = NullCursor()
+    with patch.object(file_upload_service, "get_db_connection", return_value=conn), \
+         patch.object(file_upload_service, "store_log"), \
+         patch.object(file_upload_service, "upload_file_to_s3", return_value={}):
+        file_upload_service.handle_file_upload(contents, "bench.csv")
+
+
+def current_rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def run_child(mode: str, path: str):
+    import pandas  # noqa: F401
+    from app.services import file_upload_service  # noqa: F401
+
+    with open(path, "rb") as f:
+        contents = f.read()
+    baseline_mb = current_rss_mb()
+    start = time.perf_counter()
+    if mode == "legacy":
+        legacy_pipeline(contents)
+    else:
+        current_pipeline(contents)
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed:.3f} {peak_mb:.1f} {peak_mb - baseline_mb:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=500)
+    parser.add_argument("--child", choices=["legacy", "current"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.path)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.csv")
+        generate_csv(path, args.size_mb)
+        size = os.path.getsize(path) / (1024 * 1024)
+        print(f"CSV de {size:.0f} MB")
+
+        results = {}
+        for mode in ("legacy", "current"):
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", mode, "--path", path],
+                check=True, capture_output=True, text=True
+            ).stdout.split()
+            results[mode] = tuple(float(value) for value in output)
+            elapsed, peak, extra = results[mode]
+            print(f"{mode:8s} tiempo {elapsed:8.2f} s   pico RSS {peak:8.0f} MB   adicional {extra:8.0f} MB")
+
+        ratio = results["legacy"][0] / results["current"][0]
+        print(
+            f"\nTiempo legacy/current: {ratio:.1f}x   "
+            f"memoria adicional legacy/current: {results['legacy'][2]:.0f} / {results['current'][2]:.0f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
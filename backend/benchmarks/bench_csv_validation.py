@@ -0,0 +1,123 @@
+"""
+Benchmark del motor de validación de app/utils/csv_validation.py sobre DataFrames de
+varios millones de filas.
+
+1. Validación anterior de file_upload_service (cuatro revisiones de sí/no, sin filas).
+2. Las mismas reglas del esquema evaluadas fila por fila en Python, informando filas.
+3. El motor vectorizado con el mismo esquema.
+4. Un archivo con muchos errores: el motor se detiene al superar el máximo de errores.
+
+Uso:
+    python benchmarks/bench_csv_validation.py --rows 5000000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.utils.csv_validation import ColumnRule, Schema, is_text_dtype, validate_frame  # noqa: E402
+
+SCHEMA = Schema([
+    ColumnRule("code", pattern=r"[A-Z]{2}\d{6}"),
+    ColumnRule("amount", dtype="float", min_value=0, max_value=1_000_000),
+    ColumnRule("name", max_length=20),
+], unique_rows=True)
+
+
+def generate_frame(rows: int, error_rate: float, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    numbers = np.arange(rows)
+    df = pd.DataFrame({
+        "code": pd.Series(numbers % 1_000_000).map("AB{:06d}".format) if rows <= 1_000_000
+        else "AB" + pd.Series(numbers % 1_000_000).astype(str).str.zfill(6),
+        "amount": rng.uniform(0, 1_000_000, rows).round(2).astype(str),
+        "name": "cliente_" + pd.Series(numbers).astype(str),
+    })
+    bad = rng.random(rows) < error_rate
+    df.loc[bad, "code"] = "invalido"
+    return df
+
+
+def legacy_validate(df: pd.DataFrame) -> list:
+    """Validación anterior: cuatro revisiones vectorizadas de sí/no."""
+    results = []
+    if df.shape[1] != 3:
+        results.append("columnas")
+    if df.isnull().values.any():
+        results.append("vacíos")
+    if not all(is_text_dtype(dtype) for dtype in df.dtypes):
+        results.append("tipos")
+    if df.duplicated().any():
+        results.append("duplicados")
+    return results
+
+
+def row_loop_validate(df: pd.DataFrame, max_rows: int = 20) -> dict:
+    """Las reglas del esquema evaluadas fila por fila, como haría un validador en Python puro."""
+    code_pattern = re.compile(r"[A-Z]{2}\d{6}")
+    issues = {}
+    seen = set()
+
+    def add(key, row):
+        rows = issues.setdefault(key, [])
+        if len(rows) < max_rows:
+            rows.append(row)
+
+    for row, (code, amount, name) in enumerate(df.itertuples(index=False, name=None), start=1):
+        if code is None or not code_pattern.fullmatch(code):
+            add("code", row)
+        try:
+            if not 0 <= float(amount) <= 1_000_000:
+                add("amount", row)
+        except (TypeError, ValueError):
+            add("amount", row)
+        if name is None or len(name) > 20:
+            add("name", row)
+        key = (code, amount, name)
+        if key in seen:
+            add("duplicados", row)
+        seen.add(key)
+    return issues
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--error-rate", type=float, default=0.001, help="Proporción de filas con código inválido")
+    parser.add_argument("--skip-loop", action="store_true", help="No ejecutar la validación fila por fila")
+    args = parser.parse_args()
+
+    print(f"Generando {args.rows:,} filas...")
+    df = generate_frame(args.rows, args.error_rate)
+
+    print(f"\n== {args.rows:,} filas, {args.error_rate:.2%} con errores ==")
+    seconds, _ = timed(legacy_validate, df)
+    print(f"{'anterior (sí/no, sin filas)':38s} {seconds:7.2f} s")
+    if not args.skip_loop:
+        seconds, _ = timed(row_loop_validate, df)
+        print(f"{'reglas fila por fila':38s} {seconds:7.2f} s")
+    seconds, report = timed(validate_frame, df, SCHEMA, max_errors=len(df))
+    print(f"{'motor vectorizado':38s} {seconds:7.2f} s   {report.error_count:,} errores")
+
+    print("\n== 20% de filas con errores ==")
+    noisy = generate_frame(args.rows, 0.2)
+    seconds, report = timed(validate_frame, noisy, SCHEMA, max_errors=len(noisy) * 4)
+    print(f"{'motor, sin máximo de errores':38s} {seconds:7.2f} s   {report.error_count:,} errores")
+    seconds, report = timed(validate_frame, noisy, SCHEMA, max_errors=1000)
+    print(f"{'motor, máximo 1000 errores':38s} {seconds:7.2f} s   detenido: {report.truncated}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark del filtro por descripción de GET /history en SQL: recorrido completo
+(`message LIKE '%termino%'`) contra el índice de trigramas de log_search_service.
+
+Ejecuta las consultas que arma history_service._build_base_query (con y sin el filtro de
+build_search_filter) sobre SQLite en memoria, con las tablas de sql/002_log_trigram_index.sql
+en un esquema `dbo`. No requiere SQL Server: los tiempos absolutos difieren, pero ambos
+caminos usan el mismo motor, el mismo SQL y la misma clave primaria (trigram, log_id).
+
+Uso:
+    python benchmarks/bench_history_search.py --rows 1000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.services import log_search_service  # noqa: E402
+from app.services.history_service import _build_base_query  # noqa: E402
+from app.services.log_search_service import extract_trigrams  # noqa: E402
+
+TEMPLATES = [
+    "user_id:{n}, successfully authenticated.",
+    "Incorrect password for username: usuario{n}",
+    "Archivo subido con éxito a bucket/files/file_upload/reporte_{n}.csv",
+    "Factura almacenada en la base de datos. ID: {n}",
+    "Error al analizar el documento: timeout {n}",
+    "Tipo de archivo no válido: image/gif ({n})",
+]
+
+
+def generate_messages(rows: int) -> list:
+    rng = random.Random(42)
+    return [rng.choice(TEMPLATES).format(n=rng.randint(1, 10_000_000)) for _ in range(rows)]
+
+
+def create_database(messages: list) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute("ATTACH DATABASE ':memory:' AS dbo")
+    conn.execute(
+        "CREATE TABLE dbo.logs (id INTEGER PRIMARY KEY, level TEXT, message TEXT, log_type TEXT, timestamp TEXT)"
+    )
+    conn.execute(
+        "CREATE TABLE dbo.log_trigrams (trigram TEXT NOT NULL, log_id INTEGER NOT NULL, "
+        "PRIMARY KEY (trigram, log_id)) WITHOUT ROWID"
+    )
+    conn.execute("CREATE TABLE dbo.log_search_state (id INTEGER PRIMARY KEY, last_indexed_id INTEGER NOT NULL)")
+    conn.executemany(
+        "INSERT INTO dbo.logs (id, level, message, log_type, timestamp) VALUES (?, 'IA', ?, 'INFO', '2024-11-29')",
+        enumerate(messages, start=1)
+    )
+    return conn
+
+
+def build_index(conn: sqlite3.Connection, messages: list):
+    conn.executemany(
+        "INSERT INTO dbo.log_trigrams (trigram, log_id) VALUES (?, ?)",
+        ((trigram, log_id) for log_id, message in enumerate(messages, start=1) for trigram in extract_trigrams(message))
+    )
+    conn.execute("INSERT INTO dbo.log_search_state (id, last_indexed_id) VALUES (1, ?)", (len(messages),))
+    conn.commit()
+
+
+def search(conn: sqlite3.Connection, term: str, use_index: bool) -> list:
+    with patch.object(log_search_service, "LOG_SEARCH_INDEX_ENABLED", use_index):
+        query, params = _build_base_query(None, term, None, None)
+    return sorted(row[0] for row in conn.execute(query, params))
+
+
+def timed(func, *args, repeat: int = 3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--terms", nargs="*", default=["usuario12345", "timeout", "reporte99", "gif"])
+    args = parser.parse_args()
+
+    print(f"Generando {args.rows:,} mensajes...")
+    messages = generate_messages(args.rows)
+    conn = create_database(messages)
+
+    started = time.perf_counter()
+    build_index(conn, messages)
+    postings = conn.execute("SELECT COUNT(*) FROM dbo.log_trigrams").fetchone()[0]
+    print(f"Índice construido en {time.perf_counter() - started:.1f}s ({postings:,} filas en dbo.log_trigrams)\n")
+
+    print(f"{'término':<16}{'coincidencias':>14}{'scan (ms)':>12}{'índice (ms)':>14}{'mejora':>9}")
+    for term in args.terms:
+        scan_time, scan_result = timed(search, conn, term, False, repeat=1)
+        index_time, index_result = timed(search, conn, term, True)
+        assert scan_result == index_result, f"Resultados distintos para {term!r}"
+        print(
+            f"{term:<16}{len(scan_result):>14,}{scan_time * 1000:>12.1f}"
+            f"{index_time * 1000:>14.2f}{scan_time / max(index_time, 1e-9):>8.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
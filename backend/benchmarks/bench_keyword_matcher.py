@@ -0,0 +1,99 @@
+"""
+Microbenchmark de la búsqueda de campos para las claves extraídas por Textract: la búsqueda
+lineal anterior (normaliza todas las palabras clave de KEYWORD_MAPPING en cada clave) contra
+KeywordMatcher (índices compilados una vez), sin y con su caché de resultados.
+
+Las claves mezclan palabras clave con otras mayúsculas y tildes, variantes con ruido de OCR
+(letras cambiadas, puntuación suelta) y claves que no corresponden a ningún campo.
+
+Uso:
+    python benchmarks/bench_keyword_matcher.py --keys 20000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import unicodedata
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.utils.keyword_matcher import KeywordMatcher  # noqa: E402
+from app.utils.text_extraction_mapping import KEYWORD_MAPPING  # noqa: E402
+
+OTHER_KEYS = ["Teléfono", "Correo electrónico", "Observaciones", "Forma de pago", "Vendedor asignado", "Moneda", "Página"]
+
+
+def legacy_normalize_text(text):
+    if not text:
+        return ""
+    text = text.lower().strip()
+    return "".join(c for c in unicodedata.normalize("NFD", text) if unicodedata.category(c) != "Mn")
+
+
+def legacy_find_matching_field(key, keyword_mapping):
+    normalized_key = legacy_normalize_text(key)
+    for field, keywords in keyword_mapping.items():
+        normalized_keywords = [legacy_normalize_text(k) for k in keywords]
+        if any(normalized_key == keyword for keyword in normalized_keywords):
+            return field
+    return None
+
+
+def ocr_noise(text: str, rng: random.Random) -> str:
+    chars = list(legacy_normalize_text(text))
+    position = rng.randrange(len(chars))
+    if rng.random() < 0.5 and len(chars) > 1:
+        chars[position], chars[position - 1] = chars[position - 1], chars[position]
+    else:
+        chars.insert(position, rng.choice(".,;'"))
+    return "".join(chars)
+
+
+def make_keys(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    keywords = [keyword for keywords in KEYWORD_MAPPING.values() for keyword in keywords]
+    keys = []
+    for _ in range(count):
+        kind = rng.random()
+        keyword = rng.choice(keywords)
+        if kind < 0.5:
+            keys.append(keyword.upper() if rng.random() < 0.5 else f" {keyword.title()} ")
+        elif kind < 0.75:
+            keys.append(ocr_noise(keyword, rng))
+        else:
+            keys.append(f"{rng.choice(OTHER_KEYS)} {rng.randrange(100)}")
+    return keys
+
+
+def timed(name: str, keys: list, find) -> None:
+    start = time.perf_counter()
+    matched = sum(1 for key in keys if find(key) is not None)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<36} {elapsed * 1000:9.1f} ms  {len(keys) / elapsed:12,.0f} claves/s  {matched:6} con campo")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys", type=int, default=20000)
+    args = parser.parse_args()
+
+    keys = make_keys(args.keys)
+    print(f"{len(keys)} claves, {sum(len(v) for v in KEYWORD_MAPPING.values())} palabras clave")
+
+    timed("búsqueda lineal (anterior)", keys, lambda key: legacy_find_matching_field(key, KEYWORD_MAPPING))
+
+    start = time.perf_counter()
+    KeywordMatcher(KEYWORD_MAPPING, fuzzy=True)
+    print(f"{'compilación del mapeo':<36} {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+    exact = KeywordMatcher(KEYWORD_MAPPING, fuzzy=False, cache_size=1)
+    timed("índice exacto, sin caché", keys, exact._match)
+    fuzzy = KeywordMatcher(KEYWORD_MAPPING, fuzzy=True, cache_size=1)
+    timed("índice exacto + difuso, sin caché", keys, fuzzy._match)
+    cached = KeywordMatcher(KEYWORD_MAPPING, fuzzy=True)
+    timed("índice exacto + difuso, con caché", keys, cached.match)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark de la subida de archivos a S3 contra el S3 local de benchmarks/fake_s3.py
+(no requiere AWS ni red).
+
+1. Rendimiento de upload_fileobj con la configuración por defecto de boto3 contra
+   distintos tamaños de parte y concurrencias (con el pool de conexiones ajustado).
+2. Tiempo total de handle_file_upload: la inserción en la base de datos (simulada con
+   --db-seconds) seguida de la subida, contra ambas al mismo tiempo.
+
+Uso:
+    python benchmarks/bench_s3_upload.py --size-mb 128 --latency-ms 50 --mbps 2
+"""
+import argparse
+import os
+import sys
+import time
+from io import BytesIO
+from unittest.mock import patch
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_s3 import FakeS3Server  # noqa: E402
+
+BUCKET = "benchmark"
+MB = 1024 * 1024
+
+
+def make_client(endpoint_url: str, max_pool_connections: int = 10):
+    return boto3.client(
+        "s3",
+        endpoint_url=endpoint_url,
+        region_name="us-east-1",
+        aws_access_key_id="benchmark",
+        aws_secret_access_key="benchmark",
+        config=Config(max_pool_connections=max_pool_connections, s3={"addressing_style": "path"})
+    )
+
+
+def tuned(chunk_mb: int, concurrency: int, in_memory: bool = True) -> TransferConfig:
+    config = TransferConfig(multipart_chunksize=chunk_mb * MB, max_concurrency=concurrency)
+    if in_memory:
+        # Sin este ajuste boto3 mantiene a lo sumo 10 partes en vuelo al subir desde memoria
+        config.max_in_memory_upload_chunks = concurrency
+    return config
+
+
+def bench_throughput(server: FakeS3Server, data: bytes, repeat: int):
+    print(f"\n== upload_fileobj de {len(data) / MB:.0f} MB ==")
+    variants = [
+        ("boto3 por defecto", None, 10),
+        ("parte 8 MB, 32 hilos", tuned(8, 32, in_memory=False), 32),
+        ("parte 8 MB, 32 hilos, 32 en memoria", tuned(8, 32), 32),
+        ("parte 16 MB, 32 hilos, 32 en memoria", tuned(16, 32), 32),
+        ("parte 8 MB, 32 hilos, pool 10", tuned(8, 32), 10),
+    ]
+    for name, config, pool in variants:
+        client = make_client(server.endpoint_url, pool)
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            kwargs = {"Config": config} if config is not None else {}
+            client.upload_fileobj(BytesIO(data), BUCKET, "bench/throughput.bin", **kwargs)
+            best = min(best, time.perf_counter() - start)
+        assert server.objects[(BUCKET, "bench/throughput.bin")] == data
+        print(f"{name:38s} {best:7.2f} s   {len(data) / MB / best:8.1f} MB/s")
+
+
+def bench_overlap(server: FakeS3Server, data: bytes, db_seconds: float):
+    from app.services import file_upload_service as service
+
+    print(f"\n== handle_file_upload con {db_seconds:.1f} s de inserción simulada ==")
+    client = make_client(server.endpoint_url, service.S3_MAX_POOL_CONNECTIONS)
+    contents = b"column1,column2\nvalor1,valor2\n" + data
+
+    def simulated_store(*args, **kwargs):
+        time.sleep(db_seconds)
+
+    def sequential(contents, filename):
+        # Orden anterior: insertar y, al terminar, subir a S3
+        simulated_store()
+        return service.upload_file_to_s3(contents, f"files/file_upload/{filename}")
+
+    with patch.object(service, "s3_client", client), \
+         patch.object(service, "BUCKET_NAME", BUCKET), \
+         patch.object(service, "validate_csv", return_value=[]), \
+         patch.object(service, "parse_upload", return_value=(None, None)), \
+         patch.object(service, "store_csv_data", side_effect=simulated_store), \
+         patch.object(service, "store_log"):
+        for name, func in (("secuencial", sequential), ("en paralelo", service.handle_file_upload)):
+            start = time.perf_counter()
+            func(contents, "bench.csv")
+            print(f"{name:38s} {time.perf_counter() - start:7.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=128)
+    parser.add_argument("--latency-ms", type=float, default=50, help="Latencia simulada por petición")
+    parser.add_argument("--mbps", type=float, default=2, help="Ancho de banda simulado por conexión en MB/s")
+    parser.add_argument("--db-seconds", type=float, default=5, help="Duración simulada de la inserción")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    server = FakeS3Server(latency_ms=args.latency_ms, mbps=args.mbps).start()
+    try:
+        data = os.urandom(args.size_mb * MB)
+        bench_throughput(server, data, args.repeat)
+        bench_overlap(server, data, args.db_seconds)
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark del análisis asíncrono de PDF de varias páginas (StartDocumentAnalysis /
+GetDocumentAnalysis) contra el Textract local de benchmarks/fake_textract.py y el S3 local de
+benchmarks/fake_s3.py (no requiere AWS ni red).
+
+Analiza --documents PDF de --pages páginas con run_textract (sin caché ni base de datos) y
+compara:
+1. Trabajos de a uno consultando el estado a intervalo fijo (--fixed-poll) con páginas de
+   resultados de 100 bloques.
+2. Trabajos de a uno con espera creciente y páginas de 1000 bloques (la configuración del servicio).
+3. Varios trabajos a la vez (--jobs), como con TEXTRACT_ASYNC_MAX_JOBS.
+
+Uso:
+    python benchmarks/bench_textract_async.py --documents 12 --pages 40 --page-seconds 0.2 --jobs 6
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_s3_upload import BUCKET, make_client  # noqa: E402
+from fake_s3 import FakeS3Server  # noqa: E402
+from fake_textract import FakeTextract, make_pdf  # noqa: E402
+from app.db import DBExecutor  # noqa: E402
+from app.services import document_analysis_service as service  # noqa: E402
+from app.services import file_upload_service  # noqa: E402
+from app.utils.concurrency import ConcurrencyLimiter  # noqa: E402
+
+
+def run_scenario(name, args, client, documents, jobs, poll_initial, poll_max, page_size):
+    # Un Textract nuevo por escenario: el anterior devolvería los trabajos ya terminados (ClientRequestToken)
+    textract = FakeTextract(client, args.latency_ms, args.page_seconds, args.parallel_pages)
+
+    async def analyze_all():
+        return await asyncio.gather(*(service.run_textract(document) for document in documents))
+
+    with patch.object(service, "textract_client", textract), \
+         patch.object(service, "TEXTRACT_CACHE_ENABLED", False), \
+         patch.object(service, "TEXTRACT_ASYNC_POLL_INITIAL", poll_initial), \
+         patch.object(service, "TEXTRACT_ASYNC_POLL_MAX", poll_max), \
+         patch.object(service, "TEXTRACT_RESULTS_PAGE_SIZE", page_size), \
+         patch.object(service, "textract_job_limiter", ConcurrencyLimiter(jobs, len(documents), 3600)), \
+         patch.object(service, "textract_job_executor", DBExecutor(max_workers=jobs, thread_name_prefix="textract-job")), \
+         patch.object(service, "store_log"), \
+         patch.object(file_upload_service, "s3_client", client), \
+         patch.object(file_upload_service, "BUCKET_NAME", BUCKET), \
+         patch.object(file_upload_service, "store_log"):
+        start = time.perf_counter()
+        responses = asyncio.run(analyze_all())
+        elapsed = time.perf_counter() - start
+
+    pages = sum(response["DocumentMetadata"]["Pages"] for response in responses)
+    pairs = sum(len(service.extract_data_from_textract_response(response)) for response in responses)
+    get_calls = textract.calls["GetDocumentAnalysis"]
+    print(
+        f"{name:<44} {elapsed:7.2f} s  {len(documents) / elapsed:6.2f} doc/s  {pages / elapsed:7.1f} pág/s  "
+        f"{get_calls / len(documents):5.1f} Get/doc  {pairs} pares clave-valor"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=12)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--page-seconds", type=float, default=0.2, help="Tiempo simulado de Textract por página")
+    parser.add_argument("--parallel-pages", type=int, default=8, help="Páginas que Textract procesa a la vez por trabajo")
+    parser.add_argument("--latency-ms", type=float, default=30, help="Latencia simulada por llamada")
+    parser.add_argument("--fixed-poll", type=float, default=2.0, help="Intervalo fijo de consulta del escenario 1")
+    parser.add_argument("--jobs", type=int, default=6)
+    args = parser.parse_args()
+
+    server = FakeS3Server(latency_ms=args.latency_ms).start()
+    try:
+        client = make_client(server.endpoint_url)
+        # Contenido distinto por documento para que no se reutilicen trabajos por ClientRequestToken
+        documents = [make_pdf(args.pages, {f"Documento {i}": "página {page}"}) for i in range(args.documents)]
+        print(f"{args.documents} documentos de {args.pages} páginas ({len(documents[0]) / 1024:.0f} KB cada uno)")
+
+        run_scenario("1. de a uno, intervalo fijo, páginas de 100", args, client, documents, 1, args.fixed_poll, args.fixed_poll, 100)
+        run_scenario("2. de a uno, espera creciente, páginas de 1000", args, client, documents, 1, 0.25, 5, 1000)
+        run_scenario(f"3. {args.jobs} trabajos a la vez", args, client, documents, args.jobs, 0.25, 5, 1000)
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
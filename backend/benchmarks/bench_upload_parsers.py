@@ -0,0 +1,99 @@
+"""
+Benchmark de los motores de lectura de app/utils/upload_parsers.py con el mismo archivo
+en CSV, CSV comprimido (gzip y zstd) y Parquet.
+
+Para cada variante se mide la lectura (read_upload: DataFrame para validar y datos para la
+carga) y la conversión de las filas a tuplas que hace el cargador masivo antes de
+enviarlas a la base de datos (sin base de datos). La referencia es el flujo anterior:
+decodificar a str y leer con pd.read_csv desde StringIO.
+
+pyarrow y zstandard son opcionales: las variantes que los requieren se omiten si no están
+instalados. El motor pyarrow usa varios hilos; la mejora depende de los núcleos disponibles.
+
+Uso:
+    python benchmarks/bench_upload_parsers.py --size-mb 200
+"""
+import argparse
+import gzip
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.services.bulk_load_service import _chunk_rows  # noqa: E402
+from app.utils import upload_parsers  # noqa: E402
+from app.utils.upload_parsers import read_upload  # noqa: E402
+
+COLUMNS = ["column1", "column2"]
+MB = 1024 * 1024
+
+
+def generate_csv(size_mb: int) -> bytes:
+    lines = ["column1,column2\n"]
+    written, i = 0, 0
+    while written < size_mb * MB:
+        block = "".join(f"cliente_{n:012d},proveedor_{n * 7:014d}\n" for n in range(i, i + 100_000))
+        lines.append(block)
+        written += len(block)
+        i += 100_000
+    return "".join(lines).encode("utf-8")
+
+
+def legacy_read(contents: bytes):
+    df = pd.read_csv(io.StringIO(contents.decode("utf-8")))
+    return df, df
+
+
+def convert_rows(data) -> int:
+    rows = 0
+    for chunk, _ in _chunk_rows(data, 10_000):
+        rows += len(chunk)
+    return rows
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"Generando {args.size_mb} MB de CSV... (núcleos: {os.cpu_count()})")
+    contents = generate_csv(args.size_mb)
+    payloads = {"csv": contents, "gzip": gzip.compress(contents, compresslevel=1)}
+    if upload_parsers.zstandard is not None:
+        payloads["zstd"] = upload_parsers.zstandard.ZstdCompressor().compress(contents)
+    if upload_parsers.pa is not None:
+        buffer = io.BytesIO()
+        upload_parsers.pq.write_table(upload_parsers.pa_csv.read_csv(upload_parsers.pa.BufferReader(contents)), buffer)
+        payloads["parquet"] = buffer.getvalue()
+    for name, payload in payloads.items():
+        print(f"  {name:8s} {len(payload) / MB:8.1f} MB")
+
+    variants = [("anterior (decode + StringIO)", legacy_read, contents)]
+    for engine in upload_parsers.available_engines():
+        variants.append((f"{engine}, csv", lambda data, engine=engine: read_upload(data, ("csv", None), engine, COLUMNS), contents))
+        variants.append((f"{engine}, csv.gz", lambda data, engine=engine: read_upload(data, ("csv", "gzip"), engine, COLUMNS), payloads["gzip"]))
+        if "zstd" in payloads:
+            variants.append((f"{engine}, csv.zst", lambda data, engine=engine: read_upload(data, ("csv", "zstd"), engine, COLUMNS), payloads["zstd"]))
+    if "parquet" in payloads:
+        variants.append(("pyarrow, parquet", lambda data: read_upload(data, ("parquet", None), "pyarrow", COLUMNS), payloads["parquet"]))
+
+    print(f"\n{'variante':32s} {'lectura':>9s} {'a tuplas':>9s} {'total':>9s}")
+    for name, read, payload in variants:
+        read_seconds, (_, columnar) = timed(read, payload)
+        convert_seconds, rows = timed(convert_rows, columnar)
+        print(f"{name:32s} {read_seconds:8.2f}s {convert_seconds:8.2f}s {read_seconds + convert_seconds:8.2f}s   {rows:,} filas")
+        del columnar
+
+
+if __name__ == "__main__":
+    main()
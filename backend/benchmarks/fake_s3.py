@@ -0,0 +1,208 @@
+"""
+S3 local mínimo para los benchmarks: guarda los objetos en memoria y atiende las
+operaciones que usa la aplicación (PutObject, subida por partes, DeleteObject y
+GetObject/HeadObject) con direccionamiento por ruta (http://host:puerto/bucket/clave).
+
+Simula la red con una latencia fija por petición (--latency-ms) y un ancho de banda
+por conexión (--mbps), de modo que el paralelismo de la subida por partes se refleje
+en el tiempo igual que contra S3.
+
+Uso como proceso independiente:
+    python benchmarks/fake_s3.py --port 9000 --latency-ms 30 --mbps 20
+    S3_ENDPOINT_URL=http://127.0.0.1:9000 AWS_ACCESS_KEY_ID=x AWS_SECRET_ACCESS_KEY=x ...
+
+Uso desde otro benchmark:
+    server = FakeS3Server(latency_ms=30, mbps=20).start()
+    ... server.endpoint_url ...
+    server.stop()
+"""
+import argparse
+import itertools
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+class FakeS3Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    # === Lectura del cuerpo ===
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            body = self._read_http_chunks()
+        else:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if "aws-chunked" in self.headers.get("Content-Encoding", ""):
+            body = _decode_aws_chunked(body)
+        self._throttle(len(body))
+        return body
+
+    def _read_http_chunks(self) -> bytes:
+        parts = []
+        while True:
+            size = int(self.rfile.readline().split(b";")[0].strip(), 16)
+            if size == 0:
+                # Trailers hasta la línea vacía
+                while self.rfile.readline().strip():
+                    pass
+                return b"".join(parts)
+            parts.append(self.rfile.read(size))
+            self.rfile.readline()
+
+    def _throttle(self, size: int):
+        server = self.server
+        delay = server.latency
+        if server.bytes_per_second:
+            delay += size / server.bytes_per_second
+        if delay:
+            time.sleep(delay)
+
+    # === Respuestas ===
+
+    def _send(self, status: int, body: bytes = b"", headers: dict = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _xml(self, status: int, content: str):
+        self._send(status, ('<?xml version="1.0" encoding="UTF-8"?>' + content).encode(), {"Content-Type": "application/xml"})
+
+    def _target(self):
+        url = urlsplit(self.path)
+        bucket, _, key = unquote(url.path).lstrip("/").partition("/")
+        query = {name: values[0] for name, values in parse_qs(url.query, keep_blank_values=True).items()}
+        return bucket, key, query
+
+    # === Operaciones ===
+
+    def do_PUT(self):
+        bucket, key, query = self._target()
+        body = self._read_body()
+        # ETag sin calcular el MD5 del contenido: el servidor no debe competir por CPU con el cliente
+        etag = f'"{len(body):x}-{next(self.server.ids)}"'
+        if "uploadId" in query:
+            with self.server.lock:
+                upload = self.server.uploads.get(query["uploadId"])
+                if upload is None:
+                    return self._xml(404, "<Error><Code>NoSuchUpload</Code></Error>")
+                upload["parts"][int(query["partNumber"])] = body
+        else:
+            with self.server.lock:
+                self.server.objects[(bucket, key)] = body
+                self.server.requests["put"] += 1
+        self._send(200, headers={"ETag": etag})
+
+    def do_POST(self):
+        bucket, key, query = self._target()
+        self._read_body()
+        if "uploads" in query:
+            upload_id = str(next(self.server.ids))
+            with self.server.lock:
+                self.server.uploads[upload_id] = {"bucket": bucket, "key": key, "parts": {}}
+                self.server.requests["multipart"] += 1
+            return self._xml(200, (
+                "<InitiateMultipartUploadResult>"
+                f"<Bucket>{bucket}</Bucket><Key>{key}</Key><UploadId>{upload_id}</UploadId>"
+                "</InitiateMultipartUploadResult>"
+            ))
+        if "uploadId" in query:
+            with self.server.lock:
+                upload = self.server.uploads.pop(query["uploadId"], None)
+                if upload is None:
+                    return self._xml(404, "<Error><Code>NoSuchUpload</Code></Error>")
+                data = b"".join(upload["parts"][number] for number in sorted(upload["parts"]))
+                self.server.objects[(bucket, key)] = data
+            return self._xml(200, (
+                "<CompleteMultipartUploadResult>"
+                f"<Bucket>{bucket}</Bucket><Key>{key}</Key><ETag>\"{len(data):x}-{len(upload['parts'])}\"</ETag>"
+                "</CompleteMultipartUploadResult>"
+            ))
+        self._xml(400, "<Error><Code>NotImplemented</Code></Error>")
+
+    def do_DELETE(self):
+        bucket, key, query = self._target()
+        with self.server.lock:
+            if "uploadId" in query:
+                self.server.uploads.pop(query["uploadId"], None)
+            else:
+                self.server.objects.pop((bucket, key), None)
+                self.server.requests["delete"] += 1
+        self._send(204)
+
+    def do_GET(self):
+        bucket, key, _ = self._target()
+        data = self.server.objects.get((bucket, key))
+        if data is None:
+            return self._xml(404, "<Error><Code>NoSuchKey</Code></Error>")
+        self._send(200, data, {"ETag": f'"{len(data):x}"'})
+
+    def do_HEAD(self):
+        self.do_GET()
+
+
+def _decode_aws_chunked(body: bytes) -> bytes:
+    """Quita el formato aws-chunked (tamaño;firma CRLF datos CRLF ... 0 CRLF trailers)."""
+    data = []
+    position = 0
+    while True:
+        line_end = body.index(b"\r\n", position)
+        size = int(body[position:line_end].split(b";")[0], 16)
+        if size == 0:
+            return b"".join(data)
+        start = line_end + 2
+        data.append(body[start:start + size])
+        position = start + size + 2
+
+
+class FakeS3Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0, mbps: float = 0):
+        super().__init__((host, port), FakeS3Handler)
+        self.latency = latency_ms / 1000
+        self.bytes_per_second = mbps * 1024 * 1024
+        self.lock = threading.Lock()
+        self.objects = {}
+        self.uploads = {}
+        self.ids = itertools.count(1)
+        self.requests = {"put": 0, "multipart": 0, "delete": 0}
+        self._thread = None
+
+    @property
+    def endpoint_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeS3Server":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-s3", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latencia simulada por petición")
+    parser.add_argument("--mbps", type=float, default=0, help="Ancho de banda simulado por conexión en MB/s (0 = sin límite)")
+    args = parser.parse_args()
+
+    server = FakeS3Server(args.host, args.port, args.latency_ms, args.mbps)
+    print(f"S3 local en {server.endpoint_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -0,0 +1,148 @@
+"""
+Textract local mínimo para los benchmarks y las pruebas sin AWS: un objeto con la misma
+interfaz que el cliente de boto3 para AnalyzeDocument, StartDocumentAnalysis y
+GetDocumentAnalysis (con paginación por NextToken).
+
+Los documentos son PDF sintéticos (ver make_pdf): cada objeto /Type /Page es una página y
+cada "(Clave: valor)" de la página, un par clave-valor de FORMS. Cada página genera además
+`filler_words` palabras para que las respuestas tengan un tamaño realista.
+
+Simula los tiempos de Textract: una latencia fija por llamada (--latency-ms), un tiempo por
+página (--page-seconds) y el procesamiento de `parallel_pages` páginas a la vez en los
+trabajos asíncronos. AnalyzeDocument rechaza los PDF de varias páginas, como el real.
+
+Uso desde otro benchmark:
+    textract = FakeTextract(s3_client=client, latency_ms=50, page_seconds=0.2)
+    with patch.object(document_analysis_service, "textract_client", textract): ...
+"""
+import itertools
+import math
+import re
+import threading
+import time
+from botocore.exceptions import ClientError
+
+PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+FIELD_PATTERN = re.compile(rb"\(([^():]+):\s*([^()]*)\)")
+
+
+def make_pdf(pages: int, fields: dict = None) -> bytes:
+    """PDF sintético de `pages` páginas; los campos se repiten con el número de página."""
+    fields = fields or {"Invoice Number": "F-{page}", "Client Name": "Cliente {page}"}
+    parts = [b"%PDF-1.4\n"]
+    for page in range(1, pages + 1):
+        parts.append(f"{page} 0 obj << /Type /Page >>\nBT\n".encode())
+        for key, value in fields.items():
+            parts.append(f"({key}: {value.format(page=page)}) Tj\n".encode())
+        parts.append(b"ET\nendobj\n")
+    parts.append(b"%%EOF\n")
+    return b"".join(parts)
+
+
+def _client_error(code: str, message: str, operation: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": message}}, operation)
+
+
+class FakeTextract:
+    def __init__(
+        self,
+        s3_client=None,
+        latency_ms: float = 50,
+        page_seconds: float = 0.2,
+        parallel_pages: int = 8,
+        filler_words: int = 300
+    ):
+        self.s3_client = s3_client
+        self.documents = {}  # (bucket, clave) -> bytes, si no hay cliente de S3
+        self.latency = latency_ms / 1000
+        self.page_seconds = page_seconds
+        self.parallel_pages = max(1, parallel_pages)
+        self.filler_words = filler_words
+        self._jobs = {}
+        self._tokens = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.calls = {"AnalyzeDocument": 0, "StartDocumentAnalysis": 0, "GetDocumentAnalysis": 0}
+
+    # === Generación de bloques ===
+
+    def _blocks(self, content: bytes) -> list:
+        pages = PAGE_PATTERN.split(content)[1:] or [content]
+        blocks = []
+        ids = itertools.count(1)
+        for number, page in enumerate(pages, start=1):
+            page_block = {"Id": f"p{number}", "BlockType": "PAGE", "Page": number, "Relationships": [{"Type": "CHILD", "Ids": []}]}
+            blocks.append(page_block)
+            for key, value in FIELD_PATTERN.findall(page):
+                key_words = [self._word(ids, text, number) for text in key.decode().split()]
+                value_words = [self._word(ids, text, number) for text in value.decode().split()]
+                value_id, key_id = f"b{next(ids)}", f"b{next(ids)}"
+                blocks.append({
+                    "Id": key_id, "BlockType": "KEY_VALUE_SET", "EntityTypes": ["KEY"], "Page": number,
+                    "Relationships": [{"Type": "VALUE", "Ids": [value_id]}, {"Type": "CHILD", "Ids": [w["Id"] for w in key_words]}]
+                })
+                blocks.append({
+                    "Id": value_id, "BlockType": "KEY_VALUE_SET", "EntityTypes": ["VALUE"], "Page": number,
+                    "Relationships": [{"Type": "CHILD", "Ids": [w["Id"] for w in value_words]}]
+                })
+                blocks.extend(key_words + value_words)
+            filler = [self._word(ids, f"palabra{i}", number) for i in range(self.filler_words)]
+            page_block["Relationships"][0]["Ids"] = [w["Id"] for w in filler]
+            blocks.extend(filler)
+        return blocks
+
+    @staticmethod
+    def _word(ids, text: str, page: int) -> dict:
+        return {"Id": f"b{next(ids)}", "BlockType": "WORD", "Text": text, "Confidence": 99.0, "Page": page}
+
+    # === API ===
+
+    def analyze_document(self, Document: dict, FeatureTypes: list):
+        self.calls["AnalyzeDocument"] += 1
+        content = Document["Bytes"]
+        if len(PAGE_PATTERN.findall(content)) > 1:
+            time.sleep(self.latency)
+            raise _client_error("UnsupportedDocumentException", "Request has unsupported document format", "AnalyzeDocument")
+        time.sleep(self.latency + self.page_seconds)
+        return {"DocumentMetadata": {"Pages": 1}, "Blocks": self._blocks(content), "AnalyzeDocumentModelVersion": "1.0"}
+
+    def start_document_analysis(self, DocumentLocation: dict, FeatureTypes: list, ClientRequestToken: str = None):
+        time.sleep(self.latency)
+        with self._lock:
+            self.calls["StartDocumentAnalysis"] += 1
+            if ClientRequestToken in self._tokens:
+                return {"JobId": self._tokens[ClientRequestToken]}
+        location = DocumentLocation["S3Object"]
+        if self.s3_client is not None:
+            content = self.s3_client.get_object(Bucket=location["Bucket"], Key=location["Name"])["Body"].read()
+        else:
+            content = self.documents[(location["Bucket"], location["Name"])]
+        blocks = self._blocks(content)
+        pages = sum(1 for block in blocks if block["BlockType"] == "PAGE")
+        with self._lock:
+            job_id = f"job-{next(self._ids)}"
+            ready_at = time.monotonic() + math.ceil(pages / self.parallel_pages) * self.page_seconds
+            self._jobs[job_id] = (ready_at, pages, blocks)
+            if ClientRequestToken:
+                self._tokens[ClientRequestToken] = job_id
+        return {"JobId": job_id}
+
+    def get_document_analysis(self, JobId: str, MaxResults: int = 1000, NextToken: str = None):
+        time.sleep(self.latency)
+        with self._lock:
+            self.calls["GetDocumentAnalysis"] += 1
+            if JobId not in self._jobs:
+                raise _client_error("InvalidJobIdException", "Job not found", "GetDocumentAnalysis")
+            ready_at, pages, blocks = self._jobs[JobId]
+        if time.monotonic() < ready_at:
+            return {"JobStatus": "IN_PROGRESS"}
+        offset = int(NextToken or 0)
+        response = {
+            "JobStatus": "SUCCEEDED",
+            "DocumentMetadata": {"Pages": pages},
+            "Blocks": blocks[offset:offset + MaxResults],
+            "AnalyzeDocumentModelVersion": "1.0",
+        }
+        if offset + MaxResults < len(blocks):
+            response["NextToken"] = str(offset + MaxResults)
+        return response
@@ -0,0 +1,7 @@
+-- Índice para la paginación por búsqueda (keyset) de GET /history.
+-- Permite ubicar la página siguiente con un seek sobre (timestamp, id) en lugar de recorrer OFFSET filas.
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_logs_timestamp_id' AND object_id = OBJECT_ID('dbo.logs'))
+    CREATE NONCLUSTERED INDEX IX_logs_timestamp_id
+        ON dbo.logs (timestamp DESC, id DESC)
+        INCLUDE (level, log_type);
+GO
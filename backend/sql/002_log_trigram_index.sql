@@ -0,0 +1,21 @@
+-- Índice de trigramas para el filtro por descripción de GET /history.
+-- `message LIKE '%termino%'` no puede usar índices; la tabla dbo.log_trigrams reduce los
+-- candidatos y el LIKE solo verifica esos registros. La mantiene app/services/log_search_service.py
+-- (se llena desde cero en lotes al iniciar la aplicación con LOG_SEARCH_INDEX_ENABLED=true).
+-- Cada trigrama son 3 caracteres del plano básico: la aplicación reemplaza los que ocupan dos
+-- unidades UTF-16 (emojis) por U+FFFD antes de indexar.
+IF OBJECT_ID('dbo.log_trigrams') IS NULL
+    CREATE TABLE dbo.log_trigrams (
+        trigram NCHAR(3) NOT NULL,
+        log_id BIGINT NOT NULL,
+        CONSTRAINT PK_log_trigrams PRIMARY KEY CLUSTERED (trigram, log_id)
+    );
+GO
+
+-- Marca de agua: último id de dbo.logs ya indexado
+IF OBJECT_ID('dbo.log_search_state') IS NULL
+    CREATE TABLE dbo.log_search_state (
+        id INT NOT NULL CONSTRAINT PK_log_search_state PRIMARY KEY,
+        last_indexed_id BIGINT NOT NULL
+    );
+GO
@@ -0,0 +1,31 @@
+-- Agregados de conteo de logs para GET /analytics/logs.
+-- Conteos por bucket de minuto y de hora, nivel (HistoryType) y log_type. Los mantiene
+-- app/services/analytics_service.py de forma incremental a partir de una marca de agua
+-- (se llenan desde cero en lotes al iniciar la aplicación con LOG_ROLLUP_ENABLED=true).
+IF OBJECT_ID('dbo.log_counts_minute') IS NULL
+    CREATE TABLE dbo.log_counts_minute (
+        bucket DATETIME2(0) NOT NULL,
+        level NVARCHAR(50) NOT NULL,
+        log_type NVARCHAR(50) NOT NULL,
+        total BIGINT NOT NULL,
+        CONSTRAINT PK_log_counts_minute PRIMARY KEY CLUSTERED (bucket, level, log_type)
+    );
+GO
+
+IF OBJECT_ID('dbo.log_counts_hour') IS NULL
+    CREATE TABLE dbo.log_counts_hour (
+        bucket DATETIME2(0) NOT NULL,
+        level NVARCHAR(50) NOT NULL,
+        log_type NVARCHAR(50) NOT NULL,
+        total BIGINT NOT NULL,
+        CONSTRAINT PK_log_counts_hour PRIMARY KEY CLUSTERED (bucket, level, log_type)
+    );
+GO
+
+-- Marca de agua: último id de dbo.logs ya agregado
+IF OBJECT_ID('dbo.log_rollup_state') IS NULL
+    CREATE TABLE dbo.log_rollup_state (
+        id INT NOT NULL CONSTRAINT PK_log_rollup_state PRIMARY KEY,
+        last_rolled_id BIGINT NOT NULL
+    );
+GO
@@ -0,0 +1,19 @@
+-- Tipo de tabla y procedimiento para la carga masiva de dbo.uploaded_files con
+-- parámetros con valor de tabla (UPLOAD_BULK_MODE=tvp en app/services/bulk_load_service.py).
+-- Ajustar el largo de las columnas al de dbo.uploaded_files.
+IF TYPE_ID('dbo.uploaded_files_type') IS NULL
+    CREATE TYPE dbo.uploaded_files_type AS TABLE (
+        column1 NVARCHAR(255) NULL,
+        column2 NVARCHAR(255) NULL
+    );
+GO
+
+CREATE OR ALTER PROCEDURE dbo.insert_uploaded_files
+    @rows dbo.uploaded_files_type READONLY
+AS
+BEGIN
+    SET NOCOUNT ON;
+    INSERT INTO dbo.uploaded_files (column1, column2)
+    SELECT column1, column2 FROM @rows;
+END
+GO
@@ -0,0 +1,31 @@
+-- Deduplicación de las cargas de CSV (app/services/upload_dedup_service.py).
+-- dbo.upload_fingerprints guarda el SHA-256 de cada archivo ingerido; un archivo con el
+-- mismo contenido se responde con la referencia a la carga original sin insertar ni subir
+-- a S3 (UPLOAD_DEDUP_ENABLED=true). status = 'pending' mientras la carga está en curso.
+IF OBJECT_ID('dbo.upload_fingerprints') IS NULL
+    CREATE TABLE dbo.upload_fingerprints (
+        sha256 BINARY(32) NOT NULL CONSTRAINT PK_upload_fingerprints PRIMARY KEY,
+        filename NVARCHAR(260) NOT NULL,
+        s3_key NVARCHAR(1024) NOT NULL,
+        size_bytes BIGINT NOT NULL,
+        status NVARCHAR(10) NOT NULL,
+        row_count BIGINT NULL,
+        rows_inserted BIGINT NULL,
+        claimed_at DATETIME2(0) NOT NULL,
+        ingested_at DATETIME2(0) NULL,
+        last_seen_at DATETIME2(0) NULL,
+        times_seen INT NOT NULL CONSTRAINT DF_upload_fingerprints_times_seen DEFAULT 0
+    );
+GO
+
+-- Hash de cada fila de dbo.uploaded_files para insertar solo las filas nuevas
+-- (skip_existing_rows=true en POST /upload). Se calcula en el servidor, por lo que
+-- también cubre las filas cargadas antes de esta migración.
+IF COL_LENGTH('dbo.uploaded_files', 'row_hash') IS NULL
+    ALTER TABLE dbo.uploaded_files ADD row_hash AS
+        CAST(HASHBYTES('SHA2_256', CONCAT(column1, NCHAR(31), column2)) AS BINARY(32)) PERSISTED;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_uploaded_files_row_hash' AND object_id = OBJECT_ID('dbo.uploaded_files'))
+    CREATE INDEX IX_uploaded_files_row_hash ON dbo.uploaded_files (row_hash);
+GO
@@ -0,0 +1,41 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, AsyncMock
+from datetime import datetime
+from app.main import app
+from app.controllers.dependencies import get_current_user
+
+client = TestClient(app)
+
+# Fixture para simular el usuario autenticado
+@pytest.fixture
+def mock_current_user():
+    app.dependency_overrides[get_current_user] = lambda: {"sub": "user_id", "role": "admin"}
+    yield
+    app.dependency_overrides.pop(get_current_user, None)
+
+# Prueba para la ruta GET /analytics/logs sin token
+def test_get_log_counts_no_token():
+    response = client.get("/analytics/logs")
+    assert response.status_code == 401
+
+# Prueba para la ruta GET /analytics/logs con conteos
+def test_get_log_counts_success(mock_current_user):
+    result = {
+        "bucket": "hour",
+        "start_date": datetime(2024, 11, 29, 0, 0),
+        "end_date": datetime(2024, 11, 30, 0, 0),
+        "counts": [{"bucket": datetime(2024, 11, 29, 8, 0), "level": "IA", "log_type": "ERROR", "count": 12}],
+    }
+    with patch("app.controllers.analytics_controller.get_log_counts", new=AsyncMock(return_value=result)):
+        response = client.get("/analytics/logs", params={"bucket": "hour", "type": "IA"}, headers={"Authorization": "Bearer token"})
+
+    assert response.status_code == 200
+    assert response.json()["data"][0]["count"] == 12
+
+# Prueba para un rango inválido
+def test_get_log_counts_invalid_range(mock_current_user):
+    with patch("app.controllers.analytics_controller.get_log_counts", new=AsyncMock(side_effect=ValueError("Rango no válido"))):
+        response = client.get("/analytics/logs", headers={"Authorization": "Bearer token"})
+
+    assert response.status_code == 400
@@ -0,0 +1,30 @@
+import pytest
+from unittest.mock import patch
+from fastapi import HTTPException
+from app.controllers.dependencies import require_role, get_current_stream_user
+
+# Prueba para un usuario con el rol requerido
+def test_require_role_allows():
+    dependency = require_role("admin")
+    assert dependency({"sub": "admin", "role": "admin"})["sub"] == "admin"
+
+# Prueba para un usuario sin el rol requerido
+@patch("app.controllers.dependencies.store_log")
+def test_require_role_denies(mock_store_log):
+    dependency = require_role("admin")
+    with pytest.raises(HTTPException) as exc:
+        dependency({"sub": "usuario", "role": "user"})
+    assert exc.value.status_code == 403
+    mock_store_log.assert_called_once()
+
+# Prueba para el ticket por query en las transmisiones en vivo (el JWT no se acepta en la URL)
+@patch("app.controllers.dependencies.redeem_stream_ticket")
+@patch("app.controllers.dependencies.verify_token")
+def test_stream_user_accepts_ticket(mock_verify_token, mock_redeem):
+    mock_redeem.return_value = {"sub": "admin", "role": "admin"}
+    assert get_current_stream_user(None, "ticket")["sub"] == "admin"
+    mock_redeem.assert_called_once_with("ticket")
+    mock_verify_token.assert_not_called()
+    with pytest.raises(HTTPException) as exc:
+        get_current_stream_user(None, None)
+    assert exc.value.status_code == 401
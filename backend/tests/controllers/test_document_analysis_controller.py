@@ -1,8 +1,10 @@
+import json
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
 from app.main import app  # Asegúrate de importar tu aplicación FastAPI
 from app.controllers.document_analysis_controller import router  # Ajusta la ruta de importación
+from app.controllers.dependencies import get_current_user
 
 # Añadir el router a la aplicación para las pruebas
 app.include_router(router)
@@ -19,13 +21,18 @@ def mock_file():
     file.file.read.return_value = b"fake file content"
     return file
 
+# Fixture para simular el usuario autenticado
+@pytest.fixture
+def mock_current_user():
+    app.dependency_overrides[get_current_user] = lambda: {"sub": "testuser"}
+    yield
+    app.dependency_overrides.pop(get_current_user, None)
+
 # === Pruebas para el controlador ===
 
-@patch('app.controllers.document_analysis_controller.verify_token')
 @patch('app.controllers.document_analysis_controller.analyze_document')
 @patch('app.controllers.document_analysis_controller.store_log')
-def test_upload_document_success(mock_store_log, mock_analyze_document, mock_verify_token, mock_file):
-    mock_verify_token.return_value = {"sub": "testuser"}
+def test_upload_document_success(mock_store_log, mock_analyze_document, mock_current_user, mock_file):
     mock_analyze_document.return_value = {"message": "Factura almacenada en la base de datos.", "id": 1}
 
     response = client.post(
@@ -40,11 +47,9 @@ def test_upload_document_success(mock_store_log, mock_analyze_document, mock_ver
         "data": {"message": "Factura almacenada en la base de datos.", "id": 1}
     }
 
-@patch('app.controllers.document_analysis_controller.verify_token')
 @patch('app.controllers.document_analysis_controller.analyze_document')
 @patch('app.controllers.document_analysis_controller.store_log')
-def test_upload_document_analysis_error(mock_store_log, mock_analyze_document, mock_verify_token, mock_file):
-    mock_verify_token.return_value = {"sub": "testuser"}
+def test_upload_document_analysis_error(mock_store_log, mock_analyze_document, mock_current_user, mock_file):
     mock_analyze_document.side_effect = Exception("Error de análisis")
 
     response = client.post(
@@ -55,3 +60,63 @@ def test_upload_document_analysis_error(mock_store_log, mock_analyze_document, m
 
     assert response.status_code == 500
     assert response.json() == {"detail": "Error al analizar el documento: Error de análisis"}
+
+# Prueba para el análisis por lotes con un archivo inválido y la inserción en una transacción
+@patch('app.services.document_analysis_service.run_db')
+@patch('app.services.document_analysis_service.run_textract')
+@patch('app.controllers.document_analysis_controller.store_log')
+def test_upload_documents_batch(mock_store_log, mock_run_textract, mock_run_db, mock_current_user):
+    mock_run_textract.return_value = {"Blocks": []}
+    mock_run_db.return_value = [10, 11]
+
+    response = client.post(
+        "/analyze-documents",
+        files=[
+            ("files", ("a.pdf", b"documento a", "application/pdf")),
+            ("files", ("b.txt", b"texto", "text/plain")),
+            ("files", ("c.png", b"documento c", "image/png")),
+        ],
+        headers={"Authorization": "Bearer fake-token"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    by_index = {line["index"]: line for line in lines[:-1]}
+    assert by_index[0]["status"] == "analyzed" and by_index[2]["status"] == "analyzed"
+    assert by_index[1]["status"] == "error" and by_index[1]["status_code"] == 400
+    assert lines[-1]["status"] == "summary"
+    assert lines[-1]["committed"] is True
+    assert [(record["filename"], record["id"]) for record in lines[-1]["records"]] == [("a.pdf", 10), ("c.png", 11)]
+    mock_run_db.assert_called_once()
+    assert len(mock_run_db.call_args.args[1]) == 2
+
+# Prueba para leer los archivos en el endpoint: FastAPI los cierra antes de la respuesta en streaming
+@patch('app.controllers.document_analysis_controller.analyze_documents_batch')
+def test_upload_documents_reads_files_before_streaming(mock_batch, mock_current_user):
+    received = []
+
+    async def fake_batch(documents):
+        received.extend(documents)
+        yield {"status": "summary", "total": len(documents), "analyzed": 0, "failed": 0, "committed": True, "records": []}
+
+    mock_batch.side_effect = fake_batch
+    response = client.post(
+        "/analyze-documents",
+        files=[("files", ("a.pdf", b"documento a", "application/pdf")), ("files", ("b.txt", b"texto", "text/plain"))],
+        headers={"Authorization": "Bearer fake-token"}
+    )
+
+    assert response.status_code == 200
+    assert received == [("a.pdf", "application/pdf", b"documento a"), ("b.txt", "text/plain", b"")]
+
+# Prueba para rechazar un lote con demasiados archivos
+@patch('app.controllers.document_analysis_controller.ANALYZE_BATCH_MAX_FILES', 1)
+def test_upload_documents_too_many_files(mock_current_user):
+    response = client.post(
+        "/analyze-documents",
+        files=[("files", ("a.pdf", b"a", "application/pdf")), ("files", ("b.pdf", b"b", "application/pdf"))],
+        headers={"Authorization": "Bearer fake-token"}
+    )
+
+    assert response.status_code == 400
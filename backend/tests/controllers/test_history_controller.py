@@ -48,3 +48,12 @@ def mock_get_filtered_history():
 def test_get_filtered_history_no_token():
     response = client.get("/history")
     assert response.status_code == 401  # Unauthorized
+
+# Prueba para la ruta POST /history/stream/ticket: exige el encabezado y entrega un ticket
+def test_create_history_stream_ticket():
+    assert client.post("/history/stream/ticket").status_code == 401
+    with patch("app.controllers.dependencies.verify_token") as mock_verify:
+        mock_verify.return_value = {"sub": "admin", "role": "admin"}
+        response = client.post("/history/stream/ticket", headers={"Authorization": "Bearer token"})
+    assert response.status_code == 200
+    assert response.json()["ticket"]
@@ -0,0 +1,82 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from app.main import app
+from app.controllers.dependencies import get_current_user
+from app.utils.job_queue import JobQueueFullError
+
+client = TestClient(app)
+
+example_job = {
+    "id": "abc123",
+    "type": "upload",
+    "status": "queued",
+    "priority": "normal",
+    "attempts": 0,
+    "max_attempts": 3,
+    "created_at": "2024-11-29T08:00:00",
+    "started_at": None,
+    "finished_at": None,
+    "result": None,
+    "error": None,
+    "requested_by": "user_id",
+}
+
+# Fixture para simular el usuario autenticado
+@pytest.fixture
+def current_user():
+    user = {"sub": "user_id", "role": "admin"}
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield user
+    app.dependency_overrides.pop(get_current_user, None)
+
+# Prueba para la ruta GET /jobs/{id} sin token
+def test_get_job_no_token():
+    response = client.get("/jobs/abc123")
+    assert response.status_code == 401
+
+# Prueba para consultar un trabajo existente
+def test_get_job_success(current_user):
+    with patch("app.controllers.job_controller.get_job", return_value=example_job):
+        response = client.get("/jobs/abc123", headers={"Authorization": "Bearer token"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "queued"
+
+# Prueba para un trabajo de otro usuario (sin rol de administrador)
+def test_get_job_other_user(current_user):
+    current_user.update({"sub": "otro", "role": "user"})
+    with patch("app.controllers.job_controller.get_job", return_value=example_job):
+        response = client.get("/jobs/abc123", headers={"Authorization": "Bearer token"})
+    assert response.status_code == 404
+
+# Prueba para encolar una subida con background=true
+def test_upload_background_returns_202(current_user):
+    with patch("app.controllers.job_controller.submit_job", return_value=example_job) as mock_submit, \
+         patch("app.controllers.upload_file_controller.store_log"):
+        response = client.post(
+            "/upload",
+            params={"background": "true", "priority": "high"},
+            files={"file": ("testfile.csv", b"column1,column2\nvalor1,valor2\n", "text/csv")},
+            headers={"Authorization": "Bearer token"}
+        )
+
+    assert response.status_code == 202
+    assert response.headers["Location"] == "/jobs/abc123"
+    job_type, _, params, priority = mock_submit.call_args[0]
+    assert job_type.value == "upload"
+    assert params["filename"] == "testfile.csv"
+    assert priority.value == "high"
+
+# Prueba para la cola llena
+def test_upload_background_queue_full(current_user):
+    with patch("app.controllers.job_controller.submit_job", side_effect=JobQueueFullError("La cola de trabajos está llena.")), \
+         patch("app.controllers.upload_file_controller.store_log"):
+        response = client.post(
+            "/upload",
+            params={"background": "true"},
+            files={"file": ("testfile.csv", b"column1,column2\nvalor1,valor2\n", "text/csv")},
+            headers={"Authorization": "Bearer token"}
+        )
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
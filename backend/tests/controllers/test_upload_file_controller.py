@@ -1,3 +1,4 @@
+import threading
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
@@ -49,3 +50,23 @@ def test_upload_file_no_token():
         )
     
     assert response.status_code == 401  # Unauthorized
+
+# Prueba para procesar la subida en el ejecutor de subidas y no en el de la base de datos
+def test_upload_file_runs_on_upload_executor():
+    threads = []
+
+    def fake_upload(*args):
+        threads.append(threading.current_thread().name)
+        return example_upload_response
+
+    with patch("app.controllers.dependencies.verify_token") as mock_verify, \
+         patch("app.controllers.upload_file_controller.handle_file_upload", side_effect=fake_upload):
+        mock_verify.return_value = {"sub": "admin", "role": "admin"}
+        response = client.post(
+            "/upload",
+            files={"file": ("testfile.csv", b"column1,column2\n1,2\n", "text/csv")},
+            headers={"Authorization": f"Bearer {example_token}"}
+        )
+
+    assert response.status_code == 200
+    assert threads[0].startswith("upload")
@@ -0,0 +1,89 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from datetime import datetime
+from app.services.analytics_service import get_log_counts, rollup_pending_logs, _resolve_range
+from app.utils.watermark_worker import IdHorizon
+from app.utils.enums.time_bucket import TimeBucket
+
+# Fixture para simular la conexión a la base de datos
+@pytest.fixture
+def mock_db_connection():
+    with patch("app.services.analytics_service.get_db_connection") as mock:
+        mock_conn = MagicMock()
+        mock_cursor = mock_conn.cursor.return_value
+        mock_cursor.fetchall.return_value = [
+            (datetime(2024, 11, 29, 8, 0, 0), "IA", "ERROR", 12)
+        ]
+        mock.return_value = mock_conn
+        yield mock
+
+# Prueba para la alineación del rango a los buckets
+def test_resolve_range_aligns_to_buckets():
+    start, end = _resolve_range(TimeBucket.HOUR, datetime(2024, 11, 29, 8, 15), datetime(2024, 11, 29, 10, 5))
+    assert start == datetime(2024, 11, 29, 8, 0)
+    assert end == datetime(2024, 11, 29, 11, 0)
+
+# Prueba para rangos inválidos o demasiado grandes
+def test_resolve_range_invalid():
+    with pytest.raises(ValueError):
+        _resolve_range(TimeBucket.DAY, datetime(2024, 12, 1), datetime(2024, 11, 1))
+    with pytest.raises(ValueError):
+        _resolve_range(TimeBucket.MINUTE, datetime(2023, 1, 1), datetime(2024, 1, 1))
+
+# Prueba para los conteos calculados directamente desde dbo.logs
+@pytest.mark.asyncio
+async def test_get_log_counts_without_rollups(mock_db_connection):
+    result = await get_log_counts(TimeBucket.HOUR, "IA", "ERROR", datetime(2024, 11, 29), datetime(2024, 11, 29, 23))
+
+    assert result["counts"] == [{"bucket": datetime(2024, 11, 29, 8, 0, 0), "level": "IA", "log_type": "ERROR", "count": 12}]
+    assert result["end_date"] == datetime(2024, 11, 30)
+    query, params = mock_db_connection.return_value.cursor.return_value.execute.call_args[0]
+    assert "FROM dbo.logs" in query and "log_counts" not in query
+    assert params == [datetime(2024, 11, 29), datetime(2024, 11, 30), "IA", "ERROR"]
+
+# Prueba para los conteos desde los agregados más los logs aún no agregados
+@pytest.mark.asyncio
+async def test_get_log_counts_with_rollups(mock_db_connection):
+    with patch("app.services.analytics_service.LOG_ROLLUP_ENABLED", True):
+        await get_log_counts(TimeBucket.DAY, start_date=datetime(2024, 11, 1), end_date=datetime(2024, 11, 29))
+
+    query, params = mock_db_connection.return_value.cursor.return_value.execute.call_args[0]
+    assert "FROM dbo.log_counts_hour" in query
+    assert "UNION ALL" in query and "log_rollup_state" in query
+    assert len(params) == 4
+
+# Prueba para la agregación incremental por lotes
+def test_rollup_pending_logs(mock_db_connection):
+    mock_conn = mock_db_connection.return_value
+    mock_cursor = mock_conn.cursor.return_value
+    mock_cursor.fetchone.side_effect = [[0], (2, 2)]
+
+    assert rollup_pending_logs(batch_size=10) == 2
+
+    merges = [c[0][0] for c in mock_cursor.execute.call_args_list if "MERGE" in c[0][0]]
+    assert len(merges) == 3
+    assert "dbo.log_counts_minute" in merges[0] and "dbo.log_counts_hour" in merges[1]
+    mock_conn.commit.assert_called_once()
+    mock_conn.close.assert_called_once()
+
+# Prueba para no pasar del último id seguro al agregar
+def test_rollup_pending_logs_respects_horizon(mock_db_connection):
+    mock_cursor = mock_db_connection.return_value.cursor.return_value
+    mock_cursor.fetchone.side_effect = [[40], [0], (0, None)]
+
+    assert rollup_pending_logs(batch_size=10, horizon=IdHorizon(lag=0)) == 0
+
+    select = mock_cursor.execute.call_args_list[2][0]
+    assert "id > ? AND id <= ?" in select[0]
+    assert select[1] == (10, 0, 40)
+
+# Prueba para el rollback cuando falla la agregación
+def test_rollup_pending_logs_error(mock_db_connection):
+    mock_conn = mock_db_connection.return_value
+    mock_cursor = mock_conn.cursor.return_value
+    mock_cursor.fetchone.side_effect = [[0], (2, 2)]
+    mock_cursor.execute.side_effect = [None, None, Exception("Error de base de datos")]
+
+    with pytest.raises(Exception):
+        rollup_pending_logs(batch_size=10)
+    mock_conn.rollback.assert_called_once()
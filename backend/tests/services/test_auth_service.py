@@ -1,5 +1,7 @@
 import pytest
 from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+from app.services import auth_service
 from app.services.auth_service import create_access_token, verify_token
 from fastapi import HTTPException
 import jwt  # Importar la librería jwt para simular el comportamiento
@@ -83,3 +85,108 @@ def test_is_token_expired():
     future_time = datetime.utcnow() + timedelta(minutes=5)
     assert expired_time < datetime.utcnow()
     assert future_time > datetime.utcnow()
+
+# === Pruebas para la caché de tokens ===
+
+# Fixture con clave de prueba y cachés vacías
+@pytest.fixture
+def token_cache():
+    with patch.object(auth_service, "SECRET_KEY", "clave-de-prueba"), patch.object(auth_service, "ALGORITHM", "HS256"):
+        auth_service._verified_tokens.clear()
+        auth_service._rejected_tokens.clear()
+        yield
+        auth_service._verified_tokens.clear()
+        auth_service._rejected_tokens.clear()
+
+# Prueba para verificar la firma solo la primera vez
+def test_verify_token_uses_cache(token_cache):
+    token = auth_service.create_access_token({"sub": "admin", "role": "admin"})
+
+    with patch.object(auth_service.jwt, "decode", wraps=auth_service.jwt.decode) as mock_decode:
+        assert auth_service.verify_token(token)["role"] == "admin"
+        assert auth_service.verify_token(token)["sub"] == "admin"
+    assert mock_decode.call_count == 1
+
+# Prueba para el rechazo en caché: no se vuelve a decodificar ni a escribir en el log
+def test_rejected_token_is_cached(token_cache):
+    token = auth_service.create_access_token({"sub": "admin"})  # Sin rol
+
+    with patch.object(auth_service, "store_log") as mock_store_log:
+        for _ in range(3):
+            with pytest.raises(HTTPException) as exc:
+                auth_service.verify_token(token)
+            assert exc.value.status_code == 401
+    mock_store_log.assert_called_once()
+    assert auth_service.get_token_cache_stats()["rejected"]["hits"] == 2
+
+# Prueba para refrescar con un token rechazado: se registra el detalle una sola vez
+def test_refresh_rejected_token_logs_once(token_cache):
+    token = auth_service.create_access_token({"sub": "admin"}, expires_delta=timedelta(seconds=-1))
+
+    with patch.object(auth_service, "store_log") as mock_store_log:
+        for _ in range(3):
+            with pytest.raises(HTTPException):
+                auth_service.refresh_access_token(token)
+    mock_store_log.assert_called_once_with("INTERACCION_USUARIO", "El token ha expirado", "ERROR")
+
+# Prueba para que un token vencido no se sirva desde la caché
+def test_expired_token_not_served_from_cache(token_cache):
+    token = auth_service.create_access_token({"sub": "admin", "role": "admin"}, expires_delta=timedelta(seconds=-1))
+    with pytest.raises(HTTPException) as exc:
+        auth_service.verify_token(token)
+    assert exc.value.detail == "El token ha expirado"
+
+# Prueba para el ticket de transmisión: se canjea una sola vez y no contiene el JWT
+def test_stream_ticket_is_single_use():
+    ticket = auth_service.create_stream_ticket({"sub": "admin", "role": "admin", "exp": 123})
+    assert auth_service.redeem_stream_ticket(ticket) == {"sub": "admin", "role": "admin"}
+    with pytest.raises(HTTPException) as exc:
+        auth_service.redeem_stream_ticket(ticket)
+    assert exc.value.status_code == 401
+
+# Prueba para el ticket de transmisión vencido
+def test_stream_ticket_expires():
+    with patch.object(auth_service._stream_tickets, "ttl", -1):
+        ticket = auth_service.create_stream_ticket({"sub": "admin", "role": "admin"})
+    with pytest.raises(HTTPException):
+        auth_service.redeem_stream_ticket(ticket)
+
+# === Pruebas para el login ===
+
+# Fixture con la caché de usuarios vacía y límites nuevos
+@pytest.fixture
+def login_state():
+    auth_service._user_cache.clear()
+    with patch.object(auth_service, "_login_user_limiter", auth_service.TokenBucketLimiter(rate=0, burst=2)), \
+         patch.object(auth_service, "_login_ip_limiter", auth_service.TokenBucketLimiter(rate=0, burst=10)):
+        yield
+    auth_service._user_cache.clear()
+
+# Prueba para la caché de usuarios y su invalidación
+@pytest.mark.asyncio
+async def test_get_cached_user(login_state):
+    with patch.object(auth_service, "run_db", new=AsyncMock(return_value=(1, "admin", "admin123", "admin"))) as mock_run_db:
+        assert await auth_service.get_cached_user("admin") == (1, "admin", "admin123", "admin")
+        assert await auth_service.get_cached_user("admin") == (1, "admin", "admin123", "admin")
+        assert mock_run_db.await_count == 1
+
+        auth_service.invalidate_user("admin")
+        await auth_service.get_cached_user("admin")
+        assert mock_run_db.await_count == 2
+
+# Prueba para rechazar con 429 antes de consultar la base de datos
+@pytest.mark.asyncio
+async def test_authenticate_user_rate_limited(login_state):
+    with patch.object(auth_service, "run_db", new=AsyncMock(return_value=None)) as mock_run_db, \
+         patch.object(auth_service, "store_log"):
+        for _ in range(2):
+            with pytest.raises(HTTPException) as exc:
+                await auth_service.authenticate_user("admin", "incorrecta", client_ip="10.0.0.1")
+            assert exc.value.status_code == 401
+
+        with pytest.raises(HTTPException) as exc:
+            await auth_service.authenticate_user("admin", "incorrecta", client_ip="10.0.0.1")
+    assert exc.value.status_code == 429
+    assert "Retry-After" in exc.value.headers
+    # El usuario inexistente también queda en caché
+    assert mock_run_db.await_count == 1
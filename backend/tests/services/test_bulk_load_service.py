@@ -0,0 +1,91 @@
+import pytest
+import pandas as pd
+from unittest.mock import MagicMock
+from app.services.bulk_load_service import bulk_load_uploaded_files
+
+# Datos de ejemplo: 5 filas, una con valor vacío
+example_df = pd.DataFrame({
+    "column1": ["a", "b", "c", "d", None],
+    "column2": ["v1", "v2", "v3", "valor largo", "v5"],
+})
+
+# Fixture para simular la conexión a la base de datos
+@pytest.fixture
+def mock_conn():
+    return MagicMock()
+
+# Prueba para la carga por bloques con fast_executemany y progreso
+def test_bulk_load_executemany(mock_conn):
+    progress = []
+    result = bulk_load_uploaded_files(mock_conn, example_df, mode="executemany", chunk_size=2, progress=lambda done, total: progress.append((done, total)))
+
+    cursor = mock_conn.cursor.return_value
+    assert cursor.fast_executemany is True
+    assert cursor.executemany.call_count == 3
+    assert cursor.executemany.call_args_list[0][0][1] == [("a", "v1"), ("b", "v2")]
+    # Los nulos se envían como NULL
+    assert cursor.executemany.call_args_list[2][0][1] == [(None, "v5")]
+    assert progress == [(2, 5), (4, 5), (5, 5)]
+    assert result["rows"] == 5 and result["chunks"] == 3
+    mock_conn.commit.assert_called_once()
+
+# Prueba para las confirmaciones cada N bloques
+def test_bulk_load_commit_chunks(mock_conn):
+    bulk_load_uploaded_files(mock_conn, example_df, chunk_size=2, commit_chunks=1)
+    assert mock_conn.commit.call_count == 4
+
+# Prueba para el modo con tabla temporal
+def test_bulk_load_staging(mock_conn):
+    bulk_load_uploaded_files(mock_conn, example_df, mode="staging", chunk_size=10)
+
+    cursor = mock_conn.cursor.return_value
+    statements = [c[0][0] for c in cursor.execute.call_args_list]
+    assert "INTO #uploaded_files_staging" in statements[0]
+    assert "INSERT INTO #uploaded_files_staging" in cursor.executemany.call_args[0][0]
+    assert statements[1].startswith("INSERT INTO dbo.uploaded_files WITH (TABLOCK)")
+    mock_conn.commit.assert_called_once()
+
+# Prueba para el modo con parámetros con valor de tabla
+def test_bulk_load_tvp(mock_conn):
+    bulk_load_uploaded_files(mock_conn, example_df, mode="tvp", chunk_size=10)
+
+    query, params = mock_conn.cursor.return_value.execute.call_args[0]
+    assert "dbo.insert_uploaded_files" in query
+    assert params[0][:3] == ["uploaded_files_type", "dbo", ("a", "v1")]
+
+# Prueba para el rollback ante un error
+def test_bulk_load_rollback(mock_conn):
+    mock_conn.cursor.return_value.executemany.side_effect = Exception("DB error")
+    with pytest.raises(Exception):
+        bulk_load_uploaded_files(mock_conn, example_df)
+    mock_conn.rollback.assert_called_once()
+    mock_conn.commit.assert_not_called()
+
+# Prueba para insertar solo las filas nuevas
+def test_bulk_loader_skip_existing(mock_conn):
+    from app.services.bulk_load_service import UploadedFilesBulkLoader, INSERT_NEW_ROWS
+    cursor = mock_conn.cursor.return_value
+    cursor.rowcount = 3
+    calls = []
+    cursor.execute.side_effect = lambda sql, *args: calls.append(sql)
+
+    loader = UploadedFilesBulkLoader(mock_conn, mode="executemany", skip_existing=True)
+    loader.add(example_df)
+    result = loader.finish(lambda loader: calls.append("before_commit"))
+
+    assert loader.mode == "staging"
+    assert calls[-3:] == [INSERT_NEW_ROWS, "DROP TABLE #uploaded_files_staging", "before_commit"]
+    assert result["rows"] == 5 and result["skipped"] == 2
+    mock_conn.commit.assert_called_once()
+
+# Prueba para cargar una tabla de Arrow sin convertirla a pandas
+def test_bulk_load_arrow_table(mock_conn):
+    pa = pytest.importorskip("pyarrow")
+    table = pa.table({"column1": ["a", None, "c"], "column2": ["v1", "v2", None]})
+
+    result = bulk_load_uploaded_files(mock_conn, table, mode="executemany", chunk_size=2)
+
+    cursor = mock_conn.cursor.return_value
+    assert cursor.executemany.call_args_list[0][0][1] == [("a", "v1"), (None, "v2")]
+    assert cursor.executemany.call_args_list[1][0][1] == [("c", None)]
+    assert result["rows"] == 3
@@ -1,8 +1,17 @@
 import pytest
 from unittest.mock import patch, MagicMock
-from fastapi import UploadFile
+from botocore.exceptions import ClientError
+from fastapi import HTTPException, UploadFile
+from app.services import document_analysis_service
 from app.services.document_analysis_service import (
     analyze_document_with_textract,
+    call_textract,
+    call_textract_job,
+    count_pdf_pages,
+    needs_async_analysis,
+    run_textract,
+    TextractJobError,
+    get_textract_cache_stats,
     extract_data_from_textract_response,
     extract_key_value,
     extract_text_from_relationships,
@@ -11,8 +20,14 @@ from app.services.document_analysis_service import (
     find_matching_field,
     extract_fields_data,
     save_to_db,
-    analyze_document
+    save_many_to_db,
+    analyze_document,
+    analyze_documents_batch
 )
+from app.utils.cache import TTLCache
+from app.utils.text_extraction_mapping import KEYWORD_MAPPING
+from app.utils.concurrency import ConcurrencyLimiter
+from app.utils.tiered_cache import CompressedDiskCache, TieredCache
 
 # === Fixtures ===
 
@@ -29,7 +44,16 @@ def mock_textract_response():
 
 @pytest.fixture
 def mock_file():
-    return UploadFile(filename="test.pdf", file=MagicMock())
+    file = MagicMock()
+    file.read.return_value = b"%PDF-1.4 documento de prueba"
+    return UploadFile(filename="test.pdf", file=file)
+
+@pytest.fixture(autouse=True)
+def textract_cache(tmp_path):
+    cache = TieredCache(TTLCache(max_size=8), CompressedDiskCache(str(tmp_path / "textract_cache"), 1024 * 1024))
+    with patch.object(document_analysis_service, "textract_cache", cache), \
+         patch.object(document_analysis_service, "_textract_stats", {"hits": 0, "misses": 0, "calls_seconds": 0.0}):
+        yield cache
 
 # === Pruebas para analyze_document_with_textract ===
 
@@ -39,6 +63,48 @@ def test_analyze_document_with_textract(mock_analyze_document, mock_file, mock_t
     response = analyze_document_with_textract(mock_file)
     assert response == mock_textract_response
 
+# === Pruebas para la caché de Textract ===
+
+# Prueba para que el mismo documento no se vuelva a enviar a Textract
+@patch('app.services.document_analysis_service.textract_client.analyze_document')
+def test_call_textract_cache_hit(mock_analyze_document, mock_textract_response):
+    mock_analyze_document.return_value = {**mock_textract_response, 'ResponseMetadata': {'RequestId': 'abc'}}
+
+    first = call_textract(b"documento")
+    second = call_textract(b"documento")
+
+    mock_analyze_document.assert_called_once()
+    assert first['ResponseMetadata'] == {'RequestId': 'abc'}
+    assert second == mock_textract_response
+    stats = get_textract_cache_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert stats["memory"]["size"] == 1 and stats["disk"]["entries"] == 1
+
+# Prueba para que la clave incluya las FeatureTypes y el contenido
+@patch('app.services.document_analysis_service.textract_client.analyze_document')
+def test_call_textract_cache_key(mock_analyze_document, mock_textract_response):
+    mock_analyze_document.return_value = mock_textract_response
+
+    call_textract(b"documento", ['TABLES', 'FORMS'])
+    call_textract(b"documento", ['FORMS', 'TABLES'])
+    call_textract(b"documento", ['TABLES'])
+    call_textract(b"otro documento", ['TABLES', 'FORMS'])
+
+    assert mock_analyze_document.call_count == 3
+
+# Prueba para recuperar la respuesta desde disco cuando ya no está en memoria
+@patch('app.services.document_analysis_service.textract_client.analyze_document')
+def test_call_textract_disk_tier(mock_analyze_document, textract_cache, mock_textract_response):
+    mock_analyze_document.return_value = mock_textract_response
+
+    call_textract(b"documento")
+    textract_cache.memory.clear()
+    response = call_textract(b"documento")
+
+    mock_analyze_document.assert_called_once()
+    assert response == mock_textract_response
+    assert textract_cache.disk.stats()["hits"] == 1
+
 # === Pruebas para extract_text_from_relationships ===
 
 def test_extract_text_from_relationships(mock_textract_response):
@@ -75,6 +141,11 @@ def test_extract_fields_data():
     extracted_data = extract_fields_data(data, keyword_mapping)
     assert extracted_data == {'field': 'Value'}
 
+# Prueba para preferir la clave exacta sobre la difusa del mismo campo
+def test_extract_fields_data_prefers_confident_match():
+    data = {'Número de factura': 'F-1', 'Numero de facutra': 'F-2', 'Fecha: 2024-01-01': ''}
+    assert extract_fields_data(data, KEYWORD_MAPPING) == {'invoice_number': 'F-1', 'invoice_date': '2024-01-01'}
+
 # === Pruebas para save_to_db ===
 
 @patch('app.services.document_analysis_service.get_db_connection')
@@ -91,16 +162,174 @@ def test_save_to_db(mock_get_db_connection):
 
 # === Pruebas para analyze_document ===
 
-@patch('app.services.document_analysis_service.analyze_document_with_textract')
+@patch('app.services.document_analysis_service.call_textract')
 @patch('app.services.document_analysis_service.extract_data_from_textract_response')
 @patch('app.services.document_analysis_service.extract_fields_data')
 @patch('app.services.document_analysis_service.save_to_db')
 @pytest.mark.asyncio
-async def test_analyze_document(mock_save_to_db, mock_extract_fields_data, mock_extract_data_from_textract_response, mock_analyze_document_with_textract, mock_file, mock_textract_response):
-    mock_analyze_document_with_textract.return_value = mock_textract_response
+async def test_analyze_document(mock_save_to_db, mock_extract_fields_data, mock_extract_data_from_textract_response, mock_call_textract, mock_file, mock_textract_response):
+    mock_call_textract.return_value = mock_textract_response
     mock_extract_data_from_textract_response.return_value = {'Invoice Number': '12345'}
     mock_extract_fields_data.return_value = {'invoice_number': '12345'}
     mock_save_to_db.return_value = 1
 
     result = await analyze_document(mock_file)
-    assert result == {"message": "Factura almacenada en la base de datos.", "id": 1}
\ No newline at end of file
+    assert result == {"message": "Factura almacenada en la base de datos.", "id": 1}
+    mock_call_textract.assert_called_once_with(b"%PDF-1.4 documento de prueba", ['TABLES', 'FORMS'])
+
+# Prueba para responder 429 con Retry-After cuando Textract está saturado
+@pytest.mark.asyncio
+async def test_analyze_document_textract_busy(mock_file):
+    limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=0, queue_timeout=1)
+    await limiter.acquire()
+
+    with patch.object(document_analysis_service, "textract_limiter", limiter), \
+         patch('app.services.document_analysis_service.textract_client.analyze_document') as mock_analyze_document:
+        with pytest.raises(HTTPException) as exc_info:
+            await analyze_document(mock_file)
+
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.headers["Retry-After"] == "1"
+    mock_analyze_document.assert_not_called()
+
+# === Pruebas para el análisis por lotes ===
+
+# Prueba para insertar todos los registros con una sola transacción
+@patch('app.services.document_analysis_service.get_db_connection')
+def test_save_many_to_db(mock_get_db_connection):
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_get_db_connection.return_value = mock_conn
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.side_effect = [[1], [2]]
+
+    ids = save_many_to_db([('invoices', {'client_name': 'A', 'invoice_date': '2023-01-01'}), ('information', {'summary': 'B'})])
+
+    assert ids == [1, 2]
+    assert mock_cursor.execute.call_count == 2
+    mock_conn.commit.assert_called_once()
+
+# Prueba para no guardar nada si falla una inserción del lote
+@patch('app.services.document_analysis_service.get_db_connection')
+def test_save_many_to_db_rollback(mock_get_db_connection):
+    mock_conn = MagicMock()
+    mock_get_db_connection.return_value = mock_conn
+    mock_conn.cursor.return_value.fetchone.side_effect = [[1], Exception("DB error")]
+
+    with pytest.raises(Exception):
+        save_many_to_db([('information', {}), ('information', {})])
+
+    mock_conn.rollback.assert_called_once()
+    mock_conn.commit.assert_not_called()
+
+# Prueba para informar cada archivo, incluidos los que fallan, y el resumen del lote
+@pytest.mark.asyncio
+async def test_analyze_documents_batch_partial_failure(mock_textract_response):
+    async def fake_run_textract(content):
+        if content == b"malo":
+            raise HTTPException(status_code=429, detail="Textract saturado")
+        return mock_textract_response
+
+    files = [("a.pdf", "application/pdf", b"bueno"), ("b.pdf", "application/pdf", b"malo"), ("c.pdf", "application/pdf", b"bueno")]
+    with patch('app.services.document_analysis_service.run_textract', side_effect=fake_run_textract), \
+         patch('app.services.document_analysis_service.save_many_to_db', return_value=[7, 8]) as mock_save:
+        results = [result async for result in analyze_documents_batch(files, concurrency=2)]
+
+    summary = results[-1]
+    assert {result["index"]: result["status"] for result in results[:-1]} == {0: "analyzed", 1: "error", 2: "analyzed"}
+    assert (summary["analyzed"], summary["failed"], summary["committed"]) == (2, 1, True)
+    assert [record["index"] for record in summary["records"]] == [0, 2]
+    mock_save.assert_called_once()
+
+# Prueba para informar que no se guardó el lote si falla la transacción
+@pytest.mark.asyncio
+async def test_analyze_documents_batch_commit_failure(mock_textract_response):
+    with patch('app.services.document_analysis_service.run_textract', return_value=mock_textract_response), \
+         patch('app.services.document_analysis_service.save_many_to_db', side_effect=Exception("DB error")):
+        results = [result async for result in analyze_documents_batch([("a.pdf", "application/pdf", b"a")])]
+
+    assert results[0]["status"] == "analyzed"
+    assert results[-1]["committed"] is False
+    assert "DB error" in results[-1]["error"]
+
+# === Pruebas para el análisis asíncrono de PDF de varias páginas ===
+
+MULTIPAGE_PDF = b"%PDF-1.4\n1 0 obj << /Type /Pages >>\n2 0 obj << /Type /Page >>\n3 0 obj << /Type/Page >>\n%%EOF"
+
+# Prueba para contar las páginas y elegir el análisis asíncrono
+def test_needs_async_analysis():
+    assert count_pdf_pages(MULTIPAGE_PDF) == 2
+    assert count_pdf_pages(b"\x89PNG /Type /Page /Type /Page") == 0
+    assert needs_async_analysis(MULTIPAGE_PDF) is True
+    assert needs_async_analysis(b"%PDF-1.4\n1 0 obj << /Type /Page >>") is False
+    with patch.object(document_analysis_service, "TEXTRACT_SYNC_MAX_MB", 0.00001):
+        assert needs_async_analysis(b"%PDF-1.4\n1 0 obj << /Type /Page >>") is True
+
+@pytest.fixture
+def s3_mocks():
+    with patch('app.services.file_upload_service.upload_file_to_s3') as mock_upload, \
+         patch('app.services.file_upload_service.s3_client') as mock_s3_client:
+        yield mock_upload, mock_s3_client
+
+# Prueba para esperar el trabajo y unir los bloques de todas las páginas de resultados
+@patch('app.services.document_analysis_service.textract_client')
+def test_call_textract_job_merges_pages(mock_client, s3_mocks):
+    mock_upload, mock_s3_client = s3_mocks
+    mock_client.start_document_analysis.return_value = {'JobId': 'job-1'}
+    mock_client.get_document_analysis.side_effect = [
+        {'JobStatus': 'IN_PROGRESS'},
+        {'JobStatus': 'SUCCEEDED', 'DocumentMetadata': {'Pages': 2}, 'Blocks': [{'Id': '1'}], 'NextToken': 't1'},
+        {'JobStatus': 'SUCCEEDED', 'DocumentMetadata': {'Pages': 2}, 'Blocks': [{'Id': '2'}], 'Warnings': [{'ErrorCode': 'W', 'Pages': [2]}]},
+    ]
+    sleep = MagicMock()
+
+    response = call_textract_job(MULTIPAGE_PDF, sleep=sleep)
+
+    assert response == {'DocumentMetadata': {'Pages': 2}, 'Blocks': [{'Id': '1'}, {'Id': '2'}], 'Warnings': [{'ErrorCode': 'W', 'Pages': [2]}]}
+    sleep.assert_called_once_with(document_analysis_service.TEXTRACT_ASYNC_POLL_INITIAL)
+    s3_key = mock_upload.call_args.args[1]
+    assert mock_client.start_document_analysis.call_args.kwargs['DocumentLocation']['S3Object']['Name'] == s3_key
+    assert mock_client.get_document_analysis.call_args.kwargs == {'JobId': 'job-1', 'MaxResults': 1000, 'NextToken': 't1'}
+    mock_s3_client.delete_object.assert_called_once()
+    # La respuesta unida queda en la caché
+    assert call_textract_job(MULTIPAGE_PDF, sleep=sleep) == response
+    mock_client.start_document_analysis.assert_called_once()
+
+# Prueba para informar el trabajo fallido y eliminar igual el PDF de S3
+@patch('app.services.document_analysis_service.textract_client')
+def test_call_textract_job_failed(mock_client, s3_mocks):
+    _, mock_s3_client = s3_mocks
+    mock_client.start_document_analysis.return_value = {'JobId': 'job-1'}
+    mock_client.get_document_analysis.return_value = {'JobStatus': 'FAILED', 'StatusMessage': 'Documento dañado'}
+
+    with patch.object(document_analysis_service, "_textract_job_attempts", TTLCache()):
+        for _ in range(2):
+            with pytest.raises(TextractJobError, match="Documento dañado"):
+                call_textract_job(MULTIPAGE_PDF, sleep=MagicMock())
+
+    assert mock_s3_client.delete_object.call_count == 2
+    # El reintento usa otro ClientRequestToken para no recibir el mismo trabajo fallido
+    tokens = [c.kwargs['ClientRequestToken'] for c in mock_client.start_document_analysis.call_args_list]
+    assert tokens[0] != tokens[1] and len(tokens[1]) == 64
+
+# Prueba para pasar al análisis asíncrono cuando AnalyzeDocument rechaza el PDF
+@pytest.mark.asyncio
+async def test_run_textract_falls_back_to_job(mock_textract_response):
+    error = ClientError({'Error': {'Code': 'UnsupportedDocumentException', 'Message': 'x'}}, 'AnalyzeDocument')
+    with patch('app.services.document_analysis_service.call_textract', side_effect=error), \
+         patch('app.services.document_analysis_service.call_textract_job', return_value=mock_textract_response) as mock_job:
+        response = await run_textract(b"%PDF-1.4 sin objetos de pagina visibles")
+
+    assert response == mock_textract_response
+    mock_job.assert_called_once()
+
+# Prueba para no reintentar como trabajo los errores de otros documentos
+@pytest.mark.asyncio
+async def test_run_textract_image_error_is_raised():
+    error = ClientError({'Error': {'Code': 'UnsupportedDocumentException', 'Message': 'x'}}, 'AnalyzeDocument')
+    with patch('app.services.document_analysis_service.call_textract', side_effect=error), \
+         patch('app.services.document_analysis_service.call_textract_job') as mock_job:
+        with pytest.raises(ClientError):
+            await run_textract(b"\x89PNG imagen")
+
+    mock_job.assert_not_called()
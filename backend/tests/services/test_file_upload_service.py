@@ -1,7 +1,14 @@
+import gzip
+import hashlib
+import io
+import tempfile
+import pandas as pd
 import pytest
 from unittest.mock import patch, MagicMock
 from fastapi import HTTPException
-from app.services.file_upload_service import handle_file_upload, upload_file_to_s3, validate_csv, store_csv_data
+from app.services.file_upload_service import (
+    handle_file_upload, handle_file_upload_stream, upload_file_to_s3, validate_csv, store_csv_data, _PositionalReader
+)
 
 # Datos de ejemplo para las pruebas
 example_contents = b"column1,column2\nvalue1,value2\nvalue3,value4"
@@ -42,22 +49,273 @@ def test_handle_file_upload_invalid_file_type():
     with pytest.raises(HTTPException) as excinfo:
         handle_file_upload(example_contents, "testfile.txt")
     assert excinfo.value.status_code == 400
-    assert excinfo.value.detail == "El archivo no es un CSV."
+    assert excinfo.value.detail == "El formato del archivo no es compatible (se aceptan .csv, .csv.gz, .csv.zst y .parquet)."
 
 # Prueba para la función validate_csv con un archivo válido
 def test_validate_csv_valid():
     validation_results = validate_csv(example_contents)
     assert validation_results == []
 
+# Prueba para informar las filas con errores
+def test_validate_csv_reports_rows():
+    validation_results = validate_csv(b"column1,column2\nvalor1,\nvalor2,otro2\nvalor2,otro2\n")
+    assert validation_results == [
+        "La columna column2 tiene 1 valores vacíos (filas 1).",
+        "El archivo contiene 2 registros duplicados (filas 2, 3).",
+    ]
+
 # Prueba para la función store_csv_data con datos válidos
 def test_store_csv_data_valid(mock_db_connection, mock_store_log):
     store_csv_data(example_contents)
-    mock_db_connection().cursor().execute.assert_called()
+    mock_db_connection().cursor().executemany.assert_called_once()
+    mock_db_connection().commit.assert_called_once()
 
 # Prueba para la función store_csv_data con error en la base de datos
 def test_store_csv_data_db_error(mock_db_connection, mock_store_log):
-    mock_db_connection().cursor().execute.side_effect = Exception("DB error")
+    mock_db_connection().cursor().executemany.side_effect = Exception("DB error")
     with pytest.raises(HTTPException) as excinfo:
         store_csv_data(example_contents)
     assert excinfo.value.status_code == 500
-    assert "Ocurrió un error al almacenar el archivo: DB error" in excinfo.value.detail
\ No newline at end of file
+    assert "Ocurrió un error al almacenar el archivo: DB error" in excinfo.value.detail
+# Prueba para interpretar el CSV una sola vez y subir los bytes originales
+def test_handle_file_upload_parses_once(mock_db_connection, mock_s3_client):
+    with patch("app.services.file_upload_service.pd.read_csv", wraps=pd.read_csv) as mock_read_csv, \
+         patch("app.services.file_upload_service.store_log"):
+        result = handle_file_upload(example_contents, example_filename, engine="pandas")
+
+    assert mock_read_csv.call_count == 1
+    mock_db_connection().cursor().executemany.assert_called_once()
+    assert result["validation_results"] == []
+    assert mock_s3_client.upload_fileobj.call_args[0][2] == f"files/file_upload/{example_filename}"
+
+# === Pruebas para la subida en streaming ===
+
+# Prueba para procesar por bloques y subir el mismo archivo a S3
+def test_handle_file_upload_stream_valid(mock_db_connection, mock_s3_client):
+    contents = b"column1,column2\n" + b"".join(f"valor{i},otro{i}\n".encode() for i in range(2500))
+    fileobj = io.BytesIO(contents)
+
+    with patch("app.services.file_upload_service.store_log"):
+        result = handle_file_upload_stream(fileobj, example_filename, memory_mb=0.01, engine="pandas")
+
+    cursor = mock_db_connection().cursor()
+    # Con 0.01 MB el archivo se procesa en 3 bloques de 1000 filas
+    assert cursor.executemany.call_count == 3
+    mock_db_connection().commit.assert_called_once()
+    assert mock_s3_client.upload_fileobj.call_args[0][0] is fileobj
+    assert result["validation_results"] == []
+
+# Prueba para cargar como texto un bloque que parece numérico ("000", "1.50")
+@pytest.mark.parametrize("engine", ["pandas", "pyarrow"])
+def test_handle_file_upload_stream_loads_text(mock_db_connection, mock_s3_client, engine):
+    if engine == "pyarrow":
+        pytest.importorskip("pyarrow")
+    rows = [f"{i:03d},{i}.50\n" for i in range(1000)] + [f"valor{i},otro{i}\n" for i in range(1000)]
+    fileobj = io.BytesIO(b"column1,column2\n" + "".join(rows).encode())
+
+    with patch("app.services.file_upload_service.store_log"):
+        result = handle_file_upload_stream(fileobj, example_filename, memory_mb=0.01, engine=engine)
+
+    assert result["validation_results"] == []
+    first_rows = mock_db_connection().cursor().executemany.call_args_list[0][0][1]
+    assert tuple(first_rows[0]) == ("000", "0.50")
+
+# Prueba para los duplicados en bloques distintos: se revierte la transacción
+def test_handle_file_upload_stream_duplicates(mock_db_connection, mock_s3_client):
+    rows = [f"valor{i},otro{i}\n" for i in range(1500)] + ["valor3,otro3\n"]
+    fileobj = io.BytesIO(b"column1,column2\n" + "".join(rows).encode())
+
+    with patch("app.services.file_upload_service.store_log"):
+        with pytest.raises(HTTPException) as excinfo:
+            handle_file_upload_stream(fileobj, example_filename, memory_mb=0.01)
+
+    assert excinfo.value.status_code == 400
+    assert "registros duplicados (filas 1501)" in excinfo.value.detail
+    mock_db_connection().rollback.assert_called_once()
+    mock_db_connection().commit.assert_not_called()
+    mock_s3_client.upload_fileobj.assert_not_called()
+
+# Prueba para un archivo vacío en streaming
+def test_handle_file_upload_stream_empty():
+    with pytest.raises(HTTPException) as excinfo:
+        handle_file_upload_stream(io.BytesIO(b"  \n "), example_filename)
+    assert excinfo.value.detail == "El archivo está vacío."
+
+# === Pruebas para la subida a S3 en paralelo con la inserción ===
+
+# Prueba para eliminar el objeto subido si la inserción falla
+def test_handle_file_upload_db_error_discards_s3_object(mock_db_connection, mock_s3_client):
+    mock_db_connection().cursor().executemany.side_effect = Exception("DB error")
+    with patch("app.services.file_upload_service.store_log"):
+        with pytest.raises(HTTPException) as excinfo:
+            handle_file_upload(example_contents, example_filename)
+
+    assert excinfo.value.status_code == 500
+    mock_s3_client.upload_fileobj.assert_called_once()
+    mock_s3_client.delete_object.assert_called_once()
+    assert mock_s3_client.delete_object.call_args.kwargs["Key"] == f"files/file_upload/{example_filename}"
+
+# Prueba para no eliminar nada si la subida a S3 también falló
+def test_handle_file_upload_db_and_s3_error(mock_db_connection, mock_s3_client):
+    mock_db_connection().cursor().executemany.side_effect = Exception("DB error")
+    mock_s3_client.upload_fileobj.side_effect = Exception("S3 error")
+    with patch("app.services.file_upload_service.store_log"):
+        with pytest.raises(HTTPException) as excinfo:
+            handle_file_upload(example_contents, example_filename)
+
+    assert "DB error" in excinfo.value.detail
+    mock_s3_client.delete_object.assert_not_called()
+
+# Prueba para el lector posicional: su posición es independiente de la del archivo
+def test_positional_reader_independent_position():
+    with tempfile.TemporaryFile() as fileobj:
+        fileobj.write(b"0123456789")
+        fileobj.seek(0)
+        reader = _PositionalReader.open(fileobj)
+
+        assert fileobj.read(4) == b"0123"
+        assert reader.read(3) == b"012"
+        assert reader.seek(0, 2) == 10
+        reader.seek(5)
+        assert reader.read() == b"56789"
+        assert fileobj.read() == b"456789"
+
+# Prueba para subir a S3 el archivo en streaming mientras se procesa
+def test_handle_file_upload_stream_uploads_concurrently(mock_db_connection, mock_s3_client):
+    contents = b"column1,column2\n" + b"".join(f"valor{i},otro{i}\n".encode() for i in range(2500))
+    uploaded = []
+    mock_s3_client.upload_fileobj.side_effect = lambda fileobj, bucket, key, **kwargs: uploaded.append(fileobj.read())
+
+    with tempfile.TemporaryFile() as fileobj, patch("app.services.file_upload_service.store_log"):
+        fileobj.write(contents)
+        fileobj.seek(0)
+        result = handle_file_upload_stream(fileobj, example_filename, memory_mb=0.01)
+
+    assert uploaded == [contents]
+    mock_db_connection().commit.assert_called_once()
+    mock_s3_client.delete_object.assert_not_called()
+    assert result["validation_results"] == []
+
+# Prueba para eliminar de S3 el archivo en streaming que no pasó la validación
+def test_handle_file_upload_stream_invalid_discards_s3_object(mock_db_connection, mock_s3_client):
+    with tempfile.TemporaryFile() as fileobj, patch("app.services.file_upload_service.store_log"):
+        fileobj.write(b"column1,column2\nvalor1,\n")
+        fileobj.seek(0)
+        with pytest.raises(HTTPException) as excinfo:
+            handle_file_upload_stream(fileobj, example_filename)
+
+    assert excinfo.value.status_code == 400
+    mock_s3_client.upload_fileobj.assert_called_once()
+    mock_s3_client.delete_object.assert_called_once()
+    mock_db_connection().commit.assert_not_called()
+
+# === Pruebas para la deduplicación de cargas ===
+
+# Prueba para no volver a procesar un archivo ya cargado
+def test_handle_file_upload_duplicate_short_circuits(mock_db_connection, mock_s3_client):
+    original = {"sha256": "ab", "filename": example_filename, "s3_key": "files/file_upload/testfile.csv", "size_bytes": 44, "row_count": 2, "ingested_at": None}
+    with patch("app.services.file_upload_service.UPLOAD_DEDUP_ENABLED", True), \
+         patch("app.services.file_upload_service.claim_upload", return_value=original) as mock_claim, \
+         patch("app.services.file_upload_service.store_log"):
+        result = handle_file_upload(example_contents, example_filename)
+
+    assert mock_claim.call_args[0][0] == hashlib.sha256(example_contents).digest()
+    assert result["upload_result"]["duplicate_of"] == original
+    mock_db_connection.assert_not_called()
+    mock_s3_client.upload_fileobj.assert_not_called()
+
+# Prueba para registrar la huella en la misma transacción de la inserción
+def test_handle_file_upload_completes_fingerprint_before_commit(mock_db_connection, mock_s3_client):
+    conn = mock_db_connection.return_value
+    conn.commit.side_effect = lambda: order.append("commit")
+    order = []
+    with patch("app.services.file_upload_service.UPLOAD_DEDUP_ENABLED", True), \
+         patch("app.services.file_upload_service.claim_upload", return_value=None), \
+         patch("app.services.file_upload_service.complete_upload", side_effect=lambda *args: order.append("complete")) as mock_complete, \
+         patch("app.services.file_upload_service.release_upload") as mock_release, \
+         patch("app.services.file_upload_service.store_log"):
+        handle_file_upload(example_contents, example_filename)
+
+    assert order == ["complete", "commit"]
+    assert mock_complete.call_args[0][2:] == (2, 2)
+    mock_release.assert_not_called()
+
+# Prueba para liberar la huella si la validación falla
+def test_handle_file_upload_releases_fingerprint_on_error(mock_db_connection, mock_s3_client):
+    with patch("app.services.file_upload_service.UPLOAD_DEDUP_ENABLED", True), \
+         patch("app.services.file_upload_service.claim_upload", return_value=None), \
+         patch("app.services.file_upload_service.release_upload") as mock_release, \
+         patch("app.services.file_upload_service.store_log"):
+        with pytest.raises(HTTPException) as excinfo:
+            handle_file_upload(b"column1,column2\nvalor1,\n", example_filename)
+
+    assert excinfo.value.status_code == 400
+    mock_release.assert_called_once()
+    mock_s3_client.upload_fileobj.assert_not_called()
+
+# Prueba para responder 409 si el mismo contenido se está cargando
+def test_handle_file_upload_in_progress():
+    from app.services.upload_dedup_service import UploadInProgressError
+    with patch("app.services.file_upload_service.UPLOAD_DEDUP_ENABLED", True), \
+         patch("app.services.file_upload_service.claim_upload", side_effect=UploadInProgressError("en curso")):
+        with pytest.raises(HTTPException) as excinfo:
+            handle_file_upload(example_contents, example_filename)
+    assert excinfo.value.status_code == 409
+
+# === Pruebas para los motores de lectura y formatos ===
+
+# Prueba para un CSV comprimido con gzip leído con pandas
+def test_handle_file_upload_gzip_pandas(mock_db_connection, mock_s3_client):
+    with patch("app.services.file_upload_service.store_log"):
+        result = handle_file_upload(gzip.compress(example_contents), "testfile.csv.gz", engine="pandas")
+
+    rows = mock_db_connection().cursor().executemany.call_args[0][1]
+    assert rows == [("value1", "value2"), ("value3", "value4")]
+    assert result["validation_results"] == []
+    assert mock_s3_client.upload_fileobj.call_args[0][2] == "files/file_upload/testfile.csv.gz"
+
+# Prueba para un CSV comprimido que solo tiene espacios
+def test_handle_file_upload_gzip_empty():
+    with pytest.raises(HTTPException) as excinfo:
+        handle_file_upload(gzip.compress(b""), "testfile.csv.gz", engine="pandas")
+    assert excinfo.value.status_code == 400
+    assert excinfo.value.detail == "El archivo está vacío."
+
+# Prueba para leer con pyarrow y cargar la tabla de Arrow
+def test_handle_file_upload_pyarrow(mock_db_connection, mock_s3_client):
+    pytest.importorskip("pyarrow")
+    with patch("app.services.file_upload_service.store_log"):
+        with pytest.raises(HTTPException) as excinfo:
+            handle_file_upload(b"column1,column2\nvalue1,value2\nvalue3,\n", example_filename, engine="pyarrow")
+        assert "La columna column2 tiene 1 valores vacíos (filas 2)" in excinfo.value.detail
+
+        result = handle_file_upload(example_contents, example_filename, engine="pyarrow")
+
+    rows = mock_db_connection().cursor().executemany.call_args[0][1]
+    assert rows == [("value1", "value2"), ("value3", "value4")]
+    assert result["validation_results"] == []
+
+# Prueba para un archivo Parquet procesado en streaming
+def test_handle_file_upload_stream_parquet(mock_db_connection, mock_s3_client):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    buffer = io.BytesIO()
+    table = pa.table({"column1": [f"valor{i}" for i in range(2500)], "column2": [f"otro{i}" for i in range(2500)]})
+    pq.write_table(table, buffer, row_group_size=1000)
+    buffer.seek(0)
+
+    with patch("app.services.file_upload_service.store_log"):
+        result = handle_file_upload_stream(buffer, "testfile.parquet", memory_mb=0.01)
+
+    cursor = mock_db_connection().cursor()
+    assert sum(len(call[0][1]) for call in cursor.executemany.call_args_list) == 2500
+    mock_db_connection().commit.assert_called_once()
+    assert result["validation_results"] == []
+
+# Prueba para un motor no disponible
+def test_handle_file_upload_engine_unavailable():
+    with patch("app.utils.upload_parsers.pa", None):
+        with pytest.raises(HTTPException) as excinfo:
+            handle_file_upload(example_contents, "testfile.parquet")
+    assert excinfo.value.status_code == 400
+    assert "pyarrow" in excinfo.value.detail
@@ -1,7 +1,7 @@
 import pytest
 from unittest.mock import patch, MagicMock
 from datetime import datetime
-from app.services.history_service import get_filtered_history
+from app.services.history_service import get_filtered_history, encode_cursor, decode_cursor, _count_cache, _invalidate_counts, export_filtered_history
 
 # Datos de ejemplo para las pruebas
 example_history_data = {
@@ -9,6 +9,8 @@ example_history_data = {
     "total_pages": 5,
     "current_page": 1,
     "page_size": 10,
+    "has_more": True,
+    "count_mode": "exact",
     "records": [
         {
             "id": 1,
@@ -20,6 +22,13 @@ example_history_data = {
     ]
 }
 
+# Fixture para vaciar la caché de conteos entre pruebas
+@pytest.fixture(autouse=True)
+def clear_count_cache():
+    _count_cache.clear()
+    yield
+    _count_cache.clear()
+
 # Fixture para simular la conexión a la base de datos
 @pytest.fixture
 def mock_db_connection():
@@ -60,4 +69,138 @@ async def test_get_filtered_history_invalid_pagination(mock_db_connection):
 async def test_get_filtered_history_query_error(mock_db_connection):
     mock_db_connection.side_effect = Exception("Database error")
     with pytest.raises(Exception, match="Database error"):
-        await get_filtered_history(page=1, page_size=10)
\ No newline at end of file
+        await get_filtered_history(page=1, page_size=10)
+
+# Prueba para registrar en el log los errores de la consulta (paginación y cursor)
+@pytest.mark.asyncio
+async def test_get_filtered_history_logs_query_errors(mock_db_connection):
+    mock_db_connection.return_value.cursor.return_value.execute.side_effect = Exception("Timeout")
+    cursor = encode_cursor({"id": 10, "datetime": datetime(2024, 11, 29, 9, 0, 0)})
+
+    with patch("app.services.history_service.store_log") as mock_store_log:
+        with pytest.raises(Exception, match="Timeout"):
+            await get_filtered_history(page=1, page_size=10)
+        with pytest.raises(Exception, match="Timeout"):
+            await get_filtered_history(page_size=10, cursor=cursor)
+
+    messages = [c.args[1] for c in mock_store_log.call_args_list]
+    assert messages == ["Error al consultar el historial: Timeout", "Error al consultar el historial por cursor: Timeout"]
+    assert all(c.args[2] == "ERROR" for c in mock_store_log.call_args_list)
+
+# Prueba para la codificación y decodificación del cursor opaco
+def test_cursor_round_trip():
+    cursor = encode_cursor({"id": 42, "datetime": datetime(2024, 11, 29, 8, 42, 58, 123000)})
+    assert decode_cursor(cursor) == (datetime(2024, 11, 29, 8, 42, 58, 123000), 42)
+
+# Prueba para un cursor manipulado
+@pytest.mark.asyncio
+async def test_get_filtered_history_invalid_cursor(mock_db_connection):
+    with pytest.raises(ValueError, match="El cursor de paginación no es válido."):
+        await get_filtered_history(cursor="no-es-un-cursor")
+
+# Prueba para la paginación por búsqueda (keyset)
+@pytest.mark.asyncio
+async def test_get_filtered_history_with_cursor(mock_db_connection):
+    mock_cursor = mock_db_connection.return_value.cursor.return_value
+    mock_cursor.fetchall.return_value = [
+        (9, "IA", "uno", "INFO", datetime(2024, 11, 29, 8, 0, 0)),
+        (8, "IA", "dos", "INFO", datetime(2024, 11, 29, 7, 0, 0)),
+        (7, "IA", "tres", "INFO", datetime(2024, 11, 29, 6, 0, 0)),
+    ]
+    cursor = encode_cursor({"id": 10, "datetime": datetime(2024, 11, 29, 9, 0, 0)})
+
+    result = await get_filtered_history(level="IA", page_size=2, cursor=cursor)
+
+    query, params = mock_cursor.execute.call_args[0]
+    assert "OFFSET 0 ROWS FETCH NEXT ? ROWS ONLY" in query
+    assert "COUNT(*)" not in query
+    assert params == ["IA", 10, datetime(2024, 11, 29, 9, 0, 0), 10, datetime(2024, 11, 29, 9, 0, 0), 10, 3]
+    assert [record["id"] for record in result["records"]] == [9, 8]
+    assert result["has_more"] is True
+    assert decode_cursor(result["next_cursor"]) == (datetime(2024, 11, 29, 7, 0, 0), 8)
+
+# Prueba para la caché de conteos exactos y su invalidación por nuevos logs
+@pytest.mark.asyncio
+async def test_exact_count_is_cached_and_invalidated(mock_db_connection):
+    mock_cursor = mock_db_connection.return_value.cursor.return_value
+
+    await get_filtered_history(level="IA", description="error")
+    await get_filtered_history(level="IA", description="error", page=2)
+    count_queries = [c for c in mock_cursor.execute.call_args_list if "COUNT(*)" in c[0][0]]
+    assert len(count_queries) == 1
+
+    # Un log de otro nivel no invalida el conteo
+    _invalidate_counts([("CARGA_DOCUMENTO", "Error al subir", "ERROR", datetime.now())])
+    assert len(_count_cache) == 1
+
+    # Un log que coincide con los filtros sí lo invalida (sin distinguir mayúsculas ni tildes)
+    _invalidate_counts([("IA", "Érror al analizar", "ERROR", datetime.now())])
+    assert len(_count_cache) == 0
+
+# Prueba para el modo sin conteo
+@pytest.mark.asyncio
+async def test_count_mode_none_returns_has_more(mock_db_connection):
+    mock_cursor = mock_db_connection.return_value.cursor.return_value
+    mock_cursor.fetchall.return_value = [
+        (3, "IA", "uno", "INFO", datetime(2024, 11, 29, 8, 0, 0)),
+        (2, "IA", "dos", "INFO", datetime(2024, 11, 29, 7, 0, 0)),
+    ]
+
+    result = await get_filtered_history(page_size=1, count_mode="none")
+
+    assert all("COUNT(*)" not in c[0][0] for c in mock_cursor.execute.call_args_list)
+    assert result["total_records"] is None
+    assert result["has_more"] is True
+    assert len(result["records"]) == 1
+
+# Prueba para el conteo estimado con filtro de fechas
+@pytest.mark.asyncio
+async def test_count_mode_estimated_with_date_range(mock_db_connection):
+    mock_cursor = mock_db_connection.return_value.cursor.return_value
+    mock_cursor.fetchone.side_effect = [
+        [1000],
+        (datetime(2024, 1, 1), datetime(2024, 1, 11)),
+    ]
+
+    result = await get_filtered_history(start_date=datetime(2024, 1, 9), count_mode="estimated")
+
+    assert result["count_mode"] == "estimated"
+    assert result["total_records"] == 200
+    assert all("COUNT(*)" not in c[0][0] for c in mock_cursor.execute.call_args_list)
+
+# Prueba para el conteo estimado con filtros no soportados (se usa el exacto)
+@pytest.mark.asyncio
+async def test_count_mode_estimated_falls_back_to_exact(mock_db_connection):
+    result = await get_filtered_history(level="IA", count_mode="estimated")
+    assert result["count_mode"] == "exact"
+    assert result["total_records"] == 50
+
+# Prueba para la exportación en lotes con fetchmany
+def test_export_filtered_history_streams_batches(mock_db_connection):
+    mock_conn = mock_db_connection.return_value
+    mock_cursor = mock_conn.cursor.return_value
+    mock_cursor.fetchmany.side_effect = [
+        [(2, "Factura", "Segundo", "CARGA_DOCUMENTO", datetime(2024, 11, 29, 9, 0, 0))],
+        [(1, "Factura", "Primero", "CARGA_DOCUMENTO", datetime(2024, 11, 29, 8, 0, 0))],
+        [],
+    ]
+
+    stream = export_filtered_history(level="CARGA_DOCUMENTO", export_format="ndjson", batch_size=1)
+    # La consulta no se ejecuta hasta que se consume el flujo
+    mock_db_connection.assert_not_called()
+
+    lines = b"".join(stream).decode("utf-8").splitlines()
+    assert len(lines) == 2
+    assert '"description": "Segundo"' in lines[0]
+    query = mock_cursor.execute.call_args[0][0]
+    assert query.endswith("ORDER BY timestamp DESC, id DESC")
+    mock_cursor.fetchmany.assert_called_with(1)
+    mock_conn.close.assert_called_once()
+
+# Prueba para validar los filtros antes de iniciar la exportación
+def test_export_filtered_history_invalid_filters(mock_db_connection):
+    with pytest.raises(ValueError):
+        export_filtered_history(level="INVALIDO")
+    with pytest.raises(ValueError):
+        export_filtered_history(export_format="pdf")
+    mock_db_connection.assert_not_called()
@@ -0,0 +1,44 @@
+from unittest.mock import patch, MagicMock
+from fastapi import HTTPException
+from app.services.job_service import _is_retryable, _run_upload, submit_job, get_job_stats
+from app.utils.enums.job_priority import JobPriority
+from app.utils.enums.job_type import JobType
+from app.utils.job_queue import Job
+
+# Prueba para los errores que se reintentan
+def test_is_retryable():
+    assert _is_retryable(Exception("timeout")) is True
+    assert _is_retryable(HTTPException(status_code=500, detail="DB error")) is True
+    assert _is_retryable(HTTPException(status_code=400, detail="Errores de validación")) is False
+    assert _is_retryable(HTTPException(status_code=409, detail="Carga en curso")) is True
+    assert _is_retryable(HTTPException(status_code=429, detail="Textract saturado")) is True
+
+# Prueba para procesar una subida pequeña desde el payload persistido
+def test_run_upload_small_file(tmp_path):
+    payload = tmp_path / "job.payload"
+    payload.write_bytes(b"column1,column2\nvalor1,valor2\n")
+    job = Job(JobType.UPLOAD.value, {"filename": "testfile.csv", "param1": "a"}, 1, 3)
+
+    with patch("app.services.job_service.handle_file_upload", return_value={"ok": True}) as mock_upload:
+        assert _run_upload(job, str(payload)) == {"ok": True}
+
+    mock_upload.assert_called_once_with(b"column1,column2\nvalor1,valor2\n", "testfile.csv", "a", None, False, "auto")
+
+# Prueba para encolar con prioridad y registrar el log
+def test_submit_job_uses_priority_order():
+    job = Job(JobType.DOCUMENT_ANALYSIS.value, {"requested_by": "user_id"}, 0, 3)
+    with patch("app.services.job_service.job_queue") as mock_queue, \
+         patch("app.services.job_service.store_log") as mock_store_log:
+        mock_queue.submit.return_value = job
+        result = submit_job(JobType.DOCUMENT_ANALYSIS, b"pdf", {"requested_by": "user_id"}, JobPriority.HIGH)
+
+    assert mock_queue.submit.call_args[0][3] == 0
+    assert result["priority"] == "high"
+    assert result["requested_by"] == "user_id"
+    assert mock_store_log.call_args[0][0] == "IA"
+
+# Prueba para las métricas con los nombres de las prioridades
+def test_get_job_stats_priority_names():
+    with patch("app.services.job_service.job_queue") as mock_queue:
+        mock_queue.stats.return_value = {"queued_by_priority": {0: 2, 2: 1}}
+        assert get_job_stats()["queued_by_priority"] == {"high": 2, "low": 1}
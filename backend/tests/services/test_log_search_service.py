@@ -0,0 +1,75 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from app.services.log_search_service import extract_trigrams, build_search_filter, index_pending_logs
+from app.utils.watermark_worker import IdHorizon
+from app.services.history_service import _build_base_query
+
+# Fixture para habilitar el índice de trigramas
+@pytest.fixture
+def search_enabled():
+    with patch("app.services.log_search_service.LOG_SEARCH_INDEX_ENABLED", True):
+        yield
+
+# Fixture para simular la conexión a la base de datos
+@pytest.fixture
+def mock_db_connection():
+    with patch("app.services.log_search_service.get_db_connection") as mock:
+        mock_conn = MagicMock()
+        mock.return_value = mock_conn
+        yield mock
+
+# Prueba para la extracción de trigramas normalizados
+def test_extract_trigrams():
+    assert extract_trigrams("Análisis") == {"ana", "nal", "ali", "lis", "isi", "sis"}
+    assert extract_trigrams("ab") == set()
+
+# Prueba para que los trigramas con emojis quepan en NCHAR(3) (3 unidades UTF-16)
+def test_extract_trigrams_with_emoji():
+    trigrams = extract_trigrams("Incorrect password for username: ana😀🚀")
+
+    assert all(len(trigram.encode("utf-16-le")) == 6 for trigram in trigrams)
+    assert "a\ufffd\ufffd" in trigrams
+    # El término buscado se normaliza igual, así que sigue usando el índice
+    assert extract_trigrams("ana😀") <= trigrams
+
+# Prueba para el filtro deshabilitado o con comodines de LIKE
+def test_build_search_filter_not_applicable(search_enabled):
+    assert build_search_filter("50%") is None
+    assert build_search_filter("ab") is None
+    with patch("app.services.log_search_service.LOG_SEARCH_INDEX_ENABLED", False):
+        assert build_search_filter("error") is None
+
+# Prueba para la consulta del historial con el índice de trigramas
+def test_build_base_query_uses_trigram_index(search_enabled):
+    query, params = _build_base_query(None, "Error", None, None)
+    assert "dbo.log_trigrams" in query
+    assert "last_indexed_id" in query
+    assert query.endswith("AND message LIKE ?")
+    assert params == ["err", "ror", "rro", 3, "%Error%"]
+
+# Prueba para la indexación de los logs posteriores a la marca de agua
+def test_index_pending_logs(mock_db_connection):
+    mock_cursor = mock_db_connection.return_value.cursor.return_value
+    mock_cursor.fetchone.return_value = [10]
+    mock_cursor.fetchall.return_value = [(11, "abcd"), (12, "xyz")]
+
+    assert index_pending_logs(batch_size=100) == 2
+
+    postings = mock_cursor.executemany.call_args[0][1]
+    assert sorted(postings) == [("abc", 11), ("bcd", 11), ("xyz", 12)]
+    merge_params = mock_cursor.execute.call_args_list[-1][0][1]
+    assert merge_params == (12, 12)
+    mock_db_connection.return_value.commit.assert_called_once()
+
+# Prueba para no pasar del último id seguro (los INSERT con id menor pueden confirmarse tarde)
+def test_index_pending_logs_respects_horizon(mock_db_connection):
+    mock_cursor = mock_db_connection.return_value.cursor.return_value
+    mock_cursor.fetchone.side_effect = [[50], [10]]
+    mock_cursor.fetchall.return_value = [(11, "abcd")]
+    horizon = IdHorizon(lag=0)
+
+    assert index_pending_logs(batch_size=100, horizon=horizon) == 1
+
+    select = mock_cursor.execute.call_args_list[2][0]
+    assert "id > ? AND id <= ?" in select[0]
+    assert select[1] == (10, 50, 100)
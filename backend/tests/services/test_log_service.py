@@ -1,6 +1,8 @@
+import time
 import pytest
+from datetime import datetime
 from unittest.mock import patch, MagicMock
-from app.services.log_service import store_log
+from app.services.log_service import store_log, LogWriter, write_log_rows, start_log_writer
 
 # Fixture para simular la conexión a la base de datos
 @pytest.fixture
@@ -21,7 +23,7 @@ def mock_logging():
 def test_store_log_valid(mock_db_connection, mock_logging):
     store_log("INFO", "Test message", "TEST_TYPE")
     mock_db_connection().cursor().execute.assert_called_once_with(
-        "INSERT INTO logs (level, message, log_type) VALUES (?, ?, ?)",
+        "INSERT INTO logs (level, message, log_type) OUTPUT INSERTED.id VALUES (?, ?, ?)",
         ("INFO", "Test message", "TEST_TYPE")
     )
     mock_db_connection().commit.assert_called_once()
@@ -32,4 +34,121 @@ def test_store_log_valid(mock_db_connection, mock_logging):
 def test_store_log_db_error(mock_db_connection, mock_logging):
     mock_db_connection().cursor().execute.side_effect = Exception("DB error")
     store_log("ERROR", "Test error message", "TEST_TYPE")
-    mock_logging.error.assert_called_once_with("Error al almacenar el log: DB error")
\ No newline at end of file
+    mock_logging.error.assert_called_once_with("Error al almacenar el log: DB error")
+
+# === Pruebas para el escritor de logs en lotes ===
+
+def make_row(message):
+    return ("IA", message, "INFO", datetime(2024, 11, 29, 8, 42, 58))
+
+# Prueba para la escritura de varias filas en una sola sentencia
+def test_write_log_rows_multi_row_insert(mock_db_connection):
+    mock_db_connection().cursor().fetchall.return_value = [(8,), (7,)]
+    ids = write_log_rows([make_row("uno"), make_row("dos")])
+    query, params = mock_db_connection().cursor().execute.call_args[0]
+    assert query == "INSERT INTO logs (level, message, log_type, timestamp) OUTPUT INSERTED.id VALUES (?, ?, ?, ?), (?, ?, ?, ?)"
+    assert ids == [7, 8]
+    assert params[1] == "uno" and params[5] == "dos"
+    mock_db_connection().commit.assert_called_once()
+
+# Prueba para el vaciado por tamaño de lote y el drenado al detener
+def test_log_writer_flushes_batches_and_drains_on_stop():
+    written = []
+    writer = LogWriter(batch_size=2, flush_interval=5, writer=lambda rows: written.append(list(rows)))
+    writer.start()
+    for i in range(5):
+        writer.enqueue(make_row(str(i)))
+    writer.stop()
+
+    assert [row[1] for batch in written for row in batch] == ["0", "1", "2", "3", "4"]
+    assert writer.stats()["flushed"] == 5
+    assert not writer.running
+
+# Prueba para la política drop_oldest
+def test_log_writer_drop_oldest():
+    writer = LogWriter(buffer_size=2, overflow_policy="drop_oldest", writer=MagicMock())
+    for i in range(3):
+        writer.enqueue(make_row(str(i)))
+    assert [row[1] for row in writer._buffer] == ["1", "2"]
+    assert writer.stats()["dropped"] == 1
+
+# Prueba para la política block con tiempo de espera agotado
+def test_log_writer_block_times_out():
+    writer = LogWriter(buffer_size=1, overflow_policy="block", block_timeout=0.01, writer=MagicMock())
+    assert writer.enqueue(make_row("1")) is True
+    assert writer.enqueue(make_row("2")) is False
+    assert writer.stats()["dropped"] == 1
+
+# Prueba para no bloquear el event loop con la política block: el log se desvía al spool
+@pytest.mark.asyncio
+async def test_log_writer_block_never_blocks_event_loop(mock_logging):
+    writer = LogWriter(buffer_size=1, overflow_policy="block", block_timeout=5, writer=MagicMock())
+    writer.enqueue(make_row("1"))
+
+    started = time.monotonic()
+    assert writer.enqueue(make_row("2")) is True
+    assert time.monotonic() - started < 1
+    assert writer.stats()["diverted"] == 1
+    assert writer.stats()["spilled"] == 0
+    assert writer.stats()["dropped"] == 0
+
+# Prueba para la política spill cuando el búfer está lleno
+def test_log_writer_spill(mock_logging):
+    writer = LogWriter(buffer_size=1, overflow_policy="spill", writer=MagicMock())
+    writer.enqueue(make_row("1"))
+    writer.enqueue(make_row("2"))
+    assert writer.stats()["spilled"] == 1
+    mock_logging.error.assert_called_once()
+
+# Prueba para conservar el orden al desbordar hacia el spool: el búfer pasa antes que el log nuevo
+def test_log_writer_spill_keeps_order_with_spool():
+    spool = MagicMock()
+    writer = LogWriter(buffer_size=2, overflow_policy="spill", writer=MagicMock(), spool=spool)
+    for i in range(3):
+        writer.enqueue(make_row(str(i)))
+    assert [row[1] for row in spool.append.call_args[0][0]] == ["0", "1", "2"]
+    assert not writer._buffer
+    assert writer.stats()["spilled"] == 3
+
+# Prueba para rechazar al iniciar la política block (store_log se llama desde el event loop)
+def test_start_log_writer_rejects_block():
+    with patch("app.services.log_service.log_writer") as mock_writer:
+        mock_writer.overflow_policy = "block"
+        with pytest.raises(ValueError):
+            start_log_writer()
+    mock_writer.start.assert_not_called()
+
+# Prueba para verificar que store_log encola cuando el escritor está activo
+def test_store_log_enqueues_when_writer_running(mock_db_connection):
+    with patch("app.services.log_service.log_writer") as mock_writer:
+        mock_writer.running = True
+        store_log("ia", "Mensaje", "INFO")
+    level, message, log_type, timestamp = mock_writer.enqueue.call_args[0][0]
+    assert (level, message, log_type) == ("IA", "Mensaje", "INFO")
+    mock_db_connection().cursor().execute.assert_not_called()
+
+# Prueba para publicar en vivo solo después de escribir el log, con el id asignado
+def test_store_log_publishes_after_write_with_id(mock_db_connection):
+    mock_db_connection().cursor().fetchone.return_value = (42,)
+    with patch("app.services.log_service.log_broadcaster") as mock_broadcaster:
+        store_log("ia", "Mensaje", "INFO")
+    log_id, level, message, log_type, timestamp = mock_broadcaster.publish.call_args[0]
+    assert (log_id, level, message, log_type) == (42, "IA", "Mensaje", "INFO")
+
+# Prueba para no publicar en vivo un log que no se pudo escribir
+def test_store_log_does_not_publish_on_db_error(mock_db_connection, mock_logging):
+    mock_db_connection().cursor().execute.side_effect = Exception("DB error")
+    with patch("app.services.log_service.log_broadcaster") as mock_broadcaster:
+        store_log("ia", "Mensaje", "INFO")
+    mock_broadcaster.publish.assert_not_called()
+
+# Prueba para publicar los lotes del escritor con los ids que devuelve la escritura
+def test_log_writer_publishes_batch_with_ids():
+    writer = LogWriter(batch_size=2, flush_interval=5, writer=lambda rows: [10 + i for i in range(len(rows))])
+    with patch("app.services.log_service.log_broadcaster") as mock_broadcaster:
+        writer.start()
+        writer.enqueue(make_row("uno"))
+        writer.enqueue(make_row("dos"))
+        writer.stop()
+    published = [(call.args[0], call.args[2]) for call in mock_broadcaster.publish.call_args_list]
+    assert published == [(10, "uno"), (11, "dos")]
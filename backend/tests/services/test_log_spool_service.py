@@ -0,0 +1,93 @@
+import os
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+from app.services.log_spool_service import LogSpool
+from app.services.log_service import LogWriter
+
+# Fixture para un spool en un directorio temporal
+@pytest.fixture
+def spool(tmp_path):
+    return LogSpool(directory=str(tmp_path), segment_bytes=200, fsync_policy="always", db_retry_after=60)
+
+def make_row(message):
+    return ("IA", message, "ERROR", datetime(2024, 11, 29, 8, 42, 58))
+
+# Prueba para la rotación de segmentos y la recarga en orden
+def test_spool_replays_segments_in_order(spool):
+    for i in range(6):
+        spool.append([make_row(f"evento {i}")])
+    assert spool.has_pending()
+
+    written = []
+    replayed = spool.replay(lambda rows: written.extend(rows))
+
+    assert replayed == 6
+    assert [row[1] for row in written] == [f"evento {i}" for i in range(6)]
+    assert written[0][3] == datetime(2024, 11, 29, 8, 42, 58)
+    assert not spool.has_pending()
+
+# Prueba para conservar los segmentos si la base de datos sigue caída
+def test_spool_keeps_segments_when_replay_fails(spool):
+    spool.append([make_row("evento")])
+    writer = MagicMock(side_effect=Exception("DB down"))
+
+    assert spool.replay(writer) == 0
+    assert spool.has_pending()
+    assert spool.db_unavailable()
+    assert spool.stats()["replay_failures"] == 1
+
+# Prueba para la recuperación de un segmento abierto tras un cierre inesperado
+def test_spool_recovers_open_segment_and_skips_truncated_line(tmp_path):
+    with open(os.path.join(tmp_path, "000000000007.jsonl.open"), "wb") as f:
+        f.write(b'{"level": "IA", "message": "ok", "log_type": "INFO", "timestamp": "2024-11-29T08:42:58"}\n{"level": "IA", "mess')
+
+    spool = LogSpool(directory=str(tmp_path))
+    written = []
+    assert spool.replay(lambda rows: written.extend(rows)) == 1
+    assert written[0][1] == "ok"
+    assert spool.stats()["corrupt_lines"] == 1
+
+    spool.append([make_row("nuevo")])
+    assert os.path.exists(os.path.join(tmp_path, "000000000008.jsonl.open"))
+
+# Prueba para el desvío al spool cuando falla la base de datos
+def test_log_writer_spools_on_db_failure(spool):
+    writer = MagicMock(side_effect=Exception("DB down"))
+    log_writer = LogWriter(writer=writer, spool=spool)
+
+    log_writer._flush([make_row("uno")])
+    log_writer._flush([make_row("dos")])
+
+    # Tras el primer fallo ya no se intenta la base de datos
+    assert writer.call_count == 1
+    assert spool.stats()["spooled"] == 2
+    assert log_writer.stats()["failed"] == 1
+
+# Prueba para volver a escribir directo en la base de datos cuando el spool se vacía
+def test_log_writer_drains_active_segment_and_resumes_direct_writes(spool):
+    written = []
+    failures = [Exception("DB down")]
+
+    def writer(rows):
+        if failures:
+            raise failures.pop()
+        written.extend(rows)
+
+    log_writer = LogWriter(writer=writer, spool=spool)
+
+    log_writer._flush([make_row("uno")])
+    log_writer._flush([make_row("dos")])
+    # El estado pendiente se lleva en memoria, sin listar el directorio en cada lote
+    with patch("app.services.log_spool_service.os.listdir") as listdir:
+        assert spool.has_pending()
+    listdir.assert_not_called()
+
+    # La base de datos vuelve: el escritor recarga el segmento activo y luego escribe directo
+    spool._db_failed_at = None
+    log_writer._flush([make_row("tres")])
+    log_writer._flush([make_row("cuatro")])
+
+    assert [row[1] for row in written] == ["uno", "dos", "tres", "cuatro"]
+    assert not spool.has_pending()
+    assert spool.stats()["spooled"] == 2
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import pytest
+from datetime import datetime
+from app.services.log_stream_service import LogBroadcaster, SubscriberLimitError
+
+NOW = datetime(2024, 11, 29, 8, 42, 58)
+
+# Prueba para la entrega de eventos publicados desde otro hilo
+@pytest.mark.asyncio
+async def test_publish_from_thread_reaches_subscriber():
+    broadcaster = LogBroadcaster()
+    subscription = broadcaster.subscribe()
+
+    thread = threading.Thread(target=broadcaster.publish, args=(1, "IA", "Análisis completado", "INFO", NOW))
+    thread.start()
+    thread.join()
+
+    event = await subscription.get(timeout=1)
+    assert event == {"id": 1, "type": "IA", "description": "Análisis completado", "log_type": "INFO", "datetime": NOW}
+    assert broadcaster.stats()["delivered"] == 1
+
+# Prueba para el filtro por tipo y descripción
+@pytest.mark.asyncio
+async def test_subscription_filters():
+    broadcaster = LogBroadcaster()
+    subscription = broadcaster.subscribe(level="IA", description="factura")
+
+    broadcaster.publish(1, "CARGA_DOCUMENTO", "Factura cargada", "INFO", NOW)
+    broadcaster.publish(2, "IA", "Sin coincidencia", "INFO", NOW)
+    broadcaster.publish(3, "IA", "FACTURA analizada", "INFO", NOW)
+
+    event = await subscription.get(timeout=1)
+    assert event["description"] == "FACTURA analizada"
+    with pytest.raises(asyncio.TimeoutError):
+        await subscription.get(timeout=0.05)
+
+# Prueba para la desconexión de un consumidor lento
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_disconnected():
+    broadcaster = LogBroadcaster(queue_size=2)
+    subscription = broadcaster.subscribe()
+
+    for i in range(3):
+        broadcaster.publish(i, "IA", f"Evento {i}", "INFO", NOW)
+    await asyncio.sleep(0)
+
+    assert await subscription.get(timeout=1) is None
+    assert subscription.overflowed
+    broadcaster.unsubscribe(subscription)
+    assert broadcaster.stats()["subscribers"] == 0
+    assert broadcaster.stats()["disconnected_slow"] == 1
+
+# Prueba para el límite de suscriptores
+@pytest.mark.asyncio
+async def test_subscriber_limit():
+    broadcaster = LogBroadcaster(max_subscribers=1)
+    broadcaster.subscribe()
+    with pytest.raises(SubscriberLimitError):
+        broadcaster.subscribe()
@@ -0,0 +1,74 @@
+import io
+import hashlib
+import pytest
+import pyodbc
+from unittest.mock import patch, MagicMock
+from app.services.upload_dedup_service import (
+    UploadInProgressError, claim_upload, complete_upload, release_upload, fingerprint_file
+)
+
+digest = hashlib.sha256(b"column1,column2\nvalor1,valor2\n").digest()
+
+# Fixture para simular la conexión a la base de datos
+@pytest.fixture
+def mock_conn():
+    with patch("app.services.upload_dedup_service.get_db_connection") as mock:
+        conn = MagicMock()
+        mock.return_value = conn
+        yield conn
+
+# Prueba para la huella calculada por bloques
+def test_fingerprint_file():
+    fileobj = io.BytesIO(b"column1,column2\nvalor1,valor2\n")
+    with patch("app.services.upload_dedup_service.FINGERPRINT_BLOCK_SIZE", 4):
+        assert fingerprint_file(fileobj) == digest
+    assert fileobj.tell() == 0
+
+# Prueba para reservar una huella nueva
+def test_claim_upload_new(mock_conn):
+    assert claim_upload(digest, "testfile.csv", "files/file_upload/testfile.csv", 30) is None
+    sql, params = mock_conn.cursor.return_value.execute.call_args[0]
+    assert sql.startswith("INSERT INTO dbo.upload_fingerprints")
+    assert params[0] == digest
+    mock_conn.commit.assert_called_once()
+
+# Prueba para retornar la carga original de un archivo ya ingerido
+def test_claim_upload_duplicate(mock_conn):
+    cursor = mock_conn.cursor.return_value
+    cursor.execute.side_effect = [pyodbc.IntegrityError("duplicado"), None, None]
+    cursor.fetchone.return_value = ("original.csv", "files/file_upload/original.csv", 30, 1, "ingested", "2024-11-29", 100)
+
+    original = claim_upload(digest, "testfile.csv", "files/file_upload/testfile.csv", 30)
+
+    assert original["filename"] == "original.csv"
+    assert original["sha256"] == digest.hex()
+    assert "times_seen = times_seen + 1" in cursor.execute.call_args[0][0]
+
+# Prueba para rechazar el mismo contenido mientras otra carga lo procesa
+def test_claim_upload_in_progress(mock_conn):
+    cursor = mock_conn.cursor.return_value
+    cursor.execute.side_effect = [pyodbc.IntegrityError("duplicado"), None]
+    cursor.fetchone.return_value = ("otro.csv", "files/file_upload/otro.csv", 30, None, "pending", None, 5)
+
+    with pytest.raises(UploadInProgressError):
+        claim_upload(digest, "testfile.csv", "files/file_upload/testfile.csv", 30)
+
+# Prueba para retomar una carga abandonada
+def test_claim_upload_takes_over_stale(mock_conn):
+    cursor = mock_conn.cursor.return_value
+    cursor.execute.side_effect = [pyodbc.IntegrityError("duplicado"), None, None]
+    cursor.fetchone.return_value = ("otro.csv", "files/file_upload/otro.csv", 30, None, "pending", None, 7200)
+    cursor.rowcount = 1
+
+    assert claim_upload(digest, "testfile.csv", "files/file_upload/testfile.csv", 30) is None
+    assert cursor.execute.call_args[0][0].startswith("UPDATE dbo.upload_fingerprints SET filename")
+
+# Prueba para marcar la carga como ingerida y liberar una fallida
+def test_complete_and_release(mock_conn):
+    cursor = MagicMock()
+    complete_upload(cursor, digest, 10, 8)
+    assert cursor.execute.call_args[0][1] == (10, 8, digest)
+
+    release_upload(digest)
+    assert "status = 'pending'" in mock_conn.cursor.return_value.execute.call_args[0][0]
+    mock_conn.commit.assert_called_once()
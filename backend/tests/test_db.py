@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+from app.db import ConnectionPool, PoolTimeoutError, DBExecutor
+
+# Fixture para simular la apertura de conexiones físicas
+@pytest.fixture
+def connection_factory():
+    return MagicMock(side_effect=lambda: MagicMock())
+
+# Prueba para el precalentamiento del pool
+def test_warm_up_opens_min_size(connection_factory):
+    pool = ConnectionPool(connection_factory, min_size=3, max_size=5)
+    pool.warm_up()
+    stats = pool.stats()
+    assert connection_factory.call_count == 3
+    assert stats["idle"] == 3
+    assert stats["in_use"] == 0
+
+# Prueba para liberar los lugares reservados si falla una apertura del precalentamiento
+def test_warm_up_failure_releases_reserved_slots():
+    opened = MagicMock()
+    factory = MagicMock(side_effect=[opened, Exception("Servidor no disponible")])
+    pool = ConnectionPool(factory, min_size=3, max_size=3)
+
+    with pytest.raises(Exception):
+        pool.warm_up()
+
+    assert pool.stats()["size"] == 1
+    assert pool.stats()["idle"] == 1
+
+# Prueba para la reutilización de conexiones devueltas al pool
+def test_connection_is_reused_after_close(connection_factory):
+    pool = ConnectionPool(connection_factory, min_size=0, max_size=2)
+    conn = pool.get_connection()
+    raw = conn._entry.connection
+    conn.close()
+
+    again = pool.get_connection()
+    assert again._entry.connection is raw
+    assert connection_factory.call_count == 1
+    raw.rollback.assert_called_once()
+    raw.close.assert_not_called()
+
+# Prueba para el tiempo de espera cuando el pool está lleno
+def test_checkout_timeout(connection_factory):
+    pool = ConnectionPool(connection_factory, min_size=0, max_size=1, timeout=0.05)
+    pool.get_connection()
+    with pytest.raises(PoolTimeoutError):
+        pool.get_connection()
+    assert pool.stats()["timeouts"] == 1
+
+# Prueba para la espera de una conexión liberada por otro hilo
+def test_waiter_gets_released_connection(connection_factory):
+    pool = ConnectionPool(connection_factory, min_size=0, max_size=1, timeout=2)
+    conn = pool.get_connection()
+
+    def release_later():
+        time.sleep(0.05)
+        conn.close()
+
+    threading.Thread(target=release_later).start()
+    other = pool.get_connection()
+    assert other is not None
+    stats = pool.stats()
+    assert stats["waiters"] == 0
+    assert stats["wait_time_max_ms"] > 0
+
+# Prueba para el reciclaje por tiempo de vida
+def test_max_lifetime_recycles_connection(connection_factory):
+    pool = ConnectionPool(connection_factory, min_size=0, max_size=1, max_lifetime=0.01)
+    conn = pool.get_connection()
+    raw = conn._entry.connection
+    time.sleep(0.02)
+    conn.close()
+
+    raw.close.assert_called_once()
+    assert pool.stats()["recycled"] == 1
+    assert pool.stats()["size"] == 0
+
+# Prueba para la validación de conexiones caídas al entregarlas
+def test_dead_connection_is_replaced_on_checkout(connection_factory):
+    pool = ConnectionPool(connection_factory, min_size=1, max_size=1, ping_after=0)
+    pool.warm_up()
+    dead = pool._idle[0].connection
+    dead.cursor.return_value.execute.side_effect = Exception("Conexión perdida")
+
+    conn = pool.get_connection()
+    assert conn._entry.connection is not dead
+    dead.close.assert_called_once()
+    assert pool.stats()["failed_pings"] == 1
+
+# Prueba para el límite de concurrencia del ejecutor de base de datos
+@pytest.mark.asyncio
+async def test_db_executor_limits_concurrency():
+    executor = DBExecutor(max_workers=2)
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+
+    def blocking_query():
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        time.sleep(0.02)
+        with lock:
+            running["now"] -= 1
+        return "ok"
+
+    results = await asyncio.gather(*(executor.run(blocking_query) for _ in range(6)))
+    executor.shutdown()
+
+    assert results == ["ok"] * 6
+    assert running["max"] == 2
+    assert executor.stats()["completed"] == 6
+
+# Prueba para verificar que el event loop sigue libre durante una consulta bloqueante
+@pytest.mark.asyncio
+async def test_db_executor_does_not_block_event_loop():
+    executor = DBExecutor(max_workers=1)
+    ticks = []
+
+    async def ticker():
+        for _ in range(3):
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(executor.run(time.sleep, 0.1), ticker())
+    executor.shutdown()
+
+    assert len(ticks) == 3
+    assert ticks[-1] - ticks[0] < 0.09
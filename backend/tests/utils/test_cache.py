@@ -0,0 +1,34 @@
+import time
+from app.utils.cache import TTLCache, MISSING
+
+# Prueba para la expulsión LRU cuando la caché está llena
+def test_lru_eviction():
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+# Prueba para la expiración por TTL y por instante absoluto
+def test_expiration():
+    cache = TTLCache(ttl=0.01)
+    cache.set("ttl", "valor")
+    cache.set("exp", "valor", expires_at=time.time() + 60)
+    time.sleep(0.02)
+
+    assert cache.get("ttl") is MISSING
+    assert cache.get("exp") == "valor"
+
+# Prueba para la invalidación por predicado
+def test_invalidate_where():
+    cache = TTLCache()
+    cache.set(("IA", 1), 10)
+    cache.set(("IA", 2), 20)
+    cache.set(("OTRO", 1), 30)
+
+    assert cache.invalidate_where(lambda key: key[0] == "IA") == 2
+    assert len(cache) == 1
@@ -0,0 +1,143 @@
+import asyncio
+import threading
+import pytest
+from app.utils.concurrency import ConcurrencyLimiter, ConcurrencyLimitError, SingleFlight
+
+# Prueba para agrupar llamadas concurrentes con la misma clave
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_calls():
+    group = SingleFlight()
+    calls = 0
+
+    async def lookup():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "resultado"
+
+    results = await asyncio.gather(*(group.do("admin", lookup) for _ in range(5)))
+
+    assert results == ["resultado"] * 5
+    assert calls == 1
+    assert group.stats() == {"in_flight": 0, "executed": 1, "coalesced": 4}
+
+# Prueba para propagar el error a todas las llamadas agrupadas
+@pytest.mark.asyncio
+async def test_single_flight_propagates_errors():
+    group = SingleFlight()
+
+    async def lookup():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("Error de base de datos")
+
+    results = await asyncio.gather(group.do("admin", lookup), group.do("admin", lookup), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+# Prueba para limitar las operaciones simultáneas y atender la cola en orden
+@pytest.mark.asyncio
+async def test_limiter_queues_in_order():
+    limiter = ConcurrencyLimiter(max_in_flight=2, max_queue=10, queue_timeout=5)
+    running = 0
+    peak = 0
+    order = []
+
+    async def work(i):
+        nonlocal running, peak
+        async with limiter.slot():
+            running += 1
+            peak = max(peak, running)
+            order.append(i)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(work(i) for i in range(6)))
+
+    assert peak == 2
+    assert order == list(range(6))
+    stats = limiter.stats()
+    assert stats["admitted"] == 6 and stats["in_flight"] == 0 and stats["queued"] == 0
+
+# Prueba para rechazar cuando la cola está llena y al vencer el plazo
+@pytest.mark.asyncio
+async def test_limiter_rejects_and_times_out():
+    limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=1, queue_timeout=0.05)
+    await limiter.acquire()
+    waiting = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(ConcurrencyLimitError) as exc_info:
+        await limiter.acquire()
+    assert exc_info.value.retry_after >= 1
+    with pytest.raises(ConcurrencyLimitError):
+        await waiting
+
+    stats = limiter.stats()
+    assert (stats["rejected"], stats["timed_out"], stats["queued"]) == (1, 1, 0)
+    limiter.release()
+    assert limiter.stats()["in_flight"] == 0
+
+# Prueba para compartir el límite entre hilos y corutinas
+@pytest.mark.asyncio
+async def test_limiter_thread_hands_slot_to_coroutine():
+    limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=5, queue_timeout=5)
+    limiter.acquire_sync()
+    waiting = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+
+    threading.Thread(target=limiter.release).start()
+    await asyncio.wait_for(waiting, 1)
+
+    assert limiter.stats()["in_flight"] == 1
+    limiter.queue_timeout = 0.01
+    with pytest.raises(ConcurrencyLimitError):
+        limiter.acquire_sync()
+    assert limiter.stats()["timed_out"] == 1
+
+# Prueba para conservar el lugar mientras el hilo sigue en curso aunque se cancele quien espera
+@pytest.mark.asyncio
+async def test_limiter_run_releases_when_thread_finishes():
+    from app.db import DBExecutor
+    limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=5, queue_timeout=5)
+    executor = DBExecutor(max_workers=1, thread_name_prefix="prueba")
+    started, finish = threading.Event(), threading.Event()
+
+    def blocking_call():
+        started.set()
+        finish.wait(2)
+        return "ok"
+
+    task = asyncio.create_task(limiter.run(executor, blocking_call))
+    await asyncio.get_running_loop().run_in_executor(None, started.wait, 2)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    # La llamada sigue en el hilo: el lugar no se entrega a otro
+    assert limiter.stats()["in_flight"] == 1
+    finish.set()
+    assert await limiter.run(executor, lambda: "siguiente") == "siguiente"
+    assert limiter.stats()["in_flight"] == 0
+    executor.shutdown()
+
+# Prueba para que cancelar la primera llamada no cancele a las que esperan el mismo resultado
+@pytest.mark.asyncio
+async def test_single_flight_leader_cancel_keeps_followers():
+    group = SingleFlight()
+    release = asyncio.Event()
+
+    async def lookup():
+        await release.wait()
+        return "valor"
+
+    leader = asyncio.create_task(group.do("clave", lookup))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(group.do("clave", lookup))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == "valor"
+    assert leader.cancelled()
+    assert group.stats() == {"in_flight": 0, "executed": 1, "coalesced": 1}
@@ -0,0 +1,85 @@
+import pandas as pd
+import pytest
+from app.utils.csv_validation import ColumnRule, CsvValidator, Schema, duplicated_rows, validate_frame
+
+# Esquema de ejemplo con todas las reglas
+example_schema = Schema([
+    ColumnRule("code", pattern=r"[A-Z]{2}\d{3}", unique=True),
+    ColumnRule("amount", dtype="float", min_value=0, max_value=1000),
+    ColumnRule("date", dtype="date", nullable=True, date_format="%Y-%m-%d"),
+    ColumnRule("name", max_length=5),
+])
+
+example_df = pd.DataFrame({
+    "code": ["AB123", "ab123", "CD456", "AB123"],
+    "amount": ["10.5", "-1", "x", "999"],
+    "date": ["2024-01-01", None, "31/01/2024", "2024-02-01"],
+    "name": ["ana", "beatriz", None, "eva"],
+})
+
+# Prueba para un DataFrame válido
+def test_valid_frame():
+    report = validate_frame(example_df.iloc[[0, 2]].assign(amount="1", date=None, name="luis"), example_schema)
+    assert report.valid
+    assert report.messages() == []
+
+# Prueba para cada regla con las filas afectadas
+def test_rules_report_rows():
+    report = validate_frame(example_df, example_schema)
+    issues = {(issue["column"], issue["rule"]): issue["rows"] for issue in report.issues}
+
+    assert issues == {
+        ("code", "pattern"): [2],
+        ("amount", "type"): [3],
+        ("amount", "range"): [2],
+        ("date", "type"): [3],
+        ("name", "null"): [3],
+        ("name", "length"): [2],
+        ("code", "unique"): [1, 4],
+    }
+    assert report.error_count == 8
+
+# Prueba para la estructura del archivo
+def test_structure():
+    assert validate_frame(example_df[["code"]], example_schema).messages() == ["El archivo no tiene exactamente 4 columnas."]
+    renamed = example_df.rename(columns={"name": "nombre"})
+    assert validate_frame(renamed, example_schema).messages() == ["Faltan las columnas: name."]
+
+# Prueba para el máximo de errores y de filas informadas
+def test_error_budget_and_row_cap():
+    schema = Schema([ColumnRule("a", dtype="int"), ColumnRule("b", dtype="int")])
+    df = pd.DataFrame({"a": ["x"] * 50, "b": ["y"] * 50})
+
+    report = validate_frame(df, schema, max_errors=10, max_rows=3)
+
+    assert report.truncated
+    assert report.issues == [{"column": "a", "rule": "type", "count": 50, "rows": [1, 2, 3], "message": "La columna a tiene 50 valores que no son de tipo int (filas 1, 2, 3, ...)."}]
+    assert report.messages()[-1].startswith("Se superó el máximo de 10 errores")
+
+# Prueba para validar por bloques: numeración, tipos y unicidad entre bloques
+def test_chunks():
+    schema = Schema([ColumnRule("a"), ColumnRule("b")], unique_rows=True)
+    validator = CsvValidator(schema)
+    # El primer bloque se interpreta como números; el segundo, como texto
+    assert validator.check(pd.DataFrame({"a": [1, 2], "b": ["x", "y"]}))
+    assert validator.check(pd.DataFrame({"a": ["z", "1"], "b": ["w", "x"]}))
+
+    report = validator.report()
+
+    assert [issue["rule"] for issue in report.issues] == ["unique"]
+    assert report.issues[0]["rows"] == [1, 4]
+
+# Prueba para un tipo de columna no válido
+def test_invalid_rule():
+    with pytest.raises(ValueError):
+        ColumnRule("a", dtype="decimal")
+
+# Prueba para buscar las filas repetidas con pyarrow igual que pandas (los vacíos cuentan como iguales)
+def test_duplicated_rows_arrow_matches_pandas():
+    pytest.importorskip("pyarrow")
+    df = pd.DataFrame(
+        {"a": ["x", "y", "x", None, None, "y"], "b": ["1", "2", "1", "3", "3", "9"]},
+        dtype="string[pyarrow]"
+    )
+    expected = df.astype(object).duplicated(keep=False).to_numpy()
+    assert duplicated_rows(df).tolist() == expected.tolist() == [True, False, True, True, True, False]
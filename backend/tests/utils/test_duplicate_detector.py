@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+from app.utils.duplicate_detector import DuplicateDetector, hash_rows
+
+# Prueba para detectar filas repetidas entre bloques distintos
+def test_detects_duplicates_across_chunks():
+    first = pd.DataFrame({"column1": ["a", "b"], "column2": ["1", "2"]})
+    second = pd.DataFrame({"column1": ["c", "a"], "column2": ["3", "1"]})
+
+    with DuplicateDetector(partitions=4) as detector:
+        detector.add(hash_rows(first))
+        detector.add(hash_rows(second))
+        duplicates = detector.duplicate_hashes()
+
+    assert duplicates == {int(hash_rows(first)[0])}
+    assert detector.rows == 4
+
+# Prueba sin duplicados y limpieza de los archivos temporales
+def test_no_duplicates_and_cleanup(tmp_path):
+    detector = DuplicateDetector(partitions=3, directory=str(tmp_path))
+    detector.add(np.arange(1000, dtype=np.uint64))
+    assert detector.duplicate_hashes() == set()
+    detector.close()
+    assert list(tmp_path.iterdir()) == []
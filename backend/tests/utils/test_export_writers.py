@@ -0,0 +1,58 @@
+import io
+import json
+import zipfile
+from datetime import datetime
+from app.utils.export_writers import write_csv, write_ndjson, write_xlsx
+
+COLUMNS = ["id", "description", "datetime"]
+BATCHES = [
+    [(1, "Primero", datetime(2024, 11, 29, 8, 0, 0))],
+    [(2, "Con <marcas> & símbolos", datetime(2024, 11, 29, 9, 0, 0))],
+]
+
+# Prueba para el CSV generado por lotes
+def test_write_csv():
+    content = b"".join(write_csv(COLUMNS, iter(BATCHES))).decode("utf-8-sig")
+    lines = content.splitlines()
+
+    assert lines[0] == "id,description,datetime"
+    assert lines[1] == "1,Primero,2024-11-29T08:00:00"
+    assert len(lines) == 3
+
+# Prueba para el NDJSON generado por lotes
+def test_write_ndjson():
+    chunks = list(write_ndjson(COLUMNS, iter(BATCHES)))
+    rows = [json.loads(line) for line in b"".join(chunks).splitlines()]
+
+    assert len(chunks) == 2
+    assert rows[1] == {"id": 2, "description": "Con <marcas> & símbolos", "datetime": "2024-11-29T09:00:00"}
+
+# Prueba para el XLSX: el ZIP generado en streaming debe ser válido
+def test_write_xlsx():
+    content = b"".join(write_xlsx(COLUMNS, iter(BATCHES)))
+
+    with zipfile.ZipFile(io.BytesIO(content)) as workbook:
+        assert workbook.testzip() is None
+        assert "xl/workbook.xml" in workbook.namelist()
+        sheet = workbook.read("xl/worksheets/sheet1.xml").decode("utf-8")
+
+    assert '<row r="3">' in sheet
+    assert "Con &lt;marcas&gt; &amp; símbolos" in sheet
+    assert 's="1"' in sheet
+
+# Prueba para continuar en otra hoja al llegar al límite de filas por hoja
+def test_write_xlsx_splits_sheets():
+    batches = [[(i, f"fila {i}", None) for i in range(3)], [(i, f"fila {i}", None) for i in range(3, 5)]]
+    content = b"".join(write_xlsx(COLUMNS, iter(batches), max_rows=3))
+
+    with zipfile.ZipFile(io.BytesIO(content)) as workbook:
+        assert workbook.testzip() is None
+        sheets = [workbook.read(f"xl/worksheets/sheet{n}.xml").decode("utf-8") for n in (1, 2, 3)]
+        index = workbook.read("xl/workbook.xml").decode("utf-8")
+        content_types = workbook.read("[Content_Types].xml").decode("utf-8")
+
+    assert [sheet.count("<row ") for sheet in sheets] == [3, 3, 2]
+    assert "fila 2" in sheets[1] and '<row r="3">' not in sheets[2]
+    assert all("description" in sheet for sheet in sheets)
+    assert 'name="Logs 3"' in index
+    assert "/xl/worksheets/sheet3.xml" in content_types
@@ -0,0 +1,130 @@
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+from app.utils.job_queue import Job, JobQueue, JobQueueFullError, JobStore, RUNNING, SUCCEEDED, FAILED
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+# Prueba para el orden por prioridad y la persistencia del payload
+def test_jobs_processed_by_priority(tmp_path):
+    order = []
+    handler = lambda job, path: order.append((job.params["name"], open(path, "rb").read())) or {"ok": True}
+    queue = JobQueue("prueba", {"tarea": handler}, JobStore(str(tmp_path)), workers=1)
+
+    low = queue.submit("tarea", {"name": "baja"}, b"1", priority=2)
+    high = queue.submit("tarea", {"name": "alta"}, b"2", priority=0)
+    queue.start()
+    try:
+        assert wait_until(lambda: queue.get(low.id).status == SUCCEEDED)
+    finally:
+        queue.stop()
+
+    assert order == [("alta", b"2"), ("baja", b"1")]
+    assert queue.get(high.id).result == {"ok": True}
+    # El payload se elimina al terminar; el estado se conserva
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([f"{low.id}.json", f"{high.id}.json"])
+
+# Prueba para los reintentos de un error transitorio
+def test_job_retried_until_success(tmp_path):
+    handler = MagicMock(side_effect=[Exception("temporal"), {"ok": True}])
+    queue = JobQueue("prueba", {"tarea": handler}, JobStore(str(tmp_path)), workers=1, retry_backoff=0.01)
+    job = queue.submit("tarea", {}, b"x")
+    queue.start()
+    try:
+        assert wait_until(lambda: queue.get(job.id).status == SUCCEEDED)
+    finally:
+        queue.stop()
+
+    assert queue.get(job.id).attempts == 2
+    stats = queue.stats()
+    assert stats["retried"] == 1
+    assert stats["succeeded"] == 1
+    assert stats["processing_seconds"]["count"] == 2
+
+# Prueba para un error que no se reintenta
+def test_job_not_retryable_fails(tmp_path):
+    handler = MagicMock(side_effect=ValueError("inválido"))
+    queue = JobQueue(
+        "prueba", {"tarea": handler}, JobStore(str(tmp_path)), workers=1,
+        retryable=lambda error: not isinstance(error, ValueError)
+    )
+    job = queue.submit("tarea", {}, b"x")
+    queue.start()
+    try:
+        assert wait_until(lambda: queue.get(job.id).status == FAILED)
+    finally:
+        queue.stop()
+
+    assert handler.call_count == 1
+    assert queue.get(job.id).error == "inválido"
+
+# Prueba para la cola llena
+def test_queue_full(tmp_path):
+    queue = JobQueue("prueba", {"tarea": MagicMock()}, JobStore(str(tmp_path)), max_queued=1)
+    queue.submit("tarea", {}, b"x")
+    with pytest.raises(JobQueueFullError):
+        queue.submit("tarea", {}, b"y")
+
+# Prueba para reservar el lugar antes de guardar el payload: un envío simultáneo no excede max_queued
+def test_queue_full_while_payload_is_written(tmp_path):
+    store = JobStore(str(tmp_path))
+    queue = JobQueue("prueba", {"tarea": MagicMock()}, store, max_queued=1)
+    write_payload = store.write_payload
+    concurrent = []
+
+    def write_and_submit(job_id, payload):
+        with pytest.raises(JobQueueFullError):
+            queue.submit("tarea", {}, b"y")
+        concurrent.append(job_id)
+        write_payload(job_id, payload)
+
+    store.write_payload = write_and_submit
+    queue.submit("tarea", {}, b"x")
+    assert concurrent and queue.stats()["queued"] == 1
+
+# Prueba para liberar el lugar reservado si no se pudo guardar el payload
+def test_failed_write_releases_slot(tmp_path):
+    store = JobStore(str(tmp_path))
+    queue = JobQueue("prueba", {"tarea": MagicMock()}, store, max_queued=1)
+    store.write_payload = MagicMock(side_effect=OSError("disco lleno"))
+    with pytest.raises(OSError):
+        queue.submit("tarea", {}, b"x")
+    assert queue.stats()["submitting"] == 0
+
+    del store.write_payload
+    queue.submit("tarea", {}, b"y")
+    assert queue.stats()["queued"] == 1
+
+# Prueba para depurar los trabajos terminados al finalizar otros, sin consultas de estado
+def test_finished_jobs_pruned_without_get(tmp_path):
+    queue = JobQueue("prueba", {"tarea": lambda job, path: {}}, JobStore(str(tmp_path)), workers=1, result_ttl=0)
+    queue.submit("tarea", {}, b"x")
+    queue.submit("tarea", {}, b"y")
+    queue.start()
+    try:
+        assert wait_until(lambda: queue.stats()["succeeded"] == 2 and not queue._jobs)
+    finally:
+        queue.stop()
+
+# Prueba para retomar al iniciar los trabajos que quedaron pendientes o en curso
+def test_recovers_persisted_jobs(tmp_path):
+    store = JobStore(str(tmp_path))
+    interrupted = Job("tarea", {}, 1, 3, status=RUNNING, attempts=1)
+    store.write_payload(interrupted.id, b"x")
+    store.save(interrupted)
+
+    done = threading.Event()
+    queue = JobQueue("prueba", {"tarea": lambda job, path: done.set() or {}}, store, workers=1)
+    queue.start()
+    try:
+        assert done.wait(2)
+        assert wait_until(lambda: queue.get(interrupted.id).status == SUCCEEDED)
+    finally:
+        queue.stop()
+
+    assert queue.get(interrupted.id).attempts == 2
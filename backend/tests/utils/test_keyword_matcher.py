@@ -0,0 +1,57 @@
+from app.utils.keyword_matcher import KeywordMatcher, KeywordMatch, canonical_text, edit_distance, normalize_text
+from app.utils.text_extraction_mapping import KEYWORD_MAPPING
+
+# Prueba para la normalización de mayúsculas, tildes y espacios
+def test_normalize_text():
+    assert normalize_text("  Número de FACTURA ") == "numero de factura"
+    assert normalize_text("Ñandú") == "nandu"
+    assert normalize_text("total €") == "total €"
+    assert normalize_text(None) == ""
+    assert canonical_text("Factura  N°.:") == "factura n"
+
+# Prueba para la distancia de edición con límite
+def test_edit_distance():
+    assert edit_distance("factura", "factura", 2) == 0
+    assert edit_distance("factura", "fctura", 2) == 1
+    assert edit_distance("factura", "proveedor", 2) == 3
+    # La transposición de dos letras contiguas cuenta como un solo error
+    assert edit_distance("facutra", "factura", 2) == 1
+
+# Prueba para las coincidencias exactas con el mapeo real
+def test_exact_matches():
+    matcher = KeywordMatcher(KEYWORD_MAPPING)
+
+    assert matcher.match("NÚMERO DE FACTURA") == KeywordMatch("invoice_number", "número de factura", 1.0, False)
+    assert matcher.match("Nota Credito Electronica No") == KeywordMatch("invoice_number", "NOTA CRÉDITO ELECTRÓNICA No.", 0.95, False)
+    assert matcher.field_for("fecha de emision") == "invoice_date"
+    assert matcher.field_for("Teléfono") is None
+
+# Prueba para tolerar el ruido del OCR y rechazar claves distintas
+def test_fuzzy_matches():
+    matcher = KeywordMatcher(KEYWORD_MAPPING, fuzzy=True)
+
+    match = matcher.match("numero de facutra")
+    assert match.field == "invoice_number" and match.fuzzy
+    assert 0.9 <= match.confidence < 0.95
+    assert matcher.field_for("direccion del clente") == "client_address"
+    # Las claves cortas no admiten errores
+    assert matcher.field_for("fecna") is None
+    # La coincidencia difusa es opcional
+    assert KeywordMatcher(KEYWORD_MAPPING).field_for("numero de facutra") is None
+
+# Prueba para que las claves parecidas pero con otra palabra no coincidan
+def test_fuzzy_rejects_near_miss_keys():
+    matcher = KeywordMatcher(KEYWORD_MAPPING, fuzzy=True)
+
+    assert matcher.match("Fecha de cargo") is None  # "fecha de pago" difiere en una palabra
+    assert matcher.match("Total facturado") is None  # "total factura" con otra terminación
+    assert matcher.match("Fecha de corte") is None
+    assert matcher.field_for("fecha de pgao") == "invoice_date"
+
+# Prueba para que gane el primer campo ante palabras clave repetidas
+def test_first_field_wins():
+    matcher = KeywordMatcher({"a": ["Total"], "b": ["total", "otro"]})
+
+    assert matcher.field_for("TOTAL") == "a"
+    assert matcher.field_for("otro") == "b"
+    assert matcher.stats()["keywords"] == 2
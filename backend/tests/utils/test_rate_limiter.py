@@ -0,0 +1,42 @@
+from unittest.mock import patch
+from app.utils.rate_limiter import TokenBucketLimiter, acquire_all
+
+# Prueba para la ráfaga permitida y el rechazo posterior
+def test_burst_then_reject():
+    limiter = TokenBucketLimiter(rate=1, burst=2)
+    with patch("app.utils.rate_limiter.time.monotonic", return_value=100.0):
+        assert limiter.acquire("admin") == 0
+        assert limiter.acquire("admin") == 0
+        assert limiter.acquire("admin") == 1.0
+        # Otra clave tiene su propia ráfaga
+        assert limiter.acquire("otro") == 0
+
+    assert limiter.stats()["rejected"] == 1
+
+# Prueba para la recarga de fichas con el tiempo
+def test_refill():
+    limiter = TokenBucketLimiter(rate=0.5, burst=1)
+    with patch("app.utils.rate_limiter.time.monotonic", side_effect=[0.0, 0.0, 2.0]):
+        assert limiter.acquire("admin") == 0
+        assert limiter.acquire("admin") == 2.0
+        assert limiter.acquire("admin") == 0
+
+# Prueba para el máximo de claves recordadas
+def test_max_keys():
+    limiter = TokenBucketLimiter(rate=1, burst=1, max_keys=2)
+    for key in ("a", "b", "c"):
+        limiter.acquire(key)
+    assert limiter.stats()["keys"] == 2
+
+# Prueba para no consumir ninguna ficha si alguno de los límites rechaza la petición
+def test_acquire_all_consumes_only_when_all_allow():
+    by_user = TokenBucketLimiter(rate=0, burst=2)
+    by_ip = TokenBucketLimiter(rate=0, burst=1)
+
+    assert acquire_all((by_user, "admin"), (by_ip, "10.0.0.1")) == 0
+    assert acquire_all((by_user, "admin"), (by_ip, "10.0.0.1")) == float("inf")
+
+    # El rechazo por IP no gastó la ficha del username
+    assert by_user.acquire("admin") == 0
+    assert by_ip.stats()["rejected"] == 1
+    assert by_user.stats()["rejected"] == 0
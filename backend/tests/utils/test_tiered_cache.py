@@ -0,0 +1,68 @@
+import os
+import time
+from app.utils.cache import TTLCache
+from app.utils.tiered_cache import CompressedDiskCache, TieredCache
+
+# Prueba para guardar y leer valores comprimidos en disco
+def test_disk_cache_roundtrip(tmp_path):
+    cache = CompressedDiskCache(str(tmp_path / "cache"), 1024 * 1024)
+    cache.set("clave", b"valor " * 1000)
+
+    assert cache.get("clave") == b"valor " * 1000
+    assert cache.get("otra") is None
+    stats = cache.stats()
+    assert stats["entries"] == 1 and stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["bytes"] < 6000
+
+# Prueba para la expulsión por tamaño de las entradas usadas hace más tiempo
+def test_disk_cache_size_eviction(tmp_path):
+    value = os.urandom(400)
+    cache = CompressedDiskCache(str(tmp_path), 1000)
+    cache.set("a", value)
+    cache.set("b", value)
+    cache.get("a")
+    cache.set("c", value)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == value
+    assert cache.get("c") == value
+    assert cache.stats()["evictions"] == 1
+    assert len(os.listdir(tmp_path)) == 2
+
+# Prueba para reconstruir el índice desde el directorio tras un reinicio
+def test_disk_cache_survives_restart(tmp_path):
+    value = os.urandom(400)
+    first = CompressedDiskCache(str(tmp_path), 1000)
+    first.set("a", value)
+    first.set("b", value)
+    past = time.time() - 60
+    os.utime(os.path.join(tmp_path, first._name("b")), (past, past))
+
+    second = CompressedDiskCache(str(tmp_path), 1000)
+    second.set("c", value)
+
+    assert second.get("a") == value
+    assert second.get("b") is None
+
+# Prueba para descartar una entrada dañada
+def test_disk_cache_corrupt_entry(tmp_path):
+    cache = CompressedDiskCache(str(tmp_path), 1024)
+    cache.set("a", b"valor")
+    with open(os.path.join(tmp_path, cache._name("a")), "wb") as target:
+        target.write(b"no es zlib")
+
+    assert cache.get("a") is None
+    assert cache.stats()["errors"] == 1
+    assert os.listdir(tmp_path) == []
+
+# Prueba para promover a memoria lo que se encuentra en disco
+def test_tiered_cache_promotes_from_disk(tmp_path):
+    cache = TieredCache(TTLCache(max_size=1), CompressedDiskCache(str(tmp_path), 1024 * 1024))
+    cache.set("a", {"Blocks": [1, 2]})
+    cache.set("b", {"Blocks": [3]})
+
+    assert cache.get("a") == {"Blocks": [1, 2]}
+    assert cache.memory.stats()["size"] == 1
+    assert cache.get("a") == {"Blocks": [1, 2]}
+    assert cache.stats()["disk"]["hits"] == 1
+    assert cache.get("c") is None
@@ -0,0 +1,87 @@
+import gzip
+import io
+import pytest
+from unittest.mock import patch
+from app.utils.upload_parsers import (
+    UnsupportedUploadError, detect_format, resolve_engine, read_upload, iter_upload, is_blank_upload, profile_upload
+)
+
+example_contents = b"column1,column2\nvalor1,1\nvalor2,\nvalor3,3\n"
+columns = ["column1", "column2"]
+
+# Prueba para detectar el formato por la extensión
+def test_detect_format():
+    assert detect_format("datos.CSV") == ("csv", None)
+    assert detect_format("datos.csv.gz") == ("csv", "gzip")
+    assert detect_format("datos.csv.zst") == ("csv", "zstd")
+    assert detect_format("datos.parquet") == ("parquet", None)
+    assert detect_format("datos.xlsx") is None
+
+# Prueba para elegir el motor según las dependencias instaladas
+def test_resolve_engine_without_pyarrow():
+    with patch("app.utils.upload_parsers.pa", None):
+        assert resolve_engine("auto", ("csv", None)) == "pandas"
+        with pytest.raises(UnsupportedUploadError):
+            resolve_engine("pyarrow", ("csv", None))
+        with pytest.raises(UnsupportedUploadError):
+            resolve_engine("pandas", ("parquet", None))
+    with pytest.raises(UnsupportedUploadError):
+        resolve_engine("polars", ("csv", None))
+
+# Prueba para leer un CSV comprimido con pandas
+def test_read_upload_pandas_gzip():
+    df, columnar = read_upload(gzip.compress(example_contents), ("csv", "gzip"), "pandas", columns)
+    assert df["column1"].tolist() == ["valor1", "valor2", "valor3"]
+    assert df["column2"].isna().tolist() == [False, True, False]
+    # La carga recibe el texto; solo la vista para validar infiere números
+    assert df["column2"].dtype.kind == "f"
+    assert columnar["column2"].tolist()[0] == "1"
+
+# Prueba para leer con pyarrow: vacíos como nulos y columnas numéricas inferidas como en pandas
+def test_read_upload_pyarrow_matches_pandas():
+    pytest.importorskip("pyarrow")
+    df, table = read_upload(example_contents, ("csv", None), "pyarrow", columns)
+    expected, _ = read_upload(example_contents, ("csv", None), "pandas", columns)
+
+    assert table.column("column1").to_pylist() == ["valor1", "valor2", "valor3"]
+    assert table.column("column2").to_pylist() == ["1", None, "3"]
+    assert df["column2"].isna().tolist() == expected["column2"].isna().tolist()
+    assert df["column2"].tolist()[0] == 1
+
+# Prueba para leer por bloques un CSV comprimido con zstd
+def test_iter_upload_pyarrow_zstd():
+    pytest.importorskip("pyarrow")
+    zstandard = pytest.importorskip("zstandard")
+    contents = b"column1,column2\n" + b"".join(f"valor{i},otro{i}\n".encode() for i in range(5000))
+    fileobj = io.BytesIO(zstandard.ZstdCompressor().compress(contents))
+
+    chunks = list(iter_upload(fileobj, ("csv", "zstd"), "pyarrow", columns, 1000, 16 * 1024))
+
+    assert len(chunks) > 1
+    assert sum(len(table) for _, table in chunks) == 5000
+    # El archivo recibido sigue abierto después de leerlo
+    assert not fileobj.closed
+    assert not is_blank_upload(fileobj, ("csv", "zstd"))
+
+# Prueba para estimar las filas de un CSV comprimido y detectar uno vacío
+def test_profile_and_blank_gzip():
+    contents = b"column1,column2\n" + b"valor,otro\n" * 1000
+    fileobj = io.BytesIO(gzip.compress(contents))
+    rows, line_bytes = profile_upload(fileobj, ("csv", "gzip"), 1024)
+    assert line_bytes == pytest.approx(11, rel=0.1)
+    assert rows > 0 and fileobj.tell() == 0
+    assert is_blank_upload(io.BytesIO(gzip.compress(b" \n ")), ("csv", "gzip"))
+
+# Prueba para que la carga reciba el texto original aunque un bloque parezca numérico
+@pytest.mark.parametrize("engine", ["pandas", "pyarrow"])
+def test_iter_upload_keeps_text_for_loader(engine):
+    if engine == "pyarrow":
+        pytest.importorskip("pyarrow")
+    contents = b"column1,column2\n" + b"000,1.50\n" * 1000 + b"valor1,otro1\n" * 1000
+
+    chunks = list(iter_upload(io.BytesIO(contents), ("csv", None), engine, columns, 1000, 4 * 1024))
+
+    frame, columnar = chunks[0]
+    assert frame["column1"].tolist()[0] == 0
+    loaded = columnar if engine == "pandas" else columnar.to_pandas()
+    assert loaded[columns].values.tolist()[0] == ["000", "1.50"]
@@ -0,0 +1,37 @@
+import time
+from unittest.mock import MagicMock
+from app.utils.watermark_worker import IdHorizon, WatermarkWorker
+
+# Prueba para la ejecución del trabajo al ser notificado
+def test_worker_runs_job_on_notify():
+    job = MagicMock(return_value=5)
+    worker = WatermarkWorker("prueba", job, interval=60)
+    worker.start()
+    try:
+        worker.notify()
+        deadline = time.monotonic() + 2
+        while job.call_count == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        worker.stop()
+
+    assert job.call_count >= 1
+    assert job.call_args.kwargs["horizon"] is worker.horizon
+    assert worker.stats()["processed"] >= 5
+
+# Prueba para el trabajo deshabilitado
+def test_worker_disabled_does_not_start():
+    worker = WatermarkWorker("prueba", MagicMock(), enabled=False)
+    worker.start()
+    assert worker.stats()["running"] is False
+
+# Prueba para el margen de seguridad tras MAX(id): solo avanza a lo observado hace `lag` segundos
+def test_id_horizon_lags_behind_max_id():
+    horizon = IdHorizon(lag=5)
+
+    assert horizon.observe(10, now=100) == 0
+    assert horizon.pending()
+    assert horizon.observe(20, now=104) == 0
+    assert horizon.observe(25, now=105) == 10
+    assert horizon.observe(25, now=111) == 25
+    assert not horizon.pending()
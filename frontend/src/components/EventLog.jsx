@@ -2,7 +2,6 @@ import React, { useState, useEffect } from "react";
 import axios from "axios";
 import Swal from "sweetalert2";
 import { Table, Form, Button, Row, Col, Container } from "react-bootstrap";
-import * as XLSX from "xlsx";
 import ReactPaginate from "react-paginate"; // Importamos react-paginate
 
 const EventLog = ({ token }) => {
@@ -18,6 +17,7 @@ const EventLog = ({ token }) => {
   const [currentPage, setCurrentPage] = useState(0); // Usamos 0 ya que react-paginate empieza en 0
   const [pageSize, setPageSize] = useState(10);
   const [isSmallScreen, setIsSmallScreen] = useState(false); // Estado para controlar el tamaño de la pantalla
+  const [isLive, setIsLive] = useState(false); // Recibir los nuevos eventos en vivo
 
   // Hook para controlar el tamaño de la pantalla
   useEffect(() => {
@@ -40,6 +40,56 @@ const EventLog = ({ token }) => {
     return () => window.removeEventListener("resize", handleResize);
   }, [currentPage, pageSize]);
 
+  // Transmisión en vivo: los nuevos eventos que cumplen los filtros se agregan al inicio de la tabla.
+  // Se vuelve a conectar cuando cambian los filtros para que el servidor aplique los actuales
+  useEffect(() => {
+    if (!isLive) return;
+
+    let source = null;
+    let cancelled = false;
+
+    const connect = async () => {
+      try {
+        // EventSource no envía encabezados: se pide un ticket de un solo uso para no poner el JWT en la URL
+        const response = await axios.post("http://127.0.0.1:8000/history/stream/ticket", null, {
+          headers: {
+            Authorization: `Bearer ${token}`,
+          },
+        });
+        if (cancelled) return;
+
+        const params = new URLSearchParams({ ticket: response.data.ticket });
+        if (filters.type) params.append("type", filters.type);
+        if (filters.description) params.append("description", filters.description);
+        source = new EventSource(`http://127.0.0.1:8000/history/stream?${params}`);
+
+        source.onmessage = (e) => {
+          const event = JSON.parse(e.data);
+          setLogs((current) =>
+            [event, ...current].slice(0, pageSize === "all" ? undefined : Number(pageSize))
+          );
+        };
+        source.addEventListener("overflow", () => {
+          source.close();
+          setIsLive(false);
+        });
+        source.onerror = () => {
+          source.close();
+          setIsLive(false);
+        };
+      } catch (error) {
+        if (!cancelled) setIsLive(false);
+      }
+    };
+
+    connect();
+
+    return () => {
+      cancelled = true;
+      if (source) source.close();
+    };
+  }, [isLive, filters.type, filters.description, pageSize, token]);
+
   const fetchLogs = async () => {
     setIsLoading(true);
     try {
@@ -80,7 +130,7 @@ const EventLog = ({ token }) => {
     }
   };
 
-  const exportToExcel = () => {
+  const exportToExcel = async () => {
     if (!logs.length) {
       Swal.fire({
         icon: "info",
@@ -90,10 +140,37 @@ const EventLog = ({ token }) => {
       return;
     }
 
-    const worksheet = XLSX.utils.json_to_sheet(logs);
-    const workbook = XLSX.utils.book_new();
-    XLSX.utils.book_append_sheet(workbook, worksheet, "Logs");
-    XLSX.writeFile(workbook, "logs.xlsx");
+    // El servidor genera el archivo con todos los registros que cumplen los filtros
+    const { startDate, endDate, type, description } = filters;
+    try {
+      const response = await axios.get("http://127.0.0.1:8000/history/export", {
+        headers: {
+          Authorization: `Bearer ${token}`,
+        },
+        params: {
+          start_date: startDate || undefined,
+          end_date: endDate || undefined,
+          type: type || undefined,
+          description: description || undefined,
+          format: "xlsx",
+        },
+        responseType: "blob",
+      });
+
+      const url = window.URL.createObjectURL(response.data);
+      const link = document.createElement("a");
+      link.href = url;
+      link.download = "logs.xlsx";
+      link.click();
+      window.URL.revokeObjectURL(url);
+    } catch (error) {
+      Swal.fire({
+        icon: "error",
+        title: "Error de servidor",
+        text: "No se pudo exportar el registro de eventos.",
+      });
+      return;
+    }
 
     Swal.fire({
       icon: "success",
@@ -187,6 +264,9 @@ const EventLog = ({ token }) => {
             </Button>{" "}
             <Button variant="success" onClick={exportToExcel} disabled={isLoading}>
               {isLoading ? "Exportando..." : "Exportar a Excel"}
+            </Button>{" "}
+            <Button variant={isLive ? "danger" : "secondary"} onClick={() => setIsLive(!isLive)}>
+              {isLive ? "Detener en vivo" : "En vivo"}
             </Button>
           </Col>
           <Col md={6}></Col>